@@ -0,0 +1,17 @@
+STATIC_ROOT = "/tmp/static-root"
+COMPRESS_ROOT = "/tmp/static-root"
+CACHES = {
+    "default": {"BACKEND": "judge.cache_handler.CacheHandler"},
+    "primary": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+class _DisableMigrations:
+    def __contains__(self, item):
+        return True
+
+    def __getitem__(self, item):
+        return None
+
+
+MIGRATION_MODULES = _DisableMigrations()
@@ -84,6 +84,12 @@ DMOJ_STATS_LANGUAGE_THRESHOLD = 10
 DMOJ_SUBMISSIONS_REJUDGE_LIMIT = 10
 # Maximum number of submissions a single user can queue without the `spam_submission` permission
 DMOJ_SUBMISSION_LIMIT = 3
+# "rows" keeps one SubmissionTestCase row per graded case. "packed" replaces
+# them by one compressed SubmissionTestCasePack per submission once graded.
+SUBMISSION_TEST_CASE_STORAGE = "rows"
+# Compress result JSON with "gzip" on storages that can serve it with a
+# Content-Encoding (S3). Other encodings are not decoded by every browser.
+SUBMISSION_RESULT_COMPRESSION = None
 DMOJ_BLOG_NEW_PROBLEM_COUNT = 7
 DMOJ_BLOG_NEW_CONTEST_COUNT = 7
 DMOJ_BLOG_RECENTLY_ATTEMPTED_PROBLEMS_COUNT = 7
@@ -464,6 +470,37 @@ BRIDGED_DJANGO_ADDRESS = [("localhost", 9998)]
 BRIDGED_DJANGO_CONNECT = None
 BRIDGED_DJANGO_TIMEOUT_SECONDS = 10
 BRIDGED_AUTO_CREATE_JUDGE = False
+# File journaling the submission queue, so that a restarted bridge requeues
+# queued and in-flight submissions instead of failing them. None disables it.
+BRIDGED_QUEUE_JOURNAL = None
+# fsync every journal write; survives machine crashes, not only bridge restarts
+BRIDGED_QUEUE_JOURNAL_FSYNC = False
+# Order of submissions within a priority tier: "fifo", "sjf" (shortest expected
+# grading time first) or "wfq" (equal share of judge time per user)
+BRIDGED_SCHEDULING_POLICY = "fifo"
+# Under "sjf" and "wfq", submissions waiting longer than this go first
+BRIDGED_SCHEDULING_STARVATION_SECONDS = 300
+# Problems remembered per judge as recently graded
+BRIDGED_AFFINITY_PROBLEMS = 32
+# Prefer a judge that recently graded the problem over the least loaded one
+# when its load is at most this much higher. None always takes the least loaded.
+BRIDGED_AFFINITY_LOAD_SLACK = 0.5
+# Under "fifo", a freed judge looks this many compatible queued submissions
+# past the oldest one for a problem it recently graded. It never skips one
+# that has waited BRIDGED_SCHEDULING_STARVATION_SECONDS. 0 turns this off.
+BRIDGED_AFFINITY_LOOKAHEAD = 0
+# (host, port) serving the bridge's Prometheus metrics at /metrics, or None
+BRIDGED_METRICS_ADDRESS = None
+# Directory holding result JSON until the bridge has uploaded it to storage, so
+# that a restarted bridge uploads it. None keeps pending results in memory.
+BRIDGED_RESULT_SPOOL = None
+# Result JSON waiting for upload beyond which the bridge writes synchronously
+BRIDGED_RESULT_MAX_PENDING = 10000
+# Result JSON uploaded in parallel per batch
+BRIDGED_RESULT_BATCH_SIZE = 16
+# Seconds the bridge keeps problem limits, unless edits to them invalidate
+# them sooner. None keeps them until then.
+BRIDGED_PROBLEM_LIMITS_TTL = 60
 
 # Event Server configuration
 EVENT_DAEMON_USE = False
@@ -716,6 +753,14 @@ CELERY_BEAT_SCHEDULE = {
         "task": "judge.tasks.maintenance.recompute_contributions",
         "schedule": crontab(minute=18, hour=4),
     },
+    "roll-up-site-stats": {
+        "task": "judge.tasks.maintenance.roll_up_site_stats",
+        "schedule": 900.0,  # every 15 minutes
+    },
+    "generate-sitemaps": {
+        "task": "judge.tasks.maintenance.generate_sitemaps",
+        "schedule": crontab(minute=45),  # every hour
+    },
     "generate-daily-magazine-posts": {
         "task": "judge.tasks.magazine.generate_daily_magazine_posts",
         "schedule": crontab(minute=30, hour=4),
@@ -4,7 +4,6 @@ from django.conf.urls.static import static as url_static
 from django.contrib import admin
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
-from django.contrib.sitemaps.views import sitemap
 from django.http import Http404, HttpResponsePermanentRedirect
 from django.templatetags.static import static
 from django.urls import reverse
@@ -14,16 +13,6 @@ from django.views.generic import RedirectView
 import chat_box.views as chat
 from judge import authentication
 from judge.forms import CustomAuthenticationForm
-from judge.sitemap import (
-    BlogPostSitemap,
-    ContestSitemap,
-    HomePageSitemap,
-    OrganizationSitemap,
-    ProblemSitemap,
-    SolutionSitemap,
-    UrlSitemap,
-    UserSitemap,
-)
 from judge.views import (
     TitledTemplateView,
     about,
@@ -62,6 +51,7 @@ from judge.views import (
     quiz,
     theme,
     direct_upload,
+    sitemap,
 )
 from judge.views import package_import
 from judge.views import quiz_import
@@ -77,6 +67,10 @@ from judge.views.problem_attachment import (
     attachments_tab,
 )
 from judge.views.problem_data import (
+    ProblemDataArchiveView,
+    ProblemDataCheckView,
+    ProblemDataBlobView,
+    ProblemDataManifestView,
     ProblemDataView,
     ProblemGeneratorStaticPackageView,
     ProblemSubmissionDiff,
@@ -455,6 +449,26 @@ urlpatterns = [
                     ProblemZipUploadView.as_view(),
                     name="problem_zip_upload",
                 ),
+                re_path(
+                    r"^/test_data/blobs$",
+                    ProblemDataBlobView.as_view(),
+                    name="problem_data_blobs",
+                ),
+                re_path(
+                    r"^/test_data/manifest$",
+                    ProblemDataManifestView.as_view(),
+                    name="problem_data_manifest",
+                ),
+                re_path(
+                    r"^/test_data/archive$",
+                    ProblemDataArchiveView.as_view(),
+                    name="problem_data_archive",
+                ),
+                re_path(
+                    r"^/test_data/check$",
+                    ProblemDataCheckView.as_view(),
+                    name="problem_data_check",
+                ),
                 re_path(
                     r"^/test_data/validator$",
                     ProblemValidatorView.as_view(),
@@ -1710,25 +1724,11 @@ urlpatterns = [
             ]
         ),
     ),
+    re_path(r"^sitemap\.xml$", sitemap.sitemap_index, name="sitemap_index"),
     re_path(
-        r"^sitemap\.xml$",
-        sitemap,
-        {
-            "sitemaps": {
-                "problem": ProblemSitemap,
-                "user": UserSitemap,
-                "home": HomePageSitemap,
-                "contest": ContestSitemap,
-                "organization": OrganizationSitemap,
-                "blog": BlogPostSitemap,
-                "solutions": SolutionSitemap,
-                "pages": UrlSitemap(
-                    [
-                        {"location": "/about/", "priority": 0.9},
-                    ]
-                ),
-            }
-        },
+        r"^sitemap-(?P<section>\w+)-(?P<number>\d+)\.xml\.gz$",
+        sitemap.sitemap_segment,
+        name="sitemap_segment",
     ),
     re_path(
         r"^judge-select2/",
@@ -22,6 +22,7 @@ from judge.models import (
     Solution,
 )
 from judge.models.notification import Notification, NotificationCategory
+from judge.utils.problem_visibility import bump_problem_visibility_version
 
 from judge.widgets import (
     AdminHeavySelect2MultipleWidget,
@@ -304,6 +305,7 @@ class ProblemAdmin(CompareVersionAdmin):
 
     def make_public(self, request, queryset):
         count = queryset.update(is_public=True)
+        bump_problem_visibility_version()
         for problem_id in queryset.values_list("id", flat=True):
             self._rescore(request, problem_id)
         self.message_user(
@@ -320,6 +322,7 @@ class ProblemAdmin(CompareVersionAdmin):
 
     def make_private(self, request, queryset):
         count = queryset.update(is_public=False)
+        bump_problem_visibility_version()
         for problem_id in queryset.values_list("id", flat=True):
             self._rescore(request, problem_id)
         self.message_user(
@@ -13,6 +13,7 @@ from django.utils.html import format_html
 from django.utils.translation import gettext, gettext_lazy as _, pgettext, ngettext
 
 from django_ace import AceWidget
+from judge.judgeapi import judge_submissions
 from judge.models import (
     ContestParticipation,
     ContestProblem,
@@ -233,8 +234,7 @@ class SubmissionAdmin(admin.ModelAdmin):
                 Q(problem__authors__id=id) | Q(problem__curators__id=id)
             )
         judged = len(queryset)
-        for model in queryset:
-            model.judge(rejudge=True, batch_rejudge=True)
+        judge_submissions(queryset, rejudge=True, batch_rejudge=True)
         self.message_user(
             request,
             ngettext(
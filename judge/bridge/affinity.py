@@ -0,0 +1,83 @@
+"""
+Problem affinity of judges.
+
+A judge that graded a problem recently has its test data in the page cache
+and its checker compiled. ``ProblemAffinity`` remembers the last problems
+each judge was given and, among the free judges able to take a submission,
+prefers one that is warm for its problem unless it reports more than
+``slack`` load above the least loaded judge. With a ``lookahead``, a judge
+that frees up under FIFO also takes the first queued submission of a
+problem it is warm for among the next ``lookahead`` ones it can grade,
+before the oldest of them, unless that one has waited past the starvation
+bound. A ``slack`` of None turns both preferences off; the hit rates are
+kept either way.
+"""
+
+from collections import OrderedDict
+from operator import attrgetter
+
+
+class ProblemAffinity(object):
+    """All methods are called with ``JudgeList.lock`` held."""
+
+    def __init__(self, size=32, slack=0.5, lookahead=0):
+        self.size = size
+        self.slack = slack
+        self.lookahead = lookahead if slack is not None else 0
+        # judge name: OrderedDict of problem codes, least recent first
+        self.recent = {}
+        # judge name: [dispatches, dispatches to a warm judge]
+        self.counts = {}
+
+    def is_warm(self, judge, problem):
+        return problem in self.recent.get(judge.name, ())
+
+    def choose(self, candidates, problem):
+        least = min(candidates, key=attrgetter("load"))
+        if self.slack is None or self.is_warm(least, problem):
+            return least
+        warm = [
+            judge
+            for judge in candidates
+            if judge.load <= least.load + self.slack and self.is_warm(judge, problem)
+        ]
+        return min(warm, key=attrgetter("load")) if warm else least
+
+    def dispatched(self, judge, problem):
+        counts = self.counts.setdefault(judge.name, [0, 0])
+        counts[0] += 1
+        recent = self.recent.setdefault(judge.name, OrderedDict())
+        if problem in recent:
+            counts[1] += 1
+            recent.move_to_end(problem)
+        else:
+            recent[problem] = True
+            if len(recent) > self.size:
+                recent.popitem(last=False)
+
+    @staticmethod
+    def _hit_rate(counts):
+        return counts[1] / counts[0] if counts[0] else None
+
+    def judge_status(self, judge):
+        counts = self.counts.get(judge.name, [0, 0])
+        return {
+            "warm-problems": len(self.recent.get(judge.name, ())),
+            "affinity-dispatches": counts[0],
+            "affinity-hits": counts[1],
+            "affinity-hit-rate": self._hit_rate(counts),
+        }
+
+    def status(self):
+        counts = [
+            sum(judge[0] for judge in self.counts.values()),
+            sum(judge[1] for judge in self.counts.values()),
+        ]
+        return {
+            "size": self.size,
+            "slack": self.slack,
+            "lookahead": self.lookahead,
+            "dispatches": counts[0],
+            "hits": counts[1],
+            "hit-rate": self._hit_rate(counts),
+        }
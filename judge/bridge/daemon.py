@@ -6,10 +6,14 @@ from functools import partial
 from django.conf import settings
 
 from judge.bridge.django_handler import DjangoHandler
+from judge.bridge.metrics import serve_metrics
 from judge.bridge.judge_handler import JudgeHandler
+from judge.bridge.journal import QueueJournal
 from judge.bridge.judge_list import JudgeList
+from judge.bridge.result_writer import ResultWriter
 from judge.bridge.server import Server
 from judge.models import Judge, Submission
+from judge.models.submission import update_submission_result
 
 logger = logging.getLogger("judge.bridge")
 
@@ -18,15 +22,77 @@ def reset_judges():
     Judge.objects.update(online=False, ping=None, load=None)
 
 
+def restore_queue(judges, journal):
+    """
+    Queue the journaled submissions that are still waiting for a result.
+    Returns their ids.
+    """
+    entries = journal.replay()
+    sources = dict(
+        Submission.objects.filter(
+            id__in=[entry.id for entry in entries],
+            status__in=Submission.IN_PROGRESS_GRADING_STATUS,
+        ).values_list("id", "source__source")
+    )
+    restored = []
+    for entry in entries:
+        if entry.id not in sources:
+            # Finished, or deleted, after the journal was last written
+            journal.finish(entry.id)
+            continue
+        judges.judge(
+            entry.id,
+            entry.problem,
+            entry.language,
+            sources[entry.id],
+            entry.judge_id,
+            entry.priority,
+            entry.user_id,
+        )
+        restored.append(entry.id)
+
+    # Partial results of interrupted gradings are reset on grading-begin
+    Submission.objects.filter(id__in=restored).update(status="QU")
+    logger.info("Restored %d submissions from the queue journal", len(restored))
+    return restored
+
+
 def judge_daemon():
     reset_judges()
-    Submission.objects.filter(status__in=Submission.IN_PROGRESS_GRADING_STATUS).update(
-        status="IE", result="IE", error=None
+    journal = None
+    if settings.BRIDGED_QUEUE_JOURNAL:
+        journal = QueueJournal(
+            settings.BRIDGED_QUEUE_JOURNAL, fsync=settings.BRIDGED_QUEUE_JOURNAL_FSYNC
+        )
+    judges = JudgeList(
+        journal=journal,
+        policy=settings.BRIDGED_SCHEDULING_POLICY,
+        starvation_seconds=settings.BRIDGED_SCHEDULING_STARVATION_SECONDS,
+        affinity_size=settings.BRIDGED_AFFINITY_PROBLEMS,
+        affinity_slack=settings.BRIDGED_AFFINITY_LOAD_SLACK,
+        affinity_lookahead=settings.BRIDGED_AFFINITY_LOOKAHEAD,
+        limits_ttl=settings.BRIDGED_PROBLEM_LIMITS_TTL,
+    )
+    restored = restore_queue(judges, journal) if journal is not None else []
+    update_submission_result(
+        Submission.objects.filter(
+            status__in=Submission.IN_PROGRESS_GRADING_STATUS
+        ).exclude(id__in=restored),
+        status="IE",
+        result="IE",
+        error=None,
+    )
+
+    result_writer = ResultWriter(
+        spool=settings.BRIDGED_RESULT_SPOOL,
+        max_pending=settings.BRIDGED_RESULT_MAX_PENDING,
+        batch_size=settings.BRIDGED_RESULT_BATCH_SIZE,
     )
-    judges = JudgeList()
+    result_writer.start()
 
     judge_server = Server(
-        settings.BRIDGED_JUDGE_ADDRESS, partial(JudgeHandler, judges=judges)
+        settings.BRIDGED_JUDGE_ADDRESS,
+        partial(JudgeHandler, judges=judges, result_writer=result_writer),
     )
     django_server = Server(
         settings.BRIDGED_DJANGO_ADDRESS, partial(DjangoHandler, judges=judges)
@@ -40,6 +106,9 @@ def judge_daemon():
     )
     django_thread.start()
     judge_thread.start()
+    metrics_server = None
+    if settings.BRIDGED_METRICS_ADDRESS:
+        metrics_server = serve_metrics(settings.BRIDGED_METRICS_ADDRESS)
 
     stop = threading.Event()
 
@@ -58,3 +127,8 @@ def judge_daemon():
         judge_server.shutdown()
         django_thread.join(timeout=10)
         judge_thread.join(timeout=10)
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        result_writer.stop()
+        if journal is not None:
+            journal.close()
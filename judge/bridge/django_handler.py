@@ -4,6 +4,7 @@ import struct
 
 from django import db
 
+from judge.bridge import metrics
 from judge.bridge.base_handler import Disconnect, ZlibPacketHandler
 
 logger = logging.getLogger("judge.bridge")
@@ -16,10 +17,12 @@ class DjangoHandler(ZlibPacketHandler):
 
         self.handlers = {
             "submission-request": self.on_submission,
+            "submission-batch-request": self.on_submission_batch,
             "terminate-submission": self.on_termination,
             "disconnect-judge": self.on_disconnect_request,
             "validate-request": self.on_validate_request,
             "update-problems": self.on_update_problems,
+            "invalidate-limits": self.on_invalidate_limits,
             "bridge-status": self.on_bridge_status,
         }
         self.judges = judges
@@ -29,6 +32,7 @@ class DjangoHandler(ZlibPacketHandler):
 
     def on_packet(self, packet):
         packet = json.loads(packet)
+        metrics.PACKETS.inc("django", str(packet.get("name")))
         try:
             result = self.handlers.get(packet.get("name", None), self.on_malformed)(
                 packet
@@ -36,21 +40,42 @@ class DjangoHandler(ZlibPacketHandler):
         except Exception:
             logger.exception("Error in packet handling (Django-facing)")
             result = {"name": "bad-request"}
-        self.send(result)
-        raise Disconnect()
-
-    def on_submission(self, data):
-        id = data["submission-id"]
-        problem = data["problem-id"]
-        language = data["language"]
-        source = data["source"]
-        judge_id = data["judge-id"]
+        request_id = packet.get("request-id")
+        if request_id is None:
+            # One packet per connection from clients that predate request ids
+            self.send(result)
+            raise Disconnect()
+        self.send({**(result or {}), "request-id": request_id})
+
+    def _queue_submission(self, data):
         priority = data["priority"]
-        user_id = data.get("user-id")
         if not self.judges.check_priority(priority):
+            return False
+        self.judges.judge(
+            data["submission-id"],
+            data["problem-id"],
+            data["language"],
+            data["source"],
+            data["judge-id"],
+            priority,
+            data.get("user-id"),
+        )
+        return True
+
+    def on_submission(self, data):
+        if not self._queue_submission(data):
             return {"name": "bad-request"}
-        self.judges.judge(id, problem, language, source, judge_id, priority, user_id)
-        return {"name": "submission-received", "submission-id": id}
+        return {"name": "submission-received", "submission-id": data["submission-id"]}
+
+    def on_submission_batch(self, data):
+        received = []
+        for submission in data["submissions"]:
+            try:
+                if self._queue_submission(submission):
+                    received.append(submission["submission-id"])
+            except Exception:
+                logger.exception("Error queueing submission in batch: %s", submission)
+        return {"name": "submission-batch-received", "submission-ids": received}
 
     def on_termination(self, data):
         return {
@@ -68,17 +93,24 @@ class DjangoHandler(ZlibPacketHandler):
         }
 
     def on_update_problems(self, data):
-        self.judges.broadcast_update_problems()
+        self.judges.broadcast_update_problems(data.get("problem"))
         return {"name": "update-problems-received"}
 
+    def on_invalidate_limits(self, data):
+        self.judges.limits.invalidate(data.get("problem"))
+        return {"name": "invalidate-limits-received"}
+
     def on_bridge_status(self, data):
-        return {
+        status = {
             "name": "bridge-status",
             **self.judges.status(
                 detail=bool(data.get("detail")),
                 include_problems=bool(data.get("include-problems")),
             ),
         }
+        if data.get("metrics"):
+            status["metrics"] = metrics.REGISTRY.snapshot()
+        return status
 
     def on_disconnect_request(self, data):
         judge_id = data["judge-id"]
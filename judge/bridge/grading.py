@@ -0,0 +1,107 @@
+"""
+Running totals of the submissions being graded.
+
+Every test case is folded into the submission's ``GradingState`` as its
+packet arrives, so finishing the submission reads no ``SubmissionTestCase``
+rows back. The rows are still written; they are read only to rebuild a state
+the bridge lost, e.g. when it restarted in the middle of a grading.
+"""
+
+from judge.models import ProblemTestCase, SubmissionTestCase
+from judge.utils.problem_data import get_problem_init_hash
+
+STATUS_CODES = ["SC", "AC", "WA", "MLE", "TLE", "IR", "RTE", "OLE"]
+
+# problem id: (init.yml input hash, batch numbers scored by their worst case)
+_min_batches = {}
+
+
+class GradingState(object):
+    def __init__(self):
+        # Result JSON details by case position
+        self.cases = {}
+        # SubmissionTestCase rows by case position, for packing
+        self.rows = {}
+        self.case_count = 0
+        self.time = 0
+        self.memory = 0
+        self.status = 0
+        self.points = 0.0
+        self.total = 0
+        # batch number: [points, total, lowest case fraction]
+        self.batches = {}
+
+    def add_case(self, case):
+        self.rows[case.case] = case
+        self.case_count += 1
+        self.time = max(self.time, case.time)
+        self.memory = max(self.memory, case.memory)
+        self.status = max(self.status, STATUS_CODES.index(case.status))
+        if not case.batch:
+            self.points += case.points
+            self.total += case.total
+            return
+
+        fraction = case.points / case.total if case.total else 0.0
+        batch = self.batches.get(case.batch)
+        if batch is None:
+            self.batches[case.batch] = [case.points, case.total, fraction]
+        else:
+            batch[0] += case.points
+            batch[1] += case.total
+            batch[2] = min(batch[2], fraction)
+
+    @classmethod
+    def from_database(cls, submission_id):
+        state = cls()
+        for case in SubmissionTestCase.objects.filter(submission_id=submission_id).only(
+            "case", "time", "memory", "status", "points", "total", "batch"
+        ):
+            state.add_case(case)
+        return state
+
+    @property
+    def result(self):
+        return STATUS_CODES[self.status]
+
+    def score(self, min_batches):
+        """Return ``(points, total)``, scoring ``min_batches`` by their worst case."""
+        points = self.points
+        total = self.total
+        for number, (batch_points, batch_total, fraction) in self.batches.items():
+            if number in min_batches and batch_total > 0:
+                points += fraction * batch_total
+            else:
+                points += batch_points
+            total += batch_total
+        return points, total
+
+
+def get_min_batches(problem):
+    """
+    Numbers of the batches of ``problem`` scored by their worst case.
+
+    SubmissionTestCase.batch is a sequential counter (1-indexed) assigned
+    during judging, matching the Nth type="S" ProblemTestCase row by order.
+    This mapping is correct for all fresh judgings; it could drift if
+    ProblemTestCase rows are reordered after old submissions were graded.
+
+    Kept in process for as long as the problem's init.yml is unchanged.
+    """
+    version = get_problem_init_hash(problem.code)
+    cached = _min_batches.get(problem.id)
+    if version is not None and cached is not None and cached[0] == version:
+        return cached[1]
+
+    batches = frozenset(
+        i + 1
+        for i, scoring in enumerate(
+            ProblemTestCase.objects.filter(dataset=problem, type="S")
+            .order_by("order")
+            .values_list("batch_scoring", flat=True)
+        )
+        if scoring == "min"
+    )
+    if version is not None:
+        _min_batches[problem.id] = (version, batches)
+    return batches
@@ -0,0 +1,153 @@
+"""
+Append-only journal of the bridge's submission queue.
+
+``JudgeList`` writes a line when a submission is queued, dispatched to a
+judge and finished. A restarted bridge replays the journal to queue the
+submissions that were waiting or being graded again, in their original
+order, instead of failing them. Sources are not journaled; they are read
+back from the database on replay. Validations are not journaled either.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger("judge.bridge")
+
+ENQUEUE = "q"
+DISPATCH = "d"
+FINISH = "f"
+
+JournalEntry = namedtuple(
+    "JournalEntry", "id problem language judge_id priority user_id dispatched"
+)
+
+
+def _apply(live, record):
+    event, id = record["e"], record["id"]
+    if event == ENQUEUE:
+        # A submission queued again moves to the back
+        live.pop(id, None)
+        live[id] = JournalEntry(
+            id,
+            record["problem"],
+            record["language"],
+            record["judge_id"],
+            record["priority"],
+            record["user_id"],
+            False,
+        )
+    elif event == DISPATCH:
+        if id in live:
+            live[id] = live[id]._replace(dispatched=True)
+    elif event == FINISH:
+        live.pop(id, None)
+
+
+def _enqueue_record(entry):
+    return {
+        "e": ENQUEUE,
+        "id": entry.id,
+        "problem": entry.problem,
+        "language": entry.language,
+        "judge_id": entry.judge_id,
+        "priority": entry.priority,
+        "user_id": entry.user_id,
+    }
+
+
+def _encode(record):
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+class QueueJournal(object):
+    # Rewrite the file once it is mostly finished submissions
+    compact_records = 10000
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.live = {}
+        self.records = 0
+        self.file = None
+
+    def replay(self):
+        """
+        Return the submissions that were queued or being graded, dispatched
+        ones first and otherwise oldest first, and compact the journal down
+        to them.
+        """
+        live = {}
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # The bridge died halfway through writing a line
+                        logger.warning("Skipping torn queue journal line: %r", line)
+                        continue
+                    _apply(live, record)
+        except FileNotFoundError:
+            pass
+
+        with self.lock:
+            self.live = live
+            self._compact_locked()
+        return sorted(live.values(), key=lambda entry: not entry.dispatched)
+
+    def _write_locked(self, record):
+        _apply(self.live, record)
+        if self.file is None:
+            self.file = open(self.path, "a")
+        self.file.write(_encode(record))
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        self.records += 1
+        if self.records > self.compact_records and self.records > 4 * len(self.live):
+            self._compact_locked()
+
+    def _compact_locked(self):
+        temp = "%s.tmp" % self.path
+        records = 0
+        with open(temp, "w") as f:
+            for entry in self.live.values():
+                f.write(_encode(_enqueue_record(entry)))
+                records += 1
+                if entry.dispatched:
+                    f.write(_encode({"e": DISPATCH, "id": entry.id}))
+                    records += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.records = records
+
+    def enqueue(self, id, problem, language, judge_id, priority, user_id):
+        record = _enqueue_record(
+            JournalEntry(id, problem, language, judge_id, priority, user_id, False)
+        )
+        with self.lock:
+            self._write_locked(record)
+
+    def dispatch(self, id):
+        with self.lock:
+            if id in self.live:
+                self._write_locked({"e": DISPATCH, "id": id})
+
+    def finish(self, id):
+        with self.lock:
+            if id in self.live:
+                self._write_locked({"e": FINISH, "id": id})
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -17,29 +17,32 @@ from django.utils.html import format_html
 from django.utils.translation import gettext as _
 
 from judge import event_poster as event
+from judge.bridge import metrics
 from judge.bridge.base_handler import ZlibPacketHandler, proxy_list
 from judge.utils.problems import finished_submission
 from judge.models.notification import Notification, NotificationCategory
 from judge.models import (
-    Contest,
     Judge,
     Language,
-    LanguageLimit,
     Problem,
     Profile,
-    ProblemTestCase,
     ProblemValidation,
     ProblemValidationResult,
     RuntimeVersion,
     Submission,
     SubmissionTestCase,
+    SubmissionTestCasePack,
 )
+from judge.models.submission import update_submission_result
+from judge.bridge.grading import GradingState, get_min_batches
 from judge.bridge.utils import VanishedSubmission
 
 from judge.caching import cache_wrapper
 from judge.logging import log_exception
 from judge.tasks.submission import update_problem_stats, update_user_points
+from judge.utils.contest import post_ranking_update
 from judge.utils.problem_data import notify_problem_authors
+from judge.utils.packed_test_cases import packs_submission, store_packed_test_cases
 from judge.utils.submission_results import (
     delete_submission_result,
     save_submission_result,
@@ -176,10 +179,12 @@ class JudgeHandler(ZlibPacketHandler):
         ("handshake-connected", "ping-response", "supported-problems")
     )
 
-    def __init__(self, request, client_address, server, judges):
+    def __init__(self, request, client_address, server, judges, result_writer=None):
         super().__init__(request, client_address, server)
 
         self.judges = judges
+        # Writes result JSON in the background; None writes it synchronously
+        self.result_writer = result_writer
         self.handlers = {
             "grading-begin": self.on_grading_begin,
             "grading-end": self.on_grading_end,
@@ -224,7 +229,10 @@ class JudgeHandler(ZlibPacketHandler):
 
         self._submission_cache_id = None
         self._submission_cache = {}
-        self._submission_result_cases = {}
+        self._grading_states = {}
+        # Monotonic times the current submission was sent and began grading
+        self._submitted_at = None
+        self._grading_began = None
 
     def on_connect(self):
         self.timeout = 15
@@ -441,36 +449,34 @@ class JudgeHandler(ZlibPacketHandler):
     def working(self):
         return bool(self._working)
 
-    def get_related_submission_data(self, submission):
+    def get_related_submission_data(self, submission, problem, language):
         _ensure_connection()
 
         try:
             (
-                pid,
-                time,
-                memory,
-                short_circuit,
-                lid,
                 is_pretested,
-                sub_date,
                 uid,
                 part_virtual,
+                attempt_no,
+                pid,
+                sub_date,
                 part_id,
             ) = (
                 Submission.objects.filter(id=submission).values_list(
-                    "problem__id",
-                    "problem__time_limit",
-                    "problem__memory_limit",
-                    "problem__short_circuit",
-                    "language__id",
                     "is_pretested",
-                    "date",
                     "user__id",
                     "contest__participation__virtual",
+                    "contest__attempt",
+                    "problem__id",
+                    "date",
                     "contest__participation__id",
                 )
             ).get()
         except Submission.DoesNotExist:
+            limits = None
+        else:
+            limits = self.judges.limits.get(problem, language)
+        if limits is None:
             logger.error("Submission vanished: %s", submission)
             json_log.error(
                 self._make_json_log(
@@ -481,31 +487,25 @@ class JudgeHandler(ZlibPacketHandler):
             )
             return
 
-        attempt_no = (
-            Submission.objects.filter(
-                problem__id=pid,
-                contest__participation__id=part_id,
-                user__id=uid,
-                date__lt=sub_date,
-            )
-            .exclude(status__in=("CE", "IE"))
-            .count()
-            + 1
-        )
-
-        try:
-            time, memory = (
-                LanguageLimit.objects.filter(problem__id=pid, language__id=lid)
-                .values_list("time_limit", "memory_limit")
-                .get()
+        if attempt_no is None:
+            # Only contest submissions store their attempt number, and not
+            # those made before it was stored
+            attempt_no = (
+                Submission.objects.filter(
+                    problem__id=pid,
+                    contest__participation__id=part_id,
+                    user__id=uid,
+                    date__lt=sub_date,
+                )
+                .exclude(status__in=("CE", "IE"))
+                .count()
+                + 1
             )
-        except LanguageLimit.DoesNotExist:
-            pass
 
         return SubmissionData(
-            time=time,
-            memory=memory,
-            short_circuit=short_circuit,
+            time=limits.time,
+            memory=limits.memory,
+            short_circuit=limits.short_circuit,
             pretests_only=is_pretested,
             contest_no=part_virtual,
             attempt_no=attempt_no,
@@ -520,7 +520,7 @@ class JudgeHandler(ZlibPacketHandler):
             self.send({"name": "disconnect"})
 
     def submit(self, id, problem, language, source):
-        data = self.get_related_submission_data(id)
+        data = self.get_related_submission_data(id, problem, language)
         if not data:
             self._update_internal_error_submission(id, "Submission vanished")
             raise VanishedSubmission()
@@ -532,6 +532,7 @@ class JudgeHandler(ZlibPacketHandler):
         }
         self._no_response_job = threading.Timer(20, self._kill_if_no_response)
         self._no_response_job.start()
+        self._submitted_at = time.monotonic()
         self.send(
             {
                 "name": "submission-request",
@@ -599,11 +600,17 @@ class JudgeHandler(ZlibPacketHandler):
                 packet, action="processing", info="wrong-acknowledge", expected=expected
             )
         )
-        Submission.objects.filter(id=expected).update(
-            status="IE", result="IE", error=None
+        update_submission_result(
+            Submission.objects.filter(id=expected),
+            status="IE",
+            result="IE",
+            error=None,
         )
-        Submission.objects.filter(id=got, status="QU").update(
-            status="IE", result="IE", error=None
+        update_submission_result(
+            Submission.objects.filter(id=got, status="QU"),
+            status="IE",
+            result="IE",
+            error=None,
         )
 
     def on_submission_acknowledged(self, packet):
@@ -653,7 +660,25 @@ class JudgeHandler(ZlibPacketHandler):
             # not being malicious or simply malforms. THIS IS A SERVER!
 
     def _handle_packet(self, data, handler):
-        self._handle_with_database_retry(data.get("name"), lambda: handler(data))
+        name = data.get("name")
+        db_time = [0.0]
+
+        def time_query(execute, sql, params, many, context):
+            started = time.monotonic()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db_time[0] += time.monotonic() - started
+
+        started = time.monotonic()
+        try:
+            with db.connection.execute_wrapper(time_query):
+                self._handle_with_database_retry(name, lambda: handler(data))
+        finally:
+            if handler != self.on_malformed:
+                metrics.PACKETS.inc("judge", name)
+                metrics.PACKET_DURATION.observe(time.monotonic() - started, name)
+                metrics.PACKET_DB_DURATION.observe(db_time[0], name)
 
     def _handle_with_database_retry(self, packet_name, handler):
         _ensure_connection()
@@ -711,8 +736,20 @@ class JudgeHandler(ZlibPacketHandler):
             SubmissionTestCase.objects.filter(
                 submission_id=packet["submission-id"]
             ).delete()
-            delete_submission_result(packet["submission-id"])
-            self._submission_result_cases[packet["submission-id"]] = {}
+            SubmissionTestCasePack.objects.filter(
+                submission_id=packet["submission-id"]
+            ).delete()
+            if self.result_writer is None:
+                delete_submission_result(packet["submission-id"])
+            else:
+                self.result_writer.delete(packet["submission-id"])
+            self._grading_states[packet["submission-id"]] = GradingState()
+            self._grading_began = time.monotonic()
+            if self._submitted_at is not None:
+                metrics.DISPATCH_LATENCY.observe(
+                    self._grading_began - self._submitted_at, self.name
+                )
+                self._submitted_at = None
             event.post(
                 "sub_%s" % Submission.get_id_secret(packet["submission-id"]),
                 {"type": "grading-begin"},
@@ -721,23 +758,34 @@ class JudgeHandler(ZlibPacketHandler):
             json_log.info(self._make_json_log(packet, action="grading-begin"))
         else:
             logger.warning("Unknown submission: %s", packet["submission-id"])
-            self._submission_result_cases.pop(packet["submission-id"], None)
+            self._grading_states.pop(packet["submission-id"], None)
             json_log.error(
                 self._make_json_log(
                     packet, action="grading-begin", info="unknown submission"
                 )
             )
 
+    def _observe_grading_duration(self, problem):
+        if self._grading_began is not None:
+            metrics.GRADING_DURATION.observe(
+                time.monotonic() - self._grading_began,
+                self.name,
+                problem.group.name if problem.group_id else "",
+            )
+            self._grading_began = None
+
     def on_grading_end(self, packet):
         logger.info("%s: Grading has ended on: %s", self.name, packet["submission-id"])
         self._free_self(packet)
         self.batch_id = None
 
         try:
-            submission = Submission.objects.get(id=packet["submission-id"])
+            submission = Submission.objects.select_related(
+                "problem", "problem__group"
+            ).get(id=packet["submission-id"])
         except Submission.DoesNotExist:
             logger.warning("Unknown submission: %s", packet["submission-id"])
-            self._submission_result_cases.pop(packet["submission-id"], None)
+            self._grading_states.pop(packet["submission-id"], None)
             json_log.error(
                 self._make_json_log(
                     packet, action="grading-end", info="unknown submission"
@@ -749,7 +797,7 @@ class JudgeHandler(ZlibPacketHandler):
             logger.info(
                 "Ignoring grading end for aborted submission: %s", submission.id
             )
-            self._submission_result_cases.pop(submission.id, None)
+            self._grading_states.pop(submission.id, None)
             json_log.info(
                 self._make_json_log(
                     packet,
@@ -761,96 +809,51 @@ class JudgeHandler(ZlibPacketHandler):
             )
             return
 
-        time = 0
-        memory = 0
-        points = 0.0
-        total = 0
-        status = 0
-        test_case_count = 0
-        status_codes = ["SC", "AC", "WA", "MLE", "TLE", "IR", "RTE", "OLE"]
-        batches = {}  # batch number: [list of (case.points, case.total)]
-
-        for case in SubmissionTestCase.objects.filter(submission=submission):
-            test_case_count += 1
-            time = max(time, case.time)
-            if not case.batch:
-                points += case.points
-                total += case.total
-            else:
-                batches.setdefault(case.batch, []).append((case.points, case.total))
-            memory = max(memory, case.memory)
-            i = status_codes.index(case.status)
-            if i > status:
-                status = i
-
-        # Determine which batches use min-scoring.
-        # SubmissionTestCase.batch is a sequential counter (1-indexed) assigned
-        # during judging, matching the Nth type="S" ProblemTestCase row by order.
-        # This mapping is correct for all fresh judgings; it could drift if
-        # ProblemTestCase rows are reordered after old submissions were graded.
-        min_batch_numbers = set(
-            i + 1
-            for i, scoring in enumerate(
-                ProblemTestCase.objects.filter(dataset=submission.problem, type="S")
-                .order_by("order")
-                .values_list("batch_scoring", flat=True)
+        state = self._grading_states.get(submission.id)
+        if state is None:
+            state = GradingState.from_database(submission.id)
+        if len(state.cases) != state.case_count:
+            logger.error(
+                "Buffered result JSON for submission %s has %d of %d test "
+                "case(s); saving available details",
+                submission.id,
+                len(state.cases),
+                state.case_count,
             )
-            if scoring == "min"
-        )
 
-        for batch_id, case_pairs in batches.items():
-            batch_total = sum(t for _, t in case_pairs)
-            if batch_id in min_batch_numbers and batch_total > 0:
-                min_fraction = min(p / t if t else 0.0 for p, t in case_pairs)
-                points += min_fraction * batch_total
-            else:
-                points += sum(p for p, _ in case_pairs)
-            total += batch_total
-
-        points = points
-        total = total
+        problem = submission.problem
+        self._observe_grading_duration(problem)
+        points, total = state.score(get_min_batches(problem))
         submission.case_points = points
         submission.case_total = total
 
-        problem = submission.problem
         sub_points = round(points / total * problem.points if total > 0 else 0, 3)
         if not problem.partial and sub_points != problem.points:
             sub_points = 0
 
-        result_cases = self._submission_result_cases.get(submission.id)
-        if result_cases is None:
-            if test_case_count:
-                logger.error(
-                    "Missing buffered result JSON cases for submission %s with %d "
-                    "test case row(s); saving empty result JSON",
-                    submission.id,
-                    test_case_count,
-                )
-            result_cases = {}
-        elif len(result_cases) != test_case_count:
-            logger.error(
-                "Buffered result JSON case count mismatch for submission %s: "
-                "%d buffered, %d test case row(s); saving available details",
-                submission.id,
-                len(result_cases),
-                test_case_count,
-            )
-
         try:
-            save_submission_result(submission.id, result_cases.values())
+            if self.result_writer is None:
+                save_submission_result(submission.id, state.cases.values())
+            else:
+                self.result_writer.save(submission.id, state.cases.values())
         except Exception:
             logger.exception(
                 "Failed to write submission result JSON for %s",
                 submission.id,
             )
             raise
-        self._submission_result_cases.pop(submission.id, None)
+        # Rows are kept while grading for the live status page, then packed
+        if packs_submission(submission):
+            store_packed_test_cases(submission.id, state.rows.values())
+        self._grading_states.pop(submission.id, None)
 
+        time = state.time
+        memory = state.memory
         submission.status = "D"
         submission.time = time
         submission.memory = memory
         submission.points = sub_points
-        submission.result = status_codes[status]
+        submission.result = state.result
         submission.save()
 
         json_log.info(
@@ -872,17 +875,9 @@ class JudgeHandler(ZlibPacketHandler):
 
         update_user_points.delay(submission.user_id)
         update_problem_stats.delay(problem.id)
-        submission.update_contest()
-
-        if (
-            submission.contest_object_id
-            and submission.contest_object.scoreboard_visibility
-            == Contest.SCOREBOARD_VISIBLE
-        ):
-            event.post(
-                "contest_%s" % submission.contest_object.key,
-                {"type": "ranking-update"},
-            )
+        participation = submission.update_contest()
+        if participation is not None:
+            post_ranking_update(participation)
 
         finished_submission(submission)
 
@@ -904,10 +899,13 @@ class JudgeHandler(ZlibPacketHandler):
             "%s: Submission failed to compile: %s", self.name, packet["submission-id"]
         )
         self._free_self(packet)
-        self._submission_result_cases.pop(packet["submission-id"], None)
+        self._grading_states.pop(packet["submission-id"], None)
 
-        if Submission.objects.filter(id=packet["submission-id"]).update(
-            status="CE", result="CE", error=packet["log"]
+        if update_submission_result(
+            Submission.objects.filter(id=packet["submission-id"]),
+            status="CE",
+            result="CE",
+            error=packet["log"],
         ):
             event.post(
                 "sub_%s" % Submission.get_id_secret(packet["submission-id"]),
@@ -973,14 +971,14 @@ class JudgeHandler(ZlibPacketHandler):
         self._free_self(packet)
 
         id = packet["submission-id"]
-        self._submission_result_cases.pop(id, None)
+        self._grading_states.pop(id, None)
         self._update_internal_error_submission(id, packet["message"])
 
         self._notify_on_internal_error(id, packet["message"])
 
     def _update_internal_error_submission(self, id, message):
-        if Submission.objects.filter(id=id).update(
-            status="IE", result="IE", error=message
+        if update_submission_result(
+            Submission.objects.filter(id=id), status="IE", result="IE", error=message
         ):
             event.post(
                 "sub_%s" % Submission.get_id_secret(id), {"type": "internal-error"}
@@ -1098,10 +1096,12 @@ class JudgeHandler(ZlibPacketHandler):
     def on_submission_terminated(self, packet):
         logger.info("%s: Submission aborted: %s", self.name, packet["submission-id"])
         self._free_self(packet)
-        self._submission_result_cases.pop(packet["submission-id"], None)
+        self._grading_states.pop(packet["submission-id"], None)
 
-        if Submission.objects.filter(id=packet["submission-id"]).update(
-            status="AB", result="AB"
+        if update_submission_result(
+            Submission.objects.filter(id=packet["submission-id"]),
+            status="AB",
+            result="AB",
         ):
             event.post(
                 "sub_%s" % Submission.get_id_secret(packet["submission-id"]),
@@ -1230,17 +1230,21 @@ class JudgeHandler(ZlibPacketHandler):
                 current_testcase=max_position + 1, points=F("points") + sum_points
             ):
                 logger.warning("Unknown submission: %s", id)
-                self._submission_result_cases.pop(id, None)
+                self._grading_states.pop(id, None)
                 json_log.error(
                     self._make_json_log(
                         packet, action="test-case", info="unknown submission"
                     )
                 )
                 return
+            state = self._grading_states.get(id)
+            if state is None:
+                # Lost by a bridge restart, recount the cases graded so far
+                state = self._grading_states[id] = GradingState.from_database(id)
             SubmissionTestCase.objects.bulk_create(bulk_test_case_updates)
-            self._submission_result_cases.setdefault(id, {}).update(
-                result_detail_updates
-            )
+            for test_case in bulk_test_case_updates:
+                state.add_case(test_case)
+            state.cases.update(result_detail_updates)
 
         do_post = True
 
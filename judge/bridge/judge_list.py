@@ -1,8 +1,13 @@
 import logging
+import time
 from collections import namedtuple
 from operator import attrgetter
 from threading import RLock
 
+from judge.bridge import metrics
+from judge.bridge.affinity import ProblemAffinity
+from judge.bridge.limits import ProblemLimits
+from judge.bridge.scheduling import FIFO, Scheduler
 from judge.bridge.utils import VanishedSubmission
 
 try:
@@ -25,7 +30,16 @@ USER_TIER_THRESHOLD = 3
 class JudgeList(object):
     priorities = 5
 
-    def __init__(self):
+    def __init__(
+        self,
+        journal=None,
+        policy=FIFO,
+        starvation_seconds=300,
+        affinity_size=32,
+        affinity_slack=0.5,
+        affinity_lookahead=0,
+        limits_ttl=60,
+    ):
         self.queue = dllist()
         self.priority = [
             self.queue.append(PriorityMarker(i)) for i in range(self.priorities)
@@ -41,17 +55,39 @@ class JudgeList(object):
         self.running_users = set()
         self.validate_map = {}
         self.lock = RLock()
+        # QueueJournal recording the submission queue, see daemon.judge_daemon
+        self.journal = journal
+        self.scheduler = Scheduler(self.priorities, policy, starvation_seconds)
+        self.affinity = ProblemAffinity(
+            affinity_size, affinity_slack, affinity_lookahead
+        )
+        self.limits = ProblemLimits(limits_ttl)
+
+    def _journal(self, method, *args):
+        if self.journal is None:
+            return
+        try:
+            getattr(self.journal, method)(*args)
+        except Exception:
+            # Judging goes on, only a restart would lose the submission
+            logger.exception("Failed to write queue journal (%s %s)", method, args)
 
     @staticmethod
     def _is_user_tier(priority, user_id):
         return priority < USER_TIER_THRESHOLD and user_id is not None
 
-    def _mark_dispatched(self, sub_id, user_id, is_user_tier):
+    def _mark_dispatched(
+        self, judge, sub_id, user_id, is_user_tier, problem, language, tier
+    ):
+        self.scheduler.dispatched(sub_id, problem, language, tier)
+        self.affinity.dispatched(judge, problem)
+        metrics.DISPATCHES.inc(judge.name, tier)
         self.submission_users[sub_id] = (user_id, is_user_tier)
         if is_user_tier:
             self.running_users.add(user_id)
 
     def _mark_finished(self, sub_id):
+        self.scheduler.finished(sub_id)
         info = self.submission_users.pop(sub_id, None)
         if info is None:
             return
@@ -85,6 +121,13 @@ class JudgeList(object):
             if judge not in self.judges or judge.working:
                 return None
 
+            reorders = self.scheduler.reorders
+            now = time.monotonic()
+            # (scheduler key, node) of the submission to dispatch from this tier
+            best = None
+            # Under FIFO, compatible submissions still skipped to find one of a
+            # problem the judge is warm for
+            lookahead = self.affinity.lookahead
             current_tier = 0
             node = self.queue.first
             while node is not None:
@@ -92,12 +135,17 @@ class JudgeList(object):
                 val = node.value
 
                 if isinstance(val, PriorityMarker):
+                    if best is not None:
+                        return self._reserve_queued_submission(
+                            judge, best[1], current_tier
+                        )
                     current_tier = val.priority + 1
                     node = next_node
                     continue
 
                 if isinstance(val, ValidateItem):
-                    # Validation entries bypass per-user fairness.
+                    # Validation entries bypass per-user fairness and the
+                    # scheduling policy.
                     if val.problem_id in judge.problems:
                         self.validate_map[val.validate_id] = judge
                         self._set_judge_validation(
@@ -128,15 +176,25 @@ class JudgeList(object):
 
                 if not cap_fires:
                     if judge.can_judge(problem, language, judge_id_v):
-                        self.submission_map[id] = judge
-                        self._mark_dispatched(id, user_id, is_user_tier)
-                        self._set_judge_submission(judge, id, problem, language, source)
-                        self.queue.remove(node)
-                        del self.node_map[id]
-                        logger.info(
-                            "Dispatched queued submission %d: %s", id, judge.name
-                        )
-                        return ("submission", val, current_tier)
+                        if not reorders:
+                            if self.affinity.is_warm(judge, problem):
+                                return self._reserve_queued_submission(
+                                    judge, node, current_tier
+                                )
+                            if best is None:
+                                best = (None, node)
+                            # A starved submission is never skipped, and the
+                            # first skipped one is older than any later one
+                            if lookahead <= 0 or self.scheduler.starved(id, now):
+                                return self._reserve_queued_submission(
+                                    judge, best[1], current_tier
+                                )
+                            lookahead -= 1
+                            node = next_node
+                            continue
+                        key = self.scheduler.key(id, now)
+                        if best is None or key < best[0]:
+                            best = (key, node)
                     node = next_node
                     continue
 
@@ -147,11 +205,24 @@ class JudgeList(object):
                     self.queue.remove(node)
                     new_node = self.queue.insert(val, self.priority[current_tier + 1])
                     self.node_map[id] = new_node
+                    self.scheduler.moved(id, current_tier + 1)
                 # else: already at the lowest tier; skip in place.
                 node = next_node
 
         return None
 
+    def _reserve_queued_submission(self, judge, node, tier):
+        item = node.value
+        id, problem, language, source, judge_id, user_id, is_user_tier = item
+        self.submission_map[id] = judge
+        self._mark_dispatched(judge, id, user_id, is_user_tier, problem, language, tier)
+        self._set_judge_submission(judge, id, problem, language, source)
+        self.queue.remove(node)
+        del self.node_map[id]
+        self._journal("dispatch", id)
+        logger.info("Dispatched queued submission %d: %s", id, judge.name)
+        return ("submission", item, tier)
+
     def _fail_judge(self, judge, clear_work=True):
         with self.lock:
             self.judges.discard(judge)
@@ -240,6 +311,7 @@ class JudgeList(object):
             judge.submit(id, problem, language, source)
         except VanishedSubmission:
             self._release_submission(judge, id)
+            self._journal("finish", id)
             return False
         except Exception:
             logger.exception(
@@ -317,13 +389,18 @@ class JudgeList(object):
     def update_problems(self, judge):
         self._handle_free_judge(judge)
 
-    def broadcast_update_problems(self):
-        """Tell all connected judges to rescan their problem list."""
+    def broadcast_update_problems(self, problem=None):
+        """Tell all connected judges to rescan their problem list, or only
+        ``problem`` if given."""
+        self.limits.invalidate(problem)
+        packet = {"name": "update-problems"}
+        if problem is not None:
+            packet["problem"] = problem
         with self.lock:
             judges = list(self.judges)
         for judge in judges:
             try:
-                judge.send({"name": "update-problems"})
+                judge.send(packet)
             except Exception:
                 logger.exception("Failed to send update-problems to %s", judge.name)
                 self._fail_judge(judge, clear_work=False)
@@ -341,7 +418,9 @@ class JudgeList(object):
             logger.info("Judge available after grading %d: %s", submission, judge.name)
             if self.submission_map.get(submission) is judge:
                 del self.submission_map[submission]
+                self.scheduler.finished(submission, graded=True)
                 self._mark_finished(submission)
+                self._journal("finish", submission)
             else:
                 logger.warning(
                     "Ignoring stale completion for submission %d from %s",
@@ -363,10 +442,13 @@ class JudgeList(object):
                 else:
                     self.queue.remove(node)
                     del self.node_map[submission]
+                    self.scheduler.dequeued(submission)
+                    self._journal("finish", submission)
                 return False
 
             del self.submission_map[submission]
             self._mark_finished(submission)
+            self._journal("finish", submission)
         try:
             judge.abort()
         except Exception:
@@ -508,6 +590,7 @@ class JudgeList(object):
             "executors": sorted(executor_keys),
             "address": getattr(judge, "judge_address", None),
             "client-address": getattr(judge, "client_address", None),
+            **self.affinity.judge_status(judge),
         }
         if include_problems:
             entry["problems"] = problems
@@ -515,6 +598,7 @@ class JudgeList(object):
 
     def _queue_status_entries(self):
         entries = []
+        now = time.monotonic()
         current_tier = 0
         node = self.queue.first
         while node is not None:
@@ -528,6 +612,7 @@ class JudgeList(object):
             else:
                 entry = self._submission_status_entry(value[0], None, value)
                 entry.update({"type": "submission", "priority": current_tier})
+                entry.update(self.scheduler.queue_entry(value[0], now))
                 entries.append(entry)
             node = node.next
         return entries
@@ -542,6 +627,9 @@ class JudgeList(object):
 
                 is_user_tier = self._is_user_tier(priority, user_id)
                 item = (id, problem, language, source, judge_id, user_id, is_user_tier)
+                self._journal(
+                    "enqueue", id, problem, language, judge_id, priority, user_id
+                )
 
                 if is_user_tier and user_id in self.running_users:
                     # User already has a submission judging; push this one down
@@ -551,6 +639,14 @@ class JudgeList(object):
                         item,
                         self.priority[effective_priority],
                     )
+                    self.scheduler.enqueued(
+                        id,
+                        problem,
+                        language,
+                        user_id,
+                        effective_priority,
+                        len(self.judges),
+                    )
                     logger.info(
                         "Queued submission %d at tier %d (user %d already judging)",
                         id,
@@ -579,14 +675,21 @@ class JudgeList(object):
                         item,
                         self.priority[priority],
                     )
+                    self.scheduler.enqueued(
+                        id, problem, language, user_id, priority, len(self.judges)
+                    )
                     logger.info("Queued submission: %d", id)
                     return
 
-                # Schedule the submission on the judge reporting least load.
-                judge = min(candidates, key=attrgetter("load"))
+                # Schedule the submission on the judge reporting least load,
+                # or a slightly busier one that graded the problem recently.
+                judge = self.affinity.choose(candidates, problem)
                 logger.info("Dispatched submission %d to: %s", id, judge.name)
+                self._journal("dispatch", id)
                 self.submission_map[id] = judge
-                self._mark_dispatched(id, user_id, is_user_tier)
+                self._mark_dispatched(
+                    judge, id, user_id, is_user_tier, problem, language, priority
+                )
                 self._set_judge_submission(judge, id, problem, language, source)
 
             if self._dispatch_reserved_submission(judge, item, priority):
@@ -632,6 +735,8 @@ class JudgeList(object):
                             self.validate_map.items(), key=lambda item: str(item[0])
                         )
                     ],
+                    "scheduling": self.scheduler.status(),
+                    "affinity": self.affinity.status(),
                     "running-users": sorted(self.running_users),
                     "node-map-size": len(self.node_map),
                     "submission-map-size": len(self.submission_map),
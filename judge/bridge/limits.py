@@ -0,0 +1,69 @@
+"""
+Problem limits cached in the bridge.
+
+Every dispatch sends the problem's time and memory limits, with the
+language's own limits taking precedence. ``ProblemLimits`` loads them once
+per problem and keeps them until an edit to the limits invalidates the
+problem, or ``ttl`` seconds pass in case the bridge missed that.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from judge.models import LanguageLimit, Problem
+
+Limits = namedtuple("Limits", "time memory short_circuit")
+
+
+class ProblemLimits(object):
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # problem code: (loaded at, Limits, {language key: (time, memory)})
+        self.problems = {}
+
+    def _load(self, problem):
+        try:
+            limits = Limits(
+                *Problem.objects.filter(code=problem)
+                .values_list("time_limit", "memory_limit", "short_circuit")
+                .get()
+            )
+        except Problem.DoesNotExist:
+            return None
+        languages = {
+            key: (time, memory)
+            for key, time, memory in LanguageLimit.objects.filter(
+                problem__code=problem
+            ).values_list("language__key", "time_limit", "memory_limit")
+        }
+        return limits, languages
+
+    def get(self, problem, language):
+        """Limits of ``problem`` in ``language``, or None if it is gone."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.problems.get(problem)
+        if entry is None or (self.ttl is not None and now - entry[0] > self.ttl):
+            loaded = self._load(problem)
+            if loaded is None:
+                self.invalidate(problem)
+                return None
+            entry = (now,) + loaded
+            with self.lock:
+                self.problems[problem] = entry
+        _, limits, languages = entry
+        if language in languages:
+            return limits._replace(
+                time=languages[language][0], memory=languages[language][1]
+            )
+        return limits
+
+    def invalidate(self, problem=None):
+        """Forget ``problem``, or every problem if None."""
+        with self.lock:
+            if problem is None:
+                self.problems.clear()
+            else:
+                self.problems.pop(problem, None)
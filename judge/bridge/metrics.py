@@ -0,0 +1,259 @@
+"""
+Counters and histograms of the bridge.
+
+The metrics live in the bridge process. They are served in the Prometheus
+text format from ``BRIDGED_METRICS_ADDRESS``, and as a snapshot in the
+``bridge-status`` packet when it asks for ``metrics``. Recording a value
+takes one lock and a bisect.
+"""
+
+import logging
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("judge.bridge")
+
+# Upper bounds in seconds, from a fast packet to a long grading
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+    600,
+)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [
+        '%s="%s"'
+        % (
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in list(zip(names, values)) + list(extra)
+    ]
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Counter(object):
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        # label values: count
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = sorted(self.values.items(), key=lambda item: str(item[0]))
+        for labels, value in values:
+            yield self.name, _format_labels(self.labels, labels), value
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                [dict(zip(self.labels, labels)), value]
+                for labels, value in self.values.items()
+            ]
+
+
+class Histogram(object):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # label values: [per-bucket counts with a final +Inf bucket, sum]
+        self.series = {}
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self.lock:
+            series = sorted(
+                (
+                    (labels, list(counts), total)
+                    for labels, (counts, total) in self.series.items()
+                ),
+                key=lambda item: str(item[0]),
+            )
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield (
+                    self.name + "_bucket",
+                    _format_labels(self.labels, labels, [("le", _format_value(bound))]),
+                    cumulative,
+                )
+            yield self.name + "_sum", _format_labels(self.labels, labels), total
+            yield self.name + "_count", _format_labels(self.labels, labels), cumulative
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "buckets": list(self.buckets),
+                "series": [
+                    {
+                        "labels": dict(zip(self.labels, labels)),
+                        "counts": list(counts),
+                        "sum": total,
+                    }
+                    for labels, (counts, total) in self.series.items()
+                ],
+            }
+
+
+class Registry(object):
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append("# HELP %s %s" % (metric.name, metric.help))
+            lines.append("# TYPE %s %s" % (metric.name, metric.type))
+            for name, labels, value in metric.samples():
+                lines.append("%s%s %s" % (name, labels, _format_value(value)))
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return {
+            metric.name: {"type": metric.type, "values": metric.snapshot()}
+            for metric in self.metrics
+        }
+
+
+REGISTRY = Registry()
+
+QUEUE_WAIT = REGISTRY.histogram(
+    "bridge_queue_wait_seconds",
+    "Time submissions waited in the bridge queue before dispatch.",
+    ("tier",),
+)
+DISPATCH_LATENCY = REGISTRY.histogram(
+    "bridge_dispatch_latency_seconds",
+    "Time from sending a submission to a judge until it begins grading.",
+    ("judge",),
+)
+GRADING_DURATION = REGISTRY.histogram(
+    "bridge_grading_seconds",
+    "Time from grading-begin to grading-end.",
+    ("judge", "group"),
+)
+DISPATCHES = REGISTRY.counter(
+    "bridge_dispatches_total", "Submissions sent to judges.", ("judge", "tier")
+)
+PACKETS = REGISTRY.counter(
+    "bridge_packets_total", "Packets handled by the bridge.", ("side", "packet")
+)
+PACKET_DURATION = REGISTRY.histogram(
+    "bridge_packet_seconds", "Time spent handling judge packets.", ("packet",)
+)
+PACKET_DB_DURATION = REGISTRY.histogram(
+    "bridge_packet_db_seconds",
+    "Time spent in database queries while handling judge packets.",
+    ("packet",),
+)
+
+RESULT_WRITES = REGISTRY.counter(
+    "bridge_result_writes_total",
+    "Result JSON saves and deletes by the background writer.",
+    ("operation", "outcome"),
+)
+RESULT_WRITE_DURATION = REGISTRY.histogram(
+    "bridge_result_write_seconds",
+    "Time taken by successful result JSON saves and deletes.",
+    ("operation",),
+)
+
+
+def histogram_quantile(buckets, counts, quantile):
+    """
+    Estimate ``quantile`` of a histogram snapshot by linear interpolation
+    within the bucket it falls in, the way Prometheus does.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank = quantile * total
+    cumulative = 0
+    for index, count in enumerate(counts):
+        if cumulative + count >= rank and count:
+            if index == len(buckets):
+                return buckets[-1]
+            lower = buckets[index - 1] if index else 0.0
+            return lower + (buckets[index] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return buckets[-1]
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(address):
+    """Serve /metrics on ``address`` from a daemon thread. Returns the server."""
+    server = ThreadingHTTPServer(tuple(address), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    logger.info("Serving bridge metrics on %s:%s", *server.server_address[:2])
+    return server
@@ -0,0 +1,207 @@
+"""
+Background writes of result JSON to storage.
+
+The bridge hands result JSON to ``ResultWriter`` on grading-begin (delete)
+and grading-end (save) instead of waiting on storage. A writer thread
+uploads pending results in batches, each batch in parallel. Only the last
+operation per submission is kept, so a rejudge queued behind its own
+upload never writes stale details.
+
+With a spool directory, pending results are files there until uploaded and
+are uploaded by the next bridge if this one stops first. Without one they
+are kept in memory. Once ``max_pending`` submissions are waiting, results
+are written synchronously, slowing the bridge down to what storage takes.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from judge.bridge import metrics
+from judge.utils.submission_results import (
+    delete_submission_result,
+    save_submission_result_content,
+    submission_result_content,
+)
+
+logger = logging.getLogger("judge.bridge")
+
+SAVE = "save"
+DELETE = "delete"
+
+_SUFFIXES = {".json": SAVE, ".delete": DELETE}
+
+
+class ResultWriter(object):
+    def __init__(self, spool=None, max_pending=10000, batch_size=16, retry_seconds=5):
+        self.spool = spool
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        self.condition = threading.Condition()
+        # submission id: (operation, content or None when spooled)
+        self.pending = OrderedDict()
+        self.stopping = False
+        self.thread = None
+        self.executor = ThreadPoolExecutor(
+            max_workers=batch_size, thread_name_prefix="result-writer"
+        )
+        if spool is not None:
+            os.makedirs(spool, exist_ok=True)
+            self._recover()
+
+    def _spool_path(self, id, operation):
+        return os.path.join(
+            self.spool, "%d%s" % (id, ".json" if operation == SAVE else ".delete")
+        )
+
+    def _recover(self):
+        entries = []
+        for name in os.listdir(self.spool):
+            stem, suffix = os.path.splitext(name)
+            path = os.path.join(self.spool, name)
+            if suffix not in _SUFFIXES or not stem.isdigit():
+                # Left over from a write interrupted before its rename
+                os.unlink(path)
+                continue
+            entries.append((os.stat(path).st_mtime, int(stem), _SUFFIXES[suffix]))
+        for _, id, operation in sorted(entries):
+            self.pending.pop(id, None)
+            self.pending[id] = (operation, None)
+        if entries:
+            logger.info("Recovered %d spooled result writes", len(self.pending))
+
+    def _unspool(self, id):
+        for operation in (SAVE, DELETE):
+            try:
+                os.unlink(self._spool_path(id, operation))
+            except FileNotFoundError:
+                pass
+
+    def _spool_write(self, id, operation, content):
+        path = self._spool_path(id, operation)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+        # Remove the other operation's file, so recovery replays this one
+        other = self._spool_path(id, DELETE if operation == SAVE else SAVE)
+        try:
+            os.unlink(other)
+        except FileNotFoundError:
+            pass
+
+    def _queue(self, id, operation, content):
+        with self.condition:
+            if len(self.pending) >= self.max_pending and id not in self.pending:
+                return False
+            if self.spool is not None:
+                self._spool_write(id, operation, content)
+                content = None
+            self.pending.pop(id, None)
+            self.pending[id] = (operation, content)
+            self.condition.notify()
+            return True
+
+    def save(self, id, cases):
+        content = submission_result_content(cases)
+        if not self._queue(id, SAVE, content):
+            logger.warning("Result writer is full, saving %d synchronously", id)
+            save_submission_result_content(id, content)
+
+    def delete(self, id):
+        if not self._queue(id, DELETE, b""):
+            logger.warning("Result writer is full, deleting %d synchronously", id)
+            delete_submission_result(id)
+
+    def _write(self, id, operation, content):
+        start = time.monotonic()
+        try:
+            if operation == DELETE:
+                delete_submission_result(id)
+            else:
+                if content is None:
+                    try:
+                        with open(self._spool_path(id, SAVE), "rb") as f:
+                            content = f.read()
+                    except FileNotFoundError:
+                        # Superseded by a later operation
+                        return True
+                save_submission_result_content(id, content)
+        except Exception:
+            logger.exception("Failed to %s result JSON of %d", operation, id)
+            metrics.RESULT_WRITES.inc(operation, "error")
+            return False
+        metrics.RESULT_WRITES.inc(operation, "ok")
+        metrics.RESULT_WRITE_DURATION.observe(time.monotonic() - start, operation)
+        return True
+
+    def _take_batch(self):
+        with self.condition:
+            while not self.pending and not self.stopping:
+                self.condition.wait()
+            batch = []
+            while self.pending and len(batch) < self.batch_size:
+                batch.append(self.pending.popitem(last=False))
+            return batch
+
+    def _finish_batch(self, batch, results):
+        failed = False
+        with self.condition:
+            for (id, entry), written in zip(batch, results):
+                if id in self.pending:
+                    # A later operation replaces this one, and its spool file
+                    continue
+                if written:
+                    if self.spool is not None:
+                        self._unspool(id)
+                else:
+                    failed = True
+                    self.pending[id] = entry
+        return failed
+
+    def run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            results = list(
+                self.executor.map(
+                    lambda item: self._write(item[0], *item[1]),
+                    batch,
+                )
+            )
+            if self._finish_batch(batch, results):
+                with self.condition:
+                    if self.stopping:
+                        return
+                    self.condition.wait(self.retry_seconds)
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.run, name="result-writer", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self, timeout=30):
+        """Write what is pending within ``timeout`` seconds, then stop."""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self.executor.shutdown(wait=False)
+        with self.condition:
+            if self.pending:
+                logger.warning(
+                    "Stopped with %d result writes pending%s",
+                    len(self.pending),
+                    "" if self.spool is None else " in the spool",
+                )
+
+    def status(self):
+        with self.condition:
+            return {"pending": len(self.pending), "spooled": self.spool is not None}
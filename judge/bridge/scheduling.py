@@ -0,0 +1,184 @@
+"""
+Ordering of queued submissions within a priority tier.
+
+``JudgeList`` always serves tiers in order. Within a tier the default
+``fifo`` policy dispatches the oldest submission a free judge can take.
+``sjf`` (shortest expected job first) takes the one expected to grade
+fastest instead, and ``wfq`` (weighted fair queuing) gives every user an
+equal share of judge time, so one user's slow submissions do not hold up
+everyone else's. Expected grading times are running averages of the
+grading times the bridge has seen for the same problem and language.
+
+Under ``sjf`` and ``wfq``, a submission that has waited longer than the
+starvation bound is dispatched before all non-starved ones of its tier,
+oldest first. Under ``fifo``, problem affinity never skips one.
+"""
+
+import time
+from collections import deque
+
+from judge.bridge import metrics
+
+FIFO = "fifo"
+SJF = "sjf"
+WFQ = "wfq"
+POLICIES = (FIFO, SJF, WFQ)
+
+
+class CostModel(object):
+    """Exponentially weighted mean grading time per (problem, language)."""
+
+    alpha = 0.2
+
+    def __init__(self, default=1.0):
+        self.default = default
+        self.costs = {}
+        # Problem alone, for languages the problem has not been graded in yet
+        self.problem_costs = {}
+
+    @classmethod
+    def _update(cls, costs, key, seconds):
+        current = costs.get(key)
+        costs[key] = (
+            seconds if current is None else current + cls.alpha * (seconds - current)
+        )
+
+    def observe(self, problem, language, seconds):
+        self._update(self.costs, (problem, language), seconds)
+        self._update(self.problem_costs, problem, seconds)
+
+    def estimate(self, problem, language):
+        cost = self.costs.get((problem, language))
+        if cost is None:
+            cost = self.problem_costs.get(problem, self.default)
+        return cost
+
+
+class QueuedSubmission(object):
+    __slots__ = ("queued_at", "tier", "cost", "predicted_wait", "finish_tag")
+
+    def __init__(self, queued_at, tier, cost, predicted_wait, finish_tag):
+        self.queued_at = queued_at
+        self.tier = tier
+        self.cost = cost
+        self.predicted_wait = predicted_wait
+        self.finish_tag = finish_tag
+
+
+class Scheduler(object):
+    """
+    Bookkeeping of queued and running submissions for ``JudgeList``.
+
+    All methods are called with ``JudgeList.lock`` held.
+    """
+
+    wait_samples = 1000
+
+    def __init__(self, priorities, policy=FIFO, starvation_seconds=300):
+        if policy not in POLICIES:
+            raise ValueError("Unknown scheduling policy: %r" % (policy,))
+        self.policy = policy
+        self.starvation_seconds = starvation_seconds
+        self.costs = CostModel()
+        # submission id: QueuedSubmission
+        self.queued = {}
+        # submission id: (dispatch time, problem, language)
+        self.running = {}
+        # Sum of the expected costs queued in each tier
+        self.tier_costs = [0.0] * priorities
+        # Virtual clock and the last finish tag of each user, for wfq
+        self.virtual_time = 0.0
+        self.user_finish = {}
+        # (predicted, actual) queue waits of recently dispatched submissions
+        self.waits = deque(maxlen=self.wait_samples)
+
+    @property
+    def reorders(self):
+        return self.policy != FIFO
+
+    def enqueued(self, id, problem, language, user_id, tier, judges):
+        cost = self.costs.estimate(problem, language)
+        # Work queued at this tier or above, spread over the connected judges
+        ahead = sum(self.tier_costs[: tier + 1])
+        finish_tag = max(self.virtual_time, self.user_finish.get(user_id, 0.0)) + cost
+        self.user_finish[user_id] = finish_tag
+        self.queued[id] = QueuedSubmission(
+            time.monotonic(), tier, cost, ahead / max(judges, 1), finish_tag
+        )
+        self.tier_costs[tier] += cost
+
+    def moved(self, id, tier):
+        entry = self.queued.get(id)
+        if entry is not None:
+            self.tier_costs[entry.tier] -= entry.cost
+            self.tier_costs[tier] += entry.cost
+            entry.tier = tier
+
+    def dequeued(self, id):
+        entry = self.queued.pop(id, None)
+        if entry is not None:
+            self.tier_costs[entry.tier] -= entry.cost
+        return entry
+
+    def dispatched(self, id, problem, language, tier):
+        now = time.monotonic()
+        entry = self.dequeued(id)
+        if entry is not None:
+            waited = now - entry.queued_at
+            self.waits.append((entry.predicted_wait, waited))
+            self.virtual_time = max(self.virtual_time, entry.finish_tag - entry.cost)
+        else:
+            waited = 0.0
+        metrics.QUEUE_WAIT.observe(waited, tier)
+        self.running[id] = (now, problem, language)
+
+    def finished(self, id, graded=False):
+        running = self.running.pop(id, None)
+        if graded and running is not None:
+            started, problem, language = running
+            self.costs.observe(problem, language, time.monotonic() - started)
+
+    def starved(self, id, now):
+        entry = self.queued.get(id)
+        return entry is not None and now - entry.queued_at >= self.starvation_seconds
+
+    def key(self, id, now):
+        """Sort key among the dispatchable submissions of one tier."""
+        entry = self.queued[id]
+        waited = now - entry.queued_at
+        if waited >= self.starvation_seconds:
+            return (0, -waited)
+        if self.policy == SJF:
+            return (1, entry.cost, entry.queued_at)
+        return (1, entry.finish_tag, entry.queued_at)
+
+    def queue_entry(self, id, now):
+        entry = self.queued.get(id)
+        if entry is None:
+            return {}
+        return {
+            "expected-cost": entry.cost,
+            "predicted-wait": entry.predicted_wait,
+            "waited": now - entry.queued_at,
+        }
+
+    def status(self):
+        waits = list(self.waits)
+        count = len(waits)
+        return {
+            "policy": self.policy,
+            "starvation-seconds": self.starvation_seconds,
+            "known-costs": len(self.costs.costs),
+            "wait-samples": count,
+            "mean-predicted-wait": (
+                sum(predicted for predicted, _ in waits) / count if count else None
+            ),
+            "mean-actual-wait": (
+                sum(actual for _, actual in waits) / count if count else None
+            ),
+            "mean-wait-error": (
+                sum(abs(predicted - actual) for predicted, actual in waits) / count
+                if count
+                else None
+            ),
+        }
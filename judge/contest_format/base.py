@@ -18,6 +18,9 @@ class abstractclassmethod(classmethod):
 
 class BaseContestFormat(metaclass=ABCMeta):
     has_hidden_subtasks = False
+    # Scores are computed from SubmissionTestCase rows in SQL, so the rows of
+    # the contest's submissions must not be packed
+    uses_test_case_rows = False
 
     @abstractmethod
     def __init__(self, contest, config):
@@ -67,7 +70,7 @@ class BaseContestFormat(metaclass=ABCMeta):
         participation.format_data = format_data
 
         self.apply_result_hidden(participation, format_data)
-        participation.save()
+        participation.save_results()
 
     def gather_results(self, participation):
         """
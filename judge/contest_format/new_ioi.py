@@ -11,6 +11,7 @@ class NewIOIContestFormat(IOIContestFormat):
     name = gettext_lazy("New IOI")
     config_defaults = {"cumtime": False}
     has_hidden_subtasks = True
+    uses_test_case_rows = True
     """
         cumtime: Specify True if time penalties are to be computed. Defaults to False.
     """
@@ -177,4 +178,4 @@ class NewIOIContestFormat(IOIContestFormat):
         participation.format_data_final = format_data_final
 
         self.apply_result_hidden(participation, format_data)
-        participation.save()
+        participation.save_results()
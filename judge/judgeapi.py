@@ -1,7 +1,11 @@
+import itertools
 import json
 import logging
+import os
 import socket
 import struct
+import threading
+import time
 import zlib
 
 from django.conf import settings
@@ -29,47 +33,163 @@ def _post_update_submission(submission, done=False):
         )
 
 
-def judge_request(packet, reply=True):
-    timeout = getattr(settings, "BRIDGED_DJANGO_TIMEOUT_SECONDS", 10)
-    sock = socket.create_connection(
-        settings.BRIDGED_DJANGO_CONNECT or settings.BRIDGED_DJANGO_ADDRESS[0],
-        timeout=timeout,
-    )
-    sock.settimeout(timeout)
+class BridgeConnection(object):
+    """
+    A long-lived connection to the bridge's Django port.
 
-    output = json.dumps(packet, separators=(",", ":"))
-    output = zlib.compress(output.encode("utf-8"))
-    try:
-        writer = sock.makefile("wb")
-        writer.write(size_pack.pack(len(output)))
-        writer.write(output)
-        writer.close()
+    Every packet carries a ``request-id`` that the bridge echoes back, so the
+    threads of a process share the connection and match replies to their
+    requests. Whichever waiting thread holds ``read_lock`` reads the next
+    reply and hands it to its owner.
+    """
+
+    def __init__(self, address, timeout):
+        self.sock = socket.create_connection(address, timeout=timeout)
+        self.timeout = timeout
+        self.write_lock = threading.Lock()
+        self.read_lock = threading.Lock()
+        self.request_ids = itertools.count(1)
+        # request id: [threading.Event, reply]
+        self.pending = {}
+        self.broken = False
 
+    def _read_exactly(self, size):
+        buffer = []
+        while size:
+            data = self.sock.recv(size)
+            if not data:
+                raise ConnectionError("Bridge closed the connection")
+            size -= len(data)
+            buffer.append(data)
+        return b"".join(buffer)
+
+    def _read_reply(self, timeout):
+        self.sock.settimeout(timeout)
+        length = size_pack.unpack(self._read_exactly(size_pack.size))[0]
+        reply = json.loads(zlib.decompress(self._read_exactly(length)).decode("utf-8"))
+        waiter = self.pending.get(reply.get("request-id"))
+        if waiter is not None:
+            waiter[1] = reply
+            waiter[0].set()
+
+    def request(self, packet, reply=True):
+        id = next(self.request_ids)
+        waiter = [threading.Event(), None]
         if reply:
-            reader = sock.makefile("rb", -1)
-            input = reader.read(size_pack.size)
-            if not input:
-                raise ValueError("Judge did not respond")
-            length = size_pack.unpack(input)[0]
-            input = reader.read(length)
-            if not input:
-                raise ValueError("Judge did not respond")
-            reader.close()
-
-            result = json.loads(zlib.decompress(input).decode("utf-8"))
-            return result
-    finally:
-        sock.close()
+            self.pending[id] = waiter
+        output = json.dumps({**packet, "request-id": id}, separators=(",", ":"))
+        output = zlib.compress(output.encode("utf-8"))
+        deadline = time.monotonic() + self.timeout
+        try:
+            with self.write_lock:
+                self._io(self.sock.settimeout, self.timeout)
+                self._io(self.sock.sendall, size_pack.pack(len(output)) + output)
+            while reply and not waiter[0].is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.read_lock.acquire(timeout=remaining):
+                    raise socket.timeout("Judge did not respond")
+                try:
+                    if not waiter[0].is_set():
+                        self._io(self._read_reply, deadline - time.monotonic())
+                finally:
+                    self.read_lock.release()
+        finally:
+            self.pending.pop(id, None)
+        return waiter[1]
 
+    def _io(self, function, *args):
+        try:
+            return function(*args)
+        except BaseException:
+            # A half-read or half-written packet leaves the stream unusable
+            self.close()
+            raise
+
+    def close(self):
+        self.broken = True
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+_connection = None
+_connection_pid = None
+_connection_lock = threading.Lock()
+
+
+def _get_connection():
+    global _connection, _connection_pid
+    with _connection_lock:
+        # A forked worker must not share its parent's socket
+        if _connection is None or _connection.broken or _connection_pid != os.getpid():
+            _connection = BridgeConnection(
+                settings.BRIDGED_DJANGO_CONNECT or settings.BRIDGED_DJANGO_ADDRESS[0],
+                getattr(settings, "BRIDGED_DJANGO_TIMEOUT_SECONDS", 10),
+            )
+            _connection_pid = os.getpid()
+        return _connection
+
+
+def judge_request(packet, reply=True):
+    connection = _get_connection()
+    try:
+        return connection.request(packet, reply)
+    except ConnectionError:
+        # The bridge restarted since the connection was made. Requests are
+        # safe to repeat: the bridge does not queue a submission twice.
+        return _get_connection().request(packet, reply)
+
+
+OFFICIAL_CONTEST_PRIORITY = 0
+PRIVATE_CONTEST_PRIORITY = 1
+DEFAULT_PRIORITY = 2
+REJUDGE_PRIORITY = 3
+BATCH_REJUDGE_PRIORITY = 4
+
+# Limits of one submission-batch-request, well under the bridge's packet limit
+BATCH_MAX_SUBMISSIONS = 100
+BATCH_MAX_SOURCE_LENGTH = 2 * 1024 * 1024
 
-def judge_submission(submission, rejudge=False, batch_rejudge=False, judge_id=None):
-    from .models import ContestSubmission, Submission, SubmissionTestCase
 
-    OFFICIAL_CONTEST_PRIORITY = 0
-    PRIVATE_CONTEST_PRIORITY = 1
-    DEFAULT_PRIORITY = 2
-    REJUDGE_PRIORITY = 3
-    BATCH_REJUDGE_PRIORITY = 4
+def _prepare_submissions(submissions, rejudge, batch_rejudge, judge_id):
+    """
+    Reset ``submissions`` for judging, with one UPDATE for all of them, and
+    return the bridge's view of those that are not being judged already.
+    """
+    from django.db.models import BooleanField, Case, F, Value, When
+
+    from .models import (
+        ContestSubmission,
+        Submission,
+        SubmissionTestCase,
+        SubmissionTestCasePack,
+    )
+    from .models.submission import update_submission_results
+
+    ids = [submission.id for submission in submissions]
+    priorities = {}
+    pretested = {}
+    for submission_id, *contest_info in ContestSubmission.objects.filter(
+        submission_id__in=ids
+    ).values_list(
+        "submission_id",
+        "problem__contest__run_pretests_only",
+        "problem__is_pretested",
+        "problem__contest__is_private",
+        "problem__contest__is_organization_private",
+        "participation__virtual",
+    ):
+        # This is set proactively; it might get unset in judgecallback's on_grading_begin if the problem doesn't
+        # actually have pretests stored on the judge.
+        pretested[submission_id] = all(contest_info[:2])
+        is_private, is_organization_private, virtual = contest_info[2:5]
+        if virtual:
+            priorities[submission_id] = DEFAULT_PRIORITY
+        elif is_private or is_organization_private:
+            priorities[submission_id] = PRIVATE_CONTEST_PRIORITY
+        else:
+            priorities[submission_id] = OFFICIAL_CONTEST_PRIORITY
 
     updates = {
         "time": None,
@@ -80,31 +200,15 @@ def judge_submission(submission, rejudge=False, batch_rejudge=False, judge_id=No
         "was_rejudged": rejudge,
         "status": "QU",
     }
-    try:
-        # This is set proactively; it might get unset in judgecallback's on_grading_begin if the problem doesn't
-        # actually have pretests stored on the judge.
-        contest_info = ContestSubmission.objects.filter(
-            submission=submission
-        ).values_list(
-            "problem__contest__run_pretests_only",
-            "problem__is_pretested",
-            "problem__contest__is_private",
-            "problem__contest__is_organization_private",
-            "participation__virtual",
-        )[
-            0
-        ]
-        updates["is_pretested"] = all(contest_info[:2])
-    except IndexError:
-        priority = DEFAULT_PRIORITY
-    else:
-        is_private, is_organization_private, virtual = contest_info[2:5]
-        if virtual:
-            priority = DEFAULT_PRIORITY
-        elif is_private or is_organization_private:
-            priority = PRIVATE_CONTEST_PRIORITY
-        else:
-            priority = OFFICIAL_CONTEST_PRIORITY
+    if pretested:
+        updates["is_pretested"] = Case(
+            *(
+                When(id=submission_id, then=Value(value))
+                for submission_id, value in pretested.items()
+            ),
+            default=F("is_pretested"),
+            output_field=BooleanField(),
+        )
 
     # This should prevent double rejudge issues by permitting only the judging of
     # QU (which is the initial state) and D (which is the final state).
@@ -114,20 +218,24 @@ def judge_submission(submission, rejudge=False, batch_rejudge=False, judge_id=No
     # as that would prevent people from knowing a submission is being scheduled for rejudging.
     # It is worth noting that this mechanism does not prevent a new rejudge from being scheduled
     # while already queued, but that does not lead to data corruption.
-    if (
-        not Submission.objects.filter(id=submission.id)
-        .exclude(status__in=("P", "G"))
-        .update(**updates)
-    ):
-        return False
+    reset = set(
+        update_submission_results(
+            Submission.objects.filter(id__in=ids).exclude(status__in=("P", "G")),
+            **updates,
+        )
+    )
+    if not reset:
+        return []
 
-    SubmissionTestCase.objects.filter(submission_id=submission.id).delete()
-    delete_submission_result(submission.id)
+    SubmissionTestCase.objects.filter(submission_id__in=reset).delete()
+    SubmissionTestCasePack.objects.filter(submission_id__in=reset).delete()
+    for submission_id in reset:
+        delete_submission_result(submission_id)
 
-    try:
-        response = judge_request(
+    return [
+        (
+            submission,
             {
-                "name": "submission-request",
                 "submission-id": submission.id,
                 "problem-id": submission.problem.code,
                 "language": submission.language.key,
@@ -137,25 +245,107 @@ def judge_submission(submission, rejudge=False, batch_rejudge=False, judge_id=No
                 "priority": (
                     BATCH_REJUDGE_PRIORITY
                     if batch_rejudge
-                    else REJUDGE_PRIORITY if rejudge else priority
+                    else (
+                        REJUDGE_PRIORITY
+                        if rejudge
+                        else priorities.get(submission.id, DEFAULT_PRIORITY)
+                    )
                 ),
-            }
+            },
         )
+        for submission in submissions
+        if submission.id in reset
+    ]
+
+
+def _mark_internal_error(submission_ids):
+    from .models import Submission
+    from .models.submission import update_submission_result
+
+    update_submission_result(
+        Submission.objects.filter(id__in=submission_ids), status="IE", result="IE"
+    )
+
+
+def judge_submission(submission, rejudge=False, batch_rejudge=False, judge_id=None):
+    prepared = _prepare_submissions([submission], rejudge, batch_rejudge, judge_id)
+    if not prepared:
+        return False
+    data = prepared[0][1]
+
+    try:
+        response = judge_request({"name": "submission-request", **data})
     except BaseException:
         logger.exception("Failed to send request to judge")
-        Submission.objects.filter(id=submission.id).update(status="IE", result="IE")
+        _mark_internal_error([submission.id])
         success = False
     else:
         if (
             response["name"] != "submission-received"
             or response["submission-id"] != submission.id
         ):
-            Submission.objects.filter(id=submission.id).update(status="IE", result="IE")
+            _mark_internal_error([submission.id])
         _post_update_submission(submission)
         success = True
     return success
 
 
+def _send_batch(submissions, batch):
+    try:
+        response = judge_request(
+            {"name": "submission-batch-request", "submissions": batch}
+        )
+    except BaseException:
+        logger.exception("Failed to send batch request to judge")
+        _mark_internal_error([data["submission-id"] for data in batch])
+        return 0
+
+    received = set()
+    if response["name"] == "submission-batch-received":
+        received.update(response["submission-ids"])
+    _mark_internal_error(
+        [
+            data["submission-id"]
+            for data in batch
+            if data["submission-id"] not in received
+        ]
+    )
+    for submission in submissions:
+        _post_update_submission(submission)
+    return len(received)
+
+
+def judge_submissions(submissions, rejudge=False, batch_rejudge=False, judge_id=None):
+    """
+    Judge many submissions with as few bridge round trips and database
+    writes as possible. Returns the number the bridge queued.
+    """
+    queued = 0
+    pending = []
+    batch = []
+    source_length = 0
+    submissions = iter(submissions)
+    while True:
+        chunk = list(itertools.islice(submissions, BATCH_MAX_SUBMISSIONS))
+        if not chunk:
+            break
+        for submission, data in _prepare_submissions(
+            chunk, rejudge, batch_rejudge, judge_id
+        ):
+            if batch and (
+                len(batch) >= BATCH_MAX_SUBMISSIONS
+                or source_length + len(data["source"]) > BATCH_MAX_SOURCE_LENGTH
+            ):
+                queued += _send_batch(pending, batch)
+                pending, batch, source_length = [], [], 0
+            pending.append(submission)
+            batch.append(data)
+            source_length += len(data["source"])
+    if batch:
+        queued += _send_batch(pending, batch)
+    return queued
+
+
 def validate_testcases(problem_code, validate_id):
     try:
         response = judge_request(
@@ -171,25 +361,41 @@ def validate_testcases(problem_code, validate_id):
     return response.get("name") == "validate-received"
 
 
-def notify_problem_update():
+def notify_problem_update(problem=None):
     """Notify all connected judges to rescan their problem list.
 
-    Called after problem data changes (init.yml regenerated).
+    Called after problem data changes (init.yml regenerated). With a
+    ``problem`` code, judges that understand it only reload that problem.
     Non-critical: if the bridge is unreachable, judges will pick up
     changes on next restart or manual trigger.
     """
+    packet = {"name": "update-problems"}
+    if problem is not None:
+        packet["problem"] = problem
     try:
-        judge_request({"name": "update-problems"})
+        judge_request(packet)
     except Exception:
         logger.exception("Failed to send problem update notification to bridge")
 
 
-def bridge_status(detail=False, include_problems=False):
+def notify_limits_update(problem):
+    """Make the bridge forget the cached limits of ``problem``.
+
+    Non-critical: the bridge reloads them after BRIDGED_PROBLEM_LIMITS_TTL.
+    """
+    try:
+        judge_request({"name": "invalidate-limits", "problem": problem})
+    except Exception:
+        logger.exception("Failed to send limits invalidation to bridge")
+
+
+def bridge_status(detail=False, include_problems=False, metrics=False):
     return judge_request(
         {
             "name": "bridge-status",
             "detail": detail,
             "include-problems": include_problems,
+            "metrics": metrics,
         }
     )
 
@@ -203,6 +409,7 @@ def disconnect_judge(judge, force=False):
 
 def abort_submission(submission):
     from .models import Submission
+    from .models.submission import update_submission_result
 
     response = judge_request(
         {"name": "terminate-submission", "submission-id": submission.id}
@@ -210,7 +417,9 @@ def abort_submission(submission):
     # This defaults to true, so that in the case the JudgeList fails to remove the submission from the queue,
     # and returns a bad-request, the submission is not falsely shown as "Aborted" when it will still be judged.
     if not response.get("judge-aborted", True):
-        Submission.objects.filter(id=submission.id).update(status="AB", result="AB")
+        update_submission_result(
+            Submission.objects.filter(id=submission.id), status="AB", result="AB"
+        )
         event.post(
             "sub_%s" % Submission.get_id_secret(submission.id),
             {"type": "aborted-submission"},
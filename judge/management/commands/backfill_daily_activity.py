@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from judge.models import Profile, Submission, UserDailyActivity
+from judge.models.submission import (
+    get_submission_date_counts,
+    get_user_min_submission_year,
+    get_user_submission_dates,
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuild UserDailyActivity rows from submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of users rebuilt per transaction",
+        )
+        parser.add_argument(
+            "--user",
+            action="append",
+            help="Only rebuild these usernames (default: all users)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        profiles = Profile.objects.order_by("id")
+        if options["user"]:
+            profiles = profiles.filter(user__username__in=options["user"])
+        user_ids = list(profiles.values_list("id", flat=True))
+
+        rows = 0
+        for i in range(0, len(user_ids), batch_size):
+            batch = user_ids[i : i + batch_size]
+            with transaction.atomic():
+                # Delete first, so the users' rows stay locked until commit: a
+                # submission recorded meanwhile waits and then adds itself to
+                # the rebuilt rows, and one recorded before is counted below.
+                UserDailyActivity.objects.filter(user_id__in=batch).delete()
+                activity = [
+                    UserDailyActivity(user_id=user_id, date=date, count=count)
+                    for user_id, date, count in get_submission_date_counts(
+                        Submission.objects.filter(user_id__in=batch)
+                    )
+                ]
+                UserDailyActivity.objects.bulk_create(activity, batch_size=1000)
+            get_user_submission_dates.dirty_multi([(user_id,) for user_id in batch])
+            get_user_min_submission_year.dirty_multi([(user_id,) for user_id in batch])
+            rows += len(activity)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {rows} daily activity rows for {len(user_ids)} users."
+            )
+        )
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from judge.bridge.journal import QueueJournal
+
+
+class Command(BaseCommand):
+    help = "Time the bridge queue journal writes made for each submission"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--submissions",
+            type=int,
+            default=10000,
+            help="Number of submissions to journal (default: 10000)",
+        )
+        parser.add_argument(
+            "--queued",
+            type=int,
+            default=500,
+            help="Submissions kept waiting in the queue (default: 500)",
+        )
+
+    def run(self, path, submissions, queued, fsync):
+        journal = QueueJournal(path, fsync=fsync)
+        journal.replay()
+        start = time.perf_counter()
+        for id in range(submissions):
+            journal.enqueue(id, "aplusb", "CPP17", None, 2, id % 100)
+            if id >= queued:
+                done = id - queued
+                journal.dispatch(done)
+                journal.finish(done)
+        elapsed = time.perf_counter() - start
+        journal.close()
+
+        start = time.perf_counter()
+        live = QueueJournal(path).replay()
+        replay = time.perf_counter() - start
+        return elapsed, len(live), replay
+
+    def handle(self, *args, **options):
+        submissions = options["submissions"]
+        for fsync in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                elapsed, live, replay = self.run(
+                    os.path.join(directory, "queue.journal"),
+                    submissions,
+                    options["queued"],
+                    fsync,
+                )
+            self.stdout.write(
+                "fsync=%-5s %8.1f us per submission, replayed %d in %.1f ms"
+                % (fsync, elapsed / submissions * 1e6, live, replay * 1e3)
+            )
@@ -0,0 +1,86 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from judge.models import Contest
+from judge.views.contests import (
+    RANKING_PAGE_SIZE,
+    build_ranking_profiles,
+    get_contest_problems,
+    get_ranking_queryset,
+)
+
+
+class Command(BaseCommand):
+    help = "Time rendering a contest ranking page with and without the row cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("key", help="key of the contest to benchmark")
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Number of renders per mode (default: 20)",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=RANKING_PAGE_SIZE,
+            help=f"Rows per page (default: {RANKING_PAGE_SIZE})",
+        )
+        parser.add_argument(
+            "--final",
+            action="store_true",
+            help="Render the final (unfrozen) ranking",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            contest = Contest.objects.get(key=options["key"])
+        except Contest.DoesNotExist:
+            raise CommandError("contest '%s' does not exist" % options["key"])
+
+        show_final = options["final"]
+        iterations = options["iterations"]
+        problems = get_contest_problems(contest)
+        participations = list(
+            get_ranking_queryset(contest, show_final=show_final).select_related(
+                "user", "rating"
+            )[: options["page_size"]]
+        )
+        if not participations:
+            raise CommandError("contest '%s' has no participations" % contest.key)
+
+        def render(use_cache):
+            start = time.perf_counter()
+            build_ranking_profiles(
+                contest, problems, participations, show_final, use_cache=use_cache
+            )
+            return time.perf_counter() - start
+
+        uncached = [render(False) for _ in range(iterations)]
+        cold = []
+        for _ in range(iterations):
+            # Bump the in-memory versions so every row misses the cache
+            for participation in participations:
+                participation.result_version += 1
+            cold.append(render(True))
+        warm = [render(True) for _ in range(iterations)]
+        self.stdout.write(
+            f"{len(participations)} rows x {len(problems)} problems, "
+            f"{iterations} iterations"
+        )
+        for name, timings in (
+            ("uncached", uncached),
+            ("cold cache", cold),
+            ("warm cache", warm),
+        ):
+            timings.sort()
+            self.stdout.write(
+                f"  {name:<10}  median {timings[len(timings) // 2] * 1000:8.2f} ms"
+                f"  min {timings[0] * 1000:8.2f} ms"
+            )
+        speedup = sorted(uncached)[iterations // 2] / max(
+            sorted(warm)[iterations // 2], 1e-9
+        )
+        self.stdout.write(self.style.SUCCESS(f"Warm cache speedup: {speedup:.1f}x"))
@@ -0,0 +1,78 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from judge.utils.packed_test_cases import (
+    STATUSES,
+    PackedTestCase,
+    pack_test_cases,
+    unpack_test_cases,
+)
+
+# Approximate InnoDB size of a SubmissionTestCase row: the int id, submission
+# and case, the status, four doubles, the batch and the row header, plus its
+# (submission, case) unique index entry
+ROW_BYTES = (4 + 4 + 4 + 4 + 4 * 8 + 4 + 20) + (4 + 4 + 4 + 14)
+
+
+class Command(BaseCommand):
+    help = "Compare the size and decode time of test case rows and packs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cases",
+            type=int,
+            default=50,
+            help="Test cases per submission (default: 50)",
+        )
+        parser.add_argument(
+            "--submissions",
+            type=int,
+            default=1000,
+            help="Number of submissions to pack (default: 1000)",
+        )
+
+    def make_cases(self, count, batched):
+        status = random.choice(STATUSES[:3])
+        return [
+            PackedTestCase(
+                case,
+                "AC" if case < count // 2 else status,
+                round(random.uniform(0, 1), 3),
+                float(random.randrange(1024, 262144)),
+                1.0,
+                1.0,
+                case // 10 + 1 if batched else None,
+            )
+            for case in range(1, count + 1)
+        ]
+
+    def handle(self, *args, **options):
+        count = options["cases"]
+        submissions = options["submissions"]
+        for batched in (False, True):
+            samples = [self.make_cases(count, batched) for _ in range(submissions)]
+
+            start = time.perf_counter()
+            packs = [pack_test_cases(cases) for cases in samples]
+            pack_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for data in packs:
+                unpack_test_cases(data)
+            unpack_time = time.perf_counter() - start
+
+            packed_bytes = sum(map(len, packs)) / (submissions * count)
+            self.stdout.write(
+                "batched=%-5s rows %5.1f B/case, packed %5.1f B/case (%.1fx), "
+                "pack %6.1f us, unpack %6.1f us per submission"
+                % (
+                    batched,
+                    ROW_BYTES,
+                    packed_bytes,
+                    ROW_BYTES / packed_bytes,
+                    pack_time / submissions * 1e6,
+                    unpack_time / submissions * 1e6,
+                )
+            )
@@ -55,6 +55,15 @@ class Command(BaseCommand):
             self._print_detail(status, include_problems=options["include_problems"])
 
     def _print_detail(self, status, include_problems=False):
+        scheduling = status.get("scheduling")
+        if scheduling:
+            self.stdout.write(
+                "scheduling: policy=%(policy)s known_costs=%(known-costs)s "
+                "wait_samples=%(wait-samples)s "
+                "mean_predicted_wait=%(mean-predicted-wait)s "
+                "mean_actual_wait=%(mean-actual-wait)s "
+                "mean_wait_error=%(mean-wait-error)s" % scheduling
+            )
         self.stdout.write("running users: %s" % status.get("running-users", []))
         self.stdout.write(
             "maps: node=%d submissions=%d validations=%d"
@@ -103,6 +112,12 @@ class Command(BaseCommand):
                     "problem=%(problem)s language=%(language)s judge_id=%(judge-id)s "
                     "user=%(user-id)s user_tier=%(user-tier)s "
                     "source_bytes=%(source-bytes)s" % item
+                    + (
+                        " expected_cost=%(expected-cost).2f "
+                        "predicted_wait=%(predicted-wait).2f waited=%(waited).2f" % item
+                        if "expected-cost" in item
+                        else ""
+                    )
                 )
             else:
                 self.stdout.write(
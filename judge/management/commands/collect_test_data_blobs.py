@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from judge.utils.problem_data_blobs import collect_blobs
+
+
+class Command(BaseCommand):
+    help = "Delete test data blobs that no problem references anymore"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Collected %d blobs" % collect_blobs())
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from judge.sitemap import generate_sitemaps
+
+
+class Command(BaseCommand):
+    help = "Regenerates the changed sitemap segments and the sitemap index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--protocol", default="https", help="URL scheme")
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="rewrite every segment, even unchanged ones",
+        )
+
+    def handle(self, *args, **options):
+        written = generate_sitemaps(
+            protocol=options["protocol"], force=options["force"]
+        )
+        self.stdout.write("Wrote %d sitemap segments" % written)
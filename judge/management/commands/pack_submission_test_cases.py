@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from judge import contest_format
+from judge.models import Submission, SubmissionTestCase, SubmissionTestCasePack
+from judge.utils.packed_test_cases import store_packed_test_cases
+
+
+class Command(BaseCommand):
+    help = "Replace the SubmissionTestCase rows of graded submissions by packs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of submissions packed per query batch",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Stop after packing this many submissions (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        limit = options["limit"]
+        # Contest formats that score from the rows keep them
+        row_formats = [
+            name
+            for name, format_class in contest_format.formats.items()
+            if format_class.uses_test_case_rows
+        ]
+        submissions = (
+            Submission.objects.filter(
+                status="D", test_case_pack__isnull=True, test_cases__isnull=False
+            )
+            .filter(
+                Q(contest_object__isnull=True)
+                | ~Q(contest_object__format_name__in=row_formats)
+            )
+            .distinct()
+            .order_by("id")
+        )
+
+        packed = cases = 0
+        last_id = 0
+        while limit is None or packed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - packed)
+            ids = list(
+                submissions.filter(id__gt=last_id).values_list("id", flat=True)[:size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                # Re-check the submissions under lock: a rejudge started since
+                # the ids were read resets the status and grades new rows
+                locked = set(
+                    Submission.objects.select_for_update()
+                    .filter(id__in=ids, status="D")
+                    .values_list("id", flat=True)
+                )
+                locked.difference_update(
+                    SubmissionTestCasePack.objects.filter(
+                        submission_id__in=locked
+                    ).values_list("submission_id", flat=True)
+                )
+                rows = {}
+                for case in SubmissionTestCase.objects.filter(
+                    submission_id__in=locked
+                ).only(
+                    "submission_id",
+                    "case",
+                    "status",
+                    "time",
+                    "memory",
+                    "points",
+                    "total",
+                    "batch",
+                ):
+                    rows.setdefault(case.submission_id, []).append(case)
+                for id in locked:
+                    store_packed_test_cases(id, rows.get(id, ()))
+                    cases += len(rows.get(id, ()))
+            packed += len(locked)
+            last_id = ids[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Packed {cases} test cases of {packed} submissions.")
+        )
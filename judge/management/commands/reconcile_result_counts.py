@@ -0,0 +1,105 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from judge.models import Submission, SubmissionResultCount
+
+
+class Command(BaseCommand):
+    help = "Rebuild SubmissionResultCount rows from submissions to fix any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show mismatches without updating",
+        )
+        parser.add_argument(
+            "--scope",
+            choices=list(SubmissionResultCount.SCOPE_FIELDS),
+            action="append",
+            help="Only reconcile these scopes (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        scopes = options["scope"] or list(SubmissionResultCount.SCOPE_FIELDS)
+
+        mismatched = 0
+        for scope in scopes:
+            field = SubmissionResultCount.SCOPE_FIELDS[scope]
+
+            # Correct count for each (object, result) pair
+            expected = {
+                (object_id, result): count
+                for object_id, result, count in Submission.objects.filter(
+                    **{field + "__isnull": False, "result__isnull": False}
+                )
+                .values_list(field, "result")
+                .annotate(count=Count("id"))
+                .values_list(field, "result", "count")
+                .order_by()
+            }
+            rows = SubmissionResultCount.objects.filter(scope=scope).values_list(
+                "id", "object_id", "result", "shard", "count"
+            )
+            # Sharded scopes have several rows per (object, result); the
+            # corrected count goes to shard 0 and the others are zeroed.
+            current = {}
+            for id, object_id, result, shard, count in rows:
+                row = current.setdefault((object_id, result), [None, 0, []])
+                if shard == 0:
+                    row[0] = id
+                else:
+                    row[2].append(id)
+                row[1] += count
+
+            to_create = []
+            for key, count in expected.items():
+                row = current.get(key)
+                if row is not None and row[1] == count:
+                    continue
+                mismatched += 1
+                if dry_run:
+                    self.stdout.write(
+                        f"  {scope} {key[0]} {key[1]}: "
+                        f"{row[1] if row else 0} -> {count}"
+                    )
+                    continue
+                if row is not None:
+                    SubmissionResultCount.objects.filter(id__in=row[2]).update(count=0)
+                if row is None or row[0] is None:
+                    to_create.append(
+                        SubmissionResultCount(
+                            scope=scope, object_id=key[0], result=key[1], count=count
+                        )
+                    )
+                else:
+                    SubmissionResultCount.objects.filter(id=row[0]).update(count=count)
+
+            # Rows with no matching submissions left
+            stale = [
+                (key, row)
+                for key, row in current.items()
+                if key not in expected and row[1] != 0
+            ]
+            mismatched += len(stale)
+            if dry_run:
+                for key, row in stale:
+                    self.stdout.write(f"  {scope} {key[0]} {key[1]}: {row[1]} -> 0")
+            else:
+                SubmissionResultCount.objects.bulk_create(to_create, batch_size=1000)
+                SubmissionResultCount.objects.filter(
+                    id__in=[
+                        id
+                        for _, row in stale
+                        for id in [row[0]] + row[2]
+                        if id is not None
+                    ]
+                ).update(count=0)
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(f"Dry run: {mismatched} mismatched counts found.")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {mismatched} result counts."))
@@ -1,19 +1,17 @@
-import os
 import shutil
 import sys
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.template.loader import get_template
-from django.utils import translation
 
-from judge.models import Problem, ProblemTranslation
+from judge.models import Problem
 from judge.pdf_problems import (
     DefaultPdfMaker,
     PhantomJSPdfMaker,
     PuppeteerPDFRender,
     SeleniumPDFRender,
     SlimerJSPdfMaker,
+    load_problem_pdf,
 )
 
 
@@ -69,34 +67,9 @@ class Command(BaseCommand):
             print("Bad problem code")
             return
 
-        try:
-            trans = problem.translations.get(language=options["language"])
-        except ProblemTranslation.DoesNotExist:
-            trans = None
-
         directory = options["directory"]
-        with options["engine"](
-            directory, clean_up=directory is None
-        ) as maker, translation.override(options["language"]):
-            problem_name = problem.name if trans is None else trans.name
-            maker.html = (
-                get_template("problem/raw.html")
-                .render(
-                    {
-                        "problem": problem,
-                        "problem_name": problem_name,
-                        "description": (
-                            problem.description if trans is None else trans.description
-                        ),
-                        "url": "",
-                    }
-                )
-                .replace('"//', '"https://')
-                .replace("'//", "'https://")
-            )
-            maker.title = problem_name
-            for file in "style.css":
-                maker.load(file, os.path.join(settings.DMOJ_RESOURCES, file))
+        with options["engine"](directory, clean_up=directory is None) as maker:
+            load_problem_pdf(maker, problem, options["language"])
             maker.make(debug=True)
             if not maker.success:
                 print(maker.log, file=sys.stderr)
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from judge.models import Contest, ContestSimilarity
+from judge.tasks.contest import find_contest_similarities
+
+
+class Command(BaseCommand):
+    help = "Checks for duplicate code using the local similarity engine"
+
+    def add_arguments(self, parser):
+        parser.add_argument("contest", help="the id of the contest")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="number of processes comparing problems in parallel",
+        )
+
+    def handle(self, *args, **options):
+        contest = Contest.objects.get(key=options["contest"])
+        find_contest_similarities(contest, workers=options["workers"])
+
+        results = (
+            ContestSimilarity.objects.filter(contest=contest)
+            .select_related("problem", "first__user__user", "second__user__user")
+            .order_by("problem__code", "-first_percentage")
+        )
+        problem = None
+        for result in results:
+            if result.problem != problem:
+                problem = result.problem
+                self.stdout.write(
+                    "========== %s / %s ==========" % (problem.code, problem.name)
+                )
+            self.stdout.write(
+                "%s: %s (%d) ~ %s (%d): %.0f%%"
+                % (
+                    result.language,
+                    result.first.user.username,
+                    result.first_id,
+                    result.second.user.username,
+                    result.second_id,
+                    result.percentage,
+                )
+            )
+        if problem is None:
+            self.stdout.write("<no similar submissions>")
@@ -7,6 +7,7 @@ import yaml
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
+from django.db.models import F
 from django.utils import timezone
 
 from judge.models import (
@@ -412,7 +413,13 @@ class Command(BaseCommand):
 
         # Reset participation scores
         participations = ContestParticipation.objects.filter(contest=contest)
-        participations.update(score=0, cumtime=0, tiebreaker=0, format_data=None)
+        participations.update(
+            score=0,
+            cumtime=0,
+            tiebreaker=0,
+            format_data=None,
+            result_version=F("result_version") + 1,
+        )
         self.stdout.write(f"  Reset {participations.count()} participations")
 
         # Update contest start time to now
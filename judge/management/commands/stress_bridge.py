@@ -6,6 +6,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.db import close_old_connections
 
+from judge.bridge.metrics import histogram_quantile
 from judge.judgeapi import bridge_status
 from judge.models import Judge, Language, Problem, Profile, Submission, SubmissionSource
 
@@ -61,6 +62,11 @@ class Command(BaseCommand):
             action="store_true",
             help="Keep created submissions instead of deleting them after the run.",
         )
+        parser.add_argument(
+            "--metrics",
+            action="store_true",
+            help="Print the bridge's histograms and packet rates for the run at the end.",
+        )
         parser.add_argument(
             "--force",
             action="store_true",
@@ -130,6 +136,7 @@ class Command(BaseCommand):
                     % options["expect_judges"]
                 )
         self.stdout.write("stress target: %s / %s" % (problem.code, language.key))
+        before_metrics = self._get_metrics() if options["metrics"] else None
 
         ids = []
         started = time.monotonic()
@@ -203,6 +210,8 @@ class Command(BaseCommand):
         self.stdout.write("max bridge queue: %d" % max_queued)
         self.stdout.write("max bridge active: %d" % max_active)
         self._print_bridge_status("after")
+        if before_metrics is not None:
+            self._print_metrics(before_metrics, self._get_metrics(), elapsed)
 
         if timed_out and not options["keep_submissions"]:
             self.stdout.write(
@@ -283,3 +292,59 @@ class Command(BaseCommand):
             )
         )
         return status
+
+    def _get_metrics(self):
+        try:
+            return bridge_status(metrics=True).get("metrics", {})
+        except Exception as e:
+            self.stdout.write("bridge metrics: unreachable (%s)" % e)
+            return {}
+
+    @staticmethod
+    def _label_key(labels):
+        return tuple(sorted(labels.items()))
+
+    def _print_metrics(self, before, after, elapsed):
+        self.stdout.write("bridge metrics for this run:")
+        for name, metric in sorted(after.items()):
+            previous = before.get(name, {}).get("values")
+            if metric["type"] == "counter":
+                previous = {
+                    self._label_key(labels): value for labels, value in previous or []
+                }
+                for labels, value in metric["values"]:
+                    value -= previous.get(self._label_key(labels), 0)
+                    if value:
+                        self.stdout.write(
+                            "  %s %s: %d (%.2f/s)"
+                            % (name, labels, value, value / max(elapsed, 1e-9))
+                        )
+                continue
+
+            buckets = metric["values"]["buckets"]
+            previous = {
+                self._label_key(series["labels"]): series
+                for series in (previous or {}).get("series", [])
+            }
+            for series in metric["values"]["series"]:
+                old = previous.get(self._label_key(series["labels"]))
+                counts = series["counts"]
+                total = series["sum"]
+                if old is not None:
+                    counts = [new - prev for new, prev in zip(counts, old["counts"])]
+                    total -= old["sum"]
+                count = sum(counts)
+                if not count:
+                    continue
+                self.stdout.write(
+                    "  %s %s: count=%d mean=%.4fs p50=%.4fs p95=%.4fs p99=%.4fs"
+                    % (
+                        name,
+                        series["labels"],
+                        count,
+                        total / count,
+                        histogram_quantile(buckets, counts, 0.5),
+                        histogram_quantile(buckets, counts, 0.95),
+                        histogram_quantile(buckets, counts, 0.99),
+                    )
+                )
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0269_remove_submissiontestcase_result_details"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubmissionResultCount",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(
+                        choices=[
+                            ("P", "problem"),
+                            ("U", "user"),
+                            ("C", "contest"),
+                            ("L", "language"),
+                        ],
+                        max_length=1,
+                        verbose_name="scope",
+                    ),
+                ),
+                ("object_id", models.IntegerField(verbose_name="object ID")),
+                (
+                    "result",
+                    models.CharField(
+                        choices=[
+                            ("AC", "Accepted"),
+                            ("WA", "Wrong Answer"),
+                            ("TLE", "Time Limit Exceeded"),
+                            ("MLE", "Memory Limit Exceeded"),
+                            ("OLE", "Output Limit Exceeded"),
+                            ("IR", "Invalid Return"),
+                            ("RTE", "Runtime Error"),
+                            ("CE", "Compile Error"),
+                            ("IE", "Internal Error"),
+                            ("SC", "Short circuit"),
+                            ("AB", "Aborted"),
+                        ],
+                        max_length=3,
+                        verbose_name="result",
+                    ),
+                ),
+                ("count", models.IntegerField(default=0, verbose_name="count")),
+            ],
+            options={
+                "verbose_name": "submission result count",
+                "verbose_name_plural": "submission result counts",
+                "unique_together": {("scope", "object_id", "result")},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0271_userdailyactivity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contestparticipation",
+            name="result_version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Bumped whenever the results are recomputed.",
+                verbose_name="result version",
+            ),
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0272_contestparticipation_result_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubmissionFingerprint",
+            fields=[
+                (
+                    "submission",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="fingerprint",
+                        serialize=False,
+                        to="judge.submission",
+                        verbose_name="associated submission",
+                    ),
+                ),
+                (
+                    "family",
+                    models.CharField(max_length=16, verbose_name="language family"),
+                ),
+                (
+                    "fingerprints",
+                    models.BinaryField(verbose_name="winnowed fingerprints"),
+                ),
+            ],
+            options={
+                "verbose_name": "submission fingerprint",
+                "verbose_name_plural": "submission fingerprints",
+            },
+        ),
+        migrations.CreateModel(
+            name="ContestSimilarity",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "language",
+                    models.CharField(max_length=16, verbose_name="language family"),
+                ),
+                (
+                    "first_percentage",
+                    models.FloatField(
+                        verbose_name="share of the first submission matched"
+                    ),
+                ),
+                (
+                    "second_percentage",
+                    models.FloatField(
+                        verbose_name="share of the second submission matched"
+                    ),
+                ),
+                (
+                    "matched",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="matched fingerprints"
+                    ),
+                ),
+                (
+                    "contest",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similarities",
+                        to="judge.contest",
+                        verbose_name="contest",
+                    ),
+                ),
+                (
+                    "first",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="judge.submission",
+                        verbose_name="first submission",
+                    ),
+                ),
+                (
+                    "problem",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="judge.problem",
+                        verbose_name="problem",
+                    ),
+                ),
+                (
+                    "second",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="judge.submission",
+                        verbose_name="second submission",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "contest similarity result",
+                "verbose_name_plural": "contest similarity results",
+            },
+        ),
+    ]
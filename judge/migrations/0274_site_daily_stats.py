@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0273_contest_similarity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SiteStatWatermark",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "metric",
+                    models.CharField(max_length=32, unique=True, verbose_name="metric"),
+                ),
+                (
+                    "last_id",
+                    models.BigIntegerField(default=0, verbose_name="last rolled up ID"),
+                ),
+            ],
+            options={
+                "verbose_name": "site statistic watermark",
+                "verbose_name_plural": "site statistic watermarks",
+            },
+        ),
+        migrations.CreateModel(
+            name="SiteDailyStat",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("metric", models.CharField(max_length=32, verbose_name="metric")),
+                ("date", models.DateField(verbose_name="date")),
+                ("count", models.IntegerField(default=0, verbose_name="count")),
+            ],
+            options={
+                "verbose_name": "site daily statistic",
+                "verbose_name_plural": "site daily statistics",
+                "unique_together": {("metric", "date")},
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0274_site_daily_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TestDataBlob",
+            fields=[
+                (
+                    "digest",
+                    models.CharField(
+                        max_length=64,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="SHA-256",
+                    ),
+                ),
+                ("size", models.BigIntegerField(verbose_name="size")),
+                (
+                    "created",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created"),
+                ),
+            ],
+            options={
+                "verbose_name": "test data blob",
+                "verbose_name_plural": "test data blobs",
+            },
+        ),
+        migrations.CreateModel(
+            name="ProblemTestDataFile",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, verbose_name="file name")),
+                (
+                    "problem",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="test_data_files",
+                        to="judge.problem",
+                        verbose_name="problem",
+                    ),
+                ),
+                (
+                    "blob",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="files",
+                        to="judge.testdatablob",
+                        verbose_name="blob",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "problem test data file",
+                "verbose_name_plural": "problem test data files",
+                "unique_together": {("problem", "name")},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0275_test_data_blobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SitemapSegment",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("section", models.CharField(max_length=32, verbose_name="section")),
+                ("number", models.IntegerField(verbose_name="segment number")),
+                (
+                    "url_count",
+                    models.IntegerField(default=0, verbose_name="number of URLs"),
+                ),
+                ("digest", models.CharField(max_length=16, verbose_name="digest")),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="updated"),
+                ),
+            ],
+            options={
+                "verbose_name": "sitemap segment",
+                "verbose_name_plural": "sitemap segments",
+                "unique_together": {("section", "number")},
+            },
+        ),
+    ]
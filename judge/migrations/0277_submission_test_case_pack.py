@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0276_sitemap_segments"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubmissionTestCasePack",
+            fields=[
+                (
+                    "submission",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="test_case_pack",
+                        serialize=False,
+                        to="judge.submission",
+                        verbose_name="associated submission",
+                    ),
+                ),
+                ("data", models.BinaryField(verbose_name="packed test cases")),
+            ],
+            options={
+                "verbose_name": "submission test case pack",
+                "verbose_name_plural": "submission test case packs",
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0277_submission_test_case_pack"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contestsubmission",
+            name="attempt",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Position of this submission among the participant's submissions to the problem, not counting compile and internal errors.",
+                null=True,
+                verbose_name="attempt number",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0278_contestsubmission_attempt"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="submissionresultcount",
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name="submissionresultcount",
+            name="shard",
+            field=models.PositiveSmallIntegerField(default=0, verbose_name="shard"),
+        ),
+        migrations.AlterUniqueTogether(
+            name="submissionresultcount",
+            unique_together={("scope", "object_id", "result", "shard")},
+        ),
+    ]
@@ -0,0 +1,60 @@
+"""
+Data migration to fill SubmissionResultCount from the submissions table.
+
+The counters were only kept up to date from the migration that added them,
+so pages reading them, like the language statistics, were missing every
+earlier submission until reconcile_result_counts ran. Rebuild all of them
+here, the way reconcile_result_counts does.
+"""
+
+from itertools import islice
+
+from django.db import migrations
+from django.db.models import Count
+
+SCOPE_FIELDS = {
+    "P": "problem_id",
+    "U": "user_id",
+    "C": "contest_object_id",
+    "L": "language_id",
+}
+
+
+def backfill_submission_result_counts(apps, schema_editor):
+    Submission = apps.get_model("judge", "Submission")
+    SubmissionResultCount = apps.get_model("judge", "SubmissionResultCount")
+
+    SubmissionResultCount.objects.all().delete()
+    for scope, field in SCOPE_FIELDS.items():
+        rows = (
+            Submission.objects.filter(
+                **{field + "__isnull": False, "result__isnull": False}
+            )
+            .values_list(field, "result")
+            .annotate(count=Count("id"))
+            .values_list(field, "result", "count")
+            .order_by()
+        )
+        objs = (
+            SubmissionResultCount(
+                scope=scope, object_id=object_id, result=result, count=count
+            )
+            for object_id, result, count in rows.iterator()
+        )
+        while batch := list(islice(objs, 1000)):
+            SubmissionResultCount.objects.bulk_create(batch)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0279_submissionresultcount_shard"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_submission_result_counts, noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0280_backfill_submission_result_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sitestatwatermark",
+            name="gaps",
+            field=models.JSONField(
+                default=list,
+                help_text="IDs below the watermark not seen yet, rechecked on roll-up.",
+                verbose_name="missing IDs",
+            ),
+        ),
+    ]
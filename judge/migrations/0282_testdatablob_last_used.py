@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("judge", "0281_sitestatwatermark_gaps"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testdatablob",
+            name="last_used",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="last used"
+            ),
+        ),
+    ]
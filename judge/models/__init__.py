@@ -16,6 +16,7 @@ from judge.models.comment import (
 from judge.models.contest import (
     Contest,
     ContestMoss,
+    ContestSimilarity,
     ContestParticipation,
     ContestProblem,
     ContestSubmission,
@@ -49,6 +50,8 @@ from judge.models.problem_data import (
     ProblemValidation,
     ProblemValidationResult,
     ProblemSolutionCode,
+    ProblemTestDataFile,
+    TestDataBlob,
     problem_data_storage,
     problem_directory_file,
 )
@@ -68,8 +71,12 @@ from judge.models.submission import (
     SUBMISSION_RESULT,
     Submission,
     SubmissionSource,
+    SubmissionFingerprint,
     SubmissionTestCase,
+    SubmissionTestCasePack,
     BestSubmission,
+    SubmissionResultCount,
+    UserDailyActivity,
 )
 
 from judge.models.ticket import Ticket, TicketMessage
@@ -112,6 +119,8 @@ from judge.models.problem_review import (
     ProblemReviewSubmissionTag,
 )
 from judge.models.request_metric import RequestMetric
+from judge.models.site_stats import SiteDailyStat, SiteStatWatermark
+from judge.models.sitemap import SitemapSegment
 from judge.models.contest_review import (
     ContestReviewRun,
     ContestReviewCheckResult,
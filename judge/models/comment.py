@@ -20,6 +20,7 @@ from judge.models.interface import BlogPost
 from judge.models.problem import Problem, Solution
 from judge.models.problem_review import ProblemReviewRun
 from judge.models.profile import Profile
+from judge.utils.sorted_index import CachedSortedIndex, first_pages
 
 
 def _batch_accessible_problem_ids(problem_ids, profile):
@@ -115,7 +116,10 @@ __all__ = [
     "get_user_vote_on_comment",
     "get_visible_reply_count",
     "get_top_level_comment_ids",
+    "get_top_level_comment_page",
     "get_reply_ids",
+    "get_reply_page",
+    "prefetch_reply_pages",
     "hide_comment_for_moderation",
     "mute_comment_author",
 ]
@@ -556,24 +560,64 @@ class Comment(CacheableModel, MPTTModel):
     @classmethod
     def dirty_list_cache(cls, content_type_id, object_id, parent_id=None):
         """Invalidate comment list caches for an object."""
-        # Dirty all sort combinations for top-level comments
-        for sort_by in ("time", "score"):
-            for sort_order in ("asc", "desc"):
-                get_top_level_comment_ids.dirty(
-                    content_type_id, object_id, sort_by, sort_order
-                )
-        # If this is a reply, also dirty the parent's reply list and count cache
+        # Drop all sort combinations for top-level comments
+        for sort_by, sort_order in COMMENT_TOP_LEVEL_ORDERINGS:
+            _top_level_comment_index(
+                content_type_id, object_id, sort_by, sort_order
+            ).invalidate()
+        # If this is a reply, also drop the parent's reply list and count cache
         if parent_id:
-            for sort_order in ("asc", "desc"):
-                get_reply_ids.dirty(parent_id, sort_order)
+            for sort_order in COMMENT_REPLY_ORDERINGS:
+                _reply_comment_index(parent_id, sort_order).invalidate()
             get_visible_reply_count.dirty(parent_id)
 
+    def _list_indexes(self):
+        if self.parent_id:
+            for sort_order in COMMENT_REPLY_ORDERINGS:
+                yield "time", sort_order, _reply_comment_index(
+                    self.parent_id, sort_order
+                )
+        else:
+            for sort_by, sort_order in COMMENT_TOP_LEVEL_ORDERINGS:
+                yield sort_by, sort_order, _top_level_comment_index(
+                    self.content_type_id, self.object_id, sort_by, sort_order
+                )
+
+    def add_to_list_cache(self):
+        """Insert a new comment into the cached comment lists in place."""
+        if self.hidden:
+            return
+        for sort_by, sort_order, index in self._list_indexes():
+            index.insert(
+                _comment_index_entry(
+                    sort_by, sort_order, self.id, self.score, self.time
+                )
+            )
+        if self.parent_id:
+            get_visible_reply_count.dirty(self.parent_id)
+
+    def move_in_list_cache(self, old_score, new_score):
+        """Re-position a comment in the score-sorted lists after a vote."""
+        if self.hidden:
+            return
+        for sort_by, sort_order, index in self._list_indexes():
+            if sort_by != "score":
+                continue
+            index.reposition(
+                _comment_index_entry(
+                    sort_by, sort_order, self.id, old_score, self.time
+                ),
+                _comment_index_entry(
+                    sort_by, sort_order, self.id, new_score, self.time
+                ),
+            )
+
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         super().save(*args, **kwargs)
         if is_new:
             self.dirty_count_cache(self.content_type_id, self.object_id)
-            self.dirty_list_cache(self.content_type_id, self.object_id, self.parent_id)
+            self.add_to_list_cache()
 
     def delete(self, *args, **kwargs):
         content_type_id = self.content_type_id
@@ -899,7 +943,91 @@ def get_visible_reply_count(comment_id):
     return Comment.objects.filter(parent_id=comment_id, hidden=False).count()
 
 
-@cache_wrapper(prefix="ctlcids2")
+COMMENT_TOP_LEVEL_ORDERINGS = (
+    ("time", "desc"),
+    ("time", "asc"),
+    ("score", "desc"),
+    ("score", "asc"),
+)
+COMMENT_REPLY_ORDERINGS = ("desc", "asc")
+
+
+def _comment_sort_key(sort_by, sort_order, comment_id, score, time):
+    """
+    Sort key matching the database ordering of a comment list, with the id
+    as a final tie-breaker so that every entry has a unique position.
+    """
+    ts = time.timestamp()
+    if sort_by == "score":
+        if sort_order == "desc":
+            return (-score, -ts, -comment_id)
+        return (score, -ts, -comment_id)
+    if sort_order == "desc":
+        return (-ts, -comment_id)
+    return (ts, comment_id)
+
+
+def _comment_index_entry(sort_by, sort_order, comment_id, score, time):
+    return (_comment_sort_key(sort_by, sort_order, comment_id, score, time), comment_id)
+
+
+def _top_level_comment_index(content_type_id, object_id, sort_by, sort_order):
+    return CachedSortedIndex(
+        "ctlidx:%d:%d:%s:%s" % (content_type_id, object_id, sort_by, sort_order)
+    )
+
+
+def _reply_comment_index(parent_comment_id, sort_order):
+    return CachedSortedIndex("cridx:%d:%s" % (parent_comment_id, sort_order))
+
+
+def _build_top_level_entries(content_type_id, object_id, sort_by, sort_order):
+    rows = Comment.objects.filter(
+        content_type_id=content_type_id,
+        object_id=object_id,
+        parent=None,
+        hidden=False,
+    ).values_list("id", "score", "time")
+    rows = rows.order_by()
+    return [_comment_index_entry(sort_by, sort_order, *row) for row in rows.iterator()]
+
+
+def _build_reply_entries(parent_comment_ids, sort_order):
+    entries = {parent_id: [] for parent_id in parent_comment_ids}
+    rows = (
+        Comment.objects.filter(parent_id__in=parent_comment_ids, hidden=False)
+        .values_list("parent_id", "id", "score", "time")
+        .order_by()
+    )
+    for parent_id, comment_id, score, time in rows.iterator():
+        entries[parent_id].append(
+            _comment_index_entry("time", sort_order, comment_id, score, time)
+        )
+    return [entries[parent_id] for parent_id in parent_comment_ids]
+
+
+def get_top_level_comment_page(
+    content_type_id, object_id, sort_by, sort_order, offset, limit
+):
+    """
+    Get one page of top-level comment IDs for an object.
+
+    Only the cached chunks overlapping the page are read; the full list is
+    built from the database on a cold cache.
+
+    Returns:
+        (list of comment IDs in the requested order, total comment count)
+    """
+    index = _top_level_comment_index(content_type_id, object_id, sort_by, sort_order)
+    return index.page(
+        offset,
+        limit,
+        lambda: _build_top_level_entries(
+            content_type_id, object_id, sort_by, sort_order
+        ),
+    )
+
+
 def get_top_level_comment_ids(content_type_id, object_id, sort_by, sort_order):
     """
     Get cached list of top-level comment IDs for an object.
@@ -913,28 +1041,29 @@ def get_top_level_comment_ids(content_type_id, object_id, sort_by, sort_order):
     Returns:
         List of comment IDs in the requested order
     """
-    queryset = Comment.objects.filter(
-        content_type_id=content_type_id,
-        object_id=object_id,
-        parent=None,
-        hidden=False,
+    index = _top_level_comment_index(content_type_id, object_id, sort_by, sort_order)
+    return index.all_ids(
+        lambda: _build_top_level_entries(
+            content_type_id, object_id, sort_by, sort_order
+        )
     )
 
-    if sort_by == "score":
-        if sort_order == "desc":
-            queryset = queryset.order_by("-score", "-time")
-        else:
-            queryset = queryset.order_by("score", "-time")
-    else:  # time
-        if sort_order == "desc":
-            queryset = queryset.order_by("-time")
-        else:
-            queryset = queryset.order_by("time")
 
-    return list(queryset.values_list("id", flat=True))
+def get_reply_page(parent_comment_id, sort_order, offset, limit):
+    """
+    Get one page of reply IDs for a parent comment.
+
+    Returns:
+        (list of reply IDs in the requested order, total reply count)
+    """
+    index = _reply_comment_index(parent_comment_id, sort_order)
+    return index.page(
+        offset,
+        limit,
+        lambda: _build_reply_entries([parent_comment_id], sort_order)[0],
+    )
 
 
-@cache_wrapper(prefix="crids")
 def get_reply_ids(parent_comment_id, sort_order):
     """
     Get cached list of reply comment IDs for a parent comment.
@@ -946,17 +1075,44 @@ def get_reply_ids(parent_comment_id, sort_order):
     Returns:
         List of reply comment IDs in the requested order
     """
-    queryset = Comment.objects.filter(
-        parent_id=parent_comment_id,
-        hidden=False,
+    index = _reply_comment_index(parent_comment_id, sort_order)
+    return index.all_ids(
+        lambda: _build_reply_entries([parent_comment_id], sort_order)[0]
     )
 
-    if sort_order == "desc":
-        queryset = queryset.order_by("-time")
-    else:
-        queryset = queryset.order_by("time")
 
-    return list(queryset.values_list("id", flat=True))
+def prefetch_reply_pages(parent_comment_ids, sort_order, limit):
+    """
+    Warm the first page of replies for several comments at once.
+
+    Reply indexes missing from the cache are built with a single query, and
+    the comment data of every first-page reply is fetched in one batch, so
+    expanding any of these threads afterwards is served from the cache.
+
+    Returns:
+        Dict of parent comment ID -> list of reply IDs on the first page
+    """
+    parent_comment_ids = list(parent_comment_ids)
+    if not parent_comment_ids:
+        return {}
+
+    indexes = [
+        _reply_comment_index(parent_id, sort_order) for parent_id in parent_comment_ids
+    ]
+    parent_by_key = dict(zip((index.key for index in indexes), parent_comment_ids))
+    first = first_pages(
+        indexes,
+        limit,
+        lambda missing: _build_reply_entries(
+            [parent_by_key[index.key] for index in missing], sort_order
+        ),
+    )
+    pages = {parent_by_key[key]: ids for key, (ids, _) in first.items()}
+
+    reply_ids = [cid for ids in pages.values() for cid in ids]
+    if reply_ids:
+        Comment.get_cached_instances(*reply_ids)
+    return pages
 
 
 # Batch function for Comment caching
@@ -4,7 +4,7 @@ from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
 from django.db import models, transaction
-from django.db.models import CASCADE, Q, Count, Max, Min
+from django.db.models import CASCADE, F, Q, Count, Max, Min
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.functional import cached_property
@@ -846,14 +846,39 @@ class ContestParticipation(models.Model):
     cumtime_final = models.BigIntegerField(
         verbose_name=_("final cumulative time"), default=0
     )
+    result_version = models.PositiveIntegerField(
+        verbose_name=_("result version"),
+        default=0,
+        help_text=_("Bumped whenever the results are recomputed."),
+    )
+
+    def save_results(self, update_fields=None):
+        """
+        Save recomputed results with ``result_version`` bumped in SQL, so that
+        racing recomputes each move the version past any cached ranking row.
+        """
+        self.result_version = F("result_version") + 1
+        if update_fields is not None:
+            update_fields = list(update_fields) + ["result_version"]
+        self.save(update_fields=update_fields)
+        self.refresh_from_db(fields=["result_version"])
+
+    save_results.alters_data = True
 
     def recompute_results(self):
+        # Kept for post_ranking_update, which diffs against the old results.
+        self._previous_result = (
+            self.score,
+            self.cumtime,
+            self.tiebreaker,
+            self.format_data,
+        )
         with transaction.atomic():
             self.contest.format.update_participation(self)
             if self.is_disqualified:
                 self.score = -9999
                 self.score_final = -9999
-                self.save(update_fields=["score", "score_final"])
+                self.save_results(update_fields=["score", "score_final"])
 
     recompute_results.alters_data = True
 
@@ -1135,8 +1160,34 @@ class ContestSubmission(models.Model):
         verbose_name=_("hide result"),
         help_text=_("Whether the contest problem hides this submission's result."),
     )
+    attempt = models.PositiveIntegerField(
+        verbose_name=_("attempt number"),
+        help_text=_(
+            "Position of this submission among the participant's submissions "
+            "to the problem, not counting compile and internal errors."
+        ),
+        null=True,
+        blank=True,
+    )
 
     def save(self, *args, **kwargs):
+        if self._state.adding and self.attempt is None:
+            # Numbered once here, so the bridge need not count on every dispatch.
+            # The participation lock numbers concurrent submissions in turn.
+            with transaction.atomic():
+                ContestParticipation.objects.select_for_update().only("id").get(
+                    id=self.participation_id
+                )
+                self.attempt = (
+                    ContestSubmission.objects.filter(
+                        participation_id=self.participation_id,
+                        problem_id=self.problem_id,
+                    )
+                    .exclude(submission__status__in=("CE", "IE"))
+                    .count()
+                    + 1
+                )
+                return self.save(*args, **kwargs)
         if self.problem_id:
             self.is_result_hidden = self.problem.is_result_hidden
             if kwargs.get("update_fields") is not None:
@@ -1218,6 +1269,48 @@ class ContestMoss(models.Model):
         verbose_name_plural = _("contest moss results")
 
 
+class ContestSimilarity(models.Model):
+    contest = models.ForeignKey(
+        Contest,
+        verbose_name=_("contest"),
+        related_name="similarities",
+        on_delete=CASCADE,
+    )
+    problem = models.ForeignKey(
+        Problem, verbose_name=_("problem"), related_name="+", on_delete=CASCADE
+    )
+    language = models.CharField(verbose_name=_("language family"), max_length=16)
+    first = models.ForeignKey(
+        Submission,
+        verbose_name=_("first submission"),
+        related_name="+",
+        on_delete=CASCADE,
+    )
+    second = models.ForeignKey(
+        Submission,
+        verbose_name=_("second submission"),
+        related_name="+",
+        on_delete=CASCADE,
+    )
+    first_percentage = models.FloatField(
+        verbose_name=_("share of the first submission matched")
+    )
+    second_percentage = models.FloatField(
+        verbose_name=_("share of the second submission matched")
+    )
+    matched = models.PositiveIntegerField(
+        verbose_name=_("matched fingerprints"), default=0
+    )
+
+    class Meta:
+        verbose_name = _("contest similarity result")
+        verbose_name_plural = _("contest similarity results")
+
+    @property
+    def percentage(self):
+        return max(self.first_percentage, self.second_percentage)
+
+
 class ContestProblemClarification(models.Model):
     contest = models.ForeignKey(
         Contest,
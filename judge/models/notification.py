@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.db.models import CASCADE, F, Q
 from django.core.exceptions import ObjectDoesNotExist
@@ -8,6 +8,8 @@ from datetime import timedelta
 from judge.models import Profile
 from judge.caching import cache_wrapper
 
+NOTIFICATION_FAN_OUT_CHUNK_SIZE = 500
+
 
 class NotificationCategory(models.TextChoices):
     """Predefined notification categories for better data integrity"""
@@ -121,62 +123,101 @@ class NotificationManager(models.Manager):
         author=None,
         extra_data=None,
         deduplicate=True,
+        background=False,
     ):
-        """Create notifications for multiple users efficiently with automatic deduplication"""
-        user_ids = list(set(user_ids))
-        to_users = Profile.get_cached_instances(*user_ids)
-
-        notifications = []
-        profile_updates = []
-
-        for user in to_users:
-            if author and user.id == author.id:
-                continue
+        """
+        Create notifications for multiple users with automatic deduplication.
+
+        The fan-out is set-based: a handful of queries per chunk of
+        recipients regardless of its size. With ``background=True`` it is
+        queued as a Celery task once the current transaction commits.
+        """
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if author:
+            user_ids.discard(author.id)
+        if not user_ids:
+            return
+
+        if background:
+            from judge.tasks.notification import fan_out_notifications
+
+            args = (
+                sorted(user_ids),
+                category,
+                html_link,
+                author.id if author else None,
+                extra_data,
+                deduplicate,
+            )
+            transaction.on_commit(lambda: fan_out_notifications.delay(*args))
+            return
+
+        # Skip deleted profiles
+        user_ids = [user.id for user in Profile.get_cached_instances(*user_ids)]
+        for start in range(0, len(user_ids), NOTIFICATION_FAN_OUT_CHUNK_SIZE):
+            self._fan_out(
+                user_ids[start : start + NOTIFICATION_FAN_OUT_CHUNK_SIZE],
+                category,
+                html_link,
+                author.id if author else None,
+                extra_data or {},
+                deduplicate,
+            )
 
-            if deduplicate:
-                # Check for similar recent notifications to merge
-                similar_notification = self._find_similar_notification(
-                    user, category, html_link, author
-                )
-                if similar_notification:
-                    # Update existing notification timestamp and mark as unread if needed
-                    similar_notification.time = timezone.now()
-                    if similar_notification.is_read:
-                        # If it was read, mark as unread and we'll increment count
-                        similar_notification.is_read = False
-                        similar_notification.read_at = None
-                        similar_notification.save(
-                            update_fields=["time", "is_read", "read_at"]
-                        )
-                        profile_updates.append(user)  # Need to update count
-                    else:
-                        # Just update the timestamp
-                        similar_notification.save(update_fields=["time"])
-                    continue
-
-            # Create new notification
-            notifications.append(
-                Notification(
-                    owner=user,
+    def _fan_out(self, user_ids, category, html_link, author_id, extra_data, dedup):
+        """Notify one chunk of users, merging into similar recent notifications."""
+        merged = {}
+        if dedup:
+            cutoff_time = timezone.now() - timedelta(days=7)
+            similar = (
+                self.filter(
+                    owner_id__in=user_ids,
                     category=category,
                     html_link=html_link,
-                    author=author,
-                    extra_data=extra_data or {},
+                    author_id=author_id,
+                    time__gte=cutoff_time,
                 )
+                .order_by("owner_id", "-time")
+                .values_list("owner_id", "id", "is_read")
+            )
+            for owner_id, notification_id, is_read in similar:
+                # Only the latest one per owner, as in _find_similar_notification
+                merged.setdefault(owner_id, (notification_id, is_read))
+
+        if merged:
+            # Bump the merged notifications and mark them unread again
+            merged_ids = [notification_id for notification_id, _ in merged.values()]
+            self.filter(id__in=merged_ids).update(
+                time=timezone.now(), is_read=False, read_at=None
             )
-            profile_updates.append(user)
 
-        # Bulk create new notifications
-        if notifications:
-            self.bulk_create(notifications)
+        new_owner_ids = [user_id for user_id in user_ids if user_id not in merged]
+        self.bulk_create(
+            [
+                Notification(
+                    owner_id=owner_id,
+                    category=category,
+                    html_link=html_link,
+                    author_id=author_id,
+                    extra_data=extra_data,
+                )
+                for owner_id in new_owner_ids
+            ]
+        )
 
-        # Update unread counts for users who got new notifications or reactivated ones
-        for user in profile_updates:
-            NotificationProfile.objects.get_or_create(user=user)
-            NotificationProfile.objects.filter(user=user).update(
+        # Users who got new notifications or had a read one reactivated
+        counted = new_owner_ids + [
+            owner_id for owner_id, (_, was_read) in merged.items() if was_read
+        ]
+        if counted:
+            NotificationProfile.objects.bulk_create(
+                [NotificationProfile(user_id=user_id) for user_id in counted],
+                ignore_conflicts=True,
+            )
+            NotificationProfile.objects.filter(user_id__in=counted).update(
                 unread_count=F("unread_count") + 1
             )
-            unseen_notifications_count.dirty(user)
+            unseen_notifications_count.dirty_multi([(user_id,) for user_id in counted])
 
     def mark_as_read(self, user, notification_ids=None):
         """Mark notifications as read for a user"""
@@ -5,7 +5,9 @@ from django.core.validators import (
     MaxValueValidator,
     MinValueValidator,
 )
-from django.db import models
+from celery import current_app
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from judge.utils.problem_data import ProblemDataStorage
@@ -19,6 +21,8 @@ __all__ = [
     "ProblemValidation",
     "ProblemValidationResult",
     "ProblemSolutionCode",
+    "ProblemTestDataFile",
+    "TestDataBlob",
     "CHECKERS",
     "CSV_CHECKER_KEYS",
 ]
@@ -246,10 +250,23 @@ class ProblemData(models.Model):
         self.__original_zipfile = self.zipfile
 
     def save(self, *args, **kwargs):
+        zipfile_changed = bool(self.zipfile) and self.zipfile != self.__original_zipfile
         if self.__original_zipfile:
             if self.zipfile != self.__original_zipfile:
                 self.__original_zipfile.delete(save=False)
-        return super(ProblemData, self).save(*args, **kwargs)
+        result = super(ProblemData, self).save(*args, **kwargs)
+        if zipfile_changed:
+            self.__original_zipfile = self.zipfile
+            args = [self.problem_id, self.zipfile.name]
+            # Move the new archive into the blob store, so that later uploads
+            # can send only the files that changed, and check its contents
+            # outside of the upload request.
+            transaction.on_commit(
+                lambda: current_app.send_task(
+                    "judge.tasks.problem_data.index_problem_archive", args=args
+                )
+            )
+        return result
 
     def has_yml(self):
         return problem_data_storage.exists("%s/init.yml" % self.problem.code)
@@ -491,3 +508,47 @@ class ProblemSolutionCode(models.Model):
 
     class Meta:
         ordering = ["order"]
+
+
+class TestDataBlob(models.Model):
+    """
+    One test data file in the content-addressed store, kept under
+    ``.blobs/`` of the problem data root and named by its SHA-256. A blob is
+    referenced by the manifest rows of every problem containing that file.
+    """
+
+    digest = models.CharField(
+        max_length=64, primary_key=True, verbose_name=_("SHA-256")
+    )
+    size = models.BigIntegerField(verbose_name=_("size"))
+    created = models.DateTimeField(auto_now_add=True, verbose_name=_("created"))
+    # Bumped whenever an upload relies on the blob, so that it is not
+    # collected between the upload and its manifest commit.
+    last_used = models.DateTimeField(default=timezone.now, verbose_name=_("last used"))
+
+    class Meta:
+        verbose_name = _("test data blob")
+        verbose_name_plural = _("test data blobs")
+
+
+class ProblemTestDataFile(models.Model):
+    """A file of a problem's test data manifest."""
+
+    problem = models.ForeignKey(
+        "Problem",
+        verbose_name=_("problem"),
+        related_name="test_data_files",
+        on_delete=models.CASCADE,
+    )
+    name = models.CharField(max_length=255, verbose_name=_("file name"))
+    blob = models.ForeignKey(
+        TestDataBlob,
+        verbose_name=_("blob"),
+        related_name="files",
+        on_delete=models.PROTECT,
+    )
+
+    class Meta:
+        unique_together = ("problem", "name")
+        verbose_name = _("problem test data file")
+        verbose_name_plural = _("problem test data files")
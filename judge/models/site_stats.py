@@ -0,0 +1,162 @@
+import datetime
+
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import TruncDate
+from django.utils.translation import gettext_lazy as _
+
+
+class SiteDailyStat(models.Model):
+    """
+    Number of rows created on each (UTC) day for the site statistics charts.
+
+    Rows are rolled up incrementally by ``roll_up``, which only counts rows
+    with an id past the metric's watermark, so the charts never aggregate the
+    underlying tables themselves. Deleted rows are not subtracted.
+
+    Ids missing from the last ``RESCAN_WINDOW`` ids below the watermark are
+    remembered and looked up again on later roll-ups, so that a row committed
+    after a higher id was rolled up is still counted.
+    """
+
+    SUBMISSIONS = "submissions"
+    COMMENTS = "comments"
+    NEW_USERS = "new_users"
+    CHAT_MESSAGES = "chat_messages"
+    CONTESTS = "contests"
+    GROUPS = "groups"
+    # Model and date field counted by each metric.
+    METRICS = {
+        SUBMISSIONS: ("judge.Submission", "date"),
+        COMMENTS: ("judge.Comment", "time"),
+        NEW_USERS: ("auth.User", "date_joined"),
+        CHAT_MESSAGES: ("chat_box.Message", "time"),
+        CONTESTS: ("judge.Contest", "start_time"),
+        GROUPS: ("judge.Organization", "creation_date"),
+    }
+    # Ids counted by one pass, so the first roll-up of a big table is chunked.
+    BATCH_SIZE = 100000
+    # Ids below the watermark whose absence is rechecked.
+    RESCAN_WINDOW = 10000
+
+    metric = models.CharField(max_length=32, verbose_name=_("metric"))
+    date = models.DateField(verbose_name=_("date"))
+    count = models.IntegerField(default=0, verbose_name=_("count"))
+
+    class Meta:
+        unique_together = ("metric", "date")
+        verbose_name = _("site daily statistic")
+        verbose_name_plural = _("site daily statistics")
+
+    @classmethod
+    def _add(cls, metric, counts):
+        existing = set(
+            cls.objects.filter(metric=metric, date__in=counts).values_list(
+                "date", flat=True
+            )
+        )
+        cls.objects.bulk_create(
+            [
+                cls(metric=metric, date=date, count=0)
+                for date in counts
+                if date not in existing
+            ],
+            ignore_conflicts=True,
+        )
+        for date, count in counts.items():
+            cls.objects.filter(metric=metric, date=date).update(
+                count=F("count") + count
+            )
+
+    @classmethod
+    def _count_days(cls, queryset, date_field):
+        counts = dict(
+            queryset.annotate(day=TruncDate(date_field, tzinfo=datetime.timezone.utc))
+            .values("day")
+            .annotate(total=Count("id"))
+            .values_list("day", "total")
+        )
+        counts.pop(None, None)
+        return counts
+
+    @classmethod
+    def roll_up(cls, metric):
+        """Count the rows of ``metric`` created since the last roll-up."""
+        model_label, date_field = cls.METRICS[metric]
+        queryset = apps.get_model(model_label).objects.all()
+        max_id = queryset.aggregate(max_id=Max("id"))["max_id"] or 0
+        rolled = 0
+
+        SiteStatWatermark.objects.get_or_create(metric=metric)
+        with transaction.atomic():
+            watermark = SiteStatWatermark.objects.select_for_update().get(metric=metric)
+            if watermark.gaps:
+                found = queryset.filter(id__in=watermark.gaps)
+                counts = cls._count_days(found, date_field)
+                if counts:
+                    cls._add(metric, counts)
+                    rolled += sum(counts.values())
+                found = set(found.values_list("id", flat=True))
+                watermark.gaps = [id for id in watermark.gaps if id not in found]
+                watermark.save(update_fields=["gaps"])
+
+        while True:
+            with transaction.atomic():
+                watermark = SiteStatWatermark.objects.select_for_update().get(
+                    metric=metric
+                )
+                if watermark.last_id >= max_id:
+                    return rolled
+                end_id = min(watermark.last_id + cls.BATCH_SIZE, max_id)
+                counts = cls._count_days(
+                    queryset.filter(id__gt=watermark.last_id, id__lte=end_id),
+                    date_field,
+                )
+                if counts:
+                    cls._add(metric, counts)
+                    rolled += sum(counts.values())
+
+                window_start = max(watermark.last_id, end_id - cls.RESCAN_WINDOW)
+                present = set(
+                    queryset.filter(id__gt=window_start, id__lte=end_id).values_list(
+                        "id", flat=True
+                    )
+                )
+                watermark.gaps = [
+                    id for id in watermark.gaps if id > end_id - cls.RESCAN_WINDOW
+                ] + [
+                    id
+                    for id in range(window_start + 1, end_id + 1)
+                    if id not in present
+                ]
+                watermark.last_id = end_id
+                watermark.save(update_fields=["last_id", "gaps"])
+
+    @classmethod
+    def roll_up_all(cls):
+        return {metric: cls.roll_up(metric) for metric in cls.METRICS}
+
+    @classmethod
+    def get_series(cls, metric):
+        """Return ``(dates, counts)`` of ``metric`` in date order."""
+        rows = cls.objects.filter(metric=metric).order_by("date")
+        dates, counts = [], []
+        for date, count in rows.values_list("date", "count"):
+            dates.append(date)
+            counts.append(count)
+        return dates, counts
+
+
+class SiteStatWatermark(models.Model):
+    metric = models.CharField(max_length=32, unique=True, verbose_name=_("metric"))
+    last_id = models.BigIntegerField(default=0, verbose_name=_("last rolled up ID"))
+    gaps = models.JSONField(
+        default=list,
+        verbose_name=_("missing IDs"),
+        help_text=_("IDs below the watermark not seen yet, rechecked on roll-up."),
+    )
+
+    class Meta:
+        verbose_name = _("site statistic watermark")
+        verbose_name_plural = _("site statistic watermarks")
@@ -0,0 +1,22 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SitemapSegment(models.Model):
+    """
+    A pre-generated, gzipped sitemap file covering one id range of a section.
+
+    ``digest`` hashes the rows the file was generated from, so a regeneration
+    only rewrites the segments whose rows changed.
+    """
+
+    section = models.CharField(max_length=32, verbose_name=_("section"))
+    number = models.IntegerField(verbose_name=_("segment number"))
+    url_count = models.IntegerField(default=0, verbose_name=_("number of URLs"))
+    digest = models.CharField(max_length=16, verbose_name=_("digest"))
+    updated = models.DateTimeField(auto_now=True, verbose_name=_("updated"))
+
+    class Meta:
+        unique_together = ("section", "number")
+        verbose_name = _("sitemap segment")
+        verbose_name_plural = _("sitemap segments")
@@ -1,10 +1,14 @@
+import datetime
 import hashlib
 import hmac
+from collections import defaultdict
+from functools import reduce
+from operator import or_
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
-from django.db.models import Count
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
 from django.db.models.fields import DateField
 from django.db.models.functions import Cast
 from django.urls import reverse
@@ -16,6 +20,12 @@ from judge.judgeapi import abort_submission, judge_submission
 from judge.models.problem import Problem
 from judge.models.profile import Profile
 from judge.models.runtime import Language
+from judge.utils.similarity import (
+    fingerprint_source,
+    language_family,
+    pack_fingerprints,
+)
+from judge.utils.packed_test_cases import PackedTestCases
 from judge.utils.unicode import utf8bytes
 
 __all__ = [
@@ -23,7 +33,12 @@ __all__ = [
     "Submission",
     "SubmissionSource",
     "SubmissionTestCase",
+    "SubmissionTestCasePack",
     "BestSubmission",
+    "SubmissionResultCount",
+    "UserDailyActivity",
+    "update_submission_result",
+    "update_submission_results",
     "get_user_submission_dates",
     "get_user_min_submission_year",
 ]
@@ -161,6 +176,14 @@ class Submission(models.Model):
     def long_status(self):
         return Submission.USER_DISPLAY_CODES.get(self.short_status, "")
 
+    @property
+    def test_case_results(self):
+        """The graded test cases, read from the pack if the cases were packed."""
+        try:
+            return self.test_case_pack.cases
+        except SubmissionTestCasePack.DoesNotExist:
+            return list(self.test_cases.all())
+
     def judge(self, *args, **kwargs):
         judge_submission(self, *args, **kwargs)
 
@@ -190,6 +213,7 @@ class Submission(models.Model):
             contest.points = 0
         contest.save()
         contest.participation.recompute_results()
+        return contest.participation
 
     update_contest.alters_data = True
 
@@ -275,24 +299,31 @@ class Submission(models.Model):
 
         return False
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored result so save() can move the submission
+        # between SubmissionResultCount rows.
+        if "result" in field_names:
+            instance._stored_result = values[field_names.index("result")]
+        return instance
+
     def save(self, *args, **kwargs):
-        """Override to invalidate caches on save"""
+        """Override to keep activity and result counters in step"""
+        adding = self._state.adding
         super().save(*args, **kwargs)
-        # Invalidate submission date caches
-        get_user_submission_dates.dirty(self.user_id)
-        get_user_min_submission_year.dirty(self.user_id)
-
-    save.alters_data = True
+        if adding:
+            UserDailyActivity.record(self.user_id, self.date, 1)
 
-    def delete(self, *args, **kwargs):
-        """Override to invalidate caches on delete"""
-        user_id = self.user_id
-        super().delete(*args, **kwargs)
-        # Invalidate submission date caches
-        get_user_submission_dates.dirty(user_id)
-        get_user_min_submission_year.dirty(user_id)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "result" in update_fields:
+            if adding or hasattr(self, "_stored_result"):
+                SubmissionResultCount.record_change(
+                    self, None if adding else self._stored_result, self.result
+                )
+                self._stored_result = self.result
 
-    delete.alters_data = True
+    save.alters_data = True
 
     class Meta:
         permissions = (
@@ -328,6 +359,41 @@ class SubmissionSource(models.Model):
         return "Source of %s" % self.submission
 
 
+class SubmissionFingerprint(models.Model):
+    submission = models.OneToOneField(
+        Submission,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name=_("associated submission"),
+        related_name="fingerprint",
+    )
+    family = models.CharField(verbose_name=_("language family"), max_length=16)
+    fingerprints = models.BinaryField(verbose_name=_("winnowed fingerprints"))
+
+    class Meta:
+        verbose_name = _("submission fingerprint")
+        verbose_name_plural = _("submission fingerprints")
+
+    @classmethod
+    def fingerprint(cls, submission_ids):
+        """Fingerprint the sources of the given submissions that have none yet."""
+        rows = Submission.objects.filter(
+            id__in=submission_ids, fingerprint__isnull=True, source__isnull=False
+        ).values_list("id", "language__common_name", "source__source")
+        fingerprints = []
+        for submission_id, common_name, source in rows.iterator():
+            family = language_family(common_name)
+            fingerprints.append(
+                cls(
+                    submission_id=submission_id,
+                    family=family,
+                    fingerprints=pack_fingerprints(fingerprint_source(source, family)),
+                )
+            )
+        cls.objects.bulk_create(fingerprints, batch_size=500, ignore_conflicts=True)
+        return len(fingerprints)
+
+
 class SubmissionTestCase(models.Model):
     RESULT = SUBMISSION_RESULT
 
@@ -357,6 +423,248 @@ class SubmissionTestCase(models.Model):
         verbose_name_plural = _("submission test cases")
 
 
+class SubmissionTestCasePack(models.Model):
+    """
+    All ``SubmissionTestCase`` rows of a graded submission in one blob, see
+    judge.utils.packed_test_cases.
+    """
+
+    submission = models.OneToOneField(
+        Submission,
+        verbose_name=_("associated submission"),
+        related_name="test_case_pack",
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    data = models.BinaryField(verbose_name=_("packed test cases"))
+
+    @cached_property
+    def cases(self):
+        return PackedTestCases(bytes(self.data))
+
+    class Meta:
+        verbose_name = _("submission test case pack")
+        verbose_name_plural = _("submission test case packs")
+
+
+class SubmissionResultCount(models.Model):
+    """
+    Materialized ``GROUP BY result`` of submissions per problem, user, contest
+    and language, so the result chart of a submission list can be drawn from a
+    handful of rows instead of aggregating the list itself.
+
+    Kept up to date by ``record_change`` whenever a submission's result is
+    saved, set through ``update_submission_result``, or deleted. The
+    ``reconcile_result_counts`` command rebuilds the rows from the
+    submissions table if they ever drift.
+
+    Every grading touches the rows of its language, and in a contest those
+    of the contest. These scopes are split into ``SHARDS`` rows per result,
+    picked by submission id, so concurrent gradings rarely wait on the same
+    row. Readers sum the shards.
+    """
+
+    SCOPE_PROBLEM = "P"
+    SCOPE_USER = "U"
+    SCOPE_CONTEST = "C"
+    SCOPE_LANGUAGE = "L"
+    SCOPES = (
+        (SCOPE_PROBLEM, _("problem")),
+        (SCOPE_USER, _("user")),
+        (SCOPE_CONTEST, _("contest")),
+        (SCOPE_LANGUAGE, _("language")),
+    )
+    # Submission field holding the object id of each scope.
+    SCOPE_FIELDS = {
+        SCOPE_PROBLEM: "problem_id",
+        SCOPE_USER: "user_id",
+        SCOPE_CONTEST: "contest_object_id",
+        SCOPE_LANGUAGE: "language_id",
+    }
+    # Rows per (object, result) of the scopes shared by concurrent gradings
+    SHARDS = {SCOPE_LANGUAGE: 16, SCOPE_CONTEST: 8}
+
+    scope = models.CharField(max_length=1, choices=SCOPES, verbose_name=_("scope"))
+    object_id = models.IntegerField(verbose_name=_("object ID"))
+    result = models.CharField(
+        max_length=3, choices=SUBMISSION_RESULT, verbose_name=_("result")
+    )
+    count = models.IntegerField(default=0, verbose_name=_("count"))
+    shard = models.PositiveSmallIntegerField(default=0, verbose_name=_("shard"))
+
+    class Meta:
+        unique_together = ("scope", "object_id", "result", "shard")
+        verbose_name = _("submission result count")
+        verbose_name_plural = _("submission result counts")
+
+    @classmethod
+    def _scope_filter(cls, keys):
+        return reduce(
+            or_,
+            (Q(scope=scope, object_id=id, shard=shard) for scope, id, shard in keys),
+        )
+
+    @classmethod
+    def _keys(cls, submission):
+        """(scope, object id, shard) of every row ``submission`` counts in."""
+        keys = []
+        for scope, field in cls.SCOPE_FIELDS.items():
+            if submission[field] is not None:
+                shard = submission.get("id", 0) % cls.SHARDS.get(scope, 1)
+                keys.append((scope, submission[field], shard))
+        return keys
+
+    @classmethod
+    def _add(cls, keys, result, delta):
+        rows = cls.objects.filter(cls._scope_filter(keys), result=result)
+        if rows.update(count=F("count") + delta) == len(keys) or delta < 0:
+            return
+        existing = set(rows.values_list("scope", "object_id", "shard"))
+        missing = [key for key in keys if key not in existing]
+        cls.objects.bulk_create(
+            [
+                cls(scope=scope, object_id=id, result=result, shard=shard, count=0)
+                for scope, id, shard in missing
+            ],
+            ignore_conflicts=True,
+        )
+        cls.objects.filter(cls._scope_filter(missing), result=result).update(
+            count=F("count") + delta
+        )
+
+    @classmethod
+    def record_change(cls, submission, old_result, new_result):
+        """
+        Move one submission from ``old_result`` to ``new_result`` in every scope
+        it belongs to. ``submission`` is a Submission or a ``values()`` dict
+        with ``id`` and the fields in ``SCOPE_FIELDS``.
+        """
+        if old_result == new_result:
+            return
+        if not isinstance(submission, dict):
+            submission = {
+                field: getattr(submission, field)
+                for field in ["id"] + list(cls.SCOPE_FIELDS.values())
+            }
+        keys = cls._keys(submission)
+        if old_result:
+            cls._add(keys, old_result, -1)
+        if new_result:
+            cls._add(keys, new_result, 1)
+
+    @classmethod
+    def record_changes(cls, submissions, new_result):
+        """
+        ``record_change`` for many ``values()`` dicts with a ``result`` key,
+        with one UPDATE per result and count change.
+        """
+        deltas = defaultdict(int)
+        for submission in submissions:
+            old_result = submission["result"]
+            if old_result == new_result:
+                continue
+            for key in cls._keys(submission):
+                if old_result:
+                    deltas[key, old_result] -= 1
+                if new_result:
+                    deltas[key, new_result] += 1
+
+        changes = defaultdict(list)
+        for (key, result), delta in deltas.items():
+            if delta:
+                changes[result, delta].append(key)
+        for (result, delta), keys in changes.items():
+            for i in range(0, len(keys), 500):
+                cls._add(keys[i : i + 500], result, delta)
+
+    @classmethod
+    def get_counts(cls, scope, object_ids=None):
+        """
+        Return ``{result: count}`` summed over the given objects of a scope,
+        or over the whole scope if ``object_ids`` is None.
+        """
+        queryset = cls.objects.filter(scope=scope)
+        if object_ids is not None:
+            queryset = queryset.filter(object_id__in=object_ids)
+        return defaultdict(
+            int,
+            queryset.values("result")
+            .annotate(total=Sum("count"))
+            .values_list("result", "total"),
+        )
+
+
+def update_submission_results(queryset, **updates):
+    """
+    ``queryset.update(**updates)`` for updates that set ``result``, keeping
+    SubmissionResultCount in step. Returns the ids of the updated rows.
+    """
+    fields = ["id", "result"] + list(SubmissionResultCount.SCOPE_FIELDS.values())
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().values(*fields))
+        if not rows:
+            return []
+        ids = [row["id"] for row in rows]
+        queryset.filter(id__in=ids).update(**updates)
+        SubmissionResultCount.record_changes(rows, updates["result"])
+    return ids
+
+
+def update_submission_result(queryset, **updates):
+    """Like ``update_submission_results``, returning the number of updated rows."""
+    return len(update_submission_results(queryset, **updates))
+
+
+class UserDailyActivity(models.Model):
+    """
+    Number of submissions a user made on each (UTC) day, for the activity
+    heatmap. Incremented when a submission is created and decremented when
+    it is deleted; ``backfill_daily_activity`` rebuilds it from submissions.
+    """
+
+    user = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="daily_activity",
+        verbose_name=_("user"),
+    )
+    date = models.DateField(verbose_name=_("date"))
+    count = models.IntegerField(default=0, verbose_name=_("submission count"))
+
+    class Meta:
+        unique_together = ("user", "date")
+        verbose_name = _("user daily activity")
+        verbose_name_plural = _("user daily activities")
+
+    @staticmethod
+    def day_of(date):
+        # Days are in UTC, as the heatmap has always grouped them.
+        return date.astimezone(datetime.timezone.utc).date()
+
+    @classmethod
+    def record(cls, user_id, date, delta):
+        day = cls.day_of(date)
+        rows = cls.objects.filter(user_id=user_id, date=day)
+        if not rows.update(count=F("count") + delta) and delta > 0:
+            cls.objects.bulk_create(
+                [cls(user_id=user_id, date=day, count=0)], ignore_conflicts=True
+            )
+            rows.update(count=F("count") + delta)
+        get_user_submission_dates.dirty(user_id)
+        get_user_min_submission_year.dirty(user_id)
+
+
+def get_submission_date_counts(queryset):
+    """Return ``(user_id, day, count)`` rows for a queryset of submissions."""
+    return (
+        queryset.annotate(date_only=Cast("date", DateField()))
+        .values_list("user_id", "date_only")
+        .annotate(cnt=Count("id"))
+        .values_list("user_id", "date_only", "cnt")
+        .order_by()
+    )
+
+
 @cache_wrapper(prefix="SUB_dates", expected_type=dict)
 def get_user_submission_dates(user_id):
     """
@@ -368,16 +676,9 @@ def get_user_submission_dates(user_id):
     Returns:
         A dictionary mapping ISO-formatted dates to submission counts
     """
-    submissions = (
-        Submission.objects.filter(user_id=user_id)
-        .annotate(date_only=Cast("date", DateField()))
-        .values("date_only")
-        .annotate(cnt=Count("id"))
-    )
-
+    activity = UserDailyActivity.objects.filter(user_id=user_id, count__gt=0)
     return {
-        date_counts["date_only"].isoformat(): date_counts["cnt"]
-        for date_counts in submissions
+        date.isoformat(): count for date, count in activity.values_list("date", "count")
     }
 
 
@@ -392,13 +693,13 @@ def get_user_min_submission_year(user_id):
     Returns:
         The minimum year as an integer, or None if no submissions exist
     """
-    date_counts = get_user_submission_dates(user_id)
-    if not date_counts:
-        return None
-
-    # Extract years from ISO-formatted dates (YYYY-MM-DD) and find the minimum
-    years = [int(date.split("-")[0]) for date in date_counts.keys()]
-    return min(years) if years else None
+    first_day = (
+        UserDailyActivity.objects.filter(user_id=user_id, count__gt=0)
+        .order_by("date")
+        .values_list("date", flat=True)
+        .first()
+    )
+    return first_day.year if first_day else None
 
 
 class BestSubmission(models.Model):
@@ -499,6 +800,62 @@ class BestSubmission(models.Model):
             submission.user_id, submission.problem_id
         )
 
+    @classmethod
+    def recalculate_for_problem(cls, problem_id, user_ids, batch_size=1000):
+        """
+        ``recalculate_for_user_problem`` for many users of one problem, with a
+        few queries per ``batch_size`` users.
+        """
+        user_ids = list(user_ids)
+        for i in range(0, len(user_ids), batch_size):
+            batch = user_ids[i : i + batch_size]
+            best = {}
+            for user_id, submission_id, case_points, case_total in (
+                Submission.objects.filter(
+                    user_id__in=batch, problem_id=problem_id, status="D"
+                )
+                .order_by("user_id", "-points", "-date")
+                .values_list("user_id", "id", "case_points", "case_total")
+            ):
+                best.setdefault(
+                    user_id, (submission_id, case_points or 0, case_total or 0)
+                )
+
+            existing = {
+                row.user_id: row
+                for row in cls.objects.filter(user_id__in=batch, problem_id=problem_id)
+            }
+            changed, created, regraded = [], [], []
+            for user_id, (submission_id, points, case_total) in best.items():
+                row = existing.get(user_id)
+                if row is None:
+                    row = cls(user_id=user_id, problem_id=problem_id)
+                    created.append(row)
+                    old_points = 0
+                elif (row.submission_id, row.points, row.case_total) != (
+                    submission_id,
+                    points,
+                    case_total,
+                ):
+                    changed.append(row)
+                    old_points = row.points
+                else:
+                    continue
+                row.submission_id = submission_id
+                row.points = points
+                row.case_total = case_total
+                # As save() does
+                if abs(points - old_points) > 0.001:
+                    regraded.append(row)
+
+            cls.objects.bulk_create(created)
+            cls.objects.bulk_update(changed, ["submission", "points", "case_total"])
+            cls.objects.filter(user_id__in=batch, problem_id=problem_id).exclude(
+                user_id__in=best
+            ).delete()
+            for row in regraded:
+                row._update_related_lesson_grades()
+
     @classmethod
     def recalculate_for_user_problem(cls, user_id, problem_id):
         """
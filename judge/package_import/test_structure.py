@@ -29,28 +29,18 @@ Design (Approach C — trust but verify):
 
 import logging
 import os
-import zipfile
 
 from judge.models import ProblemData, ProblemTestCase
 from judge.utils.problem_data import ProblemDataCompiler
+from judge.utils.zip_index import pair_test_files, zip_names
 
 logger = logging.getLogger(__name__)
 
-# Extensions we recognize when auto-pairing test files by stem.
-INPUT_EXTS = (".in", ".inp", ".txt")
-OUTPUT_EXTS = (".out", ".ans", ".a", ".sol", ".exp")
-
 # ProblemTestCase.input_file / output_file are CharField(max_length=100); an
 # archive path longer than this can't be stored, so such cases are dropped.
 MAX_FILE_FIELD = 100
 
 
-def zip_members(zip_path):
-    """Return the list of archive-relative file paths inside a zip (no dir entries)."""
-    with zipfile.ZipFile(zip_path) as zf:
-        return [name for name in zf.namelist() if name and not name.endswith("/")]
-
-
 def _index(members):
     """Build lookup helpers: the member set, and a basename->path map that only
     keeps basenames which are unambiguous (a duplicated basename maps to None)."""
@@ -82,33 +72,6 @@ def _resolve(ref, member_set, by_base):
     return path
 
 
-def _auto_pair(members):
-    """Fallback: pair input/output files by shared stem (full path minus extension).
-
-    Handles the common conventions:
-      - `01.in` / `01.out`, `01.inp` / `01.ans`, `Data/01.inp` / `Data/01.out`
-      - Polygon-style extensionless input `01` with answer `01.a`
-    Returns a sorted list of (input_path, output_path) tuples.
-    """
-    member_set = set(members)
-    by_stem_out = {}
-    for name in members:
-        stem, ext = os.path.splitext(name)
-        if ext.lower() in OUTPUT_EXTS:
-            by_stem_out.setdefault(stem, name)
-
-    pairs = []
-    for stem, out_name in by_stem_out.items():
-        candidates = [stem + e for e in INPUT_EXTS] + [stem]
-        input_name = next(
-            (c for c in candidates if c in member_set and c != out_name), None
-        )
-        if input_name:
-            pairs.append((input_name, out_name))
-
-    return sorted(pairs, key=lambda p: p[0])
-
-
 def _resolve_points(provided):
     """Given a list of per-item provided points, decide the final integer points.
 
@@ -230,7 +193,7 @@ def _rows_from_auto_pair(members):
     """Build flat rows by auto-pairing files. Used as the last-resort fallback.
     Even split: 1 point per case."""
     rows = []
-    for in_path, out_path in _auto_pair(members):
+    for in_path, out_path in pair_test_files(members):
         rows.append(
             {
                 "type": "C",
@@ -254,7 +217,7 @@ def materialize_test_structure(problem, structure, zip_path):
     Returns a short human-readable message describing what was created.
     Raises ProblemDataError (from ProblemDataCompiler) on unrecoverable config errors.
     """
-    members = zip_members(zip_path)
+    members = zip_names(zip_path)
     if not members:
         return "Test data uploaded, but the zip contains no files; no cases created."
 
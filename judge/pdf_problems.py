@@ -374,3 +374,41 @@ elif HAS_PHANTOMJS:
     DefaultPdfMaker = PhantomJSPdfMaker
 else:
     DefaultPdfMaker = None
+
+
+def problem_pdf_cache_path(problem_code, language):
+    return "pdf_cache/%s.%s.pdf" % (problem_code, language)
+
+
+def load_problem_pdf(maker, problem, language, url=""):
+    """Write the printable page of ``problem`` in ``language`` into ``maker``."""
+    from django.template.loader import get_template
+    from django.utils import translation
+
+    from judge.models import ProblemTranslation
+
+    try:
+        trans = problem.translations.get(language=language)
+    except ProblemTranslation.DoesNotExist:
+        trans = None
+
+    with translation.override(language):
+        problem_name = problem.name if trans is None else trans.name
+        maker.html = (
+            get_template("problem/raw.html")
+            .render(
+                {
+                    "problem": problem,
+                    "problem_name": problem_name,
+                    "description": (
+                        problem.description if trans is None else trans.description
+                    ),
+                    "url": url,
+                }
+            )
+            .replace('"//', '"https://')
+            .replace("'//", "'https://")
+        )
+    maker.title = problem_name
+    for file in ("style.css",):
+        maker.load(file, os.path.join(settings.DMOJ_RESOURCES, file))
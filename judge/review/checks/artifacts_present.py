@@ -2,6 +2,8 @@
 
 `test_data` is considered present if ANY of:
   - `ProblemData.zipfile` (uploaded zip of pre-built test cases), OR
+  - `Problem.test_data_files` (the manifest an uploaded zip is indexed
+    into, after which the zip is deleted), OR
   - `ProblemData.generator` (uploaded generator binary), OR
   - `ProblemData.generator_script` (in-DB generator script text).
 LQDOJ supports all three at grading time, so the check accepts any.
@@ -55,12 +57,14 @@ class ArtifactsPresentCheck(ProblemReviewCheck):
         except ProblemData.DoesNotExist:
             pd = None
 
-        # Test data: accept zip OR generator binary OR generator script.
-        # Problems vary in which path they use; the judge supports all three.
+        # Test data: accept zip or its indexed files, generator binary, or
+        # generator script. Problems vary in which path they use; the judge
+        # supports all three.
         has_test_data = pd is not None and (
             (pd.zipfile and pd.zipfile.name)
             or (pd.generator and pd.generator.name)
             or bool((pd.generator_script or "").strip())
+            or problem.test_data_files.exists()
         )
         if has_test_data:
             present.append("test_data")
@@ -2,10 +2,10 @@
 Compute a deterministic content hash of a Problem for the dirty-check guard.
 
 Covers everything the auto-review pipeline reads: statement, time/memory/points,
-test data identity + size, checker config, and the set of saved solution codes
-(source, language, expected_result, last_submission_id). If a future check
-reads a new field, add it here AND add a test in test_review_hashing.py
-asserting the hash changes.
+test data identity (indexed files, else zip name + size), checker config, and
+the set of saved solution codes (source, language, expected_result,
+last_submission_id). If a future check reads a new field, add it here AND add
+a test in test_review_hashing.py asserting the hash changes.
 """
 
 import hashlib
@@ -59,8 +59,14 @@ def compute_input_hash(problem: Problem) -> str:
 
     try:
         pd = ProblemData.objects.get(problem=problem)
-        payload["test_data_file"] = _file_field_name(pd.zipfile)
-        payload["test_data_size"] = _file_field_size(pd.zipfile)
+        manifest = sorted(problem.test_data_files.values_list("name", "blob_id"))
+        if manifest:
+            # An uploaded zip is deleted once indexed into the blob store, so
+            # its files, not the zip, identify the test data
+            payload["test_data_files"] = manifest
+        else:
+            payload["test_data_file"] = _file_field_name(pd.zipfile)
+            payload["test_data_size"] = _file_field_size(pd.zipfile)
         payload["checker"] = pd.checker or ""
         payload["checker_args"] = pd.checker_args or ""
         # Custom checker: include both filename AND content hash. Filename
@@ -3,6 +3,7 @@ from django.dispatch import receiver
 
 from judge.models import Contest, ContestParticipation, ContestProblem, Submission
 from judge.models.contest import _get_contest_organization_ids
+from judge.tasks.pdf import schedule_contest_pdfs, schedule_contest_problem_pdf
 from judge.utils.contest_recommendation import (
     get_contests_for_problem,
     _get_contest_problems_map,
@@ -39,6 +40,16 @@ def contest_problem_delete(sender, instance, **kwargs):
     ).update(contest_object=None)
 
 
+@receiver(post_save, sender=Contest)
+def prerender_scheduled_contest(sender, instance, **kwargs):
+    schedule_contest_pdfs(instance)
+
+
+@receiver(post_save, sender=ContestProblem)
+def prerender_contest_problem(sender, instance, **kwargs):
+    schedule_contest_problem_pdf(instance)
+
+
 @receiver(post_save, sender=ContestProblem)
 @receiver(post_delete, sender=ContestProblem)
 def on_contest_problem_change(sender, instance, **kwargs):
@@ -4,12 +4,14 @@ from django.db.models.signals import m2m_changed, post_delete, post_save, pre_sa
 from django.dispatch import receiver
 from celery import current_app
 
-from judge.models import Problem, ProblemType
+from judge.models import LanguageLimit, Problem, ProblemType
 from judge.models.problem import (
     _get_allowed_languages,
     _get_problem_organization_ids,
     _get_problem_types_name,
 )
+from judge.utils.problem_data import problem_data_changed
+from judge.utils.problem_visibility import bump_problem_visibility_version
 from judge.utils.problems import user_editable_ids, user_tester_ids
 
 SEMANTIC_PROBLEM_FIELDS = {
@@ -25,6 +27,10 @@ SEMANTIC_PROBLEM_FIELDS = {
     "is_organization_private",
 }
 
+VISIBILITY_PROBLEM_FIELDS = {"is_public", "is_organization_private"}
+
+LIMIT_PROBLEM_FIELDS = ("time_limit", "memory_limit", "short_circuit")
+
 
 def _schedule_semantic_index(problem_id):
     if getattr(settings, "USE_ML", False):
@@ -148,11 +154,79 @@ def problem_semantic_index_update(sender, instance, created, update_fields, **kw
     _schedule_semantic_index(instance.id)
 
 
+@receiver(post_save, sender=Problem)
+def problem_visibility_update(sender, instance, created, update_fields, **kwargs):
+    if created or _update_fields_touch_semantic(
+        update_fields, VISIBILITY_PROBLEM_FIELDS
+    ):
+        bump_problem_visibility_version()
+
+
+@receiver(post_delete, sender=Problem)
+def problem_visibility_delete(sender, instance, **kwargs):
+    bump_problem_visibility_version()
+
+
 @receiver(post_delete, sender=Problem)
 def problem_semantic_index_delete(sender, instance, **kwargs):
     _schedule_semantic_index(instance.id)
 
 
+@receiver(problem_data_changed)
+def problem_data_push_update(sender, problem, **kwargs):
+    """Tell judges to reload just this problem. Gated behind
+    DMOJ_PROBLEM_DATA_PUSH_UPDATE; otherwise judges rely on their watchdog."""
+    if not getattr(settings, "DMOJ_PROBLEM_DATA_PUSH_UPDATE", False):
+        return
+    from judge.judgeapi import notify_problem_update
+
+    notify_problem_update(problem.code)
+
+
+def _push_limits_update(code):
+    """The bridge caches limits until told they changed. With
+    DMOJ_PROBLEM_DATA_PUSH_UPDATE, the problem update broadcast tells it and
+    the judges; otherwise only the bridge's cache is invalidated."""
+    from judge.judgeapi import notify_limits_update, notify_problem_update
+
+    if getattr(settings, "DMOJ_PROBLEM_DATA_PUSH_UPDATE", False):
+        transaction.on_commit(lambda: notify_problem_update(code))
+    else:
+        transaction.on_commit(lambda: notify_limits_update(code))
+
+
+@receiver(pre_save, sender=Problem)
+def problem_limits_capture_previous(sender, instance, update_fields, **kwargs):
+    if not instance.pk or not _update_fields_touch_semantic(
+        update_fields, set(LIMIT_PROBLEM_FIELDS)
+    ):
+        return
+    instance._previous_limits = (
+        Problem.objects.filter(pk=instance.pk)
+        .values_list(*LIMIT_PROBLEM_FIELDS)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Problem)
+def problem_limits_update(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_limits", None)
+    if created or previous is None:
+        return
+    instance._previous_limits = None
+    if previous != tuple(getattr(instance, field) for field in LIMIT_PROBLEM_FIELDS):
+        _push_limits_update(instance.code)
+
+
+@receiver(post_save, sender=LanguageLimit)
+@receiver(post_delete, sender=LanguageLimit)
+def language_limit_update(sender, instance, **kwargs):
+    code = Problem.objects.filter(id=instance.problem_id).values_list("code", flat=True)
+    # Deleted with its problem, which notifies the judges itself
+    if code:
+        _push_limits_update(code[0])
+
+
 @receiver(post_save, sender=ProblemType)
 def problem_type_semantic_index_update(sender, instance, **kwargs):
     if not getattr(settings, "USE_ML", False):
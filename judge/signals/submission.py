@@ -1,13 +1,23 @@
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from judge.models import Submission, ContestSubmission
+from judge.models import (
+    ContestSubmission,
+    Submission,
+    SubmissionResultCount,
+    SubmissionSource,
+    UserDailyActivity,
+)
+from judge.tasks.submission import fingerprint_submission
 from judge.utils.problems import finished_submission
 
 
 @receiver(post_delete, sender=Submission)
 def submission_delete(sender, instance, **kwargs):
     finished_submission(instance, is_delete=True)
+    SubmissionResultCount.record_change(instance, instance.result, None)
+    UserDailyActivity.record(instance.user_id, instance.date, -1)
     instance.user.calculate_points()
 
 
@@ -22,3 +32,12 @@ def contest_submission_update(sender, instance, **kwargs):
     Submission.objects.filter(id=instance.submission_id).update(
         contest_object_id=instance.participation.contest_id
     )
+
+
+@receiver(post_save, sender=SubmissionSource)
+def submission_source_update(sender, instance, created, **kwargs):
+    # Contest sources are fingerprinted as they come in so that the
+    # similarity check after the contest only has to compare.
+    if created and instance.submission.contest_object_id:
+        submission_id = instance.submission_id
+        transaction.on_commit(lambda: fingerprint_submission.delay(submission_id))
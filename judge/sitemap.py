@@ -1,78 +1,151 @@
+"""
+Sitemaps, pre-generated into static gzipped segments.
+
+Each section is cut into fixed id ranges walked in id order, so a segment
+keeps its rows when rows elsewhere are added or deleted. ``generate_sitemaps``
+writes one ``.xml.gz`` file per non-empty range plus the index to the default
+storage, skipping segments whose rows hash to the same digest as last time;
+the views only stream these files.
+"""
+
+import copy
+import gzip
+
+import xxhash
 from django.contrib.auth.models import User
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps.views import SitemapIndexItem
+from django.contrib.sites.models import Site
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import loader
 from django.urls import reverse
 from django.utils import timezone
 
-from judge.models import BlogPost, Contest, Organization, Problem, Solution
+from judge.models import (
+    BlogPost,
+    Contest,
+    Organization,
+    Problem,
+    SitemapSegment,
+    Solution,
+)
+
+SITEMAP_DIRECTORY = "sitemaps"
+SITEMAP_INDEX = "%s/sitemap.xml" % SITEMAP_DIRECTORY
 
 
-class ProblemSitemap(Sitemap):
+class SegmentedSitemap(Sitemap):
+    """A sitemap over a queryset that can be limited to one id range."""
+
+    fields = ()
+    segment_size = 10000
+    segment = None
+
+    def get_queryset(self):
+        raise NotImplementedError()
+
+    def items(self):
+        queryset = self.get_queryset()
+        if self.segment is not None:
+            start, end = self.segment
+            queryset = queryset.filter(id__gte=start, id__lt=end).order_by("id")
+        return queryset.values_list(*self.fields)
+
+    def segment_numbers(self):
+        """Yield the numbers of the non-empty id ranges, walking the ids."""
+        ids = self.get_queryset().order_by("id").values_list("id", flat=True)
+        start = 0
+        while True:
+            first = ids.filter(id__gte=start).first()
+            if first is None:
+                return
+            number = first // self.segment_size
+            yield number
+            start = (number + 1) * self.segment_size
+
+    def get_segment(self, number):
+        sitemap = copy.copy(self)
+        sitemap.segment = (
+            number * self.segment_size,
+            (number + 1) * self.segment_size,
+        )
+        return sitemap
+
+
+class ProblemSitemap(SegmentedSitemap):
     changefreq = "daily"
     priority = 0.8
+    fields = ("code",)
 
-    def items(self):
-        return Problem.get_public_problems().values_list("code")
+    def get_queryset(self):
+        return Problem.get_public_problems()
 
     def location(self, obj):
         return reverse("problem_detail", args=obj)
 
 
-class UserSitemap(Sitemap):
+class UserSitemap(SegmentedSitemap):
     changefreq = "hourly"
     priority = 0.5
+    fields = ("username",)
 
-    def items(self):
-        return User.objects.values_list("username")
+    def get_queryset(self):
+        return User.objects.all()
 
     def location(self, obj):
         return reverse("user_page", args=obj)
 
 
-class ContestSitemap(Sitemap):
+class ContestSitemap(SegmentedSitemap):
     changefreq = "hourly"
     priority = 0.5
+    fields = ("key",)
 
-    def items(self):
+    def get_queryset(self):
         return Contest.objects.filter(
             is_visible=True, is_private=False, is_organization_private=False
-        ).values_list("key")
+        )
 
     def location(self, obj):
         return reverse("contest_view", args=obj)
 
 
-class OrganizationSitemap(Sitemap):
+class OrganizationSitemap(SegmentedSitemap):
     changefreq = "hourly"
     priority = 0.5
+    fields = ("id", "slug")
 
-    def items(self):
-        return Organization.objects.values_list("id", "slug")
+    def get_queryset(self):
+        return Organization.objects.all()
 
     def location(self, obj):
         return reverse("organization_home", args=obj)
 
 
-class BlogPostSitemap(Sitemap):
+class BlogPostSitemap(SegmentedSitemap):
     changefreq = "hourly"
     priority = 0.7
+    fields = ("id", "slug")
 
-    def items(self):
+    def get_queryset(self):
         return BlogPost.objects.filter(
             visible=True, is_organization_private=False, publish_on__lte=timezone.now()
-        ).values_list("id", "slug")
+        )
 
     def location(self, obj):
         return reverse("blog_post", args=obj)
 
 
-class SolutionSitemap(Sitemap):
+class SolutionSitemap(SegmentedSitemap):
     changefreq = "hourly"
     priority = 0.8
+    fields = ("problem__code",)
 
-    def items(self):
+    def get_queryset(self):
         return Solution.objects.filter(
             is_public=True, publish_on__lte=timezone.now(), problem__isnull=False
-        ).values_list("problem__code")
+        )
 
     def location(self, obj):
         return reverse("problem_editorial", args=obj)
@@ -104,3 +177,102 @@ class UrlSitemap(Sitemap):
 
     def changefreq(self, obj):
         return obj.get("changefreq", "daily") if isinstance(obj, dict) else "daily"
+
+
+def get_sitemaps():
+    return {
+        "problem": ProblemSitemap(),
+        "user": UserSitemap(),
+        "home": HomePageSitemap(),
+        "contest": ContestSitemap(),
+        "organization": OrganizationSitemap(),
+        "blog": BlogPostSitemap(),
+        "solutions": SolutionSitemap(),
+        "pages": UrlSitemap(
+            [
+                {"location": "/about/", "priority": 0.9},
+            ]
+        ),
+    }
+
+
+def segment_path(section, number):
+    return "%s/%s-%d.xml.gz" % (SITEMAP_DIRECTORY, section, number)
+
+
+def _write(name, content):
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(content))
+
+
+def _generate_section(section, sitemap, site, protocol, force):
+    if isinstance(sitemap, SegmentedSitemap):
+        segments = [
+            (number, sitemap.get_segment(number))
+            for number in sitemap.segment_numbers()
+        ]
+    else:
+        segments = [(0, sitemap)]
+
+    existing = {
+        segment.number: segment
+        for segment in SitemapSegment.objects.filter(section=section)
+    }
+    written = 0
+    for number, segment_sitemap in segments:
+        items = list(segment_sitemap.items())
+        digest = xxhash.xxh64(repr(items).encode()).hexdigest()
+        segment = existing.pop(number, None)
+        if segment is not None and segment.digest == digest and not force:
+            continue
+
+        # items() is evaluated again by get_urls, still a single id range
+        xml = loader.render_to_string(
+            "sitemap.xml",
+            {"urlset": segment_sitemap.get_urls(site=site, protocol=protocol)},
+        )
+        _write(segment_path(section, number), gzip.compress(xml.encode(), mtime=0))
+        if segment is None:
+            segment = SitemapSegment(section=section, number=number)
+        segment.digest = digest
+        segment.url_count = len(items)
+        segment.save()
+        written += 1
+
+    for number, segment in existing.items():
+        default_storage.delete(segment_path(section, number))
+        segment.delete()
+    return written
+
+
+def generate_sitemaps(protocol="https", force=False):
+    """
+    Regenerate the changed sitemap segments and the index. Returns the
+    number of segments written.
+    """
+    site = Site.objects.get_current()
+    sitemaps = get_sitemaps()
+    written = sum(
+        _generate_section(section, sitemap, site, protocol, force)
+        for section, sitemap in sitemaps.items()
+    )
+    SitemapSegment.objects.exclude(section__in=sitemaps).delete()
+
+    index = [
+        SitemapIndexItem(
+            "%s://%s%s"
+            % (
+                protocol,
+                site.domain,
+                reverse("sitemap_segment", args=[segment.section, segment.number]),
+            ),
+            segment.updated,
+        )
+        for segment in SitemapSegment.objects.order_by("section", "number")
+    ]
+    _write(
+        SITEMAP_INDEX,
+        loader.render_to_string("sitemap_index.xml", {"sitemaps": index}).encode(),
+    )
+    return written
@@ -15,3 +15,6 @@ from judge.tasks.post_moderation import *
 from judge.tasks.maintenance import *
 from judge.tasks.magazine import *
 from judge.tasks.email import *
+from judge.tasks.pdf import *
+from judge.tasks.notification import *
+from judge.tasks.problem_data import *
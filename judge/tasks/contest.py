@@ -4,45 +4,33 @@ from django.core.exceptions import ImproperlyConfigured
 from django.utils.translation import gettext as _
 from moss import MOSS
 
-from judge.models import Contest, ContestMoss, ContestParticipation, Submission
+from judge.models import (
+    Contest,
+    ContestMoss,
+    ContestParticipation,
+    ContestSimilarity,
+    Submission,
+    SubmissionFingerprint,
+)
 from judge.utils.celery import Progress
+from judge.utils.rescore import recompute_participations, rescore_contest_submissions
+from judge.utils.similarity import compare_groups, unpack_fingerprints
 
-__all__ = ("rescore_contest", "run_moss")
+__all__ = ("find_contest_similarities", "rescore_contest", "run_moss", "run_similarity")
 
 
 @shared_task(bind=True)
 def rescore_contest(self, contest_key):
     contest = Contest.objects.get(key=contest_key)
-    participations = contest.users
 
-    rescored = 0
+    for contest_problem in contest.contest_problems.all():
+        rescore_contest_submissions(contest_problem)
+    participation_ids = list(contest.users.values_list("id", flat=True))
+
     with Progress(
-        self, participations.count(), stage=_("Recalculating contest scores")
+        self, len(participation_ids), stage=_("Recalculating contest scores")
     ) as p:
-        for participation in participations.iterator():
-            for contest_submission in participation.submissions.iterator():
-                submission = contest_submission.submission
-                contest_problem = contest_submission.problem
-                contest_submission.points = round(
-                    (
-                        submission.case_points
-                        / submission.case_total
-                        * contest_problem.points
-                        if submission.case_total > 0
-                        else 0
-                    ),
-                    3,
-                )
-                if (
-                    not contest_problem.partial
-                    and contest_submission.points != contest_problem.points
-                ):
-                    contest_submission.points = 0
-                contest_submission.save()
-            participation.recompute_results()
-            rescored += 1
-            if rescored % 10 == 0:
-                p.done = rescored
+        rescored = recompute_participations(participation_ids, p)
     return rescored
 
 
@@ -104,3 +92,68 @@ def run_moss(self, contest_key):
     ContestMoss.objects.bulk_create(moss_results)
 
     return len(moss_results)
+
+
+def _best_contest_submissions(contest):
+    """Ids of the highest scoring submission of each user on each problem."""
+    submissions = (
+        Submission.objects.filter(
+            contest__participation__virtual__in=(
+                ContestParticipation.LIVE,
+                ContestParticipation.SPECTATE,
+            ),
+            contest_object=contest,
+        )
+        .order_by("-points", "id")
+        .values_list("id", "problem_id", "user_id")
+    )
+    best = {}
+    for submission_id, problem_id, user_id in submissions.iterator():
+        best.setdefault((problem_id, user_id), submission_id)
+    return list(best.values())
+
+
+def find_contest_similarities(contest, workers=1):
+    submission_ids = _best_contest_submissions(contest)
+    # Normally done at submission time; this only catches up on the rest.
+    SubmissionFingerprint.fingerprint(submission_ids)
+
+    groups = {}
+    fingerprints = SubmissionFingerprint.objects.filter(
+        submission_id__in=submission_ids
+    ).values_list("submission_id", "submission__problem_id", "family", "fingerprints")
+    for submission_id, problem_id, family, data in fingerprints.iterator():
+        groups.setdefault((problem_id, family), {})[submission_id] = (
+            unpack_fingerprints(data)
+        )
+
+    results = []
+    for (problem_id, family), pairs in compare_groups(groups, workers).items():
+        for first, second, first_percentage, second_percentage, matched in pairs:
+            results.append(
+                ContestSimilarity(
+                    contest=contest,
+                    problem_id=problem_id,
+                    language=family,
+                    first_id=first,
+                    second_id=second,
+                    first_percentage=first_percentage,
+                    second_percentage=second_percentage,
+                    matched=matched,
+                )
+            )
+
+    ContestSimilarity.objects.filter(contest=contest).delete()
+    ContestSimilarity.objects.bulk_create(results)
+    return len(results)
+
+
+@shared_task(bind=True)
+def run_similarity(self, contest_key):
+    contest = Contest.objects.get(key=contest_key)
+    # Celery's prefork workers cannot start a process pool of their own, so
+    # the comparison runs in-process here; runsimilarity can use --workers.
+    with Progress(self, 1, stage=_("Comparing submissions")) as p:
+        count = find_contest_similarities(contest)
+        p.did(1)
+    return count
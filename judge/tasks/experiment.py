@@ -1,18 +1,24 @@
-from judge.models import SubmissionTestCase
+from judge.models import Submission
 
 from collections import defaultdict
 
 
 def generate_report(problem):
-    testcases = SubmissionTestCase.objects.filter(submission__problem=problem).all()
+    submissions = (
+        Submission.objects.filter(problem=problem)
+        .select_related("test_case_pack")
+        .prefetch_related("test_cases")
+        .only("id", "test_case_pack")
+    )
 
     score = defaultdict(int)
     total = defaultdict(int)
     rate = defaultdict(int)
 
-    for case in testcases.iterator():
-        score[case.case] += int(case.status == "AC")
-        total[case.case] += 1
+    for submission in submissions.iterator(chunk_size=500):
+        for case in submission.test_case_results:
+            score[case.case] += int(case.status == "AC")
+            total[case.case] += 1
 
     for i in score:
         rate[i] = score[i] / total[i]
@@ -3,6 +3,8 @@ import logging
 from celery import shared_task
 from django.conf import settings
 
+from judge import sitemap
+from judge.models import SiteDailyStat
 from judge.tasks.periodic import run_locked_command
 
 logger = logging.getLogger(__name__)
@@ -123,3 +125,24 @@ def sync_organization_private_flags():
             settings, "PERIODIC_FIX_ORGANIZATION_PRIVATE_LOCK_TIMEOUT", 3600
         ),
     )
+
+
+@shared_task
+def roll_up_site_stats():
+    if not getattr(settings, "PERIODIC_ROLL_UP_SITE_STATS_ENABLED", True):
+        logger.info("Site statistics roll-up skipped because it is disabled")
+        return {"skipped": True, "reason": "disabled"}
+
+    # Concurrent runs are safe: each pass locks its metric's watermark row.
+    return SiteDailyStat.roll_up_all()
+
+
+@shared_task
+def generate_sitemaps():
+    if not getattr(settings, "PERIODIC_GENERATE_SITEMAPS_ENABLED", True):
+        logger.info("Sitemap generation skipped because it is disabled")
+        return {"skipped": True, "reason": "disabled"}
+
+    return sitemap.generate_sitemaps(
+        protocol=getattr(settings, "DMOJ_SITEMAP_PROTOCOL", "https")
+    )
@@ -0,0 +1,21 @@
+from celery import shared_task
+
+from judge.models import Notification, Profile
+
+__all__ = ("fan_out_notifications",)
+
+
+@shared_task
+def fan_out_notifications(
+    user_ids, category, html_link="", author_id=None, extra_data=None, dedup=True
+):
+    author = Profile(id=author_id) if author_id else None
+    Notification.objects.bulk_create_notifications(
+        user_ids,
+        category,
+        html_link=html_link,
+        author=author,
+        extra_data=extra_data,
+        deduplicate=dedup,
+    )
+    return len(user_ids)
@@ -0,0 +1,136 @@
+import logging
+import uuid
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from judge.models import Contest, Problem
+from judge.pdf_problems import (
+    DefaultPdfMaker,
+    HAS_PDF,
+    load_problem_pdf,
+    problem_pdf_cache_path,
+)
+
+__all__ = (
+    "prerender_contest_pdfs",
+    "problem_pdf_render_error",
+    "render_problem_pdf",
+    "request_problem_pdf",
+    "schedule_contest_pdfs",
+    "schedule_contest_problem_pdf",
+)
+
+logger = logging.getLogger("judge.problem.pdf")
+
+PDF_RENDER_LOCK_TIMEOUT = 600
+
+
+def _render_lock_key(problem_code, language):
+    return "pdf_render:%s:%s" % (problem_code, language)
+
+
+def _render_error_key(problem_code, language):
+    return "pdf_render_error:%s:%s" % (problem_code, language)
+
+
+def problem_pdf_render_error(problem_code, language):
+    """Log of the last failed render, kept until the next attempt is allowed."""
+    return cache.get(_render_error_key(problem_code, language))
+
+
+def request_problem_pdf(problem_code, language, url=""):
+    """
+    Queue a render of the problem PDF unless one is already pending.
+
+    The lock makes sure only one render runs per (problem, language) no
+    matter how many requests ask for it; the task releases it when done.
+    Returns True if this call queued the render.
+    """
+    lock_key = _render_lock_key(problem_code, language)
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, PDF_RENDER_LOCK_TIMEOUT):
+        return False
+    transaction.on_commit(
+        lambda: render_problem_pdf.delay(problem_code, language, url, token)
+    )
+    return True
+
+
+@shared_task
+def render_problem_pdf(problem_code, language, url="", token=None):
+    lock_key = _render_lock_key(problem_code, language)
+    try:
+        cache_path = problem_pdf_cache_path(problem_code, language)
+        if default_storage.exists(cache_path):
+            return {"skipped": True, "reason": "cached"}
+
+        problem = Problem.objects.get(code=problem_code)
+        logger.info("Rendering: %s.%s.pdf", problem_code, language)
+        with DefaultPdfMaker() as maker:
+            load_problem_pdf(maker, problem, language, url)
+            maker.make()
+            if not maker.success:
+                logger.error(
+                    "Failed to render PDF for %s:\n%s", problem_code, maker.log
+                )
+                cache.set(
+                    _render_error_key(problem_code, language),
+                    maker.log,
+                    PDF_RENDER_LOCK_TIMEOUT,
+                )
+                return {"success": False}
+            with open(maker.pdffile, "rb") as f:
+                default_storage.save(cache_path, ContentFile(f.read()))
+        return {"success": True}
+    finally:
+        if token is not None and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def _problem_pdf_languages(problem):
+    languages = {settings.LANGUAGE_CODE}
+    languages.update(problem.translations.values_list("language", flat=True))
+    return languages
+
+
+def _request_problem_pdfs(problem):
+    queued = 0
+    for language in _problem_pdf_languages(problem):
+        if default_storage.exists(problem_pdf_cache_path(problem.code, language)):
+            continue
+        if request_problem_pdf(problem.code, language):
+            queued += 1
+    return queued
+
+
+@shared_task
+def prerender_contest_pdfs(contest_key):
+    """Queue PDFs of every problem in a contest before it starts."""
+    if not HAS_PDF:
+        return 0
+
+    contest = Contest.objects.get(key=contest_key)
+    return sum(_request_problem_pdfs(problem) for problem in contest.problems.all())
+
+
+def _is_upcoming(contest):
+    return contest.is_visible and contest.start_time > timezone.now()
+
+
+def schedule_contest_pdfs(contest):
+    """Pre-render the PDFs of a visible contest that has not started yet."""
+    if HAS_PDF and _is_upcoming(contest):
+        # Runs after commit, so problems saved along with the contest are in.
+        transaction.on_commit(lambda: prerender_contest_pdfs.delay(contest.key))
+
+
+def schedule_contest_problem_pdf(contest_problem):
+    """Pre-render a problem added to an upcoming contest."""
+    if HAS_PDF and contest_problem.problem_id and _is_upcoming(contest_problem.contest):
+        transaction.on_commit(lambda: _request_problem_pdfs(contest_problem.problem))
@@ -0,0 +1,57 @@
+from celery import shared_task
+from django.db import transaction
+from django.utils.translation import gettext as _
+
+from judge.models import ProblemData
+from judge.utils.celery import Progress
+from judge.utils.problem_data_blobs import (
+    check_manifest,
+    commit_manifest,
+    store_archive,
+)
+from judge.utils.zip_index import check_archive, zip_index
+
+__all__ = ("check_problem_archive", "index_problem_archive")
+
+
+@shared_task
+def index_problem_archive(problem_id, name):
+    """
+    Move the test data zip ``name`` into the blob store: its members become
+    the manifest, materialized in the problem directory, and the zip is
+    deleted so the data is not kept twice.
+    """
+    data = ProblemData.objects.get(problem_id=problem_id)
+    if data.zipfile.name != name:
+        return 0
+    files = store_archive(data.zipfile.path)
+
+    with transaction.atomic():
+        data = (
+            ProblemData.objects.select_for_update()
+            .select_related("problem")
+            .get(problem_id=problem_id)
+        )
+        # Another zip was uploaded meanwhile; its own task indexes it and the
+        # blobs stored here are collected after the grace period if unused.
+        if data.zipfile.name != name:
+            return 0
+        commit_manifest(data, files)
+    check_manifest(data.problem)
+    return len(files)
+
+
+@shared_task(bind=True)
+def check_problem_archive(self, problem_id):
+    data = ProblemData.objects.select_related("problem").get(problem_id=problem_id)
+    if data.zipfile:
+        path = data.zipfile.path
+        total = sum(member.size for member in zip_index(path))
+        with Progress(self, total, stage=_("Checking test data")) as p:
+            report = check_archive(path, p)
+    else:
+        problem = data.problem
+        total = sum(problem.test_data_files.values_list("blob__size", flat=True))
+        with Progress(self, total, stage=_("Checking test data")) as p:
+            report = check_manifest(problem, p)
+    return len(report["issues"])
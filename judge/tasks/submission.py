@@ -2,11 +2,25 @@ from celery import shared_task
 from django.core.cache import cache
 from django.utils.translation import gettext as _
 
-from judge.models import Problem, Profile, Submission
+from judge.judgeapi import BATCH_MAX_SUBMISSIONS, judge_submissions
+from judge.models import (
+    BestSubmission,
+    ContestProblem,
+    Problem,
+    Profile,
+    Submission,
+    SubmissionFingerprint,
+)
 from judge.utils.celery import Progress
+from judge.utils.rescore import (
+    recompute_participations,
+    rescore_contest_submissions,
+    rescore_submissions,
+)
 
 __all__ = (
     "apply_submission_filter",
+    "fingerprint_submission",
     "rejudge_problem_filter",
     "rescore_problem",
     "update_user_points",
@@ -31,6 +45,11 @@ def update_problem_stats(problem_id):
     problem.update_stats()
 
 
+@shared_task
+def fingerprint_submission(submission_id):
+    SubmissionFingerprint.fingerprint([submission_id])
+
+
 def apply_submission_filter(queryset, id_range, languages, results, contests):
     if id_range:
         start, end = id_range
@@ -54,11 +73,19 @@ def rejudge_problem_filter(
 
     rejudged = 0
     with Progress(self, queryset.count()) as p:
-        for submission in queryset.iterator():
-            submission.judge(rejudge=True, batch_rejudge=True)
-            rejudged += 1
-            if rejudged % 10 == 0:
+        batch = []
+        for submission in queryset.select_related(
+            "problem", "language", "source"
+        ).iterator():
+            batch.append(submission)
+            if len(batch) == BATCH_MAX_SUBMISSIONS:
+                judge_submissions(batch, rejudge=True, batch_rejudge=True)
+                rejudged += len(batch)
                 p.done = rejudged
+                batch = []
+        if batch:
+            judge_submissions(batch, rejudge=True, batch_rejudge=True)
+            rejudged += len(batch)
     return rejudged
 
 
@@ -68,34 +95,21 @@ def rescore_problem(self, problem_id):
     submissions = Submission.objects.filter(problem_id=problem_id)
 
     with Progress(self, submissions.count(), stage=_("Modifying submissions")) as p:
-        rescored = 0
-        for submission in submissions.iterator():
-            submission.points = round(
-                (
-                    submission.case_points / submission.case_total * problem.points
-                    if submission.case_total
-                    else 0
-                ),
-                1,
-            )
-            if not problem.partial and submission.points < problem.points:
-                submission.points = 0
-            submission.save(update_fields=["points"])
-            submission.update_contest()
-            rescored += 1
-            if rescored % 10 == 0:
-                p.done = rescored
+        rescored = rescore_submissions(submissions, problem.points, problem.partial, p)
 
+    participation_ids = set()
+    for contest_problem in ContestProblem.objects.filter(problem_id=problem_id):
+        participation_ids |= rescore_contest_submissions(contest_problem)
     with Progress(
-        self,
-        submissions.values("user_id").distinct().count(),
-        stage=_("Recalculating user points"),
+        self, len(participation_ids), stage=_("Recalculating contest scores")
     ) as p:
+        recompute_participations(participation_ids, p)
+
+    user_ids = list(submissions.values_list("user_id", flat=True).distinct())
+    with Progress(self, len(user_ids), stage=_("Recalculating user points")) as p:
+        BestSubmission.recalculate_for_problem(problem_id, user_ids)
         users = 0
-        profiles = Profile.objects.filter(
-            id__in=submissions.values_list("user_id", flat=True).distinct()
-        )
-        for profile in profiles.iterator():
+        for profile in Profile.objects.filter(id__in=user_ids).iterator():
             profile._updating_stats_only = True
             profile.calculate_points()
             Profile.dirty_cache(profile.id)
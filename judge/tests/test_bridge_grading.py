@@ -0,0 +1,166 @@
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from judge.bridge import grading
+from judge.bridge.judge_handler import JudgeHandler
+from judge.models import (
+    Language,
+    Problem,
+    ProblemGroup,
+    ProblemTestCase,
+    Profile,
+    Submission,
+    SubmissionTestCase,
+)
+
+
+def case(position, status, points, total, time=0.1, memory=1024):
+    return {
+        "position": position,
+        "status": status,
+        "time": time,
+        "memory": memory,
+        "points": points,
+        "total-points": total,
+        "output": "",
+    }
+
+
+@patch("judge.bridge.judge_handler.event.post")
+@patch("judge.bridge.judge_handler.finished_submission")
+@patch("judge.bridge.judge_handler.update_user_points.delay")
+@patch("judge.bridge.judge_handler.update_problem_stats.delay")
+@patch("judge.bridge.judge_handler.delete_submission_result")
+@patch("judge.bridge.judge_handler.save_submission_result")
+class GradingStateTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        grading._min_batches.clear()
+        group = ProblemGroup.objects.create(name="grading", full_name="Grading")
+        self.problem = Problem.objects.create(
+            code="grading",
+            name="Grading",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+            partial=True,
+        )
+        for order, (type, scoring) in enumerate(
+            [("S", "min"), ("C", ""), ("C", ""), ("E", ""), ("S", "sum"), ("C", "")]
+            + [("C", ""), ("E", ""), ("C", "")]
+        ):
+            ProblemTestCase.objects.create(
+                dataset=self.problem,
+                order=order,
+                type=type,
+                batch_scoring=scoring,
+                is_pretest=False,
+            )
+        user = User.objects.create(username="grading")
+        language = Language.objects.first()
+        profile = Profile.objects.create(user=user, language=language)
+        self.submission = Submission.objects.create(
+            user=profile, problem=self.problem, language=language
+        )
+
+        self.handler = object.__new__(JudgeHandler)
+        self.handler.name = "judge"
+        self.handler.judge_address = None
+        self.handler.judges = Mock()
+        self.handler.batch_id = None
+        self.handler.in_batch = False
+        self.handler.update_counter = {}
+        self.handler._grading_states = {}
+        self.handler._submitted_at = None
+        self.handler._grading_began = None
+        self.handler.result_writer = None
+        self.handler._post_update_submission = Mock()
+
+    def packet(self, **kwargs):
+        kwargs["submission-id"] = self.submission.id
+        return kwargs
+
+    def grade(self, lose_state=False):
+        handler = self.handler
+        handler.on_grading_begin(self.packet(pretested=False))
+        handler.on_batch_begin(self.packet())
+        handler.on_test_case(
+            self.packet(cases=[case(1, 0, 3, 3), case(2, 1, 1, 3, time=0.5)])
+        )
+        handler.on_batch_end(self.packet())
+        if lose_state:
+            handler._grading_states.clear()
+        handler.on_batch_begin(self.packet())
+        handler.on_test_case(
+            self.packet(cases=[case(3, 0, 2, 2), case(4, 4, 0, 2, memory=4096)])
+        )
+        handler.on_batch_end(self.packet())
+        handler.on_test_case(self.packet(cases=[case(5, 0, 2, 2)]))
+        handler.on_grading_end(self.packet())
+        self.submission.refresh_from_db()
+
+    def assert_graded(self):
+        # min batch: 1/3 * 6, sum batch: 2 of 4, plain case: 2 of 2
+        self.assertAlmostEqual(self.submission.case_points, 6.0)
+        self.assertEqual(self.submission.case_total, 12)
+        self.assertAlmostEqual(self.submission.points, 0.5)
+        self.assertEqual(self.submission.result, "TLE")
+        self.assertEqual(self.submission.time, 0.5)
+        self.assertEqual(self.submission.memory, 4096)
+
+    def test_grading_end_reads_no_test_case_rows(self, save_result, *mocks):
+        with patch.object(
+            grading.GradingState, "from_database", side_effect=AssertionError
+        ):
+            self.grade()
+
+        self.assert_graded()
+        cases = list(save_result.call_args.args[1])
+        self.assertEqual([detail["case"] for detail in cases], [1, 2, 3, 4, 5])
+        self.assertEqual(self.handler._grading_states, {})
+
+    def test_problem_without_group_is_graded(self, *mocks):
+        Problem.objects.filter(id=self.problem.id).update(group=None)
+        self.grade()
+
+        self.assert_graded()
+
+    def test_lost_state_is_recovered_from_rows(self, save_result, *mocks):
+        self.grade(lose_state=True)
+
+        self.assert_graded()
+        self.assertEqual(len(list(save_result.call_args.args[1])), 3)
+
+    @override_settings(SUBMISSION_TEST_CASE_STORAGE="packed")
+    def test_graded_cases_are_packed(self, *mocks):
+        self.grade(lose_state=True)
+
+        self.assert_graded()
+        self.assertFalse(
+            SubmissionTestCase.objects.filter(submission=self.submission).exists()
+        )
+        cases = self.submission.test_case_results
+        self.assertEqual([c.case for c in cases], [1, 2, 3, 4, 5])
+        self.assertEqual([c.batch for c in cases], [1, 1, 2, 2, None])
+        self.assertEqual([c.status for c in cases], ["AC", "WA", "AC", "TLE", "AC"])
+
+        # Rejudging starts over from rows
+        self.handler.on_grading_begin(self.packet(pretested=False))
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.test_case_results, [])
+
+    def test_batch_scoring_is_cached_per_init_version(self, *mocks):
+        with patch.object(grading, "get_problem_init_hash", return_value="v1"):
+            self.assertEqual(grading.get_min_batches(self.problem), {1})
+            ProblemTestCase.objects.filter(batch_scoring="sum").update(
+                batch_scoring="min"
+            )
+            with self.assertNumQueries(0):
+                self.assertEqual(grading.get_min_batches(self.problem), {1})
+
+        with patch.object(grading, "get_problem_init_hash", return_value="v2"):
+            self.assertEqual(grading.get_min_batches(self.problem), {1, 2})
@@ -0,0 +1,104 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from judge.bridge.daemon import restore_queue
+from judge.bridge.journal import QueueJournal
+from judge.bridge.judge_list import JudgeList
+from judge.models import (
+    Language,
+    Problem,
+    ProblemGroup,
+    Profile,
+    Submission,
+    SubmissionSource,
+)
+from judge.tests.test_bridge_reliability import FakeJudge
+
+
+class QueueJournalTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "queue.journal")
+
+    def test_replay_restores_live_submissions(self):
+        journal = QueueJournal(self.path)
+        journal.replay()
+        for id in (1, 2, 3):
+            journal.enqueue(id, "aplusb", "PY3", None, 2, id)
+        journal.dispatch(3)
+        journal.finish(1)
+        journal.close()
+        with open(self.path, "a") as f:
+            f.write('{"e":"f","id":')
+
+        entries = QueueJournal(self.path).replay()
+
+        self.assertEqual([entry.id for entry in entries], [3, 2])
+        self.assertTrue(entries[0].dispatched)
+        with open(self.path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def make_submission(self, profile, problem, status):
+        submission = Submission.objects.create(
+            user=profile,
+            problem=problem,
+            language=profile.language,
+            status=status,
+        )
+        SubmissionSource.objects.create(
+            submission=submission, source="print(%d)" % submission.id
+        )
+        return submission
+
+    def test_bridge_restart_requeues_in_flight_work(self):
+        group = ProblemGroup.objects.create(name="journal", full_name="Journal")
+        problem = Problem.objects.create(
+            code="aplusb",
+            name="A Plus B",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+        )
+        user = User.objects.create(username="journal")
+        profile = Profile.objects.create(user=user, language=Language.objects.first())
+        running, waiting, graded = (
+            self.make_submission(profile, problem, status)
+            for status in ("G", "QU", "QU")
+        )
+
+        judges = JudgeList(journal=QueueJournal(self.path))
+        judges.journal.replay()
+        busy = FakeJudge("busy")
+        judges.judges.add(busy)
+        for submission in (running, waiting, graded):
+            judges.judge(
+                submission.id, "aplusb", "PY3", "src", None, 2, user_id=user.id + 1
+            )
+        # Graded by the time the bridge goes down, but its finish is lost
+        Submission.objects.filter(id=graded.id).update(status="D")
+        judges.journal.close()
+
+        judges = JudgeList(journal=QueueJournal(self.path))
+        restored = restore_queue(judges, judges.journal)
+
+        self.assertEqual(restored, [running.id, waiting.id])
+        free = FakeJudge("free")
+        judges.judges.add(free)
+        judges._handle_free_judge(free)
+        self.assertEqual(free.submitted, [running.id])
+        self.assertEqual(free._working_data["source"], "print(%d)" % running.id)
+        running.refresh_from_db()
+        self.assertEqual(running.status, "QU")
+
+        judges.on_judge_free(free, running.id)
+        self.assertEqual(free.submitted, [running.id, waiting.id])
+        self.assertEqual(
+            [entry.id for entry in QueueJournal(self.path).replay()], [waiting.id]
+        )
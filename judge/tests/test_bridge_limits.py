@@ -0,0 +1,180 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from judge.bridge.django_handler import DjangoHandler
+from judge.bridge.judge_handler import JudgeHandler
+from judge.bridge.judge_list import JudgeList
+from judge.models import (
+    Contest,
+    ContestParticipation,
+    ContestProblem,
+    ContestSubmission,
+    Language,
+    LanguageLimit,
+    Problem,
+    ProblemGroup,
+    Profile,
+    Submission,
+)
+
+
+class BridgeLimitsTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        self.language = Language.objects.get(key="PY3")
+        group = ProblemGroup.objects.create(name="limits", full_name="Limits")
+        self.problem = Problem.objects.create(
+            code="limits",
+            name="Limits",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+        )
+        LanguageLimit.objects.create(
+            problem=self.problem,
+            language=self.language,
+            time_limit=3.0,
+            memory_limit=131072,
+        )
+        user = User.objects.create(username="limits")
+        self.profile = Profile.objects.create(user=user, language=self.language)
+        start = timezone.now() - timezone.timedelta(hours=1)
+        contest = Contest.objects.create(
+            key="limits",
+            name="Limits",
+            start_time=start,
+            end_time=start + timezone.timedelta(hours=6),
+        )
+        self.contest_problem = ContestProblem.objects.create(
+            contest=contest, problem=self.problem, points=100, order=0
+        )
+        self.participation = ContestParticipation.objects.create(
+            contest=contest, user=self.profile, real_start=start
+        )
+
+        self.judges = JudgeList()
+        self.handler = object.__new__(JudgeHandler)
+        self.handler.judges = self.judges
+
+    def submit(self, status="QU"):
+        submission = Submission.objects.create(
+            user=self.profile,
+            problem=self.problem,
+            language=self.language,
+            status=status,
+        )
+        ContestSubmission.objects.create(
+            submission=submission,
+            problem=self.contest_problem,
+            participation=self.participation,
+        )
+        return submission
+
+    def test_attempts_are_numbered_at_creation(self):
+        first = self.submit()
+        self.submit(status="CE")
+        third = self.submit()
+
+        self.assertEqual(
+            list(
+                ContestSubmission.objects.order_by("id").values_list(
+                    "attempt", flat=True
+                )
+            ),
+            [1, 2, 2],
+        )
+        self.assertEqual(third.contest.attempt, 2)
+        self.assertEqual(first.contest.attempt, 1)
+
+    def test_limits_are_cached_until_update_broadcast(self):
+        limits = self.judges.limits
+        self.assertEqual(limits.get("limits", "PY3"), (3.0, 131072, False))
+        self.assertEqual(limits.get("limits", "C"), (1.0, 65536, False))
+        self.assertIsNone(limits.get("missing", "PY3"))
+
+        Problem.objects.filter(id=self.problem.id).update(time_limit=2.0)
+        with self.assertNumQueries(0):
+            self.assertEqual(limits.get("limits", "C").time, 1.0)
+
+        self.judges.broadcast_update_problems("limits")
+        self.assertEqual(limits.get("limits", "C").time, 2.0)
+
+    def test_dispatch_data_takes_one_query(self):
+        self.submit()
+        submission = self.submit()
+        self.judges.limits.get("limits", "PY3")
+
+        with self.assertNumQueries(1):
+            data = self.handler.get_related_submission_data(
+                submission.id, "limits", "PY3"
+            )
+        self.assertEqual((data.time, data.memory), (3.0, 131072))
+        self.assertEqual(data.attempt_no, 2)
+        self.assertEqual(data.user_id, self.profile.id)
+
+        # Contest submissions made before attempts were stored are counted
+        ContestSubmission.objects.update(attempt=None)
+        data = self.handler.get_related_submission_data(submission.id, "limits", "PY3")
+        self.assertEqual(data.attempt_no, 2)
+
+    def test_submissions_outside_contests_are_counted(self):
+        self.submit()
+        start = timezone.now() - timezone.timedelta(hours=1)
+        for minute, status in enumerate(("QU", "CE", "QU")):
+            submission = Submission.objects.create(
+                user=self.profile,
+                problem=self.problem,
+                language=self.language,
+                status=status,
+            )
+            Submission.objects.filter(id=submission.id).update(
+                date=start + timezone.timedelta(minutes=minute)
+            )
+
+        data = self.handler.get_related_submission_data(submission.id, "limits", "PY3")
+        self.assertEqual(data.attempt_no, 2)
+
+    def test_limit_edits_invalidate_bridge_without_push_updates(self):
+        with patch("judge.judgeapi.notify_limits_update") as notify, patch(
+            "judge.judgeapi.notify_problem_update"
+        ) as push:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.problem.time_limit = 2.0
+                self.problem.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                LanguageLimit.objects.filter(problem=self.problem).update(
+                    time_limit=4.0
+                )
+                LanguageLimit.objects.get(problem=self.problem).save()
+        push.assert_not_called()
+        self.assertEqual(
+            [call.args for call in notify.call_args_list], [("limits",), ("limits",)]
+        )
+
+        self.judges.limits.get("limits", "PY3")
+        handler = object.__new__(DjangoHandler)
+        handler.judges = self.judges
+        handler.on_invalidate_limits({"problem": "limits"})
+        self.assertNotIn("limits", self.judges.limits.problems)
+
+    @override_settings(DMOJ_PROBLEM_DATA_PUSH_UPDATE=True)
+    def test_limit_edits_notify_judges(self):
+        with patch("judge.judgeapi.notify_problem_update") as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.problem.name = "Renamed"
+                self.problem.save()
+            notify.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.problem.memory_limit = 262144
+                self.problem.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                LanguageLimit.objects.filter(problem=self.problem).delete()
+        self.assertEqual(
+            [call.args for call in notify.call_args_list], [("limits",), ("limits",)]
+        )
@@ -0,0 +1,68 @@
+import urllib.request
+from unittest import TestCase
+
+from judge.bridge import metrics
+from judge.bridge.judge_list import JudgeList
+from judge.tests.test_bridge_reliability import FakeJudge
+
+
+class MetricsRegistryTest(TestCase):
+    def test_text_exposition(self):
+        registry = metrics.Registry()
+        packets = registry.counter("packets_total", "Packets.", ("packet",))
+        wait = registry.histogram("wait_seconds", "Wait.", ("tier",), (0.1, 1))
+        packets.inc('say "hi"')
+        packets.inc('say "hi"', amount=2)
+        for value in (0.05, 0.5, 0.5, 5):
+            wait.observe(value, 2)
+
+        self.assertEqual(
+            registry.render(),
+            "# HELP packets_total Packets.\n"
+            "# TYPE packets_total counter\n"
+            'packets_total{packet="say \\"hi\\""} 3.0\n'
+            "# HELP wait_seconds Wait.\n"
+            "# TYPE wait_seconds histogram\n"
+            'wait_seconds_bucket{tier="2",le="0.1"} 1.0\n'
+            'wait_seconds_bucket{tier="2",le="1.0"} 3.0\n'
+            'wait_seconds_bucket{tier="2",le="+Inf"} 4.0\n'
+            'wait_seconds_sum{tier="2"} 6.05\n'
+            'wait_seconds_count{tier="2"} 4.0\n',
+        )
+
+    def test_histogram_quantile(self):
+        buckets = [1, 2, 4]
+        self.assertIsNone(metrics.histogram_quantile(buckets, [0, 0, 0, 0], 0.5))
+        self.assertEqual(metrics.histogram_quantile(buckets, [0, 4, 0, 0], 0.5), 1.5)
+        self.assertEqual(metrics.histogram_quantile(buckets, [1, 0, 0, 3], 0.99), 4)
+
+    def test_served_over_http(self):
+        server = metrics.serve_metrics(("127.0.0.1", 0))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = "http://%s:%s" % server.server_address[:2]
+
+        with urllib.request.urlopen(url + "/metrics", timeout=10) as response:
+            body = response.read().decode()
+        self.assertIn("# TYPE bridge_queue_wait_seconds histogram", body)
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/", timeout=10)
+
+
+class BridgeInstrumentationTest(TestCase):
+    def series(self, histogram, *labels):
+        return histogram.series.get(labels, [[0], 0.0])[0]
+
+    def test_dispatches_record_queue_wait_per_tier(self):
+        waits = sum(self.series(metrics.QUEUE_WAIT, 3))
+        dispatches = metrics.DISPATCHES.values.get(("metrics", 3), 0)
+
+        judges = JudgeList()
+        judge = FakeJudge("metrics")
+        judges.judges.add(judge)
+        judges.judge(1, "aplusb", "PY3", "src", None, 3)
+        judges.judge(2, "aplusb", "PY3", "src", None, 3)
+        judges.on_judge_free(judge, 1)
+
+        self.assertEqual(sum(self.series(metrics.QUEUE_WAIT, 3)), waits + 2)
+        self.assertEqual(metrics.DISPATCHES.values[("metrics", 3)], dispatches + 2)
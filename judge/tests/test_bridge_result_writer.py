@@ -0,0 +1,112 @@
+import os
+import threading
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from judge.bridge import result_writer
+from judge.bridge.result_writer import ResultWriter
+
+
+class FakeResults(object):
+    def __init__(self):
+        self.files = {}
+        self.operations = []
+        self.fail = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def save(self, id, content):
+        self.release.wait(10)
+        if self.fail:
+            raise OSError("storage unavailable")
+        self.operations.append(("save", id))
+        self.files[id] = content
+
+    def delete(self, id):
+        self.release.wait(10)
+        self.operations.append(("delete", id))
+        self.files.pop(id, None)
+
+
+class ResultWriterTest(TestCase):
+    def setUp(self):
+        self.results = FakeResults()
+        for name, target in (
+            ("save_submission_result_content", self.results.save),
+            ("delete_submission_result", self.results.delete),
+        ):
+            patcher = patch.object(result_writer, name, side_effect=target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_writer(self, **kwargs):
+        writer = ResultWriter(retry_seconds=0.01, **kwargs)
+        writer.start()
+        self.addCleanup(writer.stop, 1)
+        return writer
+
+    def wait_idle(self, writer):
+        for _ in range(500):
+            with writer.condition:
+                if not writer.pending:
+                    break
+            threading.Event().wait(0.01)
+        writer.stop()
+
+    def test_uploads_in_background(self):
+        writer = self.make_writer()
+        self.results.release.clear()
+        writer.save(1, [{"case": 1, "output": "out"}])
+        writer.save(2, [{"case": 1, "output": "two"}])
+
+        self.assertEqual(self.results.files, {})
+        self.results.release.set()
+        self.wait_idle(writer)
+        self.assertEqual(sorted(self.results.files), [1, 2])
+        self.assertIn(b'"output":"out"', self.results.files[1])
+
+    def test_only_last_operation_per_submission_is_written(self):
+        writer = ResultWriter()
+        writer.save(1, [{"case": 1, "output": "old"}])
+        writer.delete(1)
+        writer.save(1, [{"case": 1, "output": "new"}])
+        writer.start()
+        self.wait_idle(writer)
+
+        self.assertEqual(self.results.operations, [("save", 1)])
+        self.assertIn(b'"new"', self.results.files[1])
+
+    def test_failed_uploads_are_retried(self):
+        writer = self.make_writer()
+        self.results.fail = True
+        writer.save(1, [{"case": 1}])
+        threading.Event().wait(0.05)
+        self.assertEqual(writer.status()["pending"], 1)
+
+        self.results.fail = False
+        self.wait_idle(writer)
+        self.assertEqual(list(self.results.files), [1])
+
+    def test_full_writer_saves_synchronously(self):
+        writer = ResultWriter(max_pending=1)
+        writer.save(1, [{"case": 1}])
+        writer.save(2, [{"case": 1}])
+
+        self.assertEqual(self.results.operations, [("save", 2)])
+        self.assertEqual(list(writer.pending), [1])
+
+    def test_spool_is_uploaded_after_restart(self):
+        with TemporaryDirectory() as spool:
+            writer = ResultWriter(spool=spool)
+            writer.save(1, [{"case": 1, "output": "spooled"}])
+            writer.delete(2)
+            self.assertEqual(sorted(os.listdir(spool)), ["1.json", "2.delete"])
+
+            writer = ResultWriter(spool=spool)
+            writer.start()
+            self.wait_idle(writer)
+
+            self.assertEqual(os.listdir(spool), [])
+        self.assertEqual(sorted(self.results.operations), [("delete", 2), ("save", 1)])
+        self.assertIn(b'"spooled"', self.results.files[1])
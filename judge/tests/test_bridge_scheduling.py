@@ -0,0 +1,158 @@
+from unittest import TestCase
+
+from judge.bridge.judge_list import JudgeList
+from judge.bridge.scheduling import SJF, WFQ, CostModel
+from judge.tests.test_bridge_reliability import FakeJudge
+
+
+class CostModelTest(TestCase):
+    def test_estimates_fall_back_to_problem_then_default(self):
+        costs = CostModel(default=2.0)
+        self.assertEqual(costs.estimate("aplusb", "PY3"), 2.0)
+
+        costs.observe("aplusb", "PY3", 10.0)
+        costs.observe("aplusb", "PY3", 5.0)
+        self.assertAlmostEqual(costs.estimate("aplusb", "PY3"), 9.0)
+        self.assertAlmostEqual(costs.estimate("aplusb", "CPP17"), 9.0)
+
+
+class SchedulingPolicyTest(TestCase):
+    def make_judges(self, **kwargs):
+        judges = JudgeList(**kwargs)
+        judges.scheduler.costs.observe("slow", "PY3", 60.0)
+        judges.scheduler.costs.observe("fast", "PY3", 0.5)
+        busy = FakeJudge("busy", problems=("slow", "fast"))
+        busy.working = True
+        judges.judges.add(busy)
+        return judges
+
+    def drain(self, judges):
+        judge = FakeJudge("free", problems=("slow", "fast"))
+        judges.judges.add(judge)
+        order = []
+        judges._handle_free_judge(judge)
+        while judge.submitted and judge.submitted[-1] not in order:
+            order.append(judge.submitted[-1])
+            judges.on_judge_free(judge, order[-1])
+        return order
+
+    def test_fifo_by_default(self):
+        judges = self.make_judges()
+        judges.judge(1, "slow", "PY3", "src", None, 3, user_id=1)
+        judges.judge(2, "fast", "PY3", "src", None, 3, user_id=2)
+
+        self.assertEqual(self.drain(judges), [1, 2])
+
+    def test_shortest_expected_job_first_within_tier(self):
+        judges = self.make_judges(policy=SJF)
+        judges.judge(1, "slow", "PY3", "src", None, 3, user_id=1)
+        judges.judge(2, "fast", "PY3", "src", None, 3, user_id=2)
+        judges.judge(3, "slow", "PY3", "src", None, 2, user_id=3)
+
+        self.assertEqual(self.drain(judges), [3, 2, 1])
+
+    def test_starved_submissions_go_first(self):
+        judges = self.make_judges(policy=SJF, starvation_seconds=0)
+        judges.judge(1, "slow", "PY3", "src", None, 3, user_id=1)
+        judges.judge(2, "fast", "PY3", "src", None, 3, user_id=2)
+
+        self.assertEqual(self.drain(judges), [1, 2])
+
+    def test_weighted_fair_queuing_interleaves_users(self):
+        judges = self.make_judges(policy=WFQ)
+        for id in (1, 2, 3):
+            judges.judge(id, "fast", "PY3", "src", None, 4, user_id=1)
+        judges.judge(4, "fast", "PY3", "src", None, 4, user_id=2)
+
+        self.assertEqual(self.drain(judges), [1, 4, 2, 3])
+
+    def test_status_reports_costs_and_waits(self):
+        judges = self.make_judges(policy=SJF)
+        judges.judge(1, "new", "PY3", "src", None, 3, user_id=1)
+        judges.judge(2, "fast", "PY3", "src", None, 3, user_id=2)
+        queued = judges.status(detail=True)["queue"]
+        self.assertEqual([entry["expected-cost"] for entry in queued], [1.0, 0.5])
+        self.assertEqual(queued[1]["predicted-wait"], 1.0)
+
+        judge = FakeJudge("free", problems=("new", "fast"))
+        judges.judges.add(judge)
+        judges._handle_free_judge(judge)
+        judges.on_judge_free(judge, 2)
+
+        scheduling = judges.status(detail=True)["scheduling"]
+        self.assertEqual(scheduling["policy"], SJF)
+        self.assertEqual(scheduling["wait-samples"], 2)
+        self.assertEqual(scheduling["known-costs"], 2)
+        self.assertIsNotNone(scheduling["mean-actual-wait"])
+
+
+class ProblemAffinityTest(TestCase):
+    def make_judges(self, **kwargs):
+        judges = JudgeList(**kwargs)
+        self.warm = FakeJudge("warm", problems=("aplusb", "other"), load=1.3)
+        self.cold = FakeJudge("cold", problems=("aplusb", "other"), load=1.0)
+        judges.judges.update((self.warm, self.cold))
+        judges.affinity.dispatched(self.warm, "aplusb")
+        return judges
+
+    def test_prefers_warm_judge_within_slack(self):
+        judges = self.make_judges()
+        judges.judge(1, "aplusb", "PY3", "src", None, 3)
+        judges.judge(2, "other", "PY3", "src", None, 3)
+
+        self.assertEqual(self.warm.submitted, [1])
+        self.assertEqual(self.cold.submitted, [2])
+        status = judges.status(detail=True)
+        self.assertEqual(status["affinity"]["dispatches"], 3)
+        self.assertEqual(status["affinity"]["hits"], 1)
+        warm = next(j for j in status["judges-detail"] if j["name"] == "warm")
+        self.assertEqual(warm["affinity-hit-rate"], 0.5)
+        self.assertEqual(warm["warm-problems"], 1)
+
+    def test_least_loaded_judge_beyond_slack(self):
+        judges = self.make_judges(affinity_slack=0.1)
+        judges.judge(1, "aplusb", "PY3", "src", None, 3)
+
+        self.assertEqual(self.cold.submitted, [1])
+
+    def test_recent_problems_are_bounded(self):
+        judges = self.make_judges(affinity_size=1)
+        judges.affinity.dispatched(self.warm, "other")
+        judges.judge(1, "aplusb", "PY3", "src", None, 3)
+
+        self.assertEqual(self.cold.submitted, [1])
+
+    def queue_behind_busy_judges(self, judges):
+        self.warm.working = self.cold.working = True
+        for id, problem in ((1, "other"), (2, "other"), (3, "aplusb")):
+            judges.judge(id, problem, "PY3", "src", None, 3)
+        self.warm.working = False
+
+    def test_freed_judge_takes_oldest_submission_by_default(self):
+        judges = self.make_judges()
+        self.queue_behind_busy_judges(judges)
+        judges._handle_free_judge(self.warm)
+
+        self.assertEqual(self.warm.submitted, [1])
+
+    def test_freed_judge_takes_warm_problem_first(self):
+        judges = self.make_judges(affinity_lookahead=16)
+        self.queue_behind_busy_judges(judges)
+        judges._handle_free_judge(self.warm)
+
+        self.assertEqual(self.warm.submitted, [3])
+
+    def test_freed_judge_looks_ahead_a_bounded_distance(self):
+        judges = self.make_judges(affinity_lookahead=1)
+        self.queue_behind_busy_judges(judges)
+        judges._handle_free_judge(self.warm)
+
+        self.assertEqual(self.warm.submitted, [1])
+
+    def test_freed_judge_never_skips_a_starved_submission(self):
+        judges = self.make_judges(affinity_lookahead=16, starvation_seconds=60)
+        self.queue_behind_busy_judges(judges)
+        judges.scheduler.queued[1].queued_at -= 60
+        judges._handle_free_judge(self.warm)
+
+        self.assertEqual(self.warm.submitted, [1])
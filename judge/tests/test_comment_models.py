@@ -17,8 +17,11 @@ from judge.models.comment import (
     get_visible_top_level_comment_count,
     get_visible_reply_count,
     get_top_level_comment_ids,
+    get_top_level_comment_page,
     get_reply_ids,
+    prefetch_reply_pages,
 )
+from judge.utils.sorted_index import CachedSortedIndex
 
 
 class CommentModelTestCase(TestCase):
@@ -596,3 +599,183 @@ class CommentCacheInvalidationTestCase(TestCase):
 
         # get_reply_count should return 1
         self.assertEqual(parent.get_reply_count(), 1)
+
+
+class CachedSortedIndexTestCase(TestCase):
+    """Test cases for the chunked cache index behind comment lists."""
+
+    def setUp(self):
+        cache.clear()
+        self.index = CachedSortedIndex("test-index", chunk_size=2)
+        self.entries = [((i,), i) for i in range(0, 20, 2)]
+
+    def tearDown(self):
+        cache.clear()
+
+    def build(self):
+        return list(self.entries)
+
+    def test_page_matches_full_list(self):
+        ids = self.index.all_ids(self.build)
+        self.assertEqual(ids, list(range(0, 20, 2)))
+        for offset in range(0, 12):
+            page, total = self.index.page(offset, 3, self.build)
+            self.assertEqual(page, ids[offset : offset + 3])
+            self.assertEqual(total, 10)
+
+    def test_insert_remove_and_reposition_in_place(self):
+        self.index.all_ids(self.build)
+        self.entries = []  # any rebuild would now be visible as an empty list
+
+        for i in (7, 1, 21, 9, 11, 13):
+            self.index.insert(((i,), i))
+        self.index.remove(((4,), 4))
+        self.index.reposition(((0,), 0), ((15,), 0))
+
+        expected = sorted(
+            [i for i in range(0, 20, 2) if i not in (0, 4)] + [7, 1, 21, 9, 11, 13]
+        )
+        expected.insert(expected.index(16), 0)
+        self.assertEqual(self.index.all_ids(self.build), expected)
+        self.assertEqual(self.index.page(5, 4, self.build)[0], expected[5:9])
+        self.assertEqual(self.index.page(0, 1, self.build)[1], len(expected))
+
+    def test_remove_unknown_entry_marks_stale(self):
+        self.index.all_ids(self.build)
+        self.index.remove(((5,), 5))
+        self.assertFalse(self.index.is_built())
+
+    def test_insert_during_cold_build_discards_build(self):
+        def build():
+            entries = list(self.entries)
+            # Committed after the build read the database
+            self.index.insert(((5,), 5))
+            self.entries.append(((5,), 5))
+            return entries
+
+        self.assertNotIn(5, self.index.all_ids(build))
+        self.assertFalse(self.index.is_built())
+        self.assertIn(5, self.index.all_ids(self.build))
+
+    def test_invalidate_during_cold_build_discards_build(self):
+        def build():
+            entries = list(self.entries)
+            # Hidden after the build read the database
+            self.entries.remove(entries[0])
+            self.index.invalidate()
+            return entries
+
+        hidden = self.entries[0][1]
+        self.assertIn(hidden, self.index.all_ids(build))
+        self.assertFalse(self.index.is_built())
+        self.assertNotIn(hidden, self.index.all_ids(self.build))
+
+
+class CommentListIndexTestCase(TestCase):
+    """Test cases for incremental updates of the cached comment lists."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language, _ = Language.objects.get_or_create(
+            key="PY3CL",
+            defaults={
+                "name": "Python 3",
+                "short_name": "PY3",
+                "common_name": "Python",
+                "ace": "python",
+                "pygments": "python3",
+                "template": "",
+            },
+        )
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username="test_comment_list_user", password="password123"
+        )
+        self.profile, _ = Profile.objects.get_or_create(
+            user=self.user, defaults={"language": self.language}
+        )
+
+        self.blog = BlogPost.objects.create(
+            title="Test Blog Comment List",
+            slug="test-blog-comment-list",
+            content="Test content",
+            publish_on=timezone.now(),
+            visible=True,
+        )
+        self.content_type = ContentType.objects.get_for_model(BlogPost)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _comment(self, parent=None, **kwargs):
+        return Comment.objects.create(
+            content_type=self.content_type,
+            object_id=self.blog.id,
+            author=self.profile,
+            body="Comment",
+            parent=parent,
+            **kwargs,
+        )
+
+    def test_new_comment_inserted_without_rebuild(self):
+        first = self._comment()
+        ct_id, obj_id = self.content_type.id, self.blog.id
+        self.assertEqual(
+            get_top_level_comment_ids(ct_id, obj_id, "time", "desc"), [first.id]
+        )
+
+        second = self._comment()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_top_level_comment_ids(ct_id, obj_id, "time", "desc"),
+                [second.id, first.id],
+            )
+            self.assertEqual(
+                get_top_level_comment_page(ct_id, obj_id, "time", "desc", 1, 10),
+                ([first.id], 2),
+            )
+
+    def test_score_change_repositions_comment(self):
+        ct_id, obj_id = self.content_type.id, self.blog.id
+        low = self._comment()
+        high = self._comment()
+        self.assertEqual(
+            get_top_level_comment_ids(ct_id, obj_id, "score", "desc"),
+            [high.id, low.id],
+        )
+
+        Comment.objects.filter(id=low.id).update(score=5)
+        low.move_in_list_cache(0, 5)
+        self.assertEqual(
+            get_top_level_comment_ids(ct_id, obj_id, "score", "desc"),
+            [low.id, high.id],
+        )
+        self.assertEqual(
+            get_top_level_comment_ids(ct_id, obj_id, "time", "desc"),
+            [high.id, low.id],
+        )
+
+    def test_prefetch_reply_pages_single_query(self):
+        parents = [self._comment() for _ in range(3)]
+        replies = {
+            parent.id: [self._comment(parent=parent) for _ in range(2)]
+            for parent in parents[:2]
+        }
+        cache.clear()
+
+        # One query for all reply lists, then the comment data, reply count
+        # and author batches for the replies on the first pages.
+        with self.assertNumQueries(4):
+            pages = prefetch_reply_pages([p.id for p in parents], "asc", 10)
+
+        self.assertEqual(pages[parents[2].id], [])
+        for parent_id, children in replies.items():
+            self.assertEqual(pages[parent_id], [c.id for c in children])
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_reply_ids(parents[0].id, "asc"),
+                [c.id for c in replies[parents[0].id]],
+            )
@@ -75,6 +75,30 @@ class TopLevelCommentsViewTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Test comment")
 
+    def test_warms_replies_in_the_order_they_are_served(self):
+        """Inline comments load replies by id alone, so in ascending order."""
+        from judge.models.comment import _reply_comment_index
+
+        parent = Comment.objects.create(
+            content_type=self.content_type,
+            object_id=self.blog.id,
+            author=self.profile,
+            body="Parent comment",
+        )
+        Comment.objects.create(
+            content_type=self.content_type,
+            object_id=self.blog.id,
+            author=self.profile,
+            body="Reply comment",
+            parent=parent,
+        )
+        params = {"content_type_id": self.content_type.id, "object_id": self.blog.id}
+
+        for compact, order in (("1", "asc"), ("0", "desc")):
+            cache.clear()
+            self.client.get(reverse("get_comments"), dict(params, compact=compact))
+            self.assertTrue(_reply_comment_index(parent.id, order).is_built())
+
     def test_get_comments_empty(self):
         """Test fetching comments when none exist."""
         response = self.client.get(
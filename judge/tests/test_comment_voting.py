@@ -473,24 +473,32 @@ class VoteCommentCacheDirtyTest(CommentVotingTestCase):
         # Cache must reflect the new vote
         self.assertEqual(get_user_vote_on_comment(self.profile.id, self.comment.id), 1)
 
-    def test_vote_dirties_score_sorted_list_cache(self):
-        """After voting, the score-sorted top-level-comment-ids cache must be invalidated."""
+    def test_vote_repositions_score_sorted_list_cache(self):
+        """After voting, the cached score-sorted top-level list must reflect the new score."""
         ct_id = self.comment.content_type_id
         obj_id = self.comment.object_id
+        newer = Comment.objects.create(
+            content_type_id=ct_id,
+            object_id=obj_id,
+            author=self.author_profile,
+            body="Newer comment",
+        )
 
-        # Prime the score-sorted list cache
-        get_top_level_comment_ids(ct_id, obj_id, "score", "desc")
+        # Prime the score-sorted list cache: equal scores, newest first
+        self.assertEqual(
+            get_top_level_comment_ids(ct_id, obj_id, "score", "desc"),
+            [newer.id, self.comment.id],
+        )
 
-        # Upvote via the view
+        # Upvote the older comment via the view
         self.client.login(username="test_user", password="password123")
         self.client.post(reverse("comment_upvote"), self._comment_vote_data())
 
-        # Cache key must no longer be present
-        from django.core.cache import cache
-        from judge.caching import arg_to_str
-
-        key = (
-            f"ctlcids2:{arg_to_str(ct_id)}:{arg_to_str(obj_id)}"
-            f":{arg_to_str('score')}:{arg_to_str('desc')}"
+        self.assertEqual(
+            get_top_level_comment_ids(ct_id, obj_id, "score", "desc"),
+            [self.comment.id, newer.id],
+        )
+        self.assertEqual(
+            get_top_level_comment_ids(ct_id, obj_id, "score", "asc"),
+            [newer.id, self.comment.id],
         )
-        self.assertIsNone(cache.get(key))
@@ -0,0 +1,121 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from judge.contest_format.default import DefaultContestFormat
+from judge.models import (
+    Contest,
+    ContestParticipation,
+    ContestProblem,
+    Language,
+    Problem,
+    ProblemGroup,
+    Profile,
+)
+from judge.views.contests import build_ranking_profiles, get_contest_problems
+
+
+class ContestRankingRowCacheTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        lang = Language.objects.first()
+        group = ProblemGroup.objects.create(name="rc", full_name="Row cache")
+        now = timezone.now()
+        self.contest = Contest.objects.create(
+            key="rowcache",
+            name="Row cache",
+            start_time=now - timezone.timedelta(hours=2),
+            end_time=now - timezone.timedelta(hours=1),
+            is_visible=True,
+        )
+        self.cps = []
+        for order in (1, 2):
+            problem = Problem.objects.create(
+                code=f"rowcache{order}",
+                name=f"Row cache {order}",
+                group=group,
+                time_limit=1.0,
+                memory_limit=65536,
+                points=100.0,
+                is_public=True,
+            )
+            self.cps.append(
+                ContestProblem.objects.create(
+                    contest=self.contest, problem=problem, points=100, order=order
+                )
+            )
+        user = User.objects.create_user("rowcache_user", password="pw")
+        profile = Profile.objects.create(user=user, language=lang)
+        self.participation = ContestParticipation.objects.create(
+            contest=self.contest,
+            user=profile,
+            format_data={str(self.cps[0].id): {"points": 100, "time": 60}},
+        )
+
+    def render(self, **kwargs):
+        contest = Contest.objects.get(id=self.contest.id)
+        problems = get_contest_problems(contest)
+        participations = ContestParticipation.objects.filter(id=self.participation.id)
+        with patch.object(
+            DefaultContestFormat,
+            "display_user_problem",
+            autospec=True,
+            side_effect=DefaultContestFormat.display_user_problem,
+        ) as display:
+            profiles = build_ranking_profiles(
+                contest, problems, participations, **kwargs
+            )
+        return profiles[0], display.call_count
+
+    def test_unchanged_rows_are_not_rendered_again(self):
+        first, calls = self.render()
+        self.assertEqual(calls, 2)
+
+        second, calls = self.render()
+        self.assertEqual(calls, 0)
+        self.assertEqual(
+            [str(cell) for cell in second.problem_cells],
+            [str(cell) for cell in first.problem_cells],
+        )
+        self.assertEqual(str(second.result_cell), str(first.result_cell))
+
+        _, calls = self.render(use_cache=False)
+        self.assertEqual(calls, 2)
+
+    def test_racing_recomputes_each_bump_version(self):
+        stale = ContestParticipation.objects.get(id=self.participation.id)
+        self.participation.recompute_results()
+        stale.recompute_results()
+
+        self.assertEqual(stale.result_version, 2)
+        self.assertEqual(
+            ContestParticipation.objects.get(id=self.participation.id).result_version,
+            2,
+        )
+
+    def test_update_participation_invalidates_row(self):
+        self.render()
+        self.participation.recompute_results()
+        self.assertEqual(
+            ContestParticipation.objects.get(id=self.participation.id).result_version,
+            1,
+        )
+
+        profile, calls = self.render()
+        self.assertEqual(calls, 2)
+        self.assertNotIn("full-score", str(profile.problem_cells[0]))
+
+    def test_final_ranking_is_cached_separately(self):
+        self.render()
+        _, calls = self.render(show_final=True)
+        self.assertEqual(calls, 2)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_ranking", self.contest.key, iterations=2, stdout=out)
+        self.assertIn("warm cache", out.getvalue())
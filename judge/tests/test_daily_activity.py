@@ -0,0 +1,103 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from judge.models import (
+    Language,
+    Problem,
+    ProblemGroup,
+    Profile,
+    Submission,
+    UserDailyActivity,
+)
+from judge.models.submission import (
+    get_user_min_submission_year,
+    get_user_submission_dates,
+)
+
+
+class UserDailyActivityTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.language, _ = Language.objects.get_or_create(
+            key="PY3",
+            defaults={
+                "name": "Python 3",
+                "short_name": "PY3",
+                "common_name": "Python",
+                "ace": "python",
+                "pygments": "python3",
+                "template": "",
+            },
+        )
+        group, _ = ProblemGroup.objects.get_or_create(
+            name="activity", defaults={"full_name": "Activity"}
+        )
+        cls.user = User.objects.create_user("activity_user", password="pw")
+        cls.profile = Profile.objects.create(user=cls.user, language=cls.language)
+        cls.problem = Problem.objects.create(
+            code="activityprob",
+            name="Activity",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+            is_public=True,
+        )
+
+    def submit(self):
+        return Submission.objects.create(
+            user=self.profile, problem=self.problem, language=self.language
+        )
+
+    def move_to(self, submission, date):
+        # Mimic a submission made on another day, bypassing the counters.
+        Submission.objects.filter(id=submission.id).update(date=date)
+
+    def test_creation_and_deletion_update_dates(self):
+        first = self.submit()
+        self.submit()
+        today = UserDailyActivity.day_of(first.date).isoformat()
+
+        self.assertEqual(get_user_submission_dates(self.profile.id), {today: 2})
+        self.assertEqual(get_user_min_submission_year(self.profile.id), first.date.year)
+
+        first.delete()
+        self.assertEqual(get_user_submission_dates(self.profile.id), {today: 1})
+
+        Submission.objects.filter(user=self.profile).delete()
+        self.assertEqual(get_user_submission_dates(self.profile.id), {})
+        self.assertIsNone(get_user_min_submission_year(self.profile.id))
+
+    def test_grading_does_not_touch_dates(self):
+        submission = self.submit()
+        get_user_submission_dates(self.profile.id)
+
+        submission.status = "D"
+        submission.result = "AC"
+        with CaptureQueriesContext(connection) as queries:
+            submission.save()
+
+        self.assertFalse(
+            [query for query in queries if "userdailyactivity" in query["sql"]]
+        )
+        self.assertEqual(UserDailyActivity.objects.get(user=self.profile).count, 1)
+
+    def test_backfill_rebuilds_from_submissions(self):
+        self.move_to(
+            self.submit(), datetime.datetime(2019, 5, 1, 12, tzinfo=datetime.UTC)
+        )
+        self.move_to(
+            self.submit(), datetime.datetime(2019, 5, 1, 13, tzinfo=datetime.UTC)
+        )
+        UserDailyActivity.objects.all().delete()
+
+        call_command("backfill_daily_activity", stdout=StringIO())
+
+        self.assertEqual(get_user_submission_dates(self.profile.id), {"2019-05-01": 2})
+        self.assertEqual(get_user_min_submission_year(self.profile.id), 2019)
@@ -0,0 +1,140 @@
+import json
+import socket
+import struct
+import threading
+import zlib
+from functools import partial
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from judge import judgeapi
+from judge.bridge.django_handler import DjangoHandler
+from judge.bridge.judge_list import JudgeList
+from judge.bridge.server import Server
+from judge.models import (
+    Language,
+    Problem,
+    ProblemGroup,
+    Profile,
+    Submission,
+    SubmissionSource,
+)
+
+size_pack = struct.Struct("!I")
+
+
+class CountingDjangoHandler(DjangoHandler):
+    connections = 0
+
+    def on_connect(self):
+        type(self).connections += 1
+
+
+class BridgeConnectionTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        CountingDjangoHandler.connections = 0
+        self.judges = JudgeList()
+        self.server = Server(
+            [("127.0.0.1", 0)], partial(CountingDjangoHandler, judges=self.judges)
+        )
+        self.address = self.server.servers[0].server_address
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 10)
+        self.addCleanup(self.server.shutdown)
+
+        override = override_settings(BRIDGED_DJANGO_CONNECT=self.address)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(self.reset_connection)
+        self.reset_connection()
+
+    def reset_connection(self):
+        if judgeapi._connection is not None:
+            judgeapi._connection.close()
+        judgeapi._connection = None
+
+    def test_requests_share_one_connection(self):
+        replies = []
+
+        def status():
+            for _ in range(10):
+                replies.append(judgeapi.bridge_status()["name"])
+
+        threads = [threading.Thread(target=status) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(replies, ["bridge-status"] * 40)
+        self.assertEqual(CountingDjangoHandler.connections, 1)
+
+    def test_reconnects_after_bridge_drops_connection(self):
+        judgeapi.bridge_status()
+        judgeapi._connection.sock.shutdown(socket.SHUT_RDWR)
+        judgeapi._connection.broken = False
+
+        self.assertEqual(judgeapi.bridge_status()["name"], "bridge-status")
+        self.assertEqual(CountingDjangoHandler.connections, 2)
+
+    def test_client_without_request_ids(self):
+        packet = zlib.compress(b'{"name":"bridge-status"}')
+        with socket.create_connection(self.address, timeout=10) as sock:
+            sock.sendall(size_pack.pack(len(packet)) + packet)
+            data = b""
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+
+        reply = json.loads(zlib.decompress(data[size_pack.size :]))
+        self.assertEqual(reply["name"], "bridge-status")
+        self.assertNotIn("request-id", reply)
+
+    def test_rejudge_is_one_round_trip(self):
+        group = ProblemGroup.objects.create(name="api", full_name="API")
+        problem = Problem.objects.create(
+            code="aplusb",
+            name="A Plus B",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+        )
+        user = User.objects.create(username="api")
+        profile = Profile.objects.create(user=user, language=Language.objects.first())
+        submissions = []
+        for status in ("D", "D", "G"):
+            submission = Submission.objects.create(
+                user=profile, problem=problem, language=profile.language, status=status
+            )
+            SubmissionSource.objects.create(submission=submission, source="print(1)")
+            submissions.append(submission)
+
+        with patch.object(
+            judgeapi, "judge_request", wraps=judgeapi.judge_request
+        ) as request:
+            queued = judgeapi.judge_submissions(
+                submissions, rejudge=True, batch_rejudge=True
+            )
+
+        self.assertEqual(queued, 2)
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(request.call_args.args[0]["name"], "submission-batch-request")
+        self.assertEqual(
+            set(self.judges.node_map), {submissions[0].id, submissions[1].id}
+        )
+        self.assertEqual(
+            list(
+                Submission.objects.filter(id__in=[s.id for s in submissions])
+                .order_by("id")
+                .values_list("status", flat=True)
+            ),
+            ["QU", "QU", "G"],
+        )
@@ -0,0 +1,73 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from judge.models import Language, Notification, NotificationProfile, Profile
+from judge.models.notification import NotificationCategory, unseen_notifications_count
+from judge.tasks.notification import fan_out_notifications
+
+
+class NotificationFanOutTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        cache.clear()
+        language = Language.objects.first()
+        self.author = self.make_profile("fanout_author", language)
+        self.profiles = [
+            self.make_profile("fanout_%d" % i, language) for i in range(20)
+        ]
+        self.ids = [profile.id for profile in self.profiles]
+
+    def make_profile(self, username, language):
+        user = User.objects.create_user(username, password="pw")
+        return Profile.objects.create(user=user, language=language)
+
+    def notify(self, user_ids, **kwargs):
+        Notification.objects.bulk_create_notifications(
+            user_ids,
+            NotificationCategory.ORGANIZATION,
+            html_link="<a>org</a>",
+            author=self.author,
+            **kwargs,
+        )
+
+    def unread(self, profile):
+        return NotificationProfile.objects.get(user=profile).unread_count
+
+    def test_query_count_does_not_grow_with_recipients(self):
+        Profile.get_cached_instances(*self.ids)
+        with self.assertNumQueries(4):
+            self.notify(self.ids + [self.author.id])
+
+        self.assertEqual(Notification.objects.count(), 20)
+        self.assertFalse(Notification.objects.filter(owner=self.author).exists())
+        self.assertEqual(self.unread(self.profiles[0]), 1)
+
+    def test_similar_notifications_are_merged(self):
+        first, second = self.profiles[:2]
+        self.assertEqual(unseen_notifications_count(first), 0)
+        self.notify([first.id, second.id])
+        Notification.objects.get(owner=first).mark_as_read()
+        self.assertEqual(unseen_notifications_count(first), 0)
+
+        self.notify([first.id, second.id])
+
+        self.assertEqual(Notification.objects.filter(owner=first).count(), 1)
+        self.assertFalse(Notification.objects.get(owner=first).is_read)
+        # Reactivated read notification counts again, an unread one does not
+        self.assertEqual(unseen_notifications_count(first), 1)
+        self.assertEqual(self.unread(second), 1)
+
+    def test_background_fan_out(self):
+        with patch(
+            "judge.tasks.notification.fan_out_notifications.delay",
+            side_effect=fan_out_notifications,
+        ) as delay, self.captureOnCommitCallbacks(execute=True):
+            self.notify(self.ids, background=True)
+            self.assertFalse(Notification.objects.exists())
+
+        delay.assert_called_once()
+        self.assertEqual(Notification.objects.count(), 20)
@@ -0,0 +1,175 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+from zipfile import ZipFile
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from judge.models import (
+    Language,
+    Problem,
+    ProblemData,
+    ProblemGroup,
+    Profile,
+    TestDataBlob,
+    problem_data_storage,
+)
+from judge.tasks.problem_data import index_problem_archive
+from judge.utils.problem_data_blobs import (
+    blob_path,
+    collect_blobs,
+    get_manifest,
+    index_archive,
+    iter_archive,
+    manifest_report,
+    missing_blobs,
+    set_manifest,
+    store_blob,
+)
+
+
+def digest(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+class ProblemDataBlobTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        for attribute in ("base_location", "location"):
+            patcher = patch.object(problem_data_storage, attribute, self.root)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        group = ProblemGroup.objects.create(name="blob", full_name="Blob")
+        self.problems = [
+            Problem.objects.create(
+                code="blob%d" % i,
+                name="Blob %d" % i,
+                group=group,
+                time_limit=1.0,
+                memory_limit=65536,
+                points=1,
+            )
+            for i in (1, 2)
+        ]
+        user = User.objects.create_superuser("blob_admin", password="pw")
+        Profile.objects.create(user=user, language=Language.objects.first())
+        self.client.force_login(user)
+
+    def make_zip(self, files):
+        buffer = io.BytesIO()
+        with ZipFile(buffer, "w") as zf:
+            for name, content in files.items():
+                zf.writestr(name, content)
+        buffer.seek(0)
+        return buffer
+
+    def test_identical_files_are_stored_once(self):
+        files = {"1.in": b"1 2\n", "1.out": b"3\n", "2.in": b"1 2\n"}
+        index_archive(self.problems[0], self.make_zip(files))
+        index_archive(self.problems[1], self.make_zip(files))
+
+        self.assertEqual(TestDataBlob.objects.count(), 2)
+        self.assertEqual(get_manifest(self.problems[1])["2.in"], digest(b"1 2\n"))
+
+    def test_replaced_files_are_collected(self):
+        old, size = store_blob(io.BytesIO(b"old"))
+        set_manifest(self.problems[0], {"1.in": old})
+        TestDataBlob.objects.update(last_used=timezone.now() - timedelta(days=2))
+        new, size = store_blob(io.BytesIO(b"new"))
+
+        self.assertEqual(set_manifest(self.problems[0], {"1.in": new}), ["1.in"])
+        self.assertFalse(TestDataBlob.objects.filter(digest=old).exists())
+        self.assertFalse(os.path.exists(blob_path(old)))
+
+    def test_blobs_used_by_an_upload_are_not_collected(self):
+        shared, size = store_blob(io.BytesIO(b"shared"))
+        set_manifest(self.problems[0], {"1.in": shared})
+        TestDataBlob.objects.update(last_used=timezone.now() - timedelta(days=2))
+
+        # Another upload found the blob present and will not send it
+        self.assertEqual(missing_blobs([shared]), [])
+        set_manifest(self.problems[0], {})
+        self.assertEqual(collect_blobs(), 0)
+        set_manifest(self.problems[1], {"1.in": shared})
+        self.assertTrue(os.path.exists(blob_path(shared)))
+
+    def test_delta_upload_links_files_into_problem_directory(self):
+        problem = self.problems[0]
+        index_archive(problem, self.make_zip({"1.in": b"1\n", "1.out": b"1\n"}))
+        files = {"1.in": digest(b"1\n"), "1.out": digest(b"2\n")}
+
+        response = self.client.post(
+            reverse("problem_data_blobs", args=[problem.code]),
+            json.dumps({"digests": list(files.values())}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.json()["missing"], [digest(b"2\n")])
+
+        self.client.post(
+            reverse("problem_data_blobs", args=[problem.code]),
+            {digest(b"2\n"): io.BytesIO(b"2\n")},
+        )
+        with patch("judge.utils.problem_data_blobs.ProblemDataCompiler.generate"):
+            response = self.client.post(
+                reverse("problem_data_manifest", args=[problem.code]),
+                json.dumps({"files": files}),
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.json(), {"success": True, "changed": ["1.out"]})
+        path = os.path.join(self.root, problem.code, "1.out")
+        self.assertTrue(os.path.samefile(path, blob_path(files["1.out"])))
+
+    def test_mismatched_upload_is_rejected(self):
+        response = self.client.post(
+            reverse("problem_data_blobs", args=[self.problems[0].code]),
+            {digest(b"expected"): io.BytesIO(b"actual")},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TestDataBlob.objects.exists())
+
+    def test_indexed_archive_replaces_zip(self):
+        problem = self.problems[0]
+        data = ProblemData(problem=problem)
+        data.zipfile.save(
+            "data.zip",
+            ContentFile(self.make_zip({"1.in": b"1\n", "1.out": b"1\r\n"}).read()),
+        )
+        zip_path = data.zipfile.path
+
+        with patch("judge.utils.problem_data_blobs.ProblemDataCompiler.generate"):
+            self.assertEqual(index_problem_archive(problem.id, "stale.zip"), 0)
+            self.assertTrue(os.path.exists(zip_path))
+            self.assertEqual(index_problem_archive(problem.id, data.zipfile.name), 2)
+
+        data.refresh_from_db()
+        self.assertFalse(data.zipfile)
+        self.assertFalse(os.path.exists(zip_path))
+        path = os.path.join(self.root, problem.code, "1.in")
+        self.assertTrue(os.path.samefile(path, blob_path(digest(b"1\n"))))
+        self.assertEqual(
+            manifest_report(problem), {"files": 2, "issues": {"1.out": ["cr"]}}
+        )
+
+    def test_archive_is_streamed_from_blobs(self):
+        files = {"a/1.in": b"x" * 100000, "a/1.out": b"y\n"}
+        index_archive(self.problems[0], self.make_zip(files))
+
+        archive = b"".join(iter_archive(self.problems[0]))
+
+        with ZipFile(io.BytesIO(archive)) as zf:
+            self.assertEqual({name: zf.read(name) for name in zf.namelist()}, files)
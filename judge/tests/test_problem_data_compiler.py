@@ -0,0 +1,132 @@
+import os
+import tempfile
+from unittest.mock import patch
+from zipfile import ZipFile, ZipInfo
+
+import yaml
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from judge.models import (
+    Problem,
+    ProblemData,
+    ProblemGroup,
+    ProblemTestCase,
+    problem_data_storage,
+)
+from judge.utils.problem_data import ProblemDataCompiler, problem_data_changed
+
+
+class ProblemDataCompilerTest(TestCase):
+    FILES = ["1.in", "1.out", "2.in", "2.out"]
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        for attribute in ("base_location", "location"):
+            patcher = patch.object(problem_data_storage, attribute, self.root)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        group = ProblemGroup.objects.create(name="init", full_name="Init")
+        self.problem = Problem.objects.create(
+            code="initcompile",
+            name="Init",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+        )
+        ProblemData.objects.create(problem=self.problem)
+        for order in (1, 2):
+            ProblemTestCase.objects.create(
+                dataset=self.problem,
+                order=order,
+                input_file="%d.in" % order,
+                output_file="%d.out" % order,
+                points=order,
+                is_pretest=False,
+            )
+
+        self.sent = []
+        receiver = lambda sender, problem, **kwargs: self.sent.append(problem.code)
+        problem_data_changed.connect(receiver)
+        self.addCleanup(problem_data_changed.disconnect, receiver)
+
+    def compile(self, files=FILES):
+        problem = Problem.objects.get(id=self.problem.id)
+        return ProblemDataCompiler.generate(
+            problem, problem.data_files, problem.cases.order_by("order"), files
+        )
+
+    def init(self):
+        with open(os.path.join(self.root, "initcompile", "init.yml")) as f:
+            return yaml.safe_load(f)
+
+    def test_unchanged_inputs_skip_regeneration(self):
+        self.assertTrue(self.compile())
+        self.assertEqual([case["points"] for case in self.init()["test_cases"]], [1, 2])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(self.compile())
+        self.assertFalse(
+            [query for query in queries if query["sql"].startswith("UPDATE")]
+        )
+        self.assertEqual(self.sent, ["initcompile"])
+
+    def test_changed_case_regenerates(self):
+        self.compile()
+        ProblemTestCase.objects.filter(dataset=self.problem, order=2).update(points=5)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(self.compile())
+
+        self.assertEqual([case["points"] for case in self.init()["test_cases"]], [1, 5])
+        # Cases the compiler did not normalize are not written back
+        self.assertFalse(
+            [
+                query
+                for query in queries
+                if query["sql"].startswith('UPDATE "judge_problemtestcase"')
+            ]
+        )
+        self.assertEqual(self.sent, ["initcompile", "initcompile"])
+
+    def test_missing_file_removes_init(self):
+        self.compile()
+
+        self.assertTrue(self.compile(files=["1.in", "1.out"]))
+
+        self.assertFalse(problem_data_storage.exists("initcompile/init.yml"))
+        self.assertIn("2.in", ProblemData.objects.get(problem=self.problem).feedback)
+        # A failed compile is never skipped
+        self.assertTrue(self.compile(files=["1.in", "1.out"]))
+
+    def test_reuploaded_zip_regenerates(self):
+        path = os.path.join(self.root, "initcompile", "data.zip")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        def write_zip(output):
+            with ZipFile(path, "w") as zf:
+                for name in self.FILES:
+                    zf.writestr(
+                        ZipInfo(name), output if name.endswith(".out") else b"1\n"
+                    )
+
+        write_zip(b"1\n")
+        ProblemData.objects.filter(problem=self.problem).update(
+            zipfile="initcompile/data.zip"
+        )
+        self.assertTrue(self.compile())
+        self.assertFalse(self.compile())
+
+        # Same name, size and modification time, different content
+        stat = os.stat(path)
+        write_zip(b"2\n")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(os.path.getsize(path), stat.st_size)
+        self.assertTrue(self.compile())
@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from judge.models import Contest, ContestProblem, Problem, ProblemGroup
+from judge.tasks.pdf import (
+    prerender_contest_pdfs,
+    render_problem_pdf,
+    request_problem_pdf,
+)
+
+
+@patch("judge.views.problem.HAS_PDF", True)
+@patch("judge.tasks.pdf.HAS_PDF", True)
+# default_storage is shared, so this covers the tasks module too
+@patch("judge.views.problem.default_storage.exists", return_value=False)
+@patch("judge.tasks.pdf.render_problem_pdf.delay")
+class ProblemPdfRenderTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        group = ProblemGroup.objects.create(name="pdf", full_name="PDF")
+        self.problem = Problem.objects.create(
+            code="pdfprob",
+            name="PDF",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+            is_public=True,
+        )
+        self.url = reverse("problem_pdf", args=[self.problem.code, "en"])
+
+    def test_concurrent_requests_render_once(self, delay, exists):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 202)
+        self.assertIn("Retry-After", second)
+        delay.assert_called_once()
+        self.assertEqual(delay.call_args.args[:2], ("pdfprob", "en"))
+
+    def test_task_releases_lock(self, delay, exists):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(request_problem_pdf("pdfprob", "en"))
+        token = delay.call_args.args[3]
+
+        exists.return_value = True
+        render_problem_pdf("pdfprob", "en", "", token)
+
+        self.assertTrue(request_problem_pdf("pdfprob", "en"))
+
+    def test_failed_render_is_reported(self, delay, exists):
+        cache.set("pdf_render_error:pdfprob:en", "boom")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.content, b"boom")
+        delay.assert_not_called()
+
+    def test_upcoming_contest_is_prerendered(self, delay, exists):
+        now = timezone.now()
+        with patch(
+            "judge.tasks.pdf.prerender_contest_pdfs.delay",
+            side_effect=prerender_contest_pdfs,
+        ), self.captureOnCommitCallbacks(execute=True):
+            contest = Contest.objects.create(
+                key="pdfcontest",
+                name="PDF contest",
+                start_time=now + timezone.timedelta(hours=1),
+                end_time=now + timezone.timedelta(hours=2),
+                is_visible=True,
+            )
+            ContestProblem.objects.create(
+                contest=contest, problem=self.problem, points=1, order=1
+            )
+
+        delay.assert_called_once()
+        self.assertEqual(delay.call_args.args[:2], ("pdfprob", settings.LANGUAGE_CODE))
@@ -0,0 +1,95 @@
+from django.contrib.auth.models import AnonymousUser, Permission, User
+from django.test import TestCase
+
+from judge.models import Language, Organization, Problem, ProblemGroup, Profile
+from judge.utils.problem_visibility import get_visible_problem_ids
+
+
+class ProblemVisibilityTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.language, _ = Language.objects.get_or_create(
+            key="PY3",
+            defaults={
+                "name": "Python 3",
+                "short_name": "PY3",
+                "common_name": "Python",
+                "ace": "python",
+                "pygments": "python3",
+                "template": "",
+            },
+        )
+        cls.group, _ = ProblemGroup.objects.get_or_create(
+            name="visibility", defaults={"full_name": "Visibility"}
+        )
+        cls.users = {}
+        for name in ("member", "author", "outsider", "staff"):
+            user = User.objects.create_user(f"vis_{name}", password="pw")
+            Profile.objects.create(user=user, language=cls.language)
+            cls.users[name] = user
+        cls.users["staff"].user_permissions.add(
+            Permission.objects.get(codename="see_private_problem")
+        )
+
+        cls.organization = Organization.objects.create(
+            name="Visibility Org",
+            slug="visibility-org",
+            short_name="VO",
+            about="",
+            registrant=cls.users["member"].profile,
+            is_open=True,
+        )
+        cls.users["member"].profile.organizations.add(cls.organization)
+
+        cls.public = cls.make_problem("vispublic", is_public=True)
+        cls.private = cls.make_problem("visprivate")
+        cls.private.authors.add(cls.users["author"].profile)
+        cls.org_problem = cls.make_problem("visorg", is_public=True)
+        cls.org_problem.organizations.add(cls.organization)
+
+    @classmethod
+    def make_problem(cls, code, **kwargs):
+        return Problem.objects.create(
+            code=code,
+            name=code,
+            group=cls.group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+            **kwargs,
+        )
+
+    def reference_ids(self, user):
+        return set(Problem.get_visible_problems(user).values_list("id", flat=True))
+
+    def test_matches_get_visible_problems(self):
+        for user in [AnonymousUser(), *self.users.values()]:
+            ids = get_visible_problem_ids(user)
+            if ids is None:
+                self.assertEqual(user, self.users["staff"])
+            else:
+                self.assertEqual(ids, self.reference_ids(user), user)
+
+        self.assertIn(
+            self.org_problem.id, get_visible_problem_ids(self.users["member"])
+        )
+        self.assertNotIn(
+            self.org_problem.id, get_visible_problem_ids(self.users["outsider"])
+        )
+        self.assertIn(self.private.id, get_visible_problem_ids(self.users["author"]))
+
+    def test_visibility_changes_invalidate_sets(self):
+        outsider = User.objects.get(id=self.users["outsider"].id)
+        self.assertNotIn(self.private.id, get_visible_problem_ids(outsider))
+
+        self.private.is_public = True
+        self.private.save()
+        self.assertIn(self.private.id, get_visible_problem_ids(outsider))
+
+        self.private.testers.add(outsider.profile)
+        self.private.is_public = False
+        self.private.save()
+        self.assertIn(self.private.id, get_visible_problem_ids(outsider))
+
+        outsider.profile.organizations.add(self.organization)
+        self.assertIn(self.org_problem.id, get_visible_problem_ids(outsider))
@@ -0,0 +1,108 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from judge.models import (
+    Contest,
+    ContestParticipation,
+    ContestProblem,
+    Language,
+    Problem,
+    ProblemGroup,
+    Profile,
+)
+from judge.utils.contest import post_ranking_update
+
+
+class RankingDiffTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        lang = Language.objects.first()
+        group = ProblemGroup.objects.create(name="rd", full_name="Ranking diff")
+        now = timezone.now()
+        self.contest = Contest.objects.create(
+            key="rankdiff",
+            name="Ranking diff",
+            start_time=now - timezone.timedelta(hours=1),
+            end_time=now + timezone.timedelta(hours=1),
+            is_visible=True,
+        )
+        self.cps = []
+        for order in (1, 2):
+            problem = Problem.objects.create(
+                code=f"rankdiff{order}",
+                name=f"Ranking diff {order}",
+                group=group,
+                time_limit=1.0,
+                memory_limit=65536,
+                points=100.0,
+                is_public=True,
+            )
+            self.cps.append(
+                ContestProblem.objects.create(
+                    contest=self.contest, problem=problem, points=100, order=order
+                )
+            )
+        self.participations = []
+        for name, score in (("rd_leader", 200), ("rd_user", 0)):
+            user = User.objects.create_user(name, password="pw")
+            profile = Profile.objects.create(user=user, language=lang)
+            self.participations.append(
+                ContestParticipation.objects.create(
+                    contest=self.contest, user=profile, score=score
+                )
+            )
+
+    def solve(self, participation, cp, points):
+        """Stand-in for recompute_results without grading any submissions."""
+        participation._previous_result = (
+            participation.score,
+            participation.cumtime,
+            participation.tiebreaker,
+            participation.format_data,
+        )
+        participation.format_data = {str(cp.id): {"points": points, "time": 60}}
+        participation.score = points
+        participation.cumtime = 60
+        participation.result_version += 1
+        participation.save()
+
+    def post(self, participation):
+        with patch("judge.utils.contest.event") as event:
+            event.real = True
+            post_ranking_update(participation)
+        return event.post.call_args_list
+
+    def test_diff_has_rank_and_changed_cells(self):
+        participation = self.participations[1]
+        self.solve(participation, self.cps[1], 100)
+
+        (call,) = self.post(participation)
+        channel, message = call.args
+        self.assertEqual(channel, "contest_rankdiff")
+        self.assertEqual(message["type"], "ranking-diff")
+        self.assertEqual(message["participation"], participation.id)
+        self.assertEqual(message["rank"], 2)
+        self.assertEqual(message["old"], [0, 0, 0])
+        self.assertEqual(list(message["cells"]), [1])
+        self.assertIn("full-score", message["cells"][1])
+        self.assertIn("user-points", message["result_cell"])
+
+    def test_virtual_participation_falls_back_to_reload(self):
+        participation = self.participations[1]
+        participation.virtual = 1
+        self.solve(participation, self.cps[0], 100)
+
+        (call,) = self.post(participation)
+        self.assertEqual(call.args[1], {"type": "ranking-update"})
+
+    def test_delayed_scoreboard_posts_nothing(self):
+        self.contest.scoreboard_visibility = Contest.SCOREBOARD_AFTER_CONTEST
+        self.contest.save()
+        participation = ContestParticipation.objects.get(id=self.participations[1].id)
+        self.solve(participation, self.cps[0], 100)
+
+        self.assertEqual(self.post(participation), [])
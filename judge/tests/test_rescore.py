@@ -0,0 +1,114 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from judge.models import (
+    BestSubmission,
+    Contest,
+    ContestParticipation,
+    ContestProblem,
+    ContestSubmission,
+    Language,
+    Problem,
+    ProblemGroup,
+    Profile,
+    Submission,
+)
+from judge.tasks import rescore_contest, rescore_problem
+from judge.utils.celery import Progress
+
+
+@patch.object(Progress, "_update_state")
+class RescoreTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        language = Language.objects.first()
+        group = ProblemGroup.objects.create(name="rescore", full_name="Rescore")
+        self.problem = Problem.objects.create(
+            code="rescore",
+            name="Rescore",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+            partial=True,
+            is_public=True,
+        )
+        user = User.objects.create(username="rescore")
+        self.profile = Profile.objects.create(user=user, language=language)
+        start = timezone.now() - timezone.timedelta(hours=1)
+        self.contest = Contest.objects.create(
+            key="rescore",
+            name="Rescore",
+            start_time=start,
+            end_time=start + timezone.timedelta(hours=6),
+            is_visible=True,
+        )
+        self.contest_problem = ContestProblem.objects.create(
+            contest=self.contest,
+            problem=self.problem,
+            points=100,
+            partial=True,
+            order=0,
+        )
+        self.participation = ContestParticipation.objects.create(
+            contest=self.contest, user=self.profile, real_start=start
+        )
+
+        self.submissions = []
+        for case_points, case_total in ((3, 4), (0, 0), (4, 4)):
+            submission = Submission.objects.create(
+                user=self.profile,
+                problem=self.problem,
+                language=language,
+                status="D",
+                result="AC",
+                case_points=case_points,
+                case_total=case_total,
+            )
+            self.submissions.append(submission)
+        ContestSubmission.objects.create(
+            submission=self.submissions[0],
+            problem=self.contest_problem,
+            participation=self.participation,
+        )
+
+    def points(self):
+        return list(
+            Submission.objects.filter(problem=self.problem)
+            .order_by("id")
+            .values_list("points", flat=True)
+        )
+
+    def test_rescore_problem(self, update_state):
+        rescore_problem.apply(args=(self.problem.id,)).get()
+
+        self.assertEqual(self.points(), [0.75, 0.0, 1.0])
+        self.assertEqual(ContestSubmission.objects.get().points, 75.0)
+        self.participation.refresh_from_db()
+        self.assertEqual(self.participation.score, 75.0)
+        best = BestSubmission.objects.get(user=self.profile, problem=self.problem)
+        self.assertEqual(best.submission_id, self.submissions[2].id)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.points, 1.0)
+
+        Problem.objects.filter(id=self.problem.id).update(partial=False)
+        rescore_problem.apply(args=(self.problem.id,)).get()
+        self.assertEqual(self.points(), [0.0, 0.0, 1.0])
+
+    def test_rescore_contest(self, update_state):
+        ContestProblem.objects.filter(id=self.contest_problem.id).update(
+            points=10, partial=False
+        )
+        rescore_contest.apply(args=(self.contest.key,)).get()
+
+        self.assertEqual(ContestSubmission.objects.get().points, 0.0)
+        self.participation.refresh_from_db()
+        self.assertEqual(self.participation.score, 0.0)
+
+        ContestProblem.objects.filter(id=self.contest_problem.id).update(partial=True)
+        rescore_contest.apply(args=(self.contest.key,)).get()
+        self.assertEqual(ContestSubmission.objects.get().points, 7.5)
@@ -2,7 +2,12 @@ from django.contrib.auth.models import User
 from django.test import TestCase
 
 from judge.models import Language, Problem, ProblemGroup, Profile
-from judge.models.problem_data import ProblemSolutionCode
+from judge.models.problem_data import (
+    ProblemData,
+    ProblemSolutionCode,
+    ProblemTestDataFile,
+    TestDataBlob,
+)
 from judge.models.problem_review import ProblemReviewCheckResult, ProblemReviewRun
 from judge.review.checks.artifacts_present import ArtifactsPresentCheck
 
@@ -74,3 +79,15 @@ class ArtifactsPresentTest(TestCase):
         result = ArtifactsPresentCheck().run(self.problem, self.review_run)
         self.assertIn("main_ac_source", result.details["present"])
         self.assertNotIn("main_ac_source", result.details["missing"])
+
+    def test_indexed_test_data_is_present(self):
+        # An indexed zip is deleted, leaving only the manifest rows
+        ProblemData.objects.create(problem=self.problem)
+        ProblemTestDataFile.objects.create(
+            problem=self.problem,
+            name="1.in",
+            blob=TestDataBlob.objects.create(digest="a" * 64, size=2),
+        )
+        result = ArtifactsPresentCheck().run(self.problem, self.review_run)
+        self.assertIn("test_data", result.details["present"])
+        self.assertNotIn("test_data", result.details["missing"])
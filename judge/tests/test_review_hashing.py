@@ -3,7 +3,12 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 
 from judge.models import Language, Problem, ProblemGroup, Profile
-from judge.models.problem_data import ProblemData, ProblemSolutionCode
+from judge.models.problem_data import (
+    ProblemData,
+    ProblemSolutionCode,
+    ProblemTestDataFile,
+    TestDataBlob,
+)
 from judge.review.hashing import compute_input_hash
 
 
@@ -104,3 +109,22 @@ class ComputeInputHashTest(TestCase):
         sc.save()
         h2 = compute_input_hash(self.problem)
         self.assertNotEqual(h1, h2)
+
+    def test_indexing_the_zip_keeps_the_hash(self):
+        # The index task turns the zip into manifest rows, then deletes it
+        pd, _ = ProblemData.objects.get_or_create(problem=self.problem)
+        ProblemData.objects.filter(id=pd.id).update(zipfile="rhash1/data.zip")
+        for name, digest in (("1.in", "a" * 64), ("1.out", "b" * 64)):
+            blob = TestDataBlob.objects.create(digest=digest, size=2)
+            ProblemTestDataFile.objects.create(
+                problem=self.problem, name=name, blob=blob
+            )
+        h1 = compute_input_hash(self.problem)
+
+        ProblemData.objects.filter(id=pd.id).update(zipfile="")
+        self.assertEqual(compute_input_hash(self.problem), h1)
+
+        ProblemTestDataFile.objects.filter(name="1.out").update(
+            blob=TestDataBlob.objects.create(digest="c" * 64, size=2)
+        )
+        self.assertNotEqual(compute_input_hash(self.problem), h1)
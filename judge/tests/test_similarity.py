@@ -0,0 +1,185 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from judge.models import (
+    Contest,
+    ContestParticipation,
+    ContestProblem,
+    ContestSimilarity,
+    ContestSubmission,
+    Language,
+    Problem,
+    ProblemGroup,
+    Profile,
+    Submission,
+    SubmissionFingerprint,
+    SubmissionSource,
+)
+from judge.tasks.contest import find_contest_similarities
+from judge.tasks.submission import fingerprint_submission
+from judge.utils.similarity import compare_groups, fingerprint_source
+
+ORIGINAL = """
+#include <bits/stdc++.h>
+using namespace std;
+
+int main() {
+    int n;
+    cin >> n;
+    vector<long long> a(n);
+    for (int i = 0; i < n; i++) cin >> a[i];
+    long long best = a[0], cur = 0;
+    for (int i = 0; i < n; i++) {
+        cur = max(a[i], cur + a[i]);
+        best = max(best, cur);
+    }
+    cout << best << endl;
+    return 0;
+}
+"""
+
+# Same program with renamed variables, different literals and layout.
+RENAMED = """
+#include <iostream>
+#include <vector>
+using namespace std;
+// kadane
+int main()
+{
+    int length; cin >> length;
+    vector<long long> values(length);
+    for (int j = 0; j < length; j++) cin >> values[j];
+    long long answer = values[0], running = 1;
+    for (int j = 0; j < length; j++)
+    {
+        running = max(values[j], running + values[j]);
+        answer = max(answer, running);
+    }
+    cout << answer << endl;
+    return 0;
+}
+"""
+
+UNRELATED = """
+#include <cstdio>
+
+int gcd(int a, int b) { return b ? gcd(b, a % b) : a; }
+
+int main() {
+    int t;
+    scanf("%d", &t);
+    while (t--) {
+        int x, y;
+        scanf("%d %d", &x, &y);
+        printf("%d\\n", gcd(x, y));
+    }
+}
+"""
+
+
+class SimilarityEngineTest(TestCase):
+    def test_renamed_copy_is_similar(self):
+        pairs = compare_groups(
+            {
+                "cpp": {
+                    1: fingerprint_source(ORIGINAL, "c"),
+                    2: fingerprint_source(RENAMED, "c"),
+                    3: fingerprint_source(UNRELATED, "c"),
+                }
+            }
+        )["cpp"]
+
+        self.assertEqual([(first, second) for first, second, *_ in pairs], [(1, 2)])
+        self.assertGreater(pairs[0][2], 80)
+
+    def test_short_source_has_no_fingerprints(self):
+        self.assertEqual(fingerprint_source("int main() {}", "c"), [])
+
+
+class ContestSimilarityTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        self.lang = Language.objects.filter(common_name="C++").first()
+        group = ProblemGroup.objects.create(name="sim", full_name="Similarity")
+        now = timezone.now()
+        self.contest = Contest.objects.create(
+            key="similarity",
+            name="Similarity",
+            start_time=now - timezone.timedelta(hours=2),
+            end_time=now - timezone.timedelta(hours=1),
+            is_visible=True,
+        )
+        self.problem = Problem.objects.create(
+            code="similarity",
+            name="Similarity",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=100.0,
+            is_public=True,
+        )
+        self.cp = ContestProblem.objects.create(
+            contest=self.contest, problem=self.problem, points=100, order=1
+        )
+        self.submissions = [
+            self.submit("sim_%d" % i, source)
+            for i, source in enumerate((ORIGINAL, RENAMED, UNRELATED))
+        ]
+
+    def submit(self, username, source):
+        user = User.objects.create_user(username, password="pw")
+        profile = Profile.objects.create(user=user, language=self.lang)
+        participation = ContestParticipation.objects.create(
+            contest=self.contest, user=profile
+        )
+        submission = Submission.objects.create(
+            user=profile,
+            problem=self.problem,
+            language=self.lang,
+            status="D",
+            result="AC",
+            points=100,
+            contest_object=self.contest,
+        )
+        ContestSubmission.objects.create(
+            submission=submission,
+            problem=self.cp,
+            participation=participation,
+            points=100,
+        )
+        SubmissionSource.objects.create(submission=submission, source=source)
+        return submission
+
+    def test_fingerprinted_at_submission_time(self):
+        with patch(
+            "judge.signals.submission.fingerprint_submission.delay",
+            side_effect=fingerprint_submission,
+        ), self.captureOnCommitCallbacks(execute=True):
+            submission = self.submit("sim_late", ORIGINAL)
+
+        fingerprint = SubmissionFingerprint.objects.get(submission=submission)
+        self.assertEqual(fingerprint.family, "c")
+
+    def test_finds_copied_pair(self):
+        self.assertEqual(find_contest_similarities(self.contest), 1)
+
+        result = ContestSimilarity.objects.get(contest=self.contest)
+        self.assertEqual(
+            {result.first_id, result.second_id},
+            {self.submissions[0].id, self.submissions[1].id},
+        )
+        self.assertEqual(result.language, "c")
+        self.assertEqual(
+            SubmissionFingerprint.objects.filter(
+                submission__contest_object=self.contest
+            ).count(),
+            3,
+        )
+
+        # Running again replaces the previous results.
+        self.assertEqual(find_contest_similarities(self.contest), 1)
+        self.assertEqual(ContestSimilarity.objects.count(), 1)
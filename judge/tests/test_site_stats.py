@@ -0,0 +1,104 @@
+import datetime
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from judge.models import (
+    Language,
+    Problem,
+    ProblemGroup,
+    Profile,
+    SiteDailyStat,
+    SiteStatWatermark,
+    Submission,
+)
+
+
+class SiteDailyStatTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        self.lang = Language.objects.first()
+        group = ProblemGroup.objects.create(name="stats", full_name="Stats")
+        self.problem = Problem.objects.create(
+            code="stats",
+            name="Stats",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+        )
+        user = User.objects.create_superuser("stats_admin", password="pw")
+        self.profile = Profile.objects.create(user=user, language=self.lang)
+
+    def submit(self, date, result="AC"):
+        submission = Submission.objects.create(
+            user=self.profile,
+            problem=self.problem,
+            language=self.lang,
+            result=result,
+        )
+        Submission.objects.filter(id=submission.id).update(date=date)
+        return submission
+
+    def series(self):
+        return dict(zip(*SiteDailyStat.get_series(SiteDailyStat.SUBMISSIONS)))
+
+    def test_roll_up_only_counts_new_rows(self):
+        day = datetime.datetime(2024, 5, 1, 12, tzinfo=datetime.timezone.utc)
+        self.submit(day)
+        self.submit(day)
+        self.submit(day + datetime.timedelta(days=1))
+
+        self.assertEqual(SiteDailyStat.roll_up(SiteDailyStat.SUBMISSIONS), 3)
+        self.assertEqual(
+            self.series(), {day.date(): 2, day.date() + datetime.timedelta(1): 1}
+        )
+
+        self.assertEqual(SiteDailyStat.roll_up(SiteDailyStat.SUBMISSIONS), 0)
+        self.submit(day)
+        with patch.object(SiteDailyStat, "BATCH_SIZE", 1):
+            self.assertEqual(SiteDailyStat.roll_up(SiteDailyStat.SUBMISSIONS), 1)
+        self.assertEqual(self.series()[day.date()], 3)
+        self.assertEqual(
+            SiteStatWatermark.objects.get(metric=SiteDailyStat.SUBMISSIONS).last_id,
+            Submission.objects.latest("id").id,
+        )
+
+    def test_roll_up_counts_rows_committed_below_watermark(self):
+        day = datetime.datetime(2024, 5, 1, 12, tzinfo=datetime.timezone.utc)
+        first, late, last = (self.submit(day) for _ in range(3))
+        # As if ``late`` had not committed yet when the roll-up ran
+        Submission.objects.filter(id=late.id).delete()
+
+        self.assertEqual(SiteDailyStat.roll_up(SiteDailyStat.SUBMISSIONS), 2)
+        self.assertEqual(
+            SiteStatWatermark.objects.get(metric=SiteDailyStat.SUBMISSIONS).gaps,
+            [late.id],
+        )
+
+        late.save(force_insert=True)
+        Submission.objects.filter(id=late.id).update(date=day)
+        self.assertEqual(SiteDailyStat.roll_up(SiteDailyStat.SUBMISSIONS), 1)
+        self.assertEqual(self.series(), {day.date(): 3})
+        self.assertEqual(
+            SiteStatWatermark.objects.get(metric=SiteDailyStat.SUBMISSIONS).gaps, []
+        )
+        self.assertEqual(SiteDailyStat.roll_up(SiteDailyStat.SUBMISSIONS), 0)
+
+    def test_stat_pages_read_rollups(self):
+        self.submit(timezone.now())
+        self.submit(timezone.now(), result="WA")
+        SiteDailyStat.roll_up_all()
+        self.client.force_login(self.profile.user)
+
+        site = self.client.get(reverse("site_stats"))
+        language = self.client.get(reverse("language_stats"))
+
+        self.assertEqual(site.status_code, 200)
+        self.assertIn(b"site-submissions-data", site.content)
+        self.assertEqual(language.status_code, 200)
+        self.assertIn(self.lang.name.encode(), language.content)
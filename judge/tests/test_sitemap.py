@@ -0,0 +1,78 @@
+import gzip
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from judge.models import SitemapSegment
+from judge.sitemap import UserSitemap, generate_sitemaps, segment_path
+
+
+class SitemapGenerationTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(MEDIA_ROOT=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        patcher = patch.object(UserSitemap, "segment_size", 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.users = [
+            User.objects.create(id=i, username="sitemap%d" % i) for i in (1, 2, 7, 8)
+        ]
+
+    def read_segment(self, number):
+        with default_storage.open(segment_path("user", number)) as f:
+            return gzip.decompress(f.read()).decode()
+
+    def test_segments_follow_id_ranges(self):
+        generate_sitemaps()
+
+        self.assertEqual(
+            list(
+                SitemapSegment.objects.filter(section="user")
+                .order_by("number")
+                .values_list("number", "url_count")
+            ),
+            [(0, 2), (2, 2)],
+        )
+        first = self.read_segment(0)
+        self.assertIn("/user/sitemap1", first)
+        self.assertIn("/user/sitemap2", first)
+        self.assertNotIn("/user/sitemap7", first)
+        self.assertIn("/user/sitemap8", self.read_segment(2))
+
+        response = self.client.get("/sitemap.xml")
+        index = b"".join(response.streaming_content).decode()
+        self.assertIn("/sitemap-user-2.xml.gz", index)
+        response = self.client.get("/sitemap-user-2.xml.gz")
+        self.assertEqual(response.status_code, 200)
+
+    def test_only_changed_segments_are_written(self):
+        self.assertGreater(generate_sitemaps(), 0)
+        self.assertEqual(generate_sitemaps(), 0)
+
+        self.users[2].username = "renamed"
+        self.users[2].save()
+        self.users[0].delete()
+        User.objects.create(id=20, username="sitemap20")
+
+        self.assertEqual(generate_sitemaps(), 3)
+        self.assertIn("/user/renamed", self.read_segment(2))
+        self.assertNotIn("/user/sitemap1", self.read_segment(0))
+        self.assertTrue(default_storage.exists(segment_path("user", 6)))
+
+        User.objects.filter(id=20).delete()
+        generate_sitemaps()
+        self.assertFalse(default_storage.exists(segment_path("user", 6)))
+        self.assertFalse(
+            SitemapSegment.objects.filter(section="user", number=6).exists()
+        )
+
+    def test_missing_sitemap(self):
+        self.assertEqual(self.client.get("/sitemap.xml").status_code, 404)
@@ -0,0 +1,162 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.test import TestCase
+from django.urls import reverse
+
+from judge.models import Language, Problem, ProblemGroup, Profile, Submission
+from judge.utils.keyset_paginator import (
+    KeysetPaginator,
+    get_cached_count,
+    keyset_paginate,
+)
+from judge.utils.problem_visibility import visible_problem_filter
+
+
+class SubmissionPaginationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.language, _ = Language.objects.get_or_create(
+            key="PY3",
+            defaults={
+                "name": "Python 3",
+                "short_name": "PY3",
+                "common_name": "Python",
+                "ace": "python",
+                "pygments": "python3",
+                "template": "",
+            },
+        )
+        cls.group, _ = ProblemGroup.objects.get_or_create(
+            name="keyset", defaults={"full_name": "Keyset"}
+        )
+        cls.user = User.objects.create_user("keyset_user", password="pw")
+        cls.profile = Profile.objects.create(user=cls.user, language=cls.language)
+        cls.public_problem = cls._create_problem("keysetpub", is_public=True)
+        cls.private_problem = cls._create_problem("keysetpriv", is_public=False)
+        cls.submissions = [
+            Submission.objects.create(
+                user=cls.profile,
+                problem=cls.public_problem,
+                language=cls.language,
+                status="D",
+                result="AC",
+            )
+            for _ in range(7)
+        ]
+        cls.hidden_submission = Submission.objects.create(
+            user=cls.profile,
+            problem=cls.private_problem,
+            language=cls.language,
+            status="D",
+            result="WA",
+        )
+
+    @classmethod
+    def _create_problem(cls, code, is_public):
+        return Problem.objects.create(
+            code=code,
+            name=code,
+            group=cls.group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+            is_public=is_public,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def public_queryset(self):
+        return Submission.objects.filter(problem=self.public_problem).order_by("-id")
+
+    def test_after_cursor_pages_through_in_order(self):
+        ids = [sub.id for sub in sorted(self.submissions, key=lambda s: -s.id)]
+        paginator = KeysetPaginator(3)
+
+        page = keyset_paginate(self.public_queryset(), "after", ids[2], 2, 3, paginator)
+        self.assertEqual([sub.id for sub in page], ids[3:6])
+        self.assertTrue(page.has_next())
+        self.assertTrue(page.has_previous())
+        self.assertEqual(page.next_cursor, "&after=%d" % ids[5])
+        self.assertEqual(page.previous_cursor, "&before=%d" % ids[3])
+
+        page = keyset_paginate(self.public_queryset(), "after", ids[5], 3, 3, paginator)
+        self.assertEqual([sub.id for sub in page], ids[6:])
+        self.assertFalse(page.has_next())
+
+        with self.assertRaises(EmptyPage):
+            keyset_paginate(self.public_queryset(), "after", ids[-1], 4, 3, paginator)
+
+    def test_before_cursor_returns_previous_page(self):
+        ids = [sub.id for sub in sorted(self.submissions, key=lambda s: -s.id)]
+        paginator = KeysetPaginator(3)
+
+        page = keyset_paginate(
+            self.public_queryset(), "before", ids[6], 3, 3, paginator
+        )
+        self.assertEqual([sub.id for sub in page], ids[3:6])
+        self.assertEqual(page.number, 3)
+        self.assertTrue(page.has_previous())
+
+        page = keyset_paginate(
+            self.public_queryset(), "before", ids[3], 2, 3, paginator
+        )
+        self.assertEqual([sub.id for sub in page], ids[:3])
+        self.assertEqual(page.number, 1)
+        self.assertFalse(page.has_previous())
+
+    def test_cached_count_is_reused(self):
+        queryset = self.public_queryset()
+        self.assertEqual(get_cached_count(queryset), 7)
+
+        Submission.objects.create(
+            user=self.profile,
+            problem=self.public_problem,
+            language=self.language,
+            status="D",
+            result="AC",
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_count(self.public_queryset()), 7)
+
+    def test_visible_problem_filter_hides_private_problems(self):
+        for user in (AnonymousUser(), self.user):
+            visible = Submission.objects.filter(visible_problem_filter(user))
+            self.assertIn(self.submissions[0], visible)
+            self.assertNotIn(self.hidden_submission, visible)
+
+    def test_visible_problem_filter_follows_problem_changes(self):
+        self.assertNotIn(
+            self.private_problem.id,
+            Problem.objects.filter(visible_problem_filter(self.user, "id")).values_list(
+                "id", flat=True
+            ),
+        )
+
+        self.private_problem.is_public = True
+        self.private_problem.save()
+
+        # Every problem is visible now, so no filter is needed at all.
+        self.assertIsNone(visible_problem_filter(self.user))
+
+    def test_submission_list_follows_cursor(self):
+        self.client.force_login(self.user)
+        newest_first = sorted(self.submissions, key=lambda s: -s.id)
+
+        response = self.client.get(
+            reverse("all_submissions"), {"after": newest_first[2].id, "page": 2}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [sub.id for sub in response.context["submissions"]],
+            [sub.id for sub in newest_first[3:]],
+        )
+
+    def test_submission_list_rejects_bad_cursor(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("all_submissions"), {"after": "abc"})
+
+        self.assertEqual(response.status_code, 404)
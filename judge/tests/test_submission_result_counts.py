@@ -0,0 +1,185 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from judge.models import (
+    Language,
+    Problem,
+    ProblemGroup,
+    Profile,
+    Submission,
+    SubmissionResultCount,
+)
+from judge.models.submission import update_submission_result
+
+
+class SubmissionResultCountTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.language, _ = Language.objects.get_or_create(
+            key="PY3",
+            defaults={
+                "name": "Python 3",
+                "short_name": "PY3",
+                "common_name": "Python",
+                "ace": "python",
+                "pygments": "python3",
+                "template": "",
+            },
+        )
+        cls.group, _ = ProblemGroup.objects.get_or_create(
+            name="counts", defaults={"full_name": "Counts"}
+        )
+        cls.user = User.objects.create_user("counts_user", password="pw")
+        cls.profile = Profile.objects.create(user=cls.user, language=cls.language)
+        cls.problem = Problem.objects.create(
+            code="countsprob",
+            name="Counts",
+            group=cls.group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+            is_public=True,
+        )
+
+    def submit(self, result):
+        return Submission.objects.create(
+            user=self.profile,
+            problem=self.problem,
+            language=self.language,
+            status="D" if result else "QU",
+            result=result,
+        )
+
+    def counts(self, scope, object_id):
+        return dict(SubmissionResultCount.get_counts(scope, [object_id]))
+
+    def test_counts_follow_saved_results(self):
+        self.submit("AC")
+        self.submit("AC")
+        pending = self.submit(None)
+
+        expected = {"AC": 2}
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_PROBLEM, self.problem.id), expected
+        )
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_USER, self.profile.id), expected
+        )
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_LANGUAGE, self.language.id),
+            expected,
+        )
+
+        pending = Submission.objects.get(id=pending.id)
+        pending.status = "D"
+        pending.result = "WA"
+        pending.save()
+
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_PROBLEM, self.problem.id),
+            {"AC": 2, "WA": 1},
+        )
+
+    def test_rejudge_and_delete_remove_counts(self):
+        first = self.submit("AC")
+        second = self.submit("WA")
+
+        update_submission_result(
+            Submission.objects.filter(id=first.id), status="QU", result=None
+        )
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_PROBLEM, self.problem.id),
+            {"AC": 0, "WA": 1},
+        )
+
+        update_submission_result(
+            Submission.objects.filter(id=first.id), status="CE", result="CE"
+        )
+        second.delete()
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_PROBLEM, self.problem.id),
+            {"AC": 0, "WA": 0, "CE": 1},
+        )
+
+    def test_language_counts_are_sharded_by_submission(self):
+        submissions = [self.submit("AC") for _ in range(3)]
+
+        shards = SubmissionResultCount.objects.filter(
+            scope=SubmissionResultCount.SCOPE_LANGUAGE, result="AC"
+        ).values_list("shard", flat=True)
+        self.assertEqual(
+            sorted(shards),
+            sorted(s.id % SubmissionResultCount.SHARDS["L"] for s in submissions),
+        )
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_LANGUAGE, self.language.id),
+            {"AC": 3},
+        )
+
+    @patch.dict(SubmissionResultCount.SHARDS, clear=True)
+    def test_bulk_update_moves_counts_in_one_update_per_change(self):
+        self.submit("CE")
+        submissions = [self.submit(result) for result in ("AC", "AC", "AC", "WA")]
+        queryset = Submission.objects.filter(id__in=[s.id for s in submissions])
+
+        # Lock and update the rows, then one UPDATE per result and count change
+        with self.assertNumQueries(7):
+            self.assertEqual(
+                update_submission_result(queryset, status="CE", result="CE"), 4
+            )
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_PROBLEM, self.problem.id),
+            {"AC": 0, "WA": 0, "CE": 5},
+        )
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_USER, self.profile.id),
+            {"AC": 0, "WA": 0, "CE": 5},
+        )
+
+    def test_reconcile_fixes_drift(self):
+        self.submit("AC")
+        submission = self.submit("AC")
+        # Bypass the counters entirely.
+        Submission.objects.filter(id=submission.id).update(result="TLE")
+
+        out = StringIO()
+        call_command("reconcile_result_counts", "--dry-run", stdout=out)
+        self.assertIn("mismatched", out.getvalue())
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_PROBLEM, self.problem.id),
+            {"AC": 2},
+        )
+
+        call_command("reconcile_result_counts", stdout=StringIO())
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_PROBLEM, self.problem.id),
+            {"AC": 1, "TLE": 1},
+        )
+        self.assertEqual(
+            self.counts(SubmissionResultCount.SCOPE_LANGUAGE, self.language.id),
+            {"AC": 1, "TLE": 1},
+        )
+
+    def test_problem_result_chart_uses_counters(self):
+        self.submit("AC")
+        self.submit("WA")
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("chronological_submissions", args=[self.problem.code]),
+            {"results": 1},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        categories = {
+            category["code"]: category["count"]
+            for category in response.json()["results_json"]["categories"]
+        }
+        self.assertEqual(categories["AC"], 1)
+        self.assertEqual(categories["WA"], 1)
+        self.assertEqual(response.json()["results_json"]["total"], 2)
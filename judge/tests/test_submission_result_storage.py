@@ -1,3 +1,4 @@
+import gzip
 import json
 from io import BytesIO
 from tempfile import TemporaryDirectory
@@ -185,3 +186,54 @@ class SubmissionResultStorageTests(SimpleTestCase):
 
         self.assertEqual(payload["cases"][0]["feedback"], "abcdef")
         self.assertEqual(payload["cases"][0]["extended_feedback"], "ghijkl")
+
+
+class ObjectParametersFakeStorage(FakeStorage):
+    object_parameters = {"CacheControl": "max-age=60"}
+
+    def __init__(self):
+        super().__init__()
+        # Shared with the copies writes are made through
+        self.saved_parameters = []
+
+    def save(self, path, content):
+        self.saved_parameters.append(self.object_parameters)
+        return super().save(path, content)
+
+
+@override_settings(SECRET_KEY="test-secret", SUBMISSION_RESULT_COMPRESSION="gzip")
+class SubmissionResultCompressionTests(SimpleTestCase):
+    def test_compressed_with_content_encoding(self):
+        storage = ObjectParametersFakeStorage()
+        with patch.object(submission_results, "default_storage", storage):
+            submission_results.save_submission_result(15, [{"case": 1, "output": "x"}])
+
+        data = storage.files[submission_results.submission_result_path(15)]
+        self.assertEqual(json.loads(gzip.decompress(data))["cases"][0]["output"], "x")
+        self.assertEqual(
+            storage.saved_parameters,
+            [
+                {
+                    "CacheControl": "max-age=60",
+                    "ContentEncoding": "gzip",
+                    "ContentType": "application/json",
+                }
+            ],
+        )
+        self.assertEqual(storage.object_parameters, {"CacheControl": "max-age=60"})
+
+    @override_settings(SUBMISSION_RESULT_COMPRESSION="zstd")
+    def test_only_gzip_is_used(self):
+        storage = ObjectParametersFakeStorage()
+        with patch.object(submission_results, "default_storage", storage):
+            submission_results.save_submission_result(17, [{"case": 1}])
+
+        self.assertEqual(load_payload(storage, 17)["cases"][0]["case"], 1)
+        self.assertNotIn("ContentEncoding", storage.saved_parameters[0])
+
+    def test_storage_without_content_encoding_is_uncompressed(self):
+        storage = FakeStorage()
+        with patch.object(submission_results, "default_storage", storage):
+            submission_results.save_submission_result(16, [{"case": 1}])
+
+            self.assertEqual(load_payload(storage, 16)["cases"][0]["case"], 1)
@@ -0,0 +1,131 @@
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from judge.models import (
+    Language,
+    Problem,
+    ProblemGroup,
+    Profile,
+    Submission,
+    SubmissionTestCase,
+)
+from judge.utils import packed_test_cases
+from judge.utils.packed_test_cases import (
+    PackedTestCase,
+    PackedTestCases,
+    pack_test_cases,
+    unpack_test_cases,
+)
+from judge.views.submission import group_test_cases
+
+
+def fields(cases):
+    return [
+        (c.case, c.status, c.time, c.memory, c.points, c.total, c.batch) for c in cases
+    ]
+
+
+class TestCasePackTest(SimpleTestCase):
+    cases = [
+        PackedTestCase(2, "WA", 0.25, 2048.0, 0.0, 5.0, 1),
+        PackedTestCase(1, "AC", 0.125, 1024.0, 5.0, 5.0, 1),
+        PackedTestCase(3, "SC", None, None, None, None, None),
+    ]
+
+    def test_round_trip_keeps_nulls_in_case_order(self):
+        self.assertEqual(
+            fields(unpack_test_cases(pack_test_cases(self.cases))),
+            [
+                (1, "AC", 0.125, 1024.0, 5.0, 5.0, 1),
+                (2, "WA", 0.25, 2048.0, 0.0, 5.0, 1),
+                (3, "SC", None, None, None, None, None),
+            ],
+        )
+        self.assertEqual(unpack_test_cases(pack_test_cases([])), [])
+
+    @patch.object(packed_test_cases, "zstandard", None)
+    def test_zlib_without_zstandard(self):
+        cases = [
+            PackedTestCase(i, "AC", 0.5, 1024.0, 1.0, 1.0, None) for i in range(64)
+        ]
+        data = pack_test_cases(cases)
+
+        self.assertEqual(data[3], packed_test_cases.COMPRESS_ZLIB)
+        self.assertLess(len(data), 64 * 8)
+        self.assertEqual(fields(unpack_test_cases(data)), fields(cases))
+
+    def test_rejects_unknown_data(self):
+        with self.assertRaises(ValueError):
+            unpack_test_cases(b"XX\x01\x00\x00\x00\x00\x00")
+
+    @patch("judge.views.submission.ProblemTestCase.objects")
+    def test_status_page_groups_packed_cases(self, objects):
+        objects.filter.return_value.order_by.return_value.values_list.return_value = [
+            "min"
+        ]
+        submission = Mock(
+            test_case_results=PackedTestCases(pack_test_cases(self.cases))
+        )
+
+        batch, case = group_test_cases(submission, set())
+        self.assertEqual([c.case for c in batch["cases"]], [1, 2])
+        self.assertEqual(batch["points"], 0.0)
+        self.assertEqual(batch["total"], 10.0)
+        self.assertEqual(case["cases"][0].status, "SC")
+
+
+class PackCommandTest(TestCase):
+    fixtures = ["language_small"]
+
+    def setUp(self):
+        group = ProblemGroup.objects.create(name="pack", full_name="Pack")
+        problem = Problem.objects.create(
+            code="pack",
+            name="Pack",
+            group=group,
+            time_limit=1.0,
+            memory_limit=65536,
+            points=1,
+        )
+        language = Language.objects.first()
+        user = User.objects.create(username="pack")
+        profile = Profile.objects.create(user=user, language=language)
+        self.graded, self.rejudging = [
+            Submission.objects.create(
+                user=profile, problem=problem, language=language, status="D"
+            )
+            for _ in range(2)
+        ]
+        for submission in (self.graded, self.rejudging):
+            for case in (1, 2):
+                SubmissionTestCase.objects.create(
+                    submission=submission, case=case, status="AC", points=1, total=1
+                )
+
+    def test_skips_submissions_rejudged_after_selection(self):
+        original = Submission.objects.select_for_update
+
+        def rejudge_then_lock(*args, **kwargs):
+            Submission.objects.filter(id=self.rejudging.id).update(status="QU")
+            return original(*args, **kwargs)
+
+        with patch.object(
+            Submission.objects, "select_for_update", side_effect=rejudge_then_lock
+        ):
+            call_command("pack_submission_test_cases", stdout=StringIO())
+
+        graded = Submission.objects.get(id=self.graded.id)
+        self.assertEqual([case.case for case in graded.test_case_results], [1, 2])
+        self.assertFalse(graded.test_cases.exists())
+        self.assertTrue(
+            SubmissionTestCase.objects.filter(submission=self.rejudging).exists()
+        )
+        self.assertFalse(
+            Submission.objects.filter(
+                id=self.rejudging.id, test_case_pack__isnull=False
+            ).exists()
+        )
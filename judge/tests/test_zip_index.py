@@ -0,0 +1,117 @@
+import io
+from unittest.mock import Mock, patch
+from zipfile import BadZipFile, ZipFile
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from judge.utils import zip_index as zip_index_module
+from judge.utils.zip_index import (
+    archive_report,
+    check_archive,
+    pair_test_files,
+    zip_index,
+    zip_names,
+)
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with ZipFile(buffer, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+class ZipIndexTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_index_matches_zipfile(self):
+        archive = make_zip(
+            {
+                "Data/": b"",
+                "Data/02.inp": b"2\n",
+                "Data/01.inp": b"1 2\n",
+                "đề.txt": b"",
+            }
+        )
+        members = zip_index(archive)
+
+        with ZipFile(archive) as zf:
+            expected = sorted(
+                (info.filename, info.file_size, info.compress_size, info.CRC)
+                for info in zf.infolist()
+                if not info.is_dir()
+            )
+        self.assertEqual([tuple(member) for member in members], expected)
+        self.assertEqual(zip_names(archive), ["Data/01.inp", "Data/02.inp", "đề.txt"])
+
+    def test_index_is_cached(self):
+        archive = make_zip({"1.in": b"1\n", "1.out": b"1\n"})
+        zip_index(archive)
+        with patch.object(
+            zip_index_module, "_parse_central_directory"
+        ) as parse_directory:
+            self.assertEqual(zip_names(archive), ["1.in", "1.out"])
+        parse_directory.assert_not_called()
+
+    def test_prepended_data(self):
+        archive = io.BytesIO(b"#!/bin/sh\n" + make_zip({"a.in": b"x"}).read())
+        self.assertEqual(zip_names(archive), ["a.in"])
+
+    def test_not_a_zip(self):
+        with self.assertRaises(BadZipFile):
+            zip_index(io.BytesIO(b"not a zip file"))
+
+    def test_pairing(self):
+        names = [
+            "Data/01.inp",
+            "Data/01.out",
+            "02.in",
+            "02.ans",
+            "02.out",
+            "tests/03",
+            "tests/03.a",
+            "04.in",
+            "05.out",
+            "checker.cpp",
+        ]
+        self.assertEqual(
+            pair_test_files(names),
+            [
+                ("02.in", "02.out"),
+                ("Data/01.inp", "Data/01.out"),
+                ("tests/03", "tests/03.a"),
+            ],
+        )
+
+    def test_check_archive(self):
+        archive = make_zip(
+            {
+                "1.in": b"1 2\n",
+                "1.out": b"3\r\n",
+                "2.in": b"\xef\xbb\xbf1\n",
+                "2.out": b"\xff\xfe\n",
+                "3.in": b"",
+                "checker": b"\x7fELF\x00\r\xff",
+            }
+        )
+        self.assertIsNone(archive_report(archive))
+
+        progress = Mock()
+        report = check_archive(archive, progress)
+
+        self.assertEqual(report["files"], 6)
+        self.assertEqual(
+            report["issues"],
+            {
+                "1.out": ["cr"],
+                "2.in": ["bom"],
+                "2.out": ["not_utf8"],
+                "3.in": ["empty"],
+            },
+        )
+        self.assertEqual(sum(call.args[0] for call in progress.did.call_args_list), 22)
+        self.assertEqual(archive_report(archive), report)
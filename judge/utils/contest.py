@@ -1,8 +1,13 @@
 from django.db import transaction
+from django.db.models import Q
+
+from judge import event_poster as event
 from judge.tasks import rescore_contest
 from judge.models import (
     Contest,
+    ContestParticipation,
 )
+from judge.utils.hidden_results import format_data_key
 
 
 def maybe_trigger_contest_rescore(form, contest, force_rescore=False):
@@ -33,3 +38,72 @@ def maybe_trigger_contest_rescore(form, contest, force_rescore=False):
         Contest._author_ids.dirty(contest)
         Contest._curator_ids.dirty(contest)
         Contest._tester_ids.dirty(contest)
+
+
+def _participation_rank(participation):
+    """Rank of a live participation as shown on the default scoreboard."""
+    score = participation.score
+    cumtime = participation.cumtime
+    tiebreaker = participation.tiebreaker
+    ahead = participation.contest.users.filter(
+        virtual=ContestParticipation.LIVE, is_disqualified=False
+    ).filter(
+        Q(score__gt=score)
+        | Q(score=score, cumtime__lt=cumtime)
+        | Q(score=score, cumtime=cumtime, tiebreaker__lt=tiebreaker)
+    )
+    return ahead.count() + 1
+
+
+def post_ranking_update(participation):
+    """
+    Push a live scoreboard update for ``participation``, which must have just
+    gone through ``recompute_results``.
+
+    The changed row is rendered once here and sent with its new rank and the
+    cells that changed, so open scoreboards patch it in place instead of all
+    refetching the ranking page. Updates the client cannot apply as a diff
+    fall back to a plain ``ranking-update``, which triggers a reload.
+    """
+    from judge.views.contests import build_ranking_profiles, get_contest_problems
+
+    contest = participation.contest
+    if not event.real or contest.scoreboard_visibility != Contest.SCOREBOARD_VISIBLE:
+        return
+
+    channel = "contest_%s" % contest.key
+    previous = getattr(participation, "_previous_result", None)
+    if (
+        previous is None
+        or participation.virtual != ContestParticipation.LIVE
+        or participation.is_disqualified
+    ):
+        event.post(channel, {"type": "ranking-update"})
+        return
+
+    problems = get_contest_problems(contest)
+    row = build_ranking_profiles(contest, problems, [participation])[0]
+    old_format_data = previous[3] or {}
+    new_format_data = participation.format_data or {}
+    cells = {
+        index: str(cell)
+        for index, (cp, cell) in enumerate(zip(problems, row.problem_cells))
+        if old_format_data.get(format_data_key(cp))
+        != new_format_data.get(format_data_key(cp))
+    }
+
+    event.post(
+        channel,
+        {
+            "type": "ranking-diff",
+            "participation": participation.id,
+            "user": participation.user_id,
+            "rank": _participation_rank(participation),
+            "score": participation.score,
+            "cumtime": participation.cumtime,
+            "tiebreaker": participation.tiebreaker,
+            "old": list(previous[:3]),
+            "result_cell": str(row.result_cell),
+            "cells": cells,
+        },
+    )
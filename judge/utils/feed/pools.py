@@ -246,12 +246,12 @@ class ProblemPool(CachedPool):
                 RecommendationType,
                 user_completed_ids,
             )
+            from judge.utils.problem_visibility import get_visible_problem_ids
 
-            visible_ids = list(
-                Problem.get_visible_problems(self.request.user).values_list(
-                    "id", flat=True
-                )
-            )
+            visible_ids = get_visible_problem_ids(self.request.user)
+            if visible_ids is None:
+                visible_ids = Problem.objects.values_list("id", flat=True)
+            visible_ids = sorted(visible_ids)
             if not visible_ids:
                 return []
 
@@ -98,13 +98,14 @@ def _subtract_result_counts(counts, hidden_counts):
     return result
 
 
-def get_result_data_with_hidden(submissions, user):
+def get_result_data_with_hidden(submissions, user, counts=None):
+    # counts, if given, are the precomputed result counts of submissions.
+    if counts is None:
+        counts = _get_result_counts(submissions)
     hidden_counts = _get_result_counts(
         filter_hidden_result_submissions(submissions, user)
     )
-    result = _get_result_data(
-        _subtract_result_counts(_get_result_counts(submissions), hidden_counts)
-    )
+    result = _get_result_data(_subtract_result_counts(counts, hidden_counts))
     hidden_count = sum(hidden_counts.values())
     if hidden_count:
         result["categories"].append(
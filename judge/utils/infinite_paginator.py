@@ -160,6 +160,10 @@ class InfinitePaginationMixin:
         return True
 
     def paginate_queryset(self, queryset, page_size):
+        if getattr(self, "keyset_cursor", None):
+            # Cursor requests are paginated by KeysetPaginationMixin.
+            return super().paginate_queryset(queryset, page_size)
+
         if not self.use_infinite_pagination:
             paginator, page, object_list, has_other = super().paginate_queryset(
                 queryset, page_size
@@ -0,0 +1,178 @@
+import collections
+
+import xxhash
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from judge.utils.infinite_paginator import get_requested_page_number
+
+KEYSET_DIRECTIONS = ("after", "before")
+CACHED_COUNT_TIMEOUT = 300
+
+
+class KeysetPage(collections.abc.Sequence):
+    """
+    A page of a list ordered by descending id, fetched with a
+    ``WHERE id < cursor`` (or ``id > cursor``) range scan instead of OFFSET.
+
+    The page number is carried along only for display; the cursor decides
+    which rows are shown, so deep pages cost the same as the first one.
+    """
+
+    def __init__(self, object_list, number, has_next, has_previous, paginator):
+        self.object_list = list(object_list)
+        self.number = number
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.num_pages = 1e3000
+        self.paginator = paginator
+        add_keyset_cursors(self)
+
+    def __repr__(self):
+        return "<Keyset page %s>" % self.number
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def next_page_number(self):
+        if not self.has_next():
+            raise EmptyPage()
+        return self.number + 1
+
+    def previous_page_number(self):
+        if not self.has_previous():
+            raise EmptyPage()
+        return max(self.number - 1, 1)
+
+    def start_index(self):
+        return (self.paginator.per_page * (self.number - 1)) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list)
+
+    @cached_property
+    def page_range(self):
+        if self.number <= 1:
+            return [1]
+        if self.number == 2:
+            return [1, 2]
+        return [1, False, self.number]
+
+
+class KeysetPaginator:
+    is_infinite = True
+
+    def __init__(self, per_page):
+        self.per_page = per_page
+
+
+def keyset_paginate(queryset, direction, cursor, number, page_size, paginator=None):
+    """
+    Return the page of ``queryset`` (ordered by ``-id``) right after
+    (``direction="after"``) or right before (``direction="before"``) the row
+    with id ``cursor``.
+    """
+    if direction == "after":
+        rows = list(queryset.filter(id__lt=cursor)[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if number > 1 and not rows:
+            raise EmptyPage()
+        return KeysetPage(rows, number, has_more, number > 1, paginator)
+
+    rows = list(queryset.filter(id__gt=cursor).order_by("id")[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size][::-1]
+    if not has_more:
+        number = 1
+    return KeysetPage(rows, number, True, has_more, paginator)
+
+
+def add_keyset_cursors(page):
+    """
+    Attach query string fragments that turn the previous/next links of a
+    page into cursor links, so following them never needs an OFFSET.
+    """
+    object_list = list(page.object_list)
+    page.previous_cursor = page.next_cursor = ""
+    if not object_list:
+        return page
+    if page.has_previous():
+        page.previous_cursor = "&before=%d" % object_list[0].id
+    if page.has_next():
+        page.next_cursor = "&after=%d" % object_list[-1].id
+    return page
+
+
+def get_cached_count(queryset, timeout=CACHED_COUNT_TIMEOUT):
+    """
+    Count a queryset, caching the result per distinct SQL query for a few
+    minutes. Intended for paginator totals, where a slightly stale number
+    is fine but a ``COUNT(*)`` on every page view is not.
+    """
+    queryset = queryset.order_by()
+    sql, params = queryset.query.sql_with_params()
+    key = "qcount:%s:%s" % (
+        queryset.model._meta.db_table,
+        xxhash.xxh64_hexdigest(("%s|%r" % (sql, params)).encode()),
+    )
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+class KeysetPaginationMixin:
+    """
+    Serve a list ordered by ``-id`` with cursor pagination when the request
+    carries an ``after=<id>`` or ``before=<id>`` parameter, falling back to
+    the regular paginator otherwise.
+    """
+
+    keyset_pagination = True
+
+    @cached_property
+    def keyset_cursor(self):
+        if not self.keyset_pagination:
+            return None
+        for direction in KEYSET_DIRECTIONS:
+            value = self.request.GET.get(direction)
+            if value is None:
+                continue
+            try:
+                return direction, int(value)
+            except ValueError:
+                raise Http404("Cursor cannot be converted to an int.")
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.keyset_cursor is None:
+            return super().paginate_queryset(queryset, page_size)
+
+        direction, cursor = self.keyset_cursor
+        page_number = get_requested_page_number(
+            self.request, self.kwargs, self.page_kwarg
+        )
+        paginator = KeysetPaginator(page_size)
+        try:
+            page = keyset_paginate(
+                queryset, direction, cursor, page_number, page_size, paginator
+            )
+        except EmptyPage:
+            raise Http404("Invalid page (%s): no results" % page_number)
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,204 @@
+"""
+Packed storage of a submission's graded test cases.
+
+With ``SUBMISSION_TEST_CASE_STORAGE = "packed"``, the bridge replaces the
+``SubmissionTestCase`` rows of a graded submission by a single
+``SubmissionTestCasePack`` blob. The blob is a little-endian header
+followed by one column per field, compressed with zstd when the
+``zstandard`` package is installed and zlib otherwise:
+
+    magic "TP", version, compression, case count
+    case numbers      int32[count]
+    statuses          uint8[count], indexes into STATUSES
+    time, memory      float64[count] each, NaN for null
+    points, total     float64[count] each, NaN for null
+    batches           int32[count], -1 for null
+
+``PackedTestCases`` decodes it on first use into objects with the
+attributes templates read from ``SubmissionTestCase``.
+"""
+
+import math
+import struct
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"TP"
+VERSION = 1
+HEADER = struct.Struct("<2sBBI")
+
+COMPRESS_NONE = 0
+COMPRESS_ZLIB = 1
+COMPRESS_ZSTD = 2
+
+# Never reorder: the packed status is an index into this tuple
+STATUSES = ("AC", "WA", "TLE", "MLE", "OLE", "IR", "RTE", "CE", "IE", "SC", "AB")
+_STATUS_INDEX = {status: index for index, status in enumerate(STATUSES)}
+
+NAN = float("nan")
+
+
+def packing_enabled():
+    return getattr(settings, "SUBMISSION_TEST_CASE_STORAGE", "rows") == "packed"
+
+
+def packs_submission(submission):
+    """
+    Whether the test cases of ``submission`` are packed once it is graded.
+    Contest formats that score from the rows keep them.
+    """
+    if not packing_enabled():
+        return False
+    if submission.contest_object_id is None:
+        return True
+    return not submission.contest_object.format_class.uses_test_case_rows
+
+
+def _float(value):
+    return NAN if value is None else value
+
+
+def _nullable(value):
+    return None if math.isnan(value) else value
+
+
+def _compress(body):
+    if zstandard is not None:
+        return COMPRESS_ZSTD, zstandard.ZstdCompressor().compress(body)
+    return COMPRESS_ZLIB, zlib.compress(body, 6)
+
+
+def _decompress(compression, data):
+    if compression == COMPRESS_NONE:
+        return data
+    if compression == COMPRESS_ZLIB:
+        return zlib.decompress(data)
+    if compression == COMPRESS_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstandard is needed to read these test case results")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError("Unknown test case pack compression: %d" % compression)
+
+
+def pack_test_cases(cases):
+    """
+    Pack ``cases``, objects with the attributes of ``SubmissionTestCase``,
+    ordered by case number.
+    """
+    cases = sorted(cases, key=lambda case: case.case)
+    count = len(cases)
+    body = b"".join(
+        (
+            struct.pack("<%di" % count, *(case.case for case in cases)),
+            bytes(_STATUS_INDEX[case.status] for case in cases),
+            struct.pack(
+                "<%dd" % (4 * count),
+                *(_float(case.time) for case in cases),
+                *(_float(case.memory) for case in cases),
+                *(_float(case.points) for case in cases),
+                *(_float(case.total) for case in cases),
+            ),
+            struct.pack(
+                "<%di" % count,
+                *(-1 if case.batch is None else case.batch for case in cases),
+            ),
+        )
+    )
+    compression, compressed = _compress(body)
+    if len(compressed) >= len(body):
+        compression, compressed = COMPRESS_NONE, body
+    return HEADER.pack(MAGIC, VERSION, compression, count) + compressed
+
+
+class PackedTestCase(object):
+    __slots__ = ("case", "status", "time", "memory", "points", "total", "batch")
+
+    def __init__(self, case, status, time, memory, points, total, batch):
+        self.case = case
+        self.status = status
+        self.time = time
+        self.memory = memory
+        self.points = points
+        self.total = total
+        self.batch = batch
+
+    @property
+    def id(self):
+        # Only used to tell apart the cases of one submission in the page
+        return self.case
+
+    @property
+    def long_status(self):
+        from judge.models import Submission
+
+        return Submission.USER_DISPLAY_CODES.get(self.status, "")
+
+
+def unpack_test_cases(data):
+    magic, version, compression, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a version %d test case pack" % VERSION)
+    body = _decompress(compression, bytes(data[HEADER.size :]))
+
+    cases = struct.unpack_from("<%di" % count, body)
+    offset = 4 * count
+    statuses = body[offset : offset + count]
+    offset += count
+    floats = struct.unpack_from("<%dd" % (4 * count), body, offset)
+    offset += 32 * count
+    batches = struct.unpack_from("<%di" % count, body, offset)
+
+    return [
+        PackedTestCase(
+            cases[i],
+            STATUSES[statuses[i]],
+            _nullable(floats[i]),
+            _nullable(floats[count + i]),
+            _nullable(floats[2 * count + i]),
+            _nullable(floats[3 * count + i]),
+            None if batches[i] == -1 else batches[i],
+        )
+        for i in range(count)
+    ]
+
+
+class PackedTestCases(object):
+    """The test cases of a pack, decoded the first time they are read."""
+
+    def __init__(self, data):
+        self.data = data
+        self._cases = None
+
+    @property
+    def cases(self):
+        if self._cases is None:
+            self._cases = unpack_test_cases(self.data)
+            self.data = None
+        return self._cases
+
+    def __iter__(self):
+        return iter(self.cases)
+
+    def __len__(self):
+        return len(self.cases)
+
+    def __getitem__(self, index):
+        return self.cases[index]
+
+
+def store_packed_test_cases(submission_id, cases):
+    """Replace the ``SubmissionTestCase`` rows of a submission by a pack."""
+    from judge.models import SubmissionTestCase, SubmissionTestCasePack
+
+    with transaction.atomic():
+        SubmissionTestCasePack.objects.update_or_create(
+            submission_id=submission_id, defaults={"data": pack_test_cases(cases)}
+        )
+        SubmissionTestCase.objects.filter(submission_id=submission_id).delete()
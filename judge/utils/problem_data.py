@@ -1,11 +1,16 @@
 import json
 import os
 import re
+import tempfile
+from zipfile import BadZipFile
 import yaml
 import shutil
 
-from django.core.files.base import ContentFile
+import xxhash
+
 from django.core.files.storage import FileSystemStorage
+from django.db.models import FileField
+from django.dispatch import Signal
 from django.conf import settings
 from django.urls import reverse
 from django.utils.translation import gettext as _
@@ -16,6 +21,8 @@ import logging
 
 from judge.logging import log_exception
 from judge.utils.deferred_email import deferred_send_mail
+from judge.utils.unicode import utf8bytes
+from judge.utils.zip_index import zip_index_key
 
 debug_log = logging.getLogger("judge.debug")
 
@@ -54,6 +61,19 @@ class ProblemDataStorage(FileSystemStorage):
     def rename(self, old, new):
         return os.rename(self.path(old), self.path(new))
 
+    def replace(self, name, content):
+        """Write ``name`` through a temporary file, so readers never see it
+        missing or half written."""
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=directory, prefix=".tmp", delete=False
+        ) as temp:
+            temp.write(utf8bytes(content))
+        os.chmod(temp.name, 0o644)
+        os.replace(temp.name, path)
+
     def delete_directory(self, name):
         directory_path = self.path(name)
         try:
@@ -68,14 +88,101 @@ class ProblemDataError(Exception):
         self.message = message
 
 
+# Sent with ``problem`` after its init.yml was rewritten or removed.
+problem_data_changed = Signal()
+
+# Fields make_init may normalize on a case row
+CASE_NORMALIZED_FIELDS = (
+    "is_pretest",
+    "input_file",
+    "output_file",
+    "generator_args",
+    "checker",
+    "checker_args",
+)
+
+
+def _file_state(fieldfile):
+    if not fieldfile:
+        return None
+    if fieldfile.name.endswith(".zip"):
+        # The central directory carries every member's CRC, so it tells a
+        # zip re-uploaded under the same name apart without hashing it
+        try:
+            return [fieldfile.name, zip_index_key(fieldfile.path)]
+        except (BadZipFile, OSError, ValueError):
+            pass
+    try:
+        stat = os.stat(fieldfile.path)
+    except (OSError, ValueError):
+        return fieldfile.name
+    return [fieldfile.name, stat.st_size, stat.st_mtime_ns]
+
+
+def _row_state(instance, exclude=()):
+    state = []
+    for field in instance._meta.concrete_fields:
+        if field.attname in exclude:
+            continue
+        value = getattr(instance, field.attname)
+        if isinstance(field, FileField):
+            value = _file_state(value)
+        state.append([field.attname, value])
+    return state
+
+
+def _init_hash_key(problem_code):
+    return "problem_init_hash:%s" % problem_code
+
+
+def get_problem_init_hash(problem_code):
+    """Input hash of the problem's current init.yml, None if it is unknown."""
+    return cache.get(_init_hash_key(problem_code))
+
+
 class ProblemDataCompiler(object):
     def __init__(self, problem, data, cases, files):
         self.problem = problem
         self.data = data
-        self.cases = cases
+        self.cases = list(cases)
         self.files = files
+        self.file_set = set(files)
 
         self.generator = data.generator
+        self._original_cases = {
+            case.pk: {field: getattr(case, field) for field in CASE_NORMALIZED_FIELDS}
+            for case in self.cases
+        }
+
+    def _save_case(self, case):
+        original = self._original_cases.get(case.pk)
+        changed = [
+            field
+            for field in CASE_NORMALIZED_FIELDS
+            if original is None or getattr(case, field) != original[field]
+        ]
+        if changed:
+            case.save(update_fields=changed)
+
+    def input_hash(self):
+        """Hash of everything init.yml is generated from."""
+        state = {
+            "code": self.problem.code,
+            "data": _row_state(self.data, exclude=("feedback",)),
+            "cases": [_row_state(case) for case in self.cases],
+            "files": sorted(self.files),
+            "manifest": sorted(
+                self.problem.test_data_files.values_list("name", "blob_id")
+            ),
+            "graders": [
+                _row_state(grader)
+                for grader in self.problem.signature_graders.order_by("id")
+            ],
+            "cpp": _get_latest_cpp_key(),
+        }
+        return xxhash.xxh64_hexdigest(
+            json.dumps(state, sort_keys=True, default=str).encode()
+        )
 
     def make_init(self):
         cases = []
@@ -169,14 +276,14 @@ class ProblemDataCompiler(object):
                     data["is_pretest"] = case.is_pretest
 
                 if not self.generator:
-                    if case.input_file not in self.files:
+                    if case.input_file not in self.file_set:
                         raise ProblemDataError(
                             _(
                                 "Input file for case %(case_num)d does not exist: %(filename)s"
                             )
                             % {"case_num": i, "filename": case.input_file}
                         )
-                    if case.output_file not in self.files:
+                    if case.output_file not in self.file_set:
                         raise ProblemDataError(
                             _(
                                 "Output file for case %(case_num)d does not exist: %(filename)s"
@@ -200,7 +307,7 @@ class ProblemDataCompiler(object):
                     data["checker"] = make_checker(case)
                 else:
                     case.checker_args = ""
-                case.save(update_fields=("checker_args", "is_pretest"))
+                self._save_case(case)
                 (batch["batched"] if batch else cases).append(data)
             elif case.type == "S":
                 if batch:
@@ -231,7 +338,7 @@ class ProblemDataCompiler(object):
                     case.checker_args = ""
                 case.input_file = ""
                 case.output_file = ""
-                case.save(update_fields=("checker_args", "input_file", "output_file"))
+                self._save_case(case)
             elif case.type == "E":
                 if not batch:
                     raise ProblemDataError(
@@ -243,7 +350,7 @@ class ProblemDataCompiler(object):
                 case.generator_args = ""
                 case.checker = ""
                 case.checker_args = ""
-                case.save()
+                self._save_case(case)
                 end_batch()
                 batch = None
         if batch:
@@ -387,42 +494,41 @@ class ProblemDataCompiler(object):
 
         return init
 
+    def _hash_key(self):
+        return _init_hash_key(self.problem.code)
+
     def compile(self):
         from judge.models import problem_data_storage
 
         yml_file = "%s/init.yml" % self.problem.code
+        input_hash = self.input_hash()
+        if (
+            not self.data.feedback
+            and cache.get(self._hash_key()) == input_hash
+            and problem_data_storage.exists(yml_file)
+        ):
+            return False
+
         try:
             init = yaml.safe_dump(self.make_init())
         except ProblemDataError as e:
             self.data.feedback = e.message
             self.data.save()
             problem_data_storage.delete(yml_file)
+            cache.delete(self._hash_key())
         else:
             self.data.feedback = ""
             self.data.save()
-            problem_data_storage.save(yml_file, ContentFile(init))
-            self._notify_judges()
-
-    def _notify_judges(self):
-        """Notify connected judges that problem data has changed.
-
-        Gated behind DMOJ_PROBLEM_DATA_PUSH_UPDATE setting (default False).
-        Set to True if you want bridge push notifications in addition to
-        watchdog monitoring.
-        """
-        if not getattr(settings, "DMOJ_PROBLEM_DATA_PUSH_UPDATE", False):
-            return
-        from judge.judgeapi import notify_problem_update
-
-        try:
-            notify_problem_update()
-        except Exception:
-            pass  # Non-critical: logged in notify_problem_update
+            problem_data_storage.replace(yml_file, init)
+            # make_init normalizes the rows, so hash what it left behind
+            cache.set(self._hash_key(), self.input_hash(), None)
+        problem_data_changed.send(sender=type(self), problem=self.problem)
+        return True
 
     @classmethod
     def generate(cls, *args, **kwargs):
         self = cls(*args, **kwargs)
-        self.compile()
+        return self.compile()
 
 
 def _get_latest_cpp_key():
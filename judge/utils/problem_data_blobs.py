@@ -0,0 +1,310 @@
+"""
+Content-addressed store for problem test data.
+
+Every test file is kept once under ``.blobs/`` of the problem data root,
+named by its SHA-256, and each problem has a manifest of ``{name: digest}``
+rows pointing into it. Uploads only need to send the blobs the store does
+not have yet; committing a manifest hard links the files into the problem
+directory, so the judges read the same copy as the web tier.
+"""
+
+import hashlib
+import os
+import posixpath
+import shutil
+import tempfile
+from datetime import timedelta
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import xxhash
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from judge.models import ProblemTestDataFile, TestDataBlob, problem_data_storage
+from judge.utils.problem_data import ProblemDataCompiler, ProblemDataError
+from judge.utils.zip_index import cached_report, check_files
+
+__all__ = [
+    "check_manifest",
+    "collect_blobs",
+    "commit_manifest",
+    "get_manifest",
+    "index_archive",
+    "iter_archive",
+    "manifest_report",
+    "missing_blobs",
+    "set_manifest",
+    "store_archive",
+    "store_blob",
+]
+
+BLOB_DIRECTORY = ".blobs"
+CHUNK_SIZE = 1 << 20
+# Blobs nobody references yet may belong to an upload that is not committed.
+UNREFERENCED_BLOB_GRACE = timedelta(days=1)
+
+
+def blob_path(digest):
+    return problem_data_storage.path("%s/%s/%s" % (BLOB_DIRECTORY, digest[:2], digest))
+
+
+def _clean_name(name):
+    cleaned = posixpath.normpath(name.replace("\\", "/"))
+    if (
+        not name
+        or cleaned.startswith(("/", "../", "."))
+        or cleaned in ("..", "init.yml")
+    ):
+        raise ProblemDataError(_("Invalid test data file name: %s") % name)
+    return cleaned
+
+
+def store_blob(fileobj, expected_digest=None):
+    """
+    Stream ``fileobj`` into the store and return ``(digest, size)``.
+    Storing a file the store already has costs only the hashing.
+    """
+    temp_directory = problem_data_storage.path("%s/tmp" % BLOB_DIRECTORY)
+    os.makedirs(temp_directory, exist_ok=True)
+    sha256 = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=temp_directory, delete=False) as temp:
+        for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            temp.write(chunk)
+            size += len(chunk)
+    digest = sha256.hexdigest()
+
+    if expected_digest is not None and expected_digest != digest:
+        os.unlink(temp.name)
+        raise ProblemDataError(_("File content does not match its hash."))
+
+    path = blob_path(digest)
+    if os.path.exists(path):
+        os.unlink(temp.name)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp.name, path)
+    blob, created = TestDataBlob.objects.get_or_create(
+        digest=digest, defaults={"size": size}
+    )
+    if not created:
+        TestDataBlob.objects.filter(digest=digest).update(last_used=timezone.now())
+    return digest, size
+
+
+def missing_blobs(digests):
+    """
+    The digests among ``digests`` that still have to be uploaded. The others
+    are marked used, so they outlive the grace period of ``collect_blobs``
+    until the upload commits its manifest.
+    """
+    digests = set(digests)
+    present = list(
+        TestDataBlob.objects.filter(digest__in=digests).values_list("digest", flat=True)
+    )
+    if present:
+        TestDataBlob.objects.filter(digest__in=present).update(last_used=timezone.now())
+    return sorted(digests.difference(present))
+
+
+def get_manifest(problem):
+    return dict(problem.test_data_files.values_list("name", "blob_id"))
+
+
+def _problem_file_path(problem, name):
+    return problem_data_storage.path("%s/%s" % (problem.code, name))
+
+
+def _is_linked(path, digest):
+    try:
+        return os.path.samefile(path, blob_path(digest))
+    except OSError:
+        return False
+
+
+def _link(digest, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = "%s.%s.tmp" % (path, digest[:8])
+    try:
+        os.link(blob_path(digest), temp)
+    except OSError:
+        # Different filesystem: fall back to a copy
+        shutil.copyfile(blob_path(digest), temp)
+    os.replace(temp, path)
+
+
+def set_manifest(problem, files, materialize=False):
+    """
+    Replace the manifest of ``problem`` with ``files`` (``{name: digest}``),
+    whose blobs must all be stored already. With ``materialize``, the files
+    are linked into the problem directory; otherwise links left by a
+    previous manifest are removed. Returns the names whose content changed.
+    """
+    files = {_clean_name(name): digest for name, digest in files.items()}
+    missing = missing_blobs(files.values())
+    if missing:
+        raise ProblemDataError(
+            _("%d test data files have not been uploaded.") % len(missing)
+        )
+
+    old = get_manifest(problem)
+    changed = {
+        name: digest for name, digest in files.items() if old.get(name) != digest
+    }
+    with transaction.atomic():
+        ProblemTestDataFile.objects.filter(
+            problem=problem,
+            name__in=[name for name in old if files.get(name) != old[name]],
+        ).delete()
+        ProblemTestDataFile.objects.bulk_create(
+            [
+                ProblemTestDataFile(problem=problem, name=name, blob_id=digest)
+                for name, digest in changed.items()
+            ]
+        )
+
+    for name, digest in old.items():
+        keep = materialize and files.get(name) == digest
+        path = _problem_file_path(problem, name)
+        if not keep and _is_linked(path, digest):
+            os.unlink(path)
+    if materialize:
+        for name, digest in files.items():
+            path = _problem_file_path(problem, name)
+            if not _is_linked(path, digest):
+                _link(digest, path)
+
+    collect_blobs(set(old.values()).difference(files.values()))
+    return sorted(changed)
+
+
+def store_archive(archive):
+    """Store the members of a test data zip and return them as a manifest."""
+    files = {}
+    with ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            try:
+                _clean_name(info.filename)
+            except ProblemDataError:
+                # The judge cannot read these either, e.g. ".DS_Store"
+                continue
+            with zf.open(info) as member:
+                files[info.filename] = store_blob(member)[0]
+    return files
+
+
+def index_archive(problem, archive):
+    """Store the members of a test data zip and make them the manifest."""
+    files = store_archive(archive)
+    set_manifest(problem, files)
+    return files
+
+
+def commit_manifest(data, files):
+    """
+    Make ``files`` the test data of ``data``'s problem: the manifest is
+    materialized into the problem directory, replacing the zip, and
+    init.yml is regenerated. Returns the names whose content changed.
+    """
+    problem = data.problem
+    changed = set_manifest(problem, files, materialize=True)
+    if data.zipfile:
+        data.zipfile.delete()
+    ProblemDataCompiler.generate(
+        problem, data, problem.cases.order_by("order"), list(files)
+    )
+    return changed
+
+
+def _manifest_report_key(manifest):
+    return (
+        "manifest:%s"
+        % xxhash.xxh64(repr(sorted(manifest.items())).encode()).hexdigest()
+    )
+
+
+def check_manifest(problem, progress=None):
+    """Check the files of the problem's manifest like ``check_archive``."""
+    rows = sorted(problem.test_data_files.values_list("name", "blob_id", "blob__size"))
+    manifest = {name: digest for name, digest, size in rows}
+    return check_files(
+        _manifest_report_key(manifest),
+        [(name, size) for name, digest, size in rows],
+        lambda name: open(blob_path(manifest[name]), "rb"),
+        progress,
+    )
+
+
+def manifest_report(problem):
+    """The report of the last ``check_manifest`` of this manifest, if any."""
+    return cached_report(_manifest_report_key(get_manifest(problem)))
+
+
+def collect_blobs(digests=None):
+    """
+    Delete blobs that no manifest references and no upload used within the
+    grace period, among ``digests`` or, without them, the whole store.
+    """
+    cutoff = timezone.now() - UNREFERENCED_BLOB_GRACE
+    blobs = TestDataBlob.objects.annotate(references=Count("files")).filter(
+        references=0, last_used__lt=cutoff
+    )
+    if digests is not None:
+        blobs = blobs.filter(digest__in=digests)
+
+    candidates = set(blobs.values_list("digest", flat=True))
+    if not candidates:
+        return 0
+    # An upload may have used a candidate since it was selected
+    TestDataBlob.objects.filter(
+        digest__in=candidates, last_used__lt=cutoff, files__isnull=True
+    ).delete()
+    collected = candidates.difference(
+        TestDataBlob.objects.filter(digest__in=candidates).values_list(
+            "digest", flat=True
+        )
+    )
+    for digest in collected:
+        try:
+            os.unlink(blob_path(digest))
+        except FileNotFoundError:
+            pass
+    return len(collected)
+
+
+class _ZipStream(object):
+    """Write-only file that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+def iter_archive(problem):
+    """Yield a zip of the problem's manifest, one blob chunk at a time."""
+    stream = _ZipStream()
+    with ZipFile(stream, "w", ZIP_DEFLATED) as zf:
+        for name, digest in sorted(get_manifest(problem).items()):
+            with open(blob_path(digest), "rb") as f, zf.open(
+                name, "w", force_zip64=True
+            ) as member:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    member.write(chunk)
+                    yield from stream.drain()
+            yield from stream.drain()
+    yield from stream.drain()
@@ -0,0 +1,157 @@
+"""
+Visible problem id sets.
+
+The problems a user can see are the union of a few shared sets and a small
+per-user delta:
+
+- the public problems (public and not organization-private), shared by
+  everyone;
+- the organization-private public problems of each organization the user
+  is in, shared by the members of that organization;
+- the problems the user authors, curates or tests.
+
+The shared sets are cached as sorted integer arrays under a global
+visibility version, bumped whenever a problem's visibility changes. The
+per-user delta reuses ``user_editable_ids`` and ``user_tester_ids``, which
+the problem signals already invalidate per profile, and membership comes
+from ``Profile.get_organization_ids``. Views can then filter with the id
+set instead of joining the permission subquery of
+``Problem.get_visible_problems``, which stays the reference definition.
+"""
+
+import time
+from array import array
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from judge.caching import cache_wrapper
+from judge.models import Problem
+from judge.utils.problems import user_editable_ids, user_tester_ids
+
+__all__ = [
+    "bump_problem_visibility_version",
+    "get_visible_problem_ids",
+    "is_problem_visible",
+    "visible_problem_filter",
+    "visible_problem_queryset",
+]
+
+PROBLEM_VISIBILITY_VERSION_KEY = "problem_visibility_version"
+PROBLEM_ID_SET_TIMEOUT = 86400
+
+
+def problem_visibility_version():
+    version = cache.get(PROBLEM_VISIBILITY_VERSION_KEY)
+    if version is None:
+        cache.add(PROBLEM_VISIBILITY_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(PROBLEM_VISIBILITY_VERSION_KEY)
+    return version
+
+
+def bump_problem_visibility_version():
+    """Invalidate every cached shared problem id set at once."""
+    try:
+        cache.incr(PROBLEM_VISIBILITY_VERSION_KEY)
+    except ValueError:
+        cache.set(PROBLEM_VISIBILITY_VERSION_KEY, int(time.time() * 1000), None)
+
+
+def _pack(ids):
+    return array("i", sorted(ids))
+
+
+@cache_wrapper(prefix="pvis_all", timeout=PROBLEM_ID_SET_TIMEOUT)
+def _all_problem_ids(version):
+    return _pack(Problem.objects.values_list("id", flat=True))
+
+
+@cache_wrapper(prefix="pvis_public", timeout=PROBLEM_ID_SET_TIMEOUT)
+def _public_problem_ids(version):
+    return _pack(
+        Problem.objects.filter(
+            is_public=True, is_organization_private=False
+        ).values_list("id", flat=True)
+    )
+
+
+@cache_wrapper(prefix="pvis_listed", timeout=PROBLEM_ID_SET_TIMEOUT)
+def _listed_problem_ids(version):
+    # Public problems including organization-private ones, for users with
+    # `judge.see_organization_problem`.
+    return _pack(Problem.objects.filter(is_public=True).values_list("id", flat=True))
+
+
+@cache_wrapper(prefix="pvis_org", timeout=PROBLEM_ID_SET_TIMEOUT)
+def _organization_problem_ids(organization_id, version):
+    return _pack(
+        Problem.objects.filter(
+            is_public=True,
+            is_organization_private=True,
+            organizations=organization_id,
+        ).values_list("id", flat=True)
+    )
+
+
+def _can_see_all_problems(user):
+    return user.has_perm("judge.see_private_problem") or user.has_perm(
+        "judge.edit_all_problem"
+    )
+
+
+def get_visible_problem_ids(user):
+    """
+    Return the set of problem ids ``user`` can see, or None if they can see
+    every problem. Matches ``Problem.get_visible_problems``.
+    """
+    version = problem_visibility_version()
+    if not user.is_authenticated:
+        return set(_public_problem_ids(version))
+    if _can_see_all_problems(user):
+        return None
+
+    profile = user.profile
+    if user.has_perm("judge.see_organization_problem"):
+        ids = set(_listed_problem_ids(version))
+    else:
+        ids = set(_public_problem_ids(version))
+        for organization_id in profile.get_organization_ids():
+            ids.update(_organization_problem_ids(organization_id, version))
+    ids |= user_editable_ids(profile)
+    ids |= user_tester_ids(profile)
+    return ids
+
+
+def is_problem_visible(user, problem_id):
+    ids = get_visible_problem_ids(user)
+    return ids is None or problem_id in ids
+
+
+def visible_problem_filter(user, field="problem_id"):
+    """
+    Return a Q restricting ``field`` to the problems ``user`` can see, or
+    None if they can see every problem.
+
+    The Q lists whichever of the visible or hidden ids is smaller, so the
+    filter stays a short ``IN`` list instead of a join against the
+    visibility subquery.
+    """
+    ids = get_visible_problem_ids(user)
+    if ids is None:
+        return None
+    all_ids = _all_problem_ids(problem_visibility_version())
+    if len(ids) * 2 <= len(all_ids):
+        return Q(**{field + "__in": ids})
+    hidden = set(all_ids) - ids
+    if not hidden:
+        return None
+    return ~Q(**{field + "__in": hidden})
+
+
+def visible_problem_queryset(user):
+    """``Problem.get_visible_problems`` filtered by id instead of by join."""
+    queryset = Problem.objects.defer("description")
+    problem_filter = visible_problem_filter(user, "id")
+    if problem_filter is not None:
+        queryset = queryset.filter(problem_filter)
+    return queryset
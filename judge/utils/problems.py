@@ -237,9 +237,13 @@ def hot_problems(duration, limit):
 def get_related_problems(profile, problem, limit=8):
     if not profile or not getattr(settings, "USE_ML", False):
         return None
-    problemset = Problem.get_visible_problems(profile.user).values_list("id", flat=True)
-    problemset = problemset.exclude(id__in=user_completed_ids(profile))
-    problemset = problemset.exclude(id=problem.id)
+    # Avoid circular import: problem_visibility imports user_editable_ids from here
+    from judge.utils.problem_visibility import get_visible_problem_ids
+
+    problemset = get_visible_problem_ids(profile.user)
+    if problemset is None:
+        problemset = Problem.objects.values_list("id", flat=True)
+    problemset = set(problemset) - user_completed_ids(profile) - {problem.id}
 
     two_tower_model = VectorStore("two_tower")
     results = two_tower_model.problem_neighbors(problem, problemset, limit * 2)
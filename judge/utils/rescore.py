@@ -0,0 +1,93 @@
+"""
+Set-based rescoring of submissions after a problem's points change.
+
+Points are recomputed from ``case_points`` and ``case_total`` in UPDATE
+statements over chunks of ids, the way grading-end computes them in the
+bridge: rounded to 3 decimals, and 0 for non-partial problems unless full.
+"""
+
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Round
+
+from judge.models import ContestParticipation, ContestSubmission, Submission
+from judge.models.contest import get_contest_problem_user_count
+
+RESCORE_CHUNK_SIZE = 5000
+
+
+def scaled_points(points, prefix=""):
+    """SQL for the score of a submission on a problem worth ``points``."""
+    case_points = F(prefix + "case_points")
+    case_total = F(prefix + "case_total")
+    return Case(
+        When(
+            Q(**{prefix + "case_total__gt": 0}),
+            then=Round(case_points / case_total * points, 3),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def id_chunks(queryset, size=RESCORE_CHUNK_SIZE):
+    """Yield lists of up to ``size`` ids of ``queryset``, in id order."""
+    last = 0
+    while True:
+        ids = list(
+            queryset.filter(id__gt=last)
+            .order_by("id")
+            .values_list("id", flat=True)[:size]
+        )
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def rescore_submissions(queryset, points, partial, progress=None):
+    """Rescore the submissions of ``queryset``. Returns the number rescored."""
+    rescored = 0
+    for ids in id_chunks(queryset):
+        chunk = Submission.objects.filter(id__in=ids)
+        chunk.update(points=scaled_points(points))
+        if not partial:
+            chunk.exclude(points=points).update(points=0)
+        rescored += len(ids)
+        if progress is not None:
+            progress.done = rescored
+    return rescored
+
+
+def rescore_contest_submissions(contest_problem):
+    """
+    Rescore the submissions made to ``contest_problem``. Returns the ids of
+    the participations to recompute.
+    """
+    queryset = ContestSubmission.objects.filter(problem=contest_problem)
+    score = (
+        Submission.objects.filter(id=OuterRef("submission_id"))
+        .annotate(score=scaled_points(contest_problem.points))
+        .values("score")
+    )
+    for ids in id_chunks(queryset):
+        chunk = ContestSubmission.objects.filter(id__in=ids)
+        chunk.update(points=Subquery(score, output_field=FloatField()))
+        if not contest_problem.partial:
+            chunk.exclude(points=contest_problem.points).update(points=0)
+    get_contest_problem_user_count.dirty(contest_problem.contest_id)
+    return set(queryset.values_list("participation_id", flat=True).distinct())
+
+
+def recompute_participations(participation_ids, progress=None):
+    """Recompute the contest results of the given participations."""
+    recomputed = 0
+    for participation in (
+        ContestParticipation.objects.filter(id__in=participation_ids)
+        .select_related("contest")
+        .iterator()
+    ):
+        participation.recompute_results()
+        recomputed += 1
+        if progress is not None and recomputed % 10 == 0:
+            progress.done = recomputed
+    return recomputed
@@ -0,0 +1,217 @@
+"""
+Local source similarity engine.
+
+Sources are reduced to a stream of normalized tokens (identifiers, literals
+and comments are erased, keywords and operators kept), hashed as k-grams and
+winnowed into a small set of fingerprints that survive renaming and
+reformatting. Candidate pairs come from an inverted index of fingerprints,
+so only submissions that share at least one fingerprint are ever compared.
+"""
+
+import re
+from array import array
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import xxhash
+
+__all__ = [
+    "compare_groups",
+    "fingerprint_source",
+    "language_family",
+    "pack_fingerprints",
+    "unpack_fingerprints",
+]
+
+KGRAM_SIZE = 10
+WINDOW_SIZE = 8
+
+# Fingerprints present in more than this share of a group's submissions are
+# template code (includes, fast IO, main) and say nothing about copying.
+MAX_DOCUMENT_FREQUENCY = 0.5
+MIN_PERCENTAGE = 30
+MAX_PAIRS_PER_GROUP = 100
+
+_C_KEYWORDS = """
+    auto bool break case catch char class const continue default delete do
+    double else enum extern false float for goto if inline int long namespace
+    new private protected public return short signed sizeof static struct
+    switch template this throw true try typedef typename union unsigned using
+    virtual void volatile while boolean extends final implements import
+    interface package super var val fun func let fn impl mut
+""".split()
+
+_PYTHON_KEYWORDS = """
+    and as assert break class continue def del elif else except False finally
+    for from global if import in is lambda None nonlocal not or pass raise
+    return True try while with yield
+""".split()
+
+_PASCAL_KEYWORDS = """
+    and array begin case const div do downto else end for function if in
+    integer longint int64 mod not of or procedure program qword real record
+    repeat string then to type until uses var while
+""".split()
+
+_FAMILIES = {
+    "c": {
+        "comment": r"//[^\n]*|/\*.*?\*/|^\s*#[^\n]*",
+        "string": r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'",
+        "keywords": frozenset(_C_KEYWORDS),
+    },
+    "python": {
+        "comment": r"#[^\n]*",
+        "string": r"'''.*?'''|\"\"\".*?\"\"\"|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'",
+        "keywords": frozenset(_PYTHON_KEYWORDS),
+    },
+    "pascal": {
+        "comment": r"\{.*?\}|\(\*.*?\*\)|//[^\n]*",
+        "string": r"'(?:''|[^'\n])*'",
+        "keywords": frozenset(_PASCAL_KEYWORDS),
+        "ignore_case": True,
+    },
+    "text": {
+        "comment": r"(?!)",
+        "string": r"(?!)",
+        "keywords": frozenset(),
+    },
+}
+
+_FAMILY_BY_COMMON_NAME = {
+    "C": "c",
+    "C++": "c",
+    "C#": "c",
+    "D": "c",
+    "Go": "c",
+    "Java": "c",
+    "JavaScript": "c",
+    "Kotlin": "c",
+    "Rust": "c",
+    "Scala": "c",
+    "Swift": "c",
+    "Python": "python",
+    "Ruby": "python",
+    "Pascal": "pascal",
+}
+
+
+def language_family(common_name):
+    return _FAMILY_BY_COMMON_NAME.get(common_name, "text")
+
+
+def _compile(family):
+    spec = _FAMILIES[family]
+    pattern = "|".join(
+        (
+            "(?P<skip>%s)" % spec["comment"],
+            "(?P<string>%s)" % spec["string"],
+            r"(?P<number>\d[\w.]*)",
+            r"(?P<word>\w+)",
+            r"(?P<op>[^\s\w])",
+        )
+    )
+    return re.compile(pattern, re.DOTALL | re.MULTILINE), spec
+
+
+_LEXERS = {family: _compile(family) for family in _FAMILIES}
+
+
+def tokenize(source, family):
+    regex, spec = _LEXERS[family]
+    ignore_case = spec.get("ignore_case", False)
+    keywords = spec["keywords"]
+    tokens = []
+    for match in regex.finditer(source):
+        kind = match.lastgroup
+        if kind == "skip":
+            continue
+        if kind == "string":
+            tokens.append("S")
+        elif kind == "number":
+            tokens.append("N")
+        elif kind == "word":
+            word = match.group()
+            if ignore_case:
+                word = word.lower()
+            tokens.append(word if word in keywords or family == "text" else "V")
+        else:
+            tokens.append(match.group())
+    return tokens
+
+
+def fingerprint_source(source, family):
+    """Return the sorted winnowed fingerprints of ``source``."""
+    tokens = tokenize(source, family)
+    if len(tokens) < KGRAM_SIZE:
+        return []
+    hashes = [
+        xxhash.xxh32_intdigest(" ".join(tokens[i : i + KGRAM_SIZE]).encode())
+        for i in range(len(tokens) - KGRAM_SIZE + 1)
+    ]
+    if len(hashes) <= WINDOW_SIZE:
+        return [min(hashes)]
+
+    # Winnowing: keep the minimum of every window, preferring the rightmost
+    # one on ties, so each position is selected at most once.
+    selected = set()
+    for start in range(len(hashes) - WINDOW_SIZE + 1):
+        window = hashes[start : start + WINDOW_SIZE]
+        low = min(window)
+        offset = WINDOW_SIZE - 1 - window[::-1].index(low)
+        selected.add((start + offset, low))
+    return sorted({value for _, value in selected})
+
+
+def pack_fingerprints(fingerprints):
+    return array("I", fingerprints).tobytes()
+
+
+def unpack_fingerprints(data):
+    fingerprints = array("I")
+    fingerprints.frombytes(bytes(data))
+    return fingerprints
+
+
+def _compare_group(documents):
+    """
+    Score the pairs of one group of ``{key: fingerprints}``.
+
+    Returns ``(first, second, first_percentage, second_percentage, shared)``
+    tuples, most similar first.
+    """
+    documents = {key: set(prints) for key, prints in documents.items() if prints}
+    index = defaultdict(list)
+    for key, prints in documents.items():
+        for value in prints:
+            index[value].append(key)
+
+    limit = max(2, MAX_DOCUMENT_FREQUENCY * len(documents))
+    shared = Counter()
+    for keys in index.values():
+        if 1 < len(keys) <= limit:
+            shared.update(combinations(sorted(keys), 2))
+
+    pairs = []
+    for (first, second), count in shared.items():
+        first_percentage = count * 100 / len(documents[first])
+        second_percentage = count * 100 / len(documents[second])
+        if max(first_percentage, second_percentage) >= MIN_PERCENTAGE:
+            pairs.append((first, second, first_percentage, second_percentage, count))
+    pairs.sort(key=lambda pair: -max(pair[2], pair[3]))
+    return pairs[:MAX_PAIRS_PER_GROUP]
+
+
+def compare_groups(groups, workers=1):
+    """
+    Score every group in ``{group: {key: fingerprints}}``.
+
+    Groups are independent, so with ``workers > 1`` they are spread over a
+    process pool. Returns ``{group: pairs}``.
+    """
+    names = list(groups)
+    if workers > 1 and len(names) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_compare_group, [groups[name] for name in names])
+            return dict(zip(names, results))
+    return {name: _compare_group(groups[name]) for name in names}
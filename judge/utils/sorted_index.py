@@ -0,0 +1,351 @@
+import uuid
+from bisect import bisect_left, bisect_right, insort
+
+from django.core.cache import cache
+
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_TIMEOUT = 86400
+LOCK_TIMEOUT = 2
+STALE_TIMEOUT = 2
+BUILD_TIMEOUT = 60
+
+
+class CachedSortedIndex(object):
+    """
+    A sorted list of (sort_key, id) entries kept in the cache as a header plus
+    fixed-size chunks, so that:
+
+    - pages are served by offset while only fetching the chunks they overlap,
+    - a single entry can be inserted, removed or re-positioned in place
+      instead of invalidating and rebuilding the whole list.
+
+    The header is ``{"chunks": [[chunk_no, size, first_key], ...], "next": n,
+    "total": n}``; each chunk is a sorted list of ``(sort_key, id)`` tuples.
+
+    Mutations take a short cache lock. If the lock cannot be acquired, the
+    index is marked stale instead: it is dropped, and any build that races
+    with the mutation is discarded rather than cached. A mutation while
+    nothing is cached discards the builds in progress, which may have read
+    the database before it. Entries expire after ``timeout`` seconds anyway.
+    """
+
+    def __init__(self, key, chunk_size=DEFAULT_CHUNK_SIZE, timeout=DEFAULT_TIMEOUT):
+        self.key = key
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+
+    @property
+    def header_key(self):
+        return "%s:h" % self.key
+
+    @property
+    def lock_key(self):
+        return "%s:lock" % self.key
+
+    @property
+    def stale_key(self):
+        return "%s:stale" % self.key
+
+    @property
+    def building_key(self):
+        return "%s:building" % self.key
+
+    def chunk_key(self, chunk_no):
+        return "%s:c%d" % (self.key, chunk_no)
+
+    # Building
+
+    def _chunks_for(self, entries):
+        return [
+            entries[i : i + self.chunk_size]
+            for i in range(0, len(entries), self.chunk_size)
+        ]
+
+    def _store(self, entries):
+        chunks = self._chunks_for(entries)
+        header = {
+            "chunks": [
+                [no, len(chunk), chunk[0][0]] for no, chunk in enumerate(chunks)
+            ],
+            "next": len(chunks),
+            "total": len(entries),
+        }
+        data = {self.chunk_key(no): chunk for no, chunk in enumerate(chunks)}
+        data[self.header_key] = header
+        return header, data
+
+    def begin_build(self):
+        """Call before reading the entries; pass the token to ``build``."""
+        token = uuid.uuid4().hex
+        cache.set(self.building_key, token, BUILD_TIMEOUT)
+        return token
+
+    def build(self, entries, token=None):
+        """
+        Cache a freshly computed list of entries. Returns the header and the
+        chunk data so the caller can serve the request without re-reading.
+        """
+        header, data = self._store(sorted(entries))
+        cache.set_many(data, self.timeout)
+        if token is not None and cache.get(self.building_key) != token:
+            cache.delete(self.header_key)
+        self._discard_if_stale()
+        return header, data
+
+    def _build_from(self, build_fn):
+        token = self.begin_build()
+        return self.build(build_fn(), token)
+
+    def _discard_if_stale(self):
+        if cache.get(self.stale_key) is not None:
+            cache.delete(self.header_key)
+
+    def mark_stale(self):
+        cache.set(self.stale_key, 1, STALE_TIMEOUT)
+        cache.delete(self.header_key)
+
+    def invalidate(self):
+        header = cache.get(self.header_key)
+        # Also revoke the token of a build that may predate this change
+        keys = [self.header_key, self.building_key]
+        if header:
+            keys += [self.chunk_key(chunk[0]) for chunk in header["chunks"]]
+        cache.delete_many(keys)
+
+    # Reading
+
+    def _load(self, build_fn, chunk_range=None):
+        """
+        Return (header, {chunk_key: chunk}) for the chunks whose positions fall
+        in chunk_range (all chunks if None), building from build_fn on a miss.
+        """
+        header = cache.get(self.header_key)
+        if header is not None:
+            chunks = header["chunks"]
+            if chunk_range is not None:
+                chunks = chunks[chunk_range[0] : chunk_range[1]]
+            keys = [self.chunk_key(chunk[0]) for chunk in chunks]
+            data = cache.get_many(keys) if keys else {}
+            if len(data) == len(keys):
+                return header, data
+        return self._build_from(build_fn)
+
+    def _locate(self, header, offset, limit):
+        """Return the chunk positions spanning [offset, offset + limit)."""
+        start = end = None
+        position = 0
+        for index, chunk in enumerate(header["chunks"]):
+            chunk_end = position + chunk[1]
+            if start is None and offset < chunk_end:
+                start = index
+            if start is not None:
+                end = index + 1
+                if offset + limit <= chunk_end:
+                    break
+            position = chunk_end
+        return start, end
+
+    def _slice(self, header, data, offset, limit):
+        ids = []
+        position = 0
+        for chunk_no, size, _ in header["chunks"]:
+            chunk_end = position + size
+            if chunk_end > offset and position < offset + limit:
+                chunk = data[self.chunk_key(chunk_no)]
+                lo = max(offset - position, 0)
+                hi = min(offset + limit - position, size)
+                ids.extend(entry[1] for entry in chunk[lo:hi])
+            position = chunk_end
+            if position >= offset + limit:
+                break
+        return ids
+
+    def page(self, offset, limit, build_fn):
+        """Return (ids, total) for a slice of the index."""
+        header = cache.get(self.header_key)
+        if header is None:
+            header, data = self._build_from(build_fn)
+        else:
+            start, end = self._locate(header, offset, limit)
+            if start is None:
+                return [], header["total"]
+            header, data = self._load(build_fn, (start, end))
+        return self._slice(header, data, offset, limit), header["total"]
+
+    def all_ids(self, build_fn):
+        header, data = self._load(build_fn)
+        ids = []
+        for chunk in header["chunks"]:
+            ids.extend(entry[1] for entry in data[self.chunk_key(chunk[0])])
+        return ids
+
+    def is_built(self):
+        return cache.get(self.header_key) is not None
+
+    # Mutation
+
+    def _acquire(self):
+        return cache.add(self.lock_key, 1, LOCK_TIMEOUT)
+
+    def _release(self):
+        cache.delete(self.lock_key)
+
+    def _mutate(self, fn):
+        if cache.get(self.header_key) is None:
+            # Nothing cached: the next read rebuilds from the database, but
+            # a build in progress may have read it before this change.
+            cache.delete(self.building_key)
+            return
+        if not self._acquire():
+            self.mark_stale()
+            return
+        try:
+            header = cache.get(self.header_key)
+            if header is None:
+                self.mark_stale()
+                return
+            header = dict(header, chunks=[list(chunk) for chunk in header["chunks"]])
+            if not fn(header):
+                self.mark_stale()
+                return
+            self._discard_if_stale()
+        finally:
+            self._release()
+
+    def _find_chunk(self, header, sort_key):
+        first_keys = [chunk[2] for chunk in header["chunks"]]
+        return max(bisect_right(first_keys, sort_key) - 1, 0)
+
+    def _write_chunk(self, header, position, chunk, data):
+        chunk_no = header["chunks"][position][0]
+        if not chunk:
+            del header["chunks"][position]
+            return [self.chunk_key(chunk_no)]
+        if len(chunk) > 2 * self.chunk_size:
+            half = len(chunk) // 2
+            new_no = header["next"]
+            header["next"] += 1
+            header["chunks"][position] = [chunk_no, half, chunk[0][0]]
+            header["chunks"].insert(
+                position + 1, [new_no, len(chunk) - half, chunk[half][0]]
+            )
+            data[self.chunk_key(chunk_no)] = chunk[:half]
+            data[self.chunk_key(new_no)] = chunk[half:]
+        else:
+            header["chunks"][position] = [chunk_no, len(chunk), chunk[0][0]]
+            data[self.chunk_key(chunk_no)] = chunk
+        return []
+
+    def _apply(self, header, removals, insertions):
+        """
+        Apply removals then insertions to the cached chunks. Returns False if
+        an entry to remove could not be found, so the caller can give up.
+        """
+        data = {}
+        deleted = []
+        for entry in removals:
+            if not header["chunks"]:
+                return False
+            position = self._find_chunk(header, entry[0])
+            key = self.chunk_key(header["chunks"][position][0])
+            chunk = data.get(key)
+            if chunk is None:
+                chunk = cache.get(key)
+            if chunk is None:
+                return False
+            chunk = list(chunk)
+            index = bisect_left(chunk, entry)
+            if index >= len(chunk) or chunk[index] != entry:
+                return False
+            del chunk[index]
+            data.pop(key, None)
+            deleted += self._write_chunk(header, position, chunk, data)
+            header["total"] -= 1
+
+        for entry in insertions:
+            if not header["chunks"]:
+                no = header["next"]
+                header["next"] += 1
+                header["chunks"].append([no, 0, entry[0]])
+                data[self.chunk_key(no)] = []
+            position = self._find_chunk(header, entry[0])
+            key = self.chunk_key(header["chunks"][position][0])
+            chunk = data.get(key)
+            if chunk is None:
+                chunk = cache.get(key)
+            if chunk is None:
+                return False
+            chunk = list(chunk)
+            index = bisect_left(chunk, entry)
+            if index < len(chunk) and chunk[index] == entry:
+                continue
+            insort(chunk, entry)
+            deleted += self._write_chunk(header, position, chunk, data)
+            header["total"] += 1
+
+        data[self.header_key] = header
+        cache.set_many(data, self.timeout)
+        if deleted:
+            cache.delete_many(deleted)
+        return True
+
+    def insert(self, entry):
+        self._mutate(lambda header: self._apply(header, [], [entry]))
+
+    def remove(self, entry):
+        self._mutate(lambda header: self._apply(header, [entry], []))
+
+    def reposition(self, old_entry, new_entry):
+        if old_entry == new_entry:
+            return
+        self._mutate(lambda header: self._apply(header, [old_entry], [new_entry]))
+
+
+def first_pages(indexes, limit, build_fn):
+    """
+    Return {index.key: (ids, total)} with the first page of every index.
+
+    Headers and chunks are read with one ``get_many`` each. ``build_fn``
+    receives the indexes missing from the cache and returns a list of entry
+    lists, one per index, so that all of them can be built with one query.
+    """
+    headers = cache.get_many([index.header_key for index in indexes])
+    missing = [index for index in indexes if index.header_key not in headers]
+    loaded = {}
+    if missing:
+        tokens = [index.begin_build() for index in missing]
+        for index, token, entries in zip(missing, tokens, build_fn(missing)):
+            loaded[index.key] = index.build(entries, token)
+
+    wanted = {}
+    for index in indexes:
+        header = headers.get(index.header_key)
+        if header is None:
+            continue
+        start, end = index._locate(header, 0, limit)
+        if start is None:
+            loaded[index.key] = header, {}
+            continue
+        wanted[index.key] = [
+            index.chunk_key(chunk[0]) for chunk in header["chunks"][start:end]
+        ]
+    chunks = cache.get_many([key for keys in wanted.values() for key in keys])
+
+    stale = []
+    for index in indexes:
+        if index.key not in wanted:
+            continue
+        if all(key in chunks for key in wanted[index.key]):
+            loaded[index.key] = headers[index.header_key], chunks
+        else:
+            stale.append(index)
+    if stale:
+        tokens = [index.begin_build() for index in stale]
+        for index, token, entries in zip(stale, tokens, build_fn(stale)):
+            loaded[index.key] = index.build(entries, token)
+
+    pages = {}
+    for index in indexes:
+        header, data = loaded[index.key]
+        pages[index.key] = index._slice(header, data, 0, limit), header["total"]
+    return pages
@@ -1,4 +1,5 @@
 import copy
+import gzip
 import hashlib
 import hmac
 import json
@@ -37,8 +38,30 @@ def delete_submission_result(submission_id):
     storage_delete_file(default_storage, submission_result_path(submission_id))
 
 
-def _write_exact(path, content):
+def _compress(content, storage):
+    """
+    Gzip ``content`` if SUBMISSION_RESULT_COMPRESSION is "gzip". Returns the
+    bytes and their Content-Encoding, or None when left uncompressed.
+
+    Only storages that take per-object parameters (S3) can serve the
+    Content-Encoding header browsers need to decode the file, so the others
+    are written uncompressed.
+    """
+    compression = getattr(settings, "SUBMISSION_RESULT_COMPRESSION", None)
+    if compression != "gzip" or not hasattr(storage, "object_parameters"):
+        return content, None
+    return gzip.compress(content, mtime=0), "gzip"
+
+
+def _write_exact(path, content, encoding=None):
     storage = default_storage
+    if encoding is not None:
+        storage = copy.copy(storage)
+        storage.object_parameters = dict(
+            storage.object_parameters,
+            ContentEncoding=encoding,
+            ContentType="application/json",
+        )
     if hasattr(storage, "file_overwrite"):
         write_storage = copy.copy(storage)
         if write_storage is not storage:
@@ -90,8 +113,15 @@ def submission_result_content(cases):
     ).encode("utf-8")
 
 
-def save_submission_result(submission_id, cases):
+def save_submission_result_content(submission_id, content):
+    """Write result JSON made by ``submission_result_content``."""
     path = submission_result_path(submission_id)
-    content = submission_result_content(cases)
-    _write_exact(path, content)
+    content, encoding = _compress(content, default_storage)
+    _write_exact(path, content, encoding)
     return path
+
+
+def save_submission_result(submission_id, cases):
+    return save_submission_result_content(
+        submission_id, submission_result_content(cases)
+    )
@@ -0,0 +1,322 @@
+"""
+Member index and content checks of test data archives.
+
+Listing a zip only needs its tail: the end of central directory record
+locates the central directory, which is read in one piece and parsed here.
+The central directory carries the CRC and size of every member, so its
+digest identifies the archive without hashing a multi-GB file, and keys the
+cached index and the cached report of ``check_archive``.
+"""
+
+import codecs
+import os
+import struct
+from collections import namedtuple
+from itertools import groupby
+from zipfile import BadZipFile, ZipFile
+
+import xxhash
+from django.conf import settings
+from django.core.cache import cache
+
+__all__ = [
+    "ZipMember",
+    "archive_report",
+    "cached_report",
+    "check_archive",
+    "check_files",
+    "pair_test_files",
+    "zip_index",
+    "zip_index_key",
+    "zip_names",
+]
+
+INDEX_TIMEOUT = 86400
+REPORT_TIMEOUT = 7 * 86400
+CHUNK_SIZE = 1 << 20
+
+# Extensions we recognize when pairing test files by stem.
+INPUT_EXTS = (".in", ".inp", ".txt")
+OUTPUT_EXTS = (".out", ".ans", ".a", ".sol", ".exp")
+
+ISSUE_EMPTY = "empty"
+ISSUE_TOO_LARGE = "too_large"
+ISSUE_NOT_UTF8 = "not_utf8"
+ISSUE_BOM = "bom"
+ISSUE_CR = "cr"
+
+_EOCD = struct.Struct("<4s4H2LH")
+_EOCD_SIGNATURE = b"PK\x05\x06"
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+_ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+_ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+_ZIP64_EOCD_SIGNATURE = b"PK\x06\x06"
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_CENTRAL_HEADER_SIGNATURE = b"PK\x01\x02"
+_ZIP64_EXTRA = 0x0001
+_MAX_COMMENT = 0xFFFF
+_UTF8_FLAG = 0x800
+
+ZipMember = namedtuple("ZipMember", "name size compressed_size crc")
+
+
+def _read_central_directory(f):
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    tail_size = min(end, _EOCD.size + _MAX_COMMENT)
+    f.seek(end - tail_size)
+    tail = f.read(tail_size)
+    position = tail.rfind(_EOCD_SIGNATURE)
+    if position < 0 or tail_size - position < _EOCD.size:
+        raise BadZipFile("File is not a zip file")
+    cd_size = _EOCD.unpack_from(tail, position)[5]
+    cd_end = end - tail_size + position
+
+    if cd_end >= _ZIP64_LOCATOR.size + _ZIP64_EOCD.size:
+        f.seek(cd_end - _ZIP64_LOCATOR.size)
+        if f.read(4) == _ZIP64_LOCATOR_SIGNATURE:
+            cd_end -= _ZIP64_LOCATOR.size + _ZIP64_EOCD.size
+            f.seek(cd_end)
+            record = f.read(_ZIP64_EOCD.size)
+            if record[:4] != _ZIP64_EOCD_SIGNATURE:
+                raise BadZipFile("Corrupt zip64 end of central directory")
+            cd_size = _ZIP64_EOCD.unpack(record)[8]
+
+    # Measured back from the end record, so data prepended to the archive
+    # does not matter
+    if cd_size > cd_end:
+        raise BadZipFile("Corrupt central directory")
+    f.seek(cd_end - cd_size)
+    directory = f.read(cd_size)
+    if len(directory) != cd_size or (
+        directory and directory[:4] != _CENTRAL_HEADER_SIGNATURE
+    ):
+        raise BadZipFile("Corrupt central directory")
+    return directory
+
+
+def _zip64_sizes(extra, size, compressed_size):
+    position = 0
+    while position + 4 <= len(extra):
+        kind, length = struct.unpack_from("<2H", extra, position)
+        position += 4
+        if kind == _ZIP64_EXTRA:
+            values = extra[position : position + length]
+            offset = 0
+            if size == 0xFFFFFFFF:
+                (size,) = struct.unpack_from("<Q", values, offset)
+                offset += 8
+            if compressed_size == 0xFFFFFFFF:
+                (compressed_size,) = struct.unpack_from("<Q", values, offset)
+            break
+        position += length
+    return size, compressed_size
+
+
+def _parse_central_directory(directory):
+    members = []
+    position = 0
+    while position < len(directory):
+        header = _CENTRAL_HEADER.unpack_from(directory, position)
+        if header[0] != _CENTRAL_HEADER_SIGNATURE:
+            raise BadZipFile("Bad magic number for central directory")
+        flags, crc, compressed_size, size = header[5], header[9], header[10], header[11]
+        name_length, extra_length, comment_length = header[12:15]
+        position += _CENTRAL_HEADER.size
+        raw_name = directory[position : position + name_length]
+        position += name_length
+        extra = directory[position : position + extra_length]
+        position += extra_length + comment_length
+
+        name = raw_name.decode("utf-8" if flags & _UTF8_FLAG else "cp437")
+        if not name or name.endswith("/"):
+            continue
+        if 0xFFFFFFFF in (size, compressed_size):
+            size, compressed_size = _zip64_sizes(extra, size, compressed_size)
+        members.append(ZipMember(name, size, compressed_size, crc))
+    members.sort()
+    return members
+
+
+def _open(archive):
+    if isinstance(archive, (str, os.PathLike)):
+        return open(archive, "rb")
+    archive.seek(0)
+    return archive
+
+
+def _index_cache_key(key):
+    return "zip_index:%s" % key
+
+
+def _report_cache_key(key):
+    return "zip_report:%s" % key
+
+
+def _read_index(archive):
+    f = _open(archive)
+    try:
+        directory = _read_central_directory(f)
+    finally:
+        if f is not archive:
+            f.close()
+        else:
+            f.seek(0)
+
+    key = xxhash.xxh64(directory).hexdigest()
+    members = cache.get(_index_cache_key(key))
+    if members is None:
+        try:
+            members = _parse_central_directory(directory)
+        except (struct.error, UnicodeDecodeError):
+            raise BadZipFile("Corrupt central directory")
+        cache.set(_index_cache_key(key), members, INDEX_TIMEOUT)
+    return key, members
+
+
+def zip_index_key(archive):
+    """Digest of the central directory of ``archive``."""
+    return _read_index(archive)[0]
+
+
+def zip_index(archive):
+    """
+    Return the file members of ``archive`` (a path or a seekable file) as
+    ``ZipMember`` tuples sorted by name. Raises ``BadZipFile``.
+    """
+    return _read_index(archive)[1]
+
+
+def zip_names(archive):
+    return [member.name for member in zip_index(archive)]
+
+
+def _pairing_records(names):
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        yield stem, ext, name
+        # Polygon-style inputs have no extension: `01` goes with `01.a`, and
+        # the whole name is the stem of its answer
+        if ext:
+            yield name, "", name
+
+
+def pair_test_files(names):
+    """
+    Pair input/output files by shared stem (full path minus extension).
+
+    Handles the common conventions:
+      - `01.in` / `01.out`, `01.inp` / `01.ans`, `Data/01.inp` / `Data/01.out`
+      - Polygon-style extensionless input `01` with answer `01.a`
+    Files sharing a stem are adjacent once sorted, so every stem is settled
+    in a single pass. Returns a list of (input, output) tuples sorted by input.
+    """
+    input_rank = {ext: rank for rank, ext in enumerate(INPUT_EXTS + ("",))}
+    output_rank = {ext: rank for rank, ext in enumerate(OUTPUT_EXTS)}
+
+    pairs = []
+    for _stem, records in groupby(
+        sorted(_pairing_records(names)), key=lambda record: record[0]
+    ):
+        inputs, outputs = [], []
+        for _stem, ext, name in records:
+            if ext.lower() in output_rank:
+                outputs.append((output_rank[ext.lower()], name))
+            if ext in input_rank:
+                inputs.append((input_rank[ext], name))
+        if not outputs:
+            continue
+        output = min(outputs)[1]
+        candidates = [item for item in inputs if item[1] != output]
+        if candidates:
+            pairs.append((min(candidates)[1], output))
+    pairs.sort()
+    return pairs
+
+
+def _check_content(stream):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    issues = set()
+    first = True
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+        if b"\0" in chunk:
+            # Binary files (checkers, images) are not judged as text
+            return set()
+        if first and chunk.startswith(codecs.BOM_UTF8):
+            issues.add(ISSUE_BOM)
+        first = False
+        if b"\r" in chunk:
+            issues.add(ISSUE_CR)
+        if decoder is not None:
+            try:
+                decoder.decode(chunk)
+            except UnicodeDecodeError:
+                issues.add(ISSUE_NOT_UTF8)
+                decoder = None
+    if decoder is not None:
+        try:
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            issues.add(ISSUE_NOT_UTF8)
+    return issues
+
+
+def check_files(key, files, open_file, progress=None):
+    """
+    Check the ``(name, size)`` pairs of ``files`` for sizes, encoding and line
+    endings, reading each through ``open_file(name)``.
+
+    Returns ``{"files": count, "issues": {name: [issue, ...]}}`` and caches it
+    under ``key`` for ``cached_report``. ``progress`` is advanced by each
+    file's size.
+    """
+    max_size = getattr(settings, "DMOJ_PROBLEM_DATA_MAX_FILE_SIZE", 1 << 30)
+    issues = {}
+    count = 0
+    for name, size in files:
+        count += 1
+        found = set()
+        if size == 0:
+            found.add(ISSUE_EMPTY)
+        elif size > max_size:
+            found.add(ISSUE_TOO_LARGE)
+        else:
+            with open_file(name) as stream:
+                found = _check_content(stream)
+        if found:
+            issues[name] = sorted(found)
+        if progress is not None:
+            progress.did(size)
+
+    report = {"files": count, "issues": issues}
+    cache.set(_report_cache_key(key), report, REPORT_TIMEOUT)
+    return report
+
+
+def cached_report(key):
+    """The report of the last ``check_files`` under ``key``, if any."""
+    return cache.get(_report_cache_key(key))
+
+
+def check_archive(archive, progress=None):
+    """
+    Check every member of ``archive`` with ``check_files``, caching the
+    report for ``archive_report``.
+    """
+    key, members = _read_index(archive)
+    with ZipFile(archive) as zf:
+        return check_files(
+            key,
+            [(member.name, member.size) for member in members],
+            zf.open,
+            progress,
+        )
+
+
+def archive_report(archive):
+    """The report of the last ``check_archive`` of this archive, if any."""
+    try:
+        key = zip_index_key(archive)
+    except (BadZipFile, OSError):
+        return None
+    return cached_report(key)
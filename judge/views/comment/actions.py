@@ -114,18 +114,18 @@ def vote_comment(request, delta):
                 _("You already voted."), content_type="text/plain"
             )
         vote.delete()
-        Comment.objects.filter(id=comment_id).update(score=F("score") - vote.score)
-        _update_contribution_for_comment_vote(comment_id, -vote.score)
+        score_change = -vote.score
     else:
-        Comment.objects.filter(id=comment_id).update(score=F("score") + delta)
-        _update_contribution_for_comment_vote(comment_id, delta)
+        score_change = delta
+    Comment.objects.filter(id=comment_id).update(score=F("score") + score_change)
+    _update_contribution_for_comment_vote(comment_id, score_change)
 
     # Dirty comment cache since we updated score via QuerySet.update()
     Comment.dirty_cache(comment_id)
     get_user_vote_on_comment.dirty(request.profile.id, comment_id)
-    Comment.dirty_list_cache(
-        comment.content_type_id, comment.object_id, comment.parent_id
-    )
+    # Only the score-sorted lists change; move the comment instead of
+    # rebuilding them.
+    comment.move_in_list_cache(comment.score, comment.score + score_change)
     return HttpResponse("success", content_type="text/plain")
 
 
@@ -5,9 +5,10 @@ from django.views.generic import ListView
 
 from judge.models import Comment
 from judge.models.comment import (
-    get_top_level_comment_ids,
-    get_reply_ids,
+    get_top_level_comment_page,
+    get_reply_page,
     get_content_author_ids,
+    prefetch_reply_pages,
 )
 from judge.views.comment.mixins import is_comment_locked
 from judge.views.comment.utils import (
@@ -146,14 +147,15 @@ class TopLevelCommentsView(CommentListView):
 
         self.comment_root_id = 0
 
-        # Get cached comment IDs (already sorted)
-        cached_ids = get_top_level_comment_ids(
-            params.content_type_id, params.object_id, self.sort_by, self.sort_order
+        # Get the cached page of comment IDs (already sorted)
+        page_ids, self.total_comments = get_top_level_comment_page(
+            params.content_type_id,
+            params.object_id,
+            self.sort_by,
+            self.sort_order,
+            self.offset,
+            self.limit,
         )
-        self.total_comments = len(cached_ids)
-
-        # Slice IDs for current page
-        page_ids = cached_ids[self.offset : self.offset + self.limit]
 
         if not page_ids:
             return []
@@ -175,6 +177,15 @@ class TopLevelCommentsView(CommentListView):
         id_to_order = {cid: i for i, cid in enumerate(page_ids)}
         comments_list = sorted(comments_list, key=lambda c: id_to_order.get(c.id, 0))
 
+        # Warm the first page of replies of every thread on this page, so
+        # expanding one is served from the cache. RepliesView serves them in
+        # the order the page asks for; inline comments only send the id.
+        prefetch_reply_pages(
+            [c.id for c in comments_list if c.count_replies],
+            "asc" if self.compact else self.sort_order,
+            DEFAULT_COMMENT_LIMIT,
+        )
+
         return comments_list
 
     def get_comment_root_id(self):
@@ -296,12 +307,10 @@ class RepliesView(CommentListView):
 
         self.parent_comment = parent_instances[0]
 
-        # Get cached reply IDs
-        cached_ids = get_reply_ids(self.comment_id, self.sort_order)
-        self.total_comments = len(cached_ids)
-
-        # Slice IDs for current page
-        page_ids = cached_ids[self.offset : self.offset + self.limit]
+        # Get the cached page of reply IDs
+        page_ids, self.total_comments = get_reply_page(
+            self.comment_id, self.sort_order, self.offset, self.limit
+        )
 
         if not page_ids:
             return []
@@ -48,7 +48,7 @@ from django.utils.functional import cached_property
 from django.utils.html import format_html, escape, json_script
 from django.utils.safestring import mark_safe
 from django.utils.timezone import make_aware
-from django.utils.translation import gettext as _, gettext_lazy, ngettext
+from django.utils.translation import gettext as _, gettext_lazy, get_language, ngettext
 from django.views.generic import ListView, TemplateView
 from django.views.generic.detail import (
     BaseDetailView,
@@ -59,6 +59,7 @@ from django.views.generic.detail import (
 
 from reversion import revisions
 from reversion.models import Version
+import xxhash
 
 from judge import event_poster as event
 from judge.views.comment import CommentableMixin
@@ -72,6 +73,7 @@ from judge.utils.contest import maybe_trigger_contest_rescore
 from judge.models import (
     Contest,
     ContestMoss,
+    ContestSimilarity,
     ContestParticipation,
     ContestProblem,
     ContestTag,
@@ -95,7 +97,7 @@ from judge.models.contest import (
     get_recent_contest_clarification_data,
 )
 from judge.models.contest_review import ContestPublicRequest
-from judge.tasks import run_moss
+from judge.tasks import run_moss, run_similarity
 from judge.utils.identity import build_semantic_formset_plan
 from judge.utils.celery import redirect_to_task_status
 from judge.utils.hidden_results import (
@@ -1443,8 +1445,87 @@ def get_contest_problems(contest):
     return problems
 
 
-def build_ranking_profiles(contest, problems, participations, show_final=False):
-    """Convert participations into ContestRankingProfile list with rendered cells."""
+RANKING_ROW_CACHE_TIMEOUT = 3600
+
+
+def _ranking_row_signature(contest, problems, result_hidden_ids, show_final):
+    """Hash of everything outside the participation that a rendered row uses."""
+    return xxhash.xxh64_hexdigest(
+        repr(
+            (
+                contest.id,
+                contest.key,
+                contest.format_name,
+                contest.format_config,
+                contest.points_precision,
+                contest.run_pretests_only,
+                show_final,
+                get_language(),
+                sorted(result_hidden_ids),
+                [
+                    (
+                        cp.id,
+                        cp.problem.code if cp.problem_id else None,
+                        cp.quiz_id,
+                        cp.points,
+                        cp.order,
+                        cp.is_pretested,
+                    )
+                    for cp in problems
+                ],
+            )
+        ).encode()
+    )
+
+
+def _ranking_row_key(participation, signature):
+    # The start time tells apart participations that reuse a deleted id.
+    return "rkrow:%d:%d:%d:%s" % (
+        participation.id,
+        participation.real_start.timestamp() * 1000000,
+        participation.result_version,
+        signature,
+    )
+
+
+def _render_ranking_row(
+    contest, problems, participation, result_hidden_ids, show_final
+):
+    """Render the problem cells and result cell of one ranking row."""
+    format_data = participation.format_data or {}
+    problem_cells = []
+    for cp in problems:
+        if result_hidden_ids and cp.id in result_hidden_ids:
+            key = format_data_key(cp)
+            if key in format_data:
+                # Masked cell: show "?" (no score/state/time leak) but keep the
+                # popup link so it stays clickable like a normal cell. The popup
+                # itself masks the score/verdict for non-editors.
+                cell = format_html(
+                    '<td class="problem-score-col" title="{tooltip}">'
+                    '<a data-featherlight="{url}" '
+                    'data-featherlight-variant="contest-tag-lightbox" href="#">'
+                    "<span>?</span></a></td>",
+                    tooltip=contest.format.get_problem_tooltip(cp),
+                    url=contest.format.get_submission_url(participation, cp),
+                )
+            else:
+                cell = contest.format.display_empty_cell(cp)
+        else:
+            cell = contest.format.display_user_problem(participation, cp, show_final)
+        problem_cells.append(cell)
+    result_cell = contest.format.display_participation_result(participation, show_final)
+    return problem_cells, result_cell
+
+
+def build_ranking_profiles(
+    contest, problems, participations, show_final=False, use_cache=True
+):
+    """Convert participations into ContestRankingProfile list with rendered cells.
+
+    Rendered rows are cached by participation result version, so a page only
+    renders the rows whose results changed since they were last shown.
+    """
     if not hasattr(contest, "_result_hidden_ids"):
         contest._result_hidden_ids = set(
             contest.contest_problems.filter(is_result_hidden=True).values_list(
@@ -1456,36 +1537,33 @@ def build_ranking_profiles(contest, problems, participations, show_final=False):
     # Ensure full objects are loaded with relations
     if hasattr(participations, "select_related"):
         participations = participations.select_related("user", "rating")
+    participations = list(participations)
+
+    cached_rows = {}
+    if use_cache and participations:
+        signature = _ranking_row_signature(
+            contest, problems, result_hidden_ids, show_final
+        )
+        row_keys = {p.id: _ranking_row_key(p, signature) for p in participations}
+        cached_rows = cache.get_many(list(row_keys.values()))
 
     res = []
+    rendered_rows = {}
     for participation in participations:
         points = participation.score_final if show_final else participation.score
         cumtime = participation.cumtime_final if show_final else participation.cumtime
 
-        format_data = participation.format_data or {}
-        problem_cells = []
-        for cp in problems:
-            if result_hidden_ids and cp.id in result_hidden_ids:
-                key = format_data_key(cp)
-                if key in format_data:
-                    # Masked cell: show "?" (no score/state/time leak) but keep the
-                    # popup link so it stays clickable like a normal cell. The popup
-                    # itself masks the score/verdict for non-editors.
-                    cell = format_html(
-                        '<td class="problem-score-col" title="{tooltip}">'
-                        '<a data-featherlight="{url}" '
-                        'data-featherlight-variant="contest-tag-lightbox" href="#">'
-                        "<span>?</span></a></td>",
-                        tooltip=contest.format.get_problem_tooltip(cp),
-                        url=contest.format.get_submission_url(participation, cp),
-                    )
-                else:
-                    cell = contest.format.display_empty_cell(cp)
-            else:
-                cell = contest.format.display_user_problem(
-                    participation, cp, show_final
-                )
-            problem_cells.append(cell)
+        row = None
+        if use_cache:
+            row_key = row_keys[participation.id]
+            row = cached_rows.get(row_key)
+        if row is None:
+            row = _render_ranking_row(
+                contest, problems, participation, result_hidden_ids, show_final
+            )
+            if use_cache:
+                rendered_rows[row_key] = row
+        problem_cells, result_cell = row
 
         res.append(
             ContestRankingProfile(
@@ -1500,13 +1578,13 @@ def build_ranking_profiles(contest, problems, participations, show_final=False):
                     else None
                 ),
                 problem_cells=problem_cells,
-                result_cell=contest.format.display_participation_result(
-                    participation, show_final
-                ),
+                result_cell=result_cell,
                 participation=participation,
             )
         )
 
+    if rendered_rows:
+        cache.set_many(rendered_rows, RANKING_ROW_CACHE_TIMEOUT)
     Profile.get_cached_instances(*[p.id for p in res])
     return res
 
@@ -2000,10 +2078,6 @@ class ContestMossMixin(ContestMixin, PermissionRequiredMixin):
 
     def get_object(self, queryset=None):
         contest = super().get_object(queryset)
-        if settings.MOSS_API_KEY is None or not contest.is_editable_by(
-            self.request.user
-        ):
-            raise Http404()
         if not contest.is_editable_by(self.request.user):
             raise Http404()
         return contest
@@ -2041,11 +2115,25 @@ class ContestMossView(ContestMossMixin, TitleMixin, DetailView):
         context["moss_results"] = [
             (problem, moss_results[problem]) for problem in problems
         ]
+        context["similarity_results"] = (
+            ContestSimilarity.objects.filter(contest=self.object)
+            .select_related("problem", "first__user__user", "second__user__user")
+            .order_by("problem__code", "-first_percentage", "-second_percentage")
+        )
 
         return context
 
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
+        if request.POST.get("engine") == "local":
+            status = run_similarity.delay(self.object.key)
+            return redirect_to_task_status(
+                status,
+                message=_("Comparing submissions for %s...") % (self.object.name,),
+                redirect=reverse("contest_moss", args=(self.object.key,)),
+            )
+        if settings.MOSS_API_KEY is None:
+            raise Http404()
         status = run_moss.delay(self.object.key)
         return redirect_to_task_status(
             status,
@@ -2057,7 +2145,10 @@ class ContestMossView(ContestMossMixin, TitleMixin, DetailView):
 class ContestMossDelete(ContestMossMixin, SingleObjectMixin, View):
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
-        ContestMoss.objects.filter(contest=self.object).delete()
+        if request.POST.get("engine") == "local":
+            ContestSimilarity.objects.filter(contest=self.object).delete()
+        else:
+            ContestMoss.objects.filter(contest=self.object).delete()
         return HttpResponseRedirect(reverse("contest_moss", args=(self.object.key,)))
 
 
@@ -503,6 +503,9 @@ class InternalBridgeStatus(InternalView, TemplateView):
             judge.pop("problems", None)
             judge["load-display"] = self._format_number(judge.get("load"))
             judge["latency-display"] = self._format_number(judge.get("latency"))
+            judge["affinity-hit-rate-display"] = self._format_rate(
+                judge.get("affinity-hit-rate")
+            )
             judge["address-display"] = self._format_address(judge.get("address"))
             judge["client-address-display"] = self._format_address(
                 judge.get("client-address")
@@ -536,6 +539,8 @@ class InternalBridgeStatus(InternalView, TemplateView):
             judge["current-submission-user-username"] = submission_user_display.get(
                 judge.get("current-submission")
             )
+        affinity = status.get("affinity", {})
+        context["affinity_hit_rate"] = self._format_rate(affinity.get("hit-rate"))
         context["judges"] = judges
         context["active_submissions"] = active_submissions
         context["active_validations"] = status.get("active-validations-detail", [])
@@ -581,6 +586,11 @@ class InternalBridgeStatus(InternalView, TemplateView):
         except (TypeError, ValueError):
             return value
 
+    def _format_rate(self, value):
+        if value is None:
+            return None
+        return "%.1f%%" % (value * 100)
+
     def _format_address(self, value):
         if value is None:
             return None
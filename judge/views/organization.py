@@ -1316,6 +1316,7 @@ class AddOrganizationMember(
             category=NotificationCategory.ORGANIZATION,
             html_link=html,
             author=self.request.profile,
+            background=True,
         )
         with revisions.create_revision():
             usernames = ", ".join([u.username for u in new_users])
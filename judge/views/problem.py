@@ -1,5 +1,4 @@
 import logging
-import os
 from collections import defaultdict
 from copy import deepcopy
 from operator import itemgetter
@@ -11,7 +10,6 @@ from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMix
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
-from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.db import transaction
 from django.db.models import Prefetch, Q
@@ -24,7 +22,6 @@ from django.http import (
     JsonResponse,
 )
 from django.shortcuts import get_object_or_404, render
-from django.template.loader import get_template
 from django.urls import reverse
 from django.utils import timezone, translation
 from django.utils.functional import cached_property
@@ -71,7 +68,7 @@ from judge.models.problem_review import (
     ProblemReviewRun,
 )
 from judge.models.public_request import PublicRequest
-from judge.pdf_problems import DefaultPdfMaker, HAS_PDF
+from judge.pdf_problems import HAS_PDF, problem_pdf_cache_path
 from judge.utils.diggpaginator import DiggPaginator
 from judge.utils.hidden_results import (
     hidden_result_best_submission_problem_ids,
@@ -79,6 +76,7 @@ from judge.utils.hidden_results import (
     mark_hidden_result_submissions,
 )
 from judge.utils.opengraph import generate_opengraph
+from judge.utils.problem_visibility import visible_problem_queryset
 from judge.utils.problems import (
     contest_attempted_ids,
     contest_completed_ids,
@@ -113,6 +111,7 @@ import reversion
 from reversion.models import Version
 
 from judge.tasks import rescore_problem
+from judge.tasks.pdf import problem_pdf_render_error, request_problem_pdf
 from judge.tasks.llm import (
     generate_solution_task,
     improve_markdown_task,
@@ -486,6 +485,7 @@ class LatexError(Exception):
 class ProblemPdfView(ProblemMixin, SingleObjectMixin, View):
     logger = logging.getLogger("judge.problem.pdf")
     languages = set(map(itemgetter(0), settings.LANGUAGES))
+    retry_after = 5
 
     def get(self, request, *args, **kwargs):
         if not HAS_PDF:
@@ -496,48 +496,28 @@ class ProblemPdfView(ProblemMixin, SingleObjectMixin, View):
             raise Http404()
 
         problem = self.get_object()
-        try:
-            trans = problem.translations.get(language=language)
-        except ProblemTranslation.DoesNotExist:
-            trans = None
+        cache_path = problem_pdf_cache_path(problem.code, language)
 
         # Use default_storage for PDF cache (works with S3 and local)
-        cache_path = "pdf_cache/%s.%s.pdf" % (problem.code, language)
-
         if not default_storage.exists(cache_path):
-            self.logger.info("Rendering: %s.%s.pdf", problem.code, language)
-            with DefaultPdfMaker() as maker, translation.override(language):
-                problem_name = problem.name if trans is None else trans.name
-                maker.html = (
-                    get_template("problem/raw.html")
-                    .render(
-                        {
-                            "problem": problem,
-                            "problem_name": problem_name,
-                            "description": (
-                                problem.description
-                                if trans is None
-                                else trans.description
-                            ),
-                            "url": request.build_absolute_uri(),
-                        }
-                    )
-                    .replace('"//', '"https://')
-                    .replace("'//", "'https://")
-                )
-                maker.title = problem_name
-                assets = ["style.css"]
-                for file in assets:
-                    maker.load(file, os.path.join(settings.DMOJ_RESOURCES, file))
-                maker.make()
-                if not maker.success:
-                    self.logger.error("Failed to render PDF for %s", problem.code)
-                    return HttpResponse(
-                        maker.log, status=500, content_type="text/plain"
-                    )
-                # Save rendered PDF to storage
-                with open(maker.pdffile, "rb") as f:
-                    default_storage.save(cache_path, ContentFile(f.read()))
+            error = problem_pdf_render_error(problem.code, language)
+            if error is not None:
+                return HttpResponse(error, status=500, content_type="text/plain")
+
+            # Rendering spawns a headless browser, so it happens once in a
+            # worker; everyone asking meanwhile is told to retry.
+            if request_problem_pdf(
+                problem.code, language, request.build_absolute_uri()
+            ):
+                self.logger.info("Queued render: %s.%s.pdf", problem.code, language)
+            response = HttpResponse(
+                _("The PDF is being rendered, please retry shortly."),
+                status=202,
+                content_type="text/plain",
+            )
+            response["Retry-After"] = self.retry_after
+            response["Refresh"] = self.retry_after
+            return response
 
         return serve_file_inline(
             request,
@@ -650,7 +630,7 @@ class ProblemList(QueryStringSortMixin, TitleMixin, SolvedProblemMixin, ListView
         ][:3]
 
     def get_normal_queryset(self):
-        queryset = Problem.get_visible_problems(self.request.user)
+        queryset = visible_problem_queryset(self.request.user)
         if self.profile is not None and self.hide_solved:
             solved_problems = self.get_completed_problems()
             queryset = queryset.exclude(id__in=solved_problems)
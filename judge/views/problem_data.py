@@ -5,7 +5,7 @@ import uuid
 from itertools import chain
 import shutil
 from tempfile import gettempdir
-from zipfile import BadZipfile, ZipFile
+from zipfile import BadZipfile
 
 import reversion
 from celery.result import AsyncResult
@@ -15,6 +15,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.files import File
 from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import UploadedFile
 from django.core.exceptions import ValidationError
 from django.forms import (
     BaseModelFormSet,
@@ -27,7 +28,13 @@ from django.forms import (
     CheckboxInput,
     modelformset_factory,
 )
-from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from django.utils.html import escape, format_html, json_script
@@ -52,9 +59,19 @@ from judge.models import (
 )
 from judge.utils.generator_static_package import build_generator_static_package
 from judge.utils.permissions import can_use_ai_features
-from judge.utils.problem_data import ProblemDataCompiler
+from judge.utils.problem_data import ProblemDataCompiler, ProblemDataError
+from judge.utils.problem_data_blobs import (
+    commit_manifest,
+    get_manifest,
+    iter_archive,
+    manifest_report,
+    missing_blobs,
+    store_blob,
+)
+from judge.utils.celery import redirect_to_task_status
 from judge.utils.unicode import utf8text
 from judge.utils.views import TitleMixin
+from judge.utils.zip_index import archive_report, zip_index, zip_names
 from judge.widgets.fine_uploader import (
     handle_upload,
     FineUploadFileInput,
@@ -62,8 +79,9 @@ from judge.widgets.fine_uploader import (
 )
 from judge.widgets.file_edit import FileEditWidget
 from judge.views.problem import ProblemMixin
-from judge.judgeapi import validate_testcases
+from judge.judgeapi import judge_submissions, validate_testcases
 from judge.tasks.llm import generate_solution_codes_task
+from judge.tasks.problem_data import check_problem_archive
 from llm_service.config import CHATBOT_SUPPORTED_MODELS
 
 mimetypes.init()
@@ -105,7 +123,13 @@ class ProblemDataForm(ModelForm):
     def clean_zipfile(self):
         if hasattr(self, "zip_valid") and not self.zip_valid:
             raise ValidationError(_("Your zip file is invalid!"))
-        return self.cleaned_data["zipfile"]
+        zipfile = self.cleaned_data["zipfile"]
+        if isinstance(zipfile, UploadedFile):
+            try:
+                zip_index(zipfile)
+            except BadZipfile:
+                raise ValidationError(_("Your zip file is invalid!"))
+        return zipfile
 
     def clean_generator(self):
         generator = self.cleaned_data.get("generator")
@@ -385,7 +409,9 @@ class ProblemSubmissionDiff(TitleMixin, ProblemMixin, DetailView):
         context = super(ProblemSubmissionDiff, self).get_context_data(**kwargs)
         try:
             ids = self.request.GET.getlist("id")
-            subs = Submission.objects.filter(id__in=ids)
+            subs = Submission.objects.filter(id__in=ids).select_related(
+                "test_case_pack"
+            )
         except ValueError:
             raise Http404
         if not subs:
@@ -398,7 +424,7 @@ class ProblemSubmissionDiff(TitleMixin, ProblemMixin, DetailView):
         if data:
             num_cases = data.count()
         else:
-            num_cases = subs.first().test_cases.count()
+            num_cases = len(subs.first().test_case_results)
         context["num_cases"] = num_cases
         return context
 
@@ -477,14 +503,16 @@ class ProblemDataView(TitleMixin, ProblemManagerMixin):
             if post and "problem-data-zipfile-clear" in self.request.POST:
                 return []
             elif post and "problem-data-zipfile" in self.request.FILES:
-                return ZipFile(self.request.FILES["problem-data-zipfile"]).namelist()
+                return zip_names(self.request.FILES["problem-data-zipfile"])
             elif data.zipfile:
-                return ZipFile(data.zipfile.path).namelist()
+                return zip_names(data.zipfile.path)
         except BadZipfile:
             return []
         except FileNotFoundError:
             return []
-        return []
+        # Test data committed through delta uploads lives in the problem
+        # directory itself
+        return list(get_manifest(self.object))
 
     def get_context_data(self, **kwargs):
         context = super(ProblemDataView, self).get_context_data(**kwargs)
@@ -507,6 +535,11 @@ class ProblemDataView(TitleMixin, ProblemManagerMixin):
             if data.generator
             else 0
         )
+        context["archive_report"] = (
+            archive_report(data.zipfile.path)
+            if data.zipfile
+            else manifest_report(self.object)
+        )
         context["valid_files_script"] = json_script(
             context["valid_files"], "problem-valid-files-data"
         )
@@ -703,7 +736,7 @@ class ProblemZipUploadView(ProblemManagerMixin, View):
                             )
                         )
 
-                    ZipFile(zip_dest).namelist()  # check if this file is valid
+                    zip_index(zip_dest)  # check if this file is valid
                     with open(zip_dest, "rb") as f:
                         problem_data.zipfile.delete()
                         problem_data.zipfile.save(filename, File(f))
@@ -727,6 +760,92 @@ class ProblemZipUploadView(ProblemManagerMixin, View):
             return HttpResponse(status_code=400)
 
 
+class ProblemDataBlobView(ProblemManagerMixin, View):
+    """
+    First half of a delta upload: POST a JSON ``{"digests": [...]}`` to learn
+    which files the store is missing, then POST those as multipart files
+    named by their SHA-256.
+    """
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        if request.FILES:
+            try:
+                for digest, upload in request.FILES.items():
+                    store_blob(upload, expected_digest=digest)
+            except ProblemDataError as e:
+                return JsonResponse({"success": False, "error": e.message}, status=400)
+            return JsonResponse({"success": True, "stored": sorted(request.FILES)})
+
+        try:
+            digests = json.loads(request.body)["digests"]
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse(
+                {"success": False, "error": _("Invalid JSON.")}, status=400
+            )
+        return JsonResponse({"success": True, "missing": missing_blobs(digests)})
+
+
+class ProblemDataManifestView(ProblemManagerMixin, View):
+    """
+    Second half of a delta upload: GET returns the current ``{name: digest}``
+    manifest, POST a JSON ``{"files": {name: digest}}`` commits a new one. The
+    committed files replace the test data zip and init.yml is regenerated.
+    """
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return JsonResponse({"files": get_manifest(self.object)})
+
+    def post(self, request, *args, **kwargs):
+        self.object = problem = self.get_object()
+        try:
+            files = json.loads(request.body)["files"]
+            if not isinstance(files, dict):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse(
+                {"success": False, "error": _("Invalid JSON.")}, status=400
+            )
+
+        data, _created = ProblemData.objects.get_or_create(problem=problem)
+        try:
+            changed = commit_manifest(data, files)
+        except ProblemDataError as e:
+            return JsonResponse({"success": False, "error": e.message}, status=400)
+        return JsonResponse({"success": True, "changed": changed})
+
+
+class ProblemDataArchiveView(ProblemManagerMixin, View):
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        if not self.object.test_data_files.exists():
+            raise Http404()
+        response = StreamingHttpResponse(
+            iter_archive(self.object), content_type="application/zip"
+        )
+        response["Content-Disposition"] = (
+            'attachment; filename="%s-test-data.zip"' % self.object.code
+        )
+        return response
+
+
+class ProblemDataCheckView(ProblemManagerMixin, View):
+    """Check the sizes, encodings and line endings of the test data."""
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        data = get_object_or_404(ProblemData, problem=self.object)
+        if not data.zipfile and not self.object.test_data_files.exists():
+            raise Http404()
+        status = check_problem_archive.delay(self.object.id)
+        return redirect_to_task_status(
+            status,
+            message=_("Checking test data for %s...") % (self.object.name,),
+            redirect=reverse("problem_data", args=[self.object.code]),
+        )
+
+
 class ProblemValidatorView(TitleMixin, ProblemManagerMixin):
     template_name = "problem/validator.html"
 
@@ -816,7 +935,9 @@ class ProblemValidatorSaveView(ProblemManagerMixin, View):
         valid_files = []
         try:
             if data.zipfile:
-                valid_files = ZipFile(data.zipfile.path).namelist()
+                valid_files = zip_names(data.zipfile.path)
+            else:
+                valid_files = list(get_manifest(problem))
         except (BadZipfile, FileNotFoundError):
             pass
         ProblemDataCompiler.generate(
@@ -1118,7 +1239,7 @@ class ProblemSolutionCodesRunView(ProblemManagerMixin, View):
                 status=429,
             )
 
-        submission_ids = []
+        submissions = []
         for sc in codes_to_run:
             sub = Submission.objects.create(
                 user=request.profile,
@@ -1128,8 +1249,9 @@ class ProblemSolutionCodesRunView(ProblemManagerMixin, View):
             SubmissionSource.objects.create(submission=sub, source=sc.source_code)
             sc.last_submission = sub
             sc.save(update_fields=["last_submission"])
-            sub.judge(rejudge=False, batch_rejudge=True)
-            submission_ids.append(sub.id)
+            submissions.append(sub)
+        judge_submissions(submissions, rejudge=False, batch_rejudge=True)
+        submission_ids = [sub.id for sub in submissions]
 
         return JsonResponse({"status": "ok", "submission_ids": submission_ids})
 
@@ -18,6 +18,8 @@ __all__ = ["RankedSubmissions", "ContestRankedSubmission"]
 class RankedSubmissions(InfinitePaginationMixin, ProblemSubmissions):
     page_type = "best_submissions_list"
     dynamic_update = False
+    # Ordered by points rather than id, so cursors do not apply.
+    keyset_pagination = False
 
     def access_check(self, request):
         super().access_check(request)
@@ -10,12 +10,12 @@ from judge.jinja2.gravatar import gravatar
 from judge.models import (
     Contest,
     Organization,
-    Problem,
     Profile,
     Quiz,
     QuizQuestion,
     CourseLesson,
 )
+from judge.utils.problem_visibility import visible_problem_queryset
 
 
 def _parse_question_id_search(term):
@@ -110,7 +110,7 @@ class OrganizationSelect2View(Select2View):
 class ProblemSelect2View(Select2View):
     def get_queryset(self):
         return (
-            Problem.get_visible_problems(self.request.user)
+            visible_problem_queryset(self.request.user)
             .filter(Q(code__icontains=self.term) | Q(name__icontains=self.term))
             .distinct()
         )
@@ -0,0 +1,19 @@
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+
+from judge.sitemap import SITEMAP_INDEX, segment_path
+
+
+def _serve(name, content_type):
+    # Generated by the generate_sitemaps task; nothing is rendered here
+    if not default_storage.exists(name):
+        raise Http404()
+    return FileResponse(default_storage.open(name), content_type=content_type)
+
+
+def sitemap_index(request):
+    return _serve(SITEMAP_INDEX, "application/xml")
+
+
+def sitemap_segment(request, section, number):
+    return _serve(segment_path(section, int(number)), "application/gzip")
@@ -1,18 +1,16 @@
+from collections import defaultdict
 from datetime import datetime
 from itertools import chain, repeat
 from operator import itemgetter
 
 from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import connection
-from django.db.models import Case, Count, FloatField, IntegerField, Value, When
-from django.db.models.expressions import CombinedExpression
 from django.http import Http404
 from django.utils.html import json_script
 from django.utils.translation import gettext as _
 from django.views.generic import TemplateView
 
-from judge.models import Language, Submission
+from judge.models import Language, SiteDailyStat, Submission, SubmissionResultCount
 from judge.utils.stats import (
     chart_colors,
     get_bar_chart,
@@ -30,23 +28,42 @@ class StatViewBase(TemplateView):
 
 class StatLanguage(StatViewBase):
     template_name = "stats/language.html"
-    ac_count = Count(
-        Case(When(submission__result="AC", then=Value(1)), output_field=IntegerField())
-    )
 
     def repeat_chain(iterable):
         return chain.from_iterable(repeat(iterable))
 
-    def language_data(
-        self, language_count=Language.objects.annotate(count=Count("submission"))
-    ):
-        languages = (
-            language_count.filter(count__gt=0)
-            .values("key", "name", "count")
-            .order_by("-count")
+    def language_counts(self):
+        """
+        ``[{"name", "count", "ac"}]`` of every language with submissions,
+        read from the per-language result counts instead of the submissions.
+        """
+        if not hasattr(self, "_language_counts"):
+            counts = defaultdict(lambda: {"count": 0, "ac": 0})
+            rows = SubmissionResultCount.objects.filter(
+                scope=SubmissionResultCount.SCOPE_LANGUAGE, count__gt=0
+            ).values_list("object_id", "result", "count")
+            for language_id, result, count in rows:
+                counts[language_id]["count"] += count
+                if result == "AC":
+                    counts[language_id]["ac"] += count
+            names = dict(
+                Language.objects.filter(id__in=counts).values_list("id", "name")
+            )
+            self._language_counts = [
+                dict(name=names[language_id], **count)
+                for language_id, count in counts.items()
+                if language_id in names
+            ]
+        return self._language_counts
+
+    def language_data(self, key="count"):
+        languages = sorted(
+            (language for language in self.language_counts() if language[key] > 0),
+            key=itemgetter(key),
+            reverse=True,
         )
         num_languages = min(len(languages), settings.DMOJ_STATS_LANGUAGE_THRESHOLD)
-        other_count = sum(map(itemgetter("count"), languages[num_languages:]))
+        other_count = sum(map(itemgetter(key), languages[num_languages:]))
 
         return {
             "labels": list(map(itemgetter("name"), languages[:num_languages]))
@@ -56,23 +73,26 @@ class StatLanguage(StatViewBase):
                     "backgroundColor": chart_colors[:num_languages] + ["#FDB45C"],
                     "highlightBackgroundColor": highlight_colors[:num_languages]
                     + ["#FFC870"],
-                    "data": list(map(itemgetter("count"), languages[:num_languages]))
+                    "data": list(map(itemgetter(key), languages[:num_languages]))
                     + [other_count],
                 },
             ],
         }
 
     def ac_language_data(self):
-        return self.language_data(Language.objects.annotate(count=self.ac_count))
+        return self.language_data("ac")
 
     def status_data(self, statuses=None):
         if not statuses:
-            statuses = (
-                Submission.objects.values("result")
-                .annotate(count=Count("result"))
-                .values("result", "count")
-                .order_by("-count")
+            counts = SubmissionResultCount.get_counts(
+                SubmissionResultCount.SCOPE_LANGUAGE
             )
+            statuses = [
+                {"result": result, "count": count}
+                for result, count in sorted(
+                    counts.items(), key=itemgetter(1), reverse=True
+                )
+            ]
         data = []
         for status in statuses:
             res = status["result"]
@@ -84,19 +104,12 @@ class StatLanguage(StatViewBase):
         return get_pie_chart(data)
 
     def ac_rate(self):
-        rate = CombinedExpression(
-            self.ac_count / Count("submission"),
-            "*",
-            Value(100.0),
-            output_field=FloatField(),
-        )
-        data = (
-            Language.objects.annotate(total=Count("submission"), ac_rate=rate)
-            .filter(total__gt=0)
-            .order_by("total")
-            .values_list("name", "ac_rate")
-        )
-        return get_bar_chart(list(data))
+        languages = sorted(self.language_counts(), key=itemgetter("count"))
+        data = [
+            (language["name"], language["ac"] * 100.0 / language["count"])
+            for language in languages
+        ]
+        return get_bar_chart(data)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -148,15 +161,8 @@ def group_data_by_period(dates, data, period="1W"):
 class StatSite(StatViewBase):
     template_name = "stats/site.html"
 
-    def create_dataset(self, query, label):
-        labels = []
-        data = []
-        with connection.cursor() as cursor:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                data.append(row[0])
-                labels.append(row[1])
-
+    def create_dataset(self, metric, label):
+        labels, data = SiteDailyStat.get_series(metric)
         labels, data = group_data_by_period(labels, data, self.period)
 
         res = {
@@ -174,40 +180,22 @@ class StatSite(StatViewBase):
         return res
 
     def get_submissions(self):
-        query = """
-        SELECT COUNT(*), CAST(date AS Date) as day from judge_submission GROUP BY day; 
-        """
-        return self.create_dataset(query, _("Submissions"))
+        return self.create_dataset(SiteDailyStat.SUBMISSIONS, _("Submissions"))
 
     def get_comments(self):
-        query = """
-        SELECT COUNT(*), CAST(time AS Date) as day from judge_comment GROUP BY day; 
-        """
-        return self.create_dataset(query, _("Comments"))
+        return self.create_dataset(SiteDailyStat.COMMENTS, _("Comments"))
 
     def get_new_users(self):
-        query = """
-        SELECT COUNT(*), CAST(date_joined AS Date) as day from auth_user GROUP BY day; 
-        """
-        return self.create_dataset(query, _("New users"))
+        return self.create_dataset(SiteDailyStat.NEW_USERS, _("New users"))
 
     def get_chat_messages(self):
-        query = """
-        SELECT COUNT(*), CAST(time AS Date) as day from chat_box_message GROUP BY day; 
-        """
-        return self.create_dataset(query, _("Chat messages"))
+        return self.create_dataset(SiteDailyStat.CHAT_MESSAGES, _("Chat messages"))
 
     def get_contests(self):
-        query = """
-        SELECT COUNT(*), CAST(start_time AS Date) as day from judge_contest GROUP BY day; 
-        """
-        return self.create_dataset(query, _("Contests"))
+        return self.create_dataset(SiteDailyStat.CONTESTS, _("Contests"))
 
     def get_groups(self):
-        query = """
-        SELECT COUNT(*), CAST(creation_date AS Date) as day from judge_organization GROUP BY day; 
-        """
-        return self.create_dataset(query, _("Groups"))
+        return self.create_dataset(SiteDailyStat.GROUPS, _("Groups"))
 
     def get(self, request, *args, **kwargs):
         self.period = request.GET.get("period", "1W")
@@ -1,5 +1,6 @@
 from collections import defaultdict
-from operator import attrgetter
+from functools import reduce
+from operator import attrgetter, or_
 
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -42,6 +43,7 @@ from judge.models import (
     ProblemTranslation,
     Profile,
     Submission,
+    SubmissionResultCount,
 )
 from judge.models.contest import get_contest_problem_ids
 from judge.caching import cache_wrapper
@@ -54,11 +56,17 @@ from judge.utils.hidden_results import (
     is_problem_result_hidden,
     mark_hidden_result_submissions,
 )
+from judge.utils.problem_visibility import visible_problem_filter
 from judge.utils.problems import _get_result_data
-from judge.utils.raw_sql import join_sql_subquery, use_straight_join
+from judge.utils.raw_sql import use_straight_join
 from judge.utils.submission_results import submission_result_url
 from judge.utils.views import DiggPaginatorMixin, paginate_query_context
 from judge.utils.infinite_paginator import InfinitePaginationMixin
+from judge.utils.keyset_paginator import (
+    KeysetPaginationMixin,
+    add_keyset_cursors,
+    get_cached_count,
+)
 from judge.utils.views import TitleMixin
 from judge.utils.timedelta import nice_repr
 from judge.views.contests import ContestMixin
@@ -112,6 +120,7 @@ class SubmissionDetailBase(LoginRequiredMixin, TitleMixin, SubmissionMixin, Deta
             "contest_object",
             "source",
             "contest__problem",
+            "test_case_pack",
         )
         .prefetch_related("test_cases")
         .defer("problem__description", "user__about", "contest_object__description")
@@ -159,7 +168,7 @@ def get_hidden_subtasks(request, submission):
         try:
             if submission.contest.is_result_hidden:
                 all_batches = {
-                    c.batch for c in submission.test_cases.all() if c.batch is not None
+                    c.batch for c in submission.test_case_results if c.batch is not None
                 }
                 return all_batches if all_batches else {-1}
         except Exception:
@@ -192,7 +201,7 @@ def make_batch(batch, cases, batch_scoring=None, include_cases=True):
 
 
 def group_test_cases(submission, hidden_subtasks, include_cases=True):
-    cases = [c for c in submission.test_cases.all() if c.batch not in hidden_subtasks]
+    cases = [c for c in submission.test_case_results if c.batch not in hidden_subtasks]
 
     # Map batch number (1-indexed) → batch_scoring, for display hints.
     batch_scorings = {
@@ -340,7 +349,9 @@ def abort_submission(request, submission):
     return HttpResponseRedirect(reverse("submission_status", args=(submission.id,)))
 
 
-class SubmissionsListBase(DiggPaginatorMixin, TitleMixin, ListView):
+class SubmissionsListBase(
+    KeysetPaginationMixin, DiggPaginatorMixin, TitleMixin, ListView
+):
     model = Submission
     paginate_by = 50
     limit_anonymous_pages = True
@@ -361,7 +372,56 @@ class SubmissionsListBase(DiggPaginatorMixin, TitleMixin, ListView):
 
     def _get_result_data(self):
         return get_result_data_with_hidden(
-            self.get_queryset().order_by(), self.request.user
+            self.get_queryset().order_by(),
+            self.request.user,
+            counts=self.get_counted_results(),
+        )
+
+    def get_result_counter(self):
+        """
+        Return ``(scope, object_id, excluded)`` if this list holds every
+        submission of one SubmissionResultCount scope, except those matching
+        the Q ``excluded`` (or None), so its chart can use the counters.
+        """
+        return None
+
+    def get_counted_results(self):
+        if self.selected_languages or self.selected_statuses:
+            return None
+        if self.organization or self.request.organization:
+            return None
+        counter = self.get_result_counter()
+        if counter is None:
+            return None
+        scope, object_id, excluded = counter
+        counts = SubmissionResultCount.get_counts(scope, [object_id])
+        if excluded is not None:
+            field = SubmissionResultCount.SCOPE_FIELDS[scope]
+            counts = _subtract_result_counts(
+                counts,
+                _get_result_counts(
+                    Submission.objects.filter(excluded, **{field: object_id})
+                ),
+            )
+        return counts
+
+    def get_visible_contests(self):
+        # Contests whose submissions are listed for everyone.
+        return Contest.objects.filter(
+            Q(authors=self.request.profile)
+            | Q(curators=self.request.profile)
+            | Q(scoreboard_visibility=Contest.SCOREBOARD_VISIBLE)
+            | Q(end_time__lt=timezone.now())
+        ).distinct()
+
+    def get_hidden_contest_filter(self):
+        """Q matching the contest submissions left out of non-contest lists."""
+        if self.request.user.has_perm("judge.see_private_contest"):
+            return None
+        return (
+            Q(contest_object__isnull=False)
+            & ~Q(contest_object__in=self.get_visible_contests())
+            & ~Q(user=self.request.profile)
         )
 
     def access_check(self, request):
@@ -464,15 +524,9 @@ class SubmissionsListBase(DiggPaginatorMixin, TitleMixin, ListView):
             # the join would be far too messy
             if not self.request.user.has_perm("judge.see_private_contest"):
                 # Show submissions for any contest you can edit or visible scoreboard
-                contest_queryset = Contest.objects.filter(
-                    Q(authors=self.request.profile)
-                    | Q(curators=self.request.profile)
-                    | Q(scoreboard_visibility=Contest.SCOREBOARD_VISIBLE)
-                    | Q(end_time__lt=timezone.now())
-                ).distinct()
                 queryset = queryset.filter(
                     Q(user=self.request.profile)
-                    | Q(contest_object__in=contest_queryset)
+                    | Q(contest_object__in=self.get_visible_contests())
                     | Q(contest_object__isnull=True)
                 )
 
@@ -486,21 +540,16 @@ class SubmissionsListBase(DiggPaginatorMixin, TitleMixin, ListView):
     def get_queryset(self):
         queryset = self._get_entire_queryset()
         if not self.in_contest:
-            join_sql_subquery(
-                queryset,
-                subquery=str(
-                    Problem.get_visible_problems(self.request.user)
-                    .distinct()
-                    .only("id")
-                    .query
-                ),
-                params=[],
-                join_fields=[("problem_id", "id")],
-                alias="visible_problems",
-                related_model=Problem,
-            )
+            visible_filter = visible_problem_filter(self.request.user)
+            if visible_filter is not None:
+                queryset = queryset.filter(visible_filter)
         return queryset
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        # The total only drives the page links, so a few minutes stale is fine.
+        kwargs.setdefault("count", get_cached_count(queryset))
+        return super().get_paginator(queryset, per_page, **kwargs)
+
     def get_my_submissions_page(self):
         return None
 
@@ -573,6 +622,8 @@ class SubmissionsListBase(DiggPaginatorMixin, TitleMixin, ListView):
         )
         # Add pagination context for parameter-based pagination
         context.update(paginate_query_context(self.request))
+        if self.keyset_pagination:
+            add_keyset_cursors(context["page_obj"])
 
         # Prefetch data
         Profile.get_cached_instances(*[s.user_id for s in context["submissions"]])
@@ -671,6 +722,21 @@ class AllUserSubmissions(ConditionalUserTabMixin, UserMixin, GeneralSubmissions)
             .filter(user_id=self.profile.id)
         )
 
+    def get_result_counter(self):
+        excluded = []
+        visible_filter = visible_problem_filter(self.request.user)
+        if visible_filter is not None:
+            excluded.append(~visible_filter)
+        if self.profile != self.request.profile:
+            hidden_contest_filter = self.get_hidden_contest_filter()
+            if hidden_contest_filter is not None:
+                excluded.append(hidden_contest_filter)
+        return (
+            SubmissionResultCount.SCOPE_USER,
+            self.profile.id,
+            reduce(or_, excluded) if excluded else None,
+        )
+
     def get_title(self):
         if self.request.user.is_authenticated and self.request.profile == self.profile:
             return _("All my submissions")
@@ -731,6 +797,15 @@ class ProblemSubmissionsBase(SubmissionsListBase):
             .filter(problem_id=self.problem.id)
         )
 
+    def get_result_counter(self):
+        if self.in_contest:
+            return None
+        return (
+            SubmissionResultCount.SCOPE_PROBLEM,
+            self.problem.id,
+            self.get_hidden_contest_filter(),
+        )
+
     def get_title(self):
         return _("All submissions for %s") % self.problem_name
 
@@ -829,6 +904,9 @@ class UserProblemSubmissions(ConditionalUserTabMixin, UserMixin, ProblemSubmissi
             .filter(user_id=self.profile.id)
         )
 
+    def get_result_counter(self):
+        return None
+
     def get_title(self):
         if self.is_own:
             return _("My submissions for %(problem)s") % {"problem": self.problem_name}
@@ -1037,6 +1115,14 @@ class ContestSubmissions(
             queryset = queryset.filter(problem=self.selected_problem)
         return queryset
 
+    def get_result_counter(self):
+        # Editors see every submission of the contest, frozen ones included.
+        if self.user_filter == "me" or self.selected_problem:
+            return None
+        if not self.contest.is_editable_by(self.request.user):
+            return None
+        return SubmissionResultCount.SCOPE_CONTEST, self.contest.id, None
+
     def get_context_data(self, **kwargs):
         self.object = self.contest
         context = super(ContestSubmissions, self).get_context_data(**kwargs)
@@ -1292,12 +1378,12 @@ def _get_global_hidden_submission_queryset(queryset, editable_contest_ids):
     return queryset
 
 
-def _get_visible_result_data(queryset, hidden_queryset):
+def _get_visible_result_data(queryset, hidden_queryset, counts=None):
+    if counts is None:
+        counts = _get_result_counts(queryset)
     hidden_counts = _get_result_counts(hidden_queryset)
     return (
-        _get_result_data(
-            _subtract_result_counts(_get_result_counts(queryset), hidden_counts)
-        ),
+        _get_result_data(_subtract_result_counts(counts, hidden_counts)),
         sum(hidden_counts.values()),
     )
 
@@ -1349,7 +1435,12 @@ def _get_global_submission_result_data(statuses, languages, editable_contest_ids
             result = _get_empty_result_data()
         hidden_count = _get_hidden_count(hidden_queryset) if show_hidden else 0
     else:
-        result, hidden_count = _get_visible_result_data(queryset, hidden_queryset)
+        counts = SubmissionResultCount.get_counts(
+            SubmissionResultCount.SCOPE_LANGUAGE, languages or None
+        )
+        result, hidden_count = _get_visible_result_data(
+            queryset, hidden_queryset, counts
+        )
 
     if hidden_count:
         result["categories"].append(
@@ -0,0 +1 @@
+int main() { return 1; /* changed */ }
\ No newline at end of file